@@ -37,6 +37,7 @@ from .stub_functions import (
 )
 from .flowcontrol import range, unroll, If, Elif, Else
 from .torchplutin import OpExec
+from .autotune import autotune
 from .shortcuts import matmul
 
 from . import globvars 
@@ -48,6 +48,7 @@ from .stub_functions.micro import (
 from .stub_functions import micro
 from .flowcontrol import range, unroll, If, Elif, Else
 from .torchplutin import OpExec
+from .autotune import autotune
 from .shortcuts import matmul
 
 from . import globvars 
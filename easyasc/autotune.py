@@ -0,0 +1,294 @@
+import inspect
+import itertools
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import globvars
+from .kernelbase import manifest
+
+if TYPE_CHECKING:
+    from .kernelbase.kernelbase import KernelBase
+    from .simulator.timing import CostTable
+
+
+# Bump when the meaning of a cached result changes so older entries stop matching.
+_AUTOTUNE_FORMAT = 1
+_SIM_LOGGER = logging.getLogger("easyasc.simulator.cube")
+
+# Worker-side state. Populated right before the process pool forks, so workers inherit the
+# kernel, its module globals and the torch arguments without pickling them.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+class TuneResult:
+    """One autotune candidate: simulated kernel cycles, or the reason it was rejected."""
+
+    __slots__ = ("config", "cycles", "reason", "failed")
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        cycles: Optional[int] = None,
+        reason: Optional[str] = None,
+        failed: bool = False,
+    ) -> None:
+        self.config = config
+        self.cycles = cycles
+        self.reason = reason
+        # Rejected because tracing or simulation raised rather than by a capacity check; never cached.
+        self.failed = failed
+
+    @property
+    def ok(self) -> bool:
+        return self.cycles is not None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"config": self.config, "cycles": self.cycles, "reason": self.reason}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "TuneResult":
+        return cls(data["config"], data.get("cycles"), data.get("reason"))
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"TuneResult({self.config}, cycles={self.cycles})"
+        return f"TuneResult({self.config}, rejected={self.reason!r})"
+
+
+@contextmanager
+def _apply_config(namespace: Dict[str, Any], config: Dict[str, Any]) -> Iterator[None]:
+    saved = {name: namespace[name] for name in config}
+    namespace.update(config)
+    try:
+        yield
+    finally:
+        namespace.update(saved)
+
+
+def _capacity_error(instructions: List[Any]) -> Optional[str]:
+    from .parser.asc import usage_by_segment
+
+    cap_map = {
+        "L1": globvars.l1_cap,
+        "L0A": globvars.l0a_cap,
+        "L0B": globvars.l0b_cap,
+        "L0C": globvars.l0c_cap,
+        "UB": globvars.ub_cap,
+    }
+    for segment_idx, usage in enumerate(usage_by_segment(instructions)):
+        for position, used in usage.items():
+            cap = cap_map.get(position, None)
+            if cap is not None and used > cap:
+                return f"{position} needs {used:g} KB > {cap} KB (reset_cache segment {segment_idx})"
+    return None
+
+
+def _tune_worker(index: int) -> TuneResult:
+    import torch
+
+    torch.set_num_threads(1)
+    tuner: "Autotuner" = _WORKER_STATE["tuner"]
+    return tuner._evaluate(_WORKER_STATE["configs"][index], _WORKER_STATE["args"])
+
+
+class Autotuner:
+    """
+    Sweep module-level constants of a kernel (tile sizes, split factors, ...) through the simulator.
+
+    `space` maps names of globals read by the kernel function to the values to try. Every
+    combination is traced, rejected if a reset_cache segment exceeds L1/L0/UB capacity, and
+    otherwise scored by the simulated kernel cycles of the timing model.
+    """
+
+    def __init__(
+        self,
+        kernel: "KernelBase",
+        space: Dict[str, Sequence[Any]],
+        cost_table: Optional["CostTable"] = None,
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str] = ".easyasc_autotune",
+    ) -> None:
+        from .kernelbase.kernelbase import KernelBase
+        from .simulator.timing import CostTable
+
+        if not isinstance(kernel, KernelBase):
+            raise TypeError(f"kernel must be KernelBase, got: {type(kernel)}")
+        if not isinstance(space, dict) or not space:
+            raise ValueError("space must be a non-empty dict of name -> candidate values")
+        namespace = kernel.func.__globals__
+        for name, values in space.items():
+            if not isinstance(name, str):
+                raise TypeError(f"space keys must be str, got: {type(name)}")
+            if name not in namespace:
+                raise ValueError(f"{name} is not a module-level name of kernel {kernel.name}")
+            if isinstance(values, (str, bytes)) or not isinstance(values, Sequence) or not values:
+                raise ValueError(f"space[{name!r}] must be a non-empty sequence of values")
+        if cost_table is not None and not isinstance(cost_table, CostTable):
+            raise TypeError(f"cost_table must be CostTable or None, got: {type(cost_table)}")
+        if max_workers is not None:
+            if isinstance(max_workers, bool) or not isinstance(max_workers, int):
+                raise TypeError(f"max_workers must be int or None, got: {type(max_workers)}")
+            if max_workers < 1:
+                raise ValueError(f"max_workers must be >= 1, got: {max_workers}")
+        if cache_dir is not None and not isinstance(cache_dir, str):
+            raise TypeError(f"cache_dir must be str or None, got: {type(cache_dir)}")
+        self.kernel = kernel
+        self.space = {name: list(values) for name, values in space.items()}
+        self.cost_table = cost_table if cost_table is not None else CostTable()
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.results: List[TuneResult] = []
+        self._namespace = namespace
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        names = list(self.space)
+        return [dict(zip(names, values)) for values in itertools.product(*self.space.values())]
+
+    def _kernel_source(self) -> str:
+        try:
+            return inspect.getsource(self.kernel.func)
+        except (OSError, TypeError):
+            return self.kernel.name
+
+    def _cache_key(self, config: Dict[str, Any], args: Tuple[Any, ...]) -> str:
+        arg_sig: List[Any] = []
+        for arg in args:
+            shape = getattr(arg, "shape", None)
+            if shape is not None:
+                arg_sig.append([list(shape), str(getattr(arg, "dtype", None))])
+            else:
+                arg_sig.append(arg)
+        return manifest.hash_parts(
+            [
+                f"autotune{_AUTOTUNE_FORMAT}",
+                # Tracer, parser and simulator sources: a changed timing model re-scores every candidate.
+                manifest.source_digest(os.path.dirname(os.path.abspath(__file__))),
+                self.kernel.name,
+                self._kernel_source(),
+                str(globvars.device_type),
+                [globvars.l1_cap, globvars.l0a_cap, globvars.l0b_cap, globvars.l0c_cap, globvars.ub_cap],
+                str(globvars.plan_local_memory),
+                str(globvars.eliminate_redundant_sync),
+                repr(self.cost_table),
+                arg_sig,
+                sorted(config.items()),
+            ]
+        )
+
+    def _load(self, key: str) -> Optional[TuneResult]:
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return TuneResult.from_json(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _store(self, key: str, result: TuneResult) -> None:
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result.to_json(), f, default=str)
+        os.replace(tmp_path, path)
+
+    def _evaluate(self, config: Dict[str, Any], args: Tuple[Any, ...]) -> TuneResult:
+        from .torchplutin import OpExec
+
+        binder = OpExec(self.kernel, simulator=True)
+        log_level = _SIM_LOGGER.level
+        with _apply_config(self._namespace, config):
+            try:
+                _, gm_tensors, scalar_vars = binder._bind_args(args)
+                self.kernel._reset_trace()
+                self.kernel(*(gm_tensors + scalar_vars))
+                reason = _capacity_error(self.kernel.instructions)
+                if reason is not None:
+                    return TuneResult(config, reason=reason)
+                # Per-candidate timing reports would flood the log; the ranking is the output.
+                _SIM_LOGGER.setLevel(logging.WARNING)
+                report = self.kernel.run_sim(profile=True, cost_table=self.cost_table)
+            except ImportError:
+                raise
+            except Exception as exc:
+                # Candidates that fail to trace or simulate (shape mismatch, memory overflow) are rejected.
+                globvars.active_kernel = None
+                return TuneResult(config, reason=f"{type(exc).__name__}: {exc}", failed=True)
+            finally:
+                _SIM_LOGGER.setLevel(log_level)
+        if report is None:
+            return TuneResult(config, reason="simulator returned no timing report", failed=True)
+        return TuneResult(config, cycles=int(report.total_cycles))
+
+    def _run_parallel(self, configs: List[Dict[str, Any]], args: Tuple[Any, ...]) -> Optional[List[TuneResult]]:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            _SIM_LOGGER.warning("[autotune] parallel candidates require the 'fork' start method; running serially")
+            return None
+        _WORKER_STATE.update(tuner=self, configs=configs, args=args)
+        try:
+            workers = min(self.max_workers or 1, len(configs))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                futures = [pool.submit(_tune_worker, idx) for idx in range(len(configs))]
+                return [future.result() for future in futures]
+        finally:
+            _WORKER_STATE.clear()
+
+    def run(self, *args: Any) -> List[TuneResult]:
+        """Evaluate every candidate for `args` (as passed to OpExec); best first, rejected last."""
+        configs = self.candidates()
+        keys = [self._cache_key(config, args) for config in configs]
+        results: List[Optional[TuneResult]] = [self._load(key) for key in keys]
+        pending = [idx for idx, result in enumerate(results) if result is None]
+        if pending:
+            todo = [configs[idx] for idx in pending]
+            computed: Optional[List[TuneResult]] = None
+            if self.max_workers is not None and self.max_workers > 1 and len(todo) > 1:
+                computed = self._run_parallel(todo, args)
+            if computed is None:
+                computed = [self._evaluate(config, args) for config in todo]
+            for idx, result in zip(pending, computed):
+                # Workers return copies; keep the candidate values as given in `space`.
+                result.config = configs[idx]
+                results[idx] = result
+                if not result.failed:
+                    self._store(keys[idx], result)
+        # Ties keep the order of `space`, so the first listed value wins.
+        self.results = sorted(
+            (result for result in results if result is not None),
+            key=lambda result: (not result.ok, result.cycles if result.ok else 0),
+        )
+        return self.results
+
+    def best(self, *args: Any) -> Dict[str, Any]:
+        results = self.run(*args)
+        if not results or not results[0].ok:
+            reasons = "; ".join(f"{result.config}: {result.reason}" for result in results)
+            raise RuntimeError(f"no autotune candidate of kernel {self.kernel.name} is feasible: {reasons}")
+        return dict(results[0].config)
+
+
+def autotune(
+    kernel: "KernelBase",
+    space: Dict[str, Sequence[Any]],
+    *args: Any,
+    cost_table: Optional["CostTable"] = None,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str] = ".easyasc_autotune",
+) -> Dict[str, Any]:
+    """Return the fastest feasible configuration of `space` for `args`; globals are left unchanged."""
+    tuner = Autotuner(kernel, space, cost_table=cost_table, max_workers=max_workers, cache_dir=cache_dir)
+    return tuner.best(*args)
@@ -17,3 +17,23 @@ l0a_cap = 64
 l0b_cap = 64 
 l0c_cap = 128
 ub_cap = 192
+
+# Optional directory for translated-code cache entries shared across processes (None: in-memory only).
+translation_cache_dir: Optional[str] = None
+
+# Fall back to sympy for expressions outside the integer polynomial fast path (comparisons, logic).
+simplify_with_sympy: bool = True
+
+# Place local buffers by live range (parser/asc_memplan.py) instead of bump allocation after reset_cache.
+# Reused bytes rely on the kernel's syncs ordering the last reader before the next writer.
+plan_local_memory: bool = False
+
+# Drop auto-sync event pairs whose ordering other events already imply (parser/asc_autosync.py).
+eliminate_redundant_sync: bool = True
+
+# Let simulator lanes run data-independent tile loops as batched torch ops (simulator/loopbatch.py).
+# Loops are always run iteration by iteration while a timing model is attached.
+sim_batch_loops: bool = True
+
+# Keep logical ND copies of cube local tiles so mmad/FIX can skip NZ decoding (simulator/layout.py).
+sim_layout_cache: bool = True
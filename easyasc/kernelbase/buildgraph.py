@@ -0,0 +1,126 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Threads suffice: the steps are file I/O (untar, copies, writes) or wait on the GIL anyway.
+_DEFAULT_WORKERS = 4
+
+
+class BuildStep:
+    """One node of a BuildGraph: `func()` runs once all `deps` are done."""
+
+    __slots__ = ("name", "func", "deps", "skip", "status", "elapsed", "result")
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        deps: Sequence[str],
+        skip: Optional[Callable[[], bool]],
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        # Evaluated when the step becomes ready, so it can read results of its dependencies.
+        self.skip = skip
+        self.status = "pending"
+        self.elapsed = 0.0
+        self.result: Any = None
+
+    def __repr__(self) -> str:
+        return f"BuildStep({self.name!r}, status={self.status!r}, elapsed={self.elapsed:.3f}s)"
+
+
+class BuildGraph:
+    """
+    Dependency graph of build steps run on a thread pool.
+
+    Steps must be added after their dependencies, so the graph is acyclic by construction.
+    A step whose `skip()` returns True (its outputs are up to date, e.g. a matching content
+    hash) is marked skipped without running and still releases its dependents.
+    """
+
+    def __init__(self, label: str, max_workers: Optional[int] = None) -> None:
+        if max_workers is not None:
+            if isinstance(max_workers, bool) or not isinstance(max_workers, int):
+                raise TypeError(f"max_workers must be int or None, got: {type(max_workers)}")
+            if max_workers < 1:
+                raise ValueError(f"max_workers must be >= 1, got: {max_workers}")
+        self.label = label
+        self.max_workers = max_workers if max_workers is not None else _DEFAULT_WORKERS
+        self.steps: Dict[str, BuildStep] = {}
+        self.elapsed = 0.0
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        deps: Sequence[str] = (),
+        skip: Optional[Callable[[], bool]] = None,
+    ) -> BuildStep:
+        if name in self.steps:
+            raise ValueError(f"duplicate build step: {name}")
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"build step {name} depends on unknown step {dep}")
+        step = BuildStep(name, func, deps, skip)
+        self.steps[name] = step
+        return step
+
+    def result(self, name: str) -> Any:
+        return self.steps[name].result
+
+    @staticmethod
+    def _run_step(step: BuildStep) -> None:
+        start = time.perf_counter()
+        try:
+            step.result = step.func()
+        finally:
+            step.elapsed = time.perf_counter() - start
+
+    def run(self) -> None:
+        """Run every step; the first failure stops scheduling and is re-raised once running steps end."""
+        start = time.perf_counter()
+        pending: List[BuildStep] = list(self.steps.values())
+        running: Dict[Future, BuildStep] = {}
+        error: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                released = error is None
+                while released:
+                    # Skipped steps release their dependents right away, so rescan until stable.
+                    released = False
+                    for step in list(pending):
+                        if any(self.steps[dep].status not in ("done", "skipped") for dep in step.deps):
+                            continue
+                        pending.remove(step)
+                        if step.skip is not None and step.skip():
+                            step.status = "skipped"
+                            released = True
+                            continue
+                        step.status = "running"
+                        running[pool.submit(self._run_step, step)] = step
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    exc = future.exception()
+                    if exc is not None:
+                        step.status = "failed"
+                        if error is None:
+                            error = exc
+                    else:
+                        step.status = "done"
+        self.elapsed = time.perf_counter() - start
+        if error is not None:
+            raise error
+
+    def report(self) -> str:
+        parts = []
+        for step in self.steps.values():
+            if step.status == "done":
+                parts.append(f"{step.name} {step.elapsed * 1000:.1f} ms")
+            else:
+                parts.append(f"{step.name} {step.status}")
+        return f"[easyasc] {self.label}: build steps: {', '.join(parts)} (wall {self.elapsed * 1000:.1f} ms)"
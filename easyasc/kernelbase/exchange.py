@@ -0,0 +1,198 @@
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Shared layout with resources/exchange.h; bump EXCHANGE_VERSION on any change.
+EXCHANGE_MAGIC = b"EASYXCHG"
+EXCHANGE_VERSION = 1
+EXCHANGE_NAME = "exchange.bin"
+# Overrides the exchange file path for OpExec and the generated aclnn test (e.g. a file under /dev/shm).
+EXCHANGE_ENV = "EASYASC_EXCHANGE"
+MAX_DIMS = 8
+# Tensor regions start on page boundaries so each one can be mapped and DMA'd on its own.
+_ALIGN = 4096
+# magic, version, entry count, file size, reserved
+_HEADER = struct.Struct("<8sIIQQ")
+# name, dtype, set index, ndim, offset, nbytes, dims
+_ENTRY = struct.Struct(f"<64s16sIIQQ{MAX_DIMS}q")
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _fixed_str(value: str, size: int, label: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) >= size:
+        raise ValueError(f"{label} must be shorter than {size} bytes, got: {value!r}")
+    return data
+
+
+class ExchangeEntry:
+    """One tensor region of an exchange file."""
+
+    __slots__ = ("name", "dtype", "set_index", "shape", "offset", "nbytes")
+
+    def __init__(self, name: str, dtype: str, set_index: int, shape: Sequence[int], offset: int, nbytes: int) -> None:
+        self.name = name
+        self.dtype = dtype
+        self.set_index = set_index
+        self.shape = tuple(shape)
+        self.offset = offset
+        self.nbytes = nbytes
+
+    def __repr__(self) -> str:
+        return (
+            f"ExchangeEntry({self.name!r}, set={self.set_index}, dtype={self.dtype!r}, "
+            f"shape={self.shape}, offset={self.offset}, nbytes={self.nbytes})"
+        )
+
+
+class ExchangeFile:
+    """
+    Memory-mapped tensor exchange between OpExec and the generated aclnn test.
+
+    The file holds a header, an entry table (name, input-set index, dtype, shape, offset,
+    size) and page-aligned tensor regions. OpExec writes inputs straight into the mapping,
+    the test binary maps the same file and copies between the regions and the device, and
+    outputs are read back as views of the mapping. `create` replaces the file instead of
+    truncating it, so views of a previous run keep their data.
+    """
+
+    def __init__(self, path: str, mapping: mmap.mmap, entries: List[ExchangeEntry]) -> None:
+        self.path = path
+        self._mapping = mapping
+        self.entries = entries
+        self._by_key: Dict[Tuple[str, int], ExchangeEntry] = {
+            (entry.name, entry.set_index): entry for entry in entries
+        }
+
+    @classmethod
+    def create(cls, path: str, specs: Sequence[Tuple[str, int, str, Sequence[int], int]]) -> "ExchangeFile":
+        """`specs` are (name, set_index, dtype, shape, nbytes) per tensor region."""
+        if not isinstance(path, str):
+            raise TypeError(f"path must be str, got: {type(path)}")
+        table_end = _HEADER.size + _ENTRY.size * len(specs)
+        offset = _align(table_end)
+        entries: List[ExchangeEntry] = []
+        seen = set()
+        for name, set_index, dtype, shape, nbytes in specs:
+            if len(shape) > MAX_DIMS:
+                raise ValueError(f"exchange tensor {name} has {len(shape)} dims, at most {MAX_DIMS} are supported")
+            if (name, set_index) in seen:
+                raise ValueError(f"duplicate exchange entry: {name} (set {set_index})")
+            seen.add((name, set_index))
+            entries.append(ExchangeEntry(name, dtype, set_index, shape, offset, nbytes))
+            offset = _align(offset + nbytes)
+        size = max(offset, _ALIGN)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            # Unlink rather than truncate: tensors still viewing the old mapping keep their pages.
+            os.remove(path)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            mapping = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mapping, 0, EXCHANGE_MAGIC, EXCHANGE_VERSION, len(entries), size, 0)
+        for idx, entry in enumerate(entries):
+            dims = list(entry.shape) + [0] * (MAX_DIMS - len(entry.shape))
+            _ENTRY.pack_into(
+                mapping,
+                _HEADER.size + idx * _ENTRY.size,
+                _fixed_str(entry.name, 64, "exchange tensor name"),
+                _fixed_str(entry.dtype, 16, "exchange dtype"),
+                entry.set_index,
+                len(entry.shape),
+                entry.offset,
+                entry.nbytes,
+                *dims,
+            )
+        return cls(path, mapping, entries)
+
+    @classmethod
+    def open(cls, path: str) -> "ExchangeFile":
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"exchange file not found: {path}")
+        fd = os.open(path, os.O_RDWR)
+        try:
+            size = os.fstat(fd).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"exchange file is truncated: {path}")
+            mapping = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        magic, version, count, total, _ = _HEADER.unpack_from(mapping, 0)
+        if magic != EXCHANGE_MAGIC or version != EXCHANGE_VERSION:
+            mapping.close()
+            raise ValueError(f"{path} is not an exchange file of version {EXCHANGE_VERSION}")
+        if total > size or _HEADER.size + count * _ENTRY.size > size:
+            mapping.close()
+            raise ValueError(f"exchange file is truncated: {path}")
+        entries: List[ExchangeEntry] = []
+        for idx in range(count):
+            name, dtype, set_index, ndim, offset, nbytes, *dims = _ENTRY.unpack_from(
+                mapping, _HEADER.size + idx * _ENTRY.size
+            )
+            entries.append(
+                ExchangeEntry(
+                    name.rstrip(b"\0").decode("utf-8"),
+                    dtype.rstrip(b"\0").decode("utf-8"),
+                    set_index,
+                    dims[:ndim],
+                    offset,
+                    nbytes,
+                )
+            )
+        return cls(path, mapping, entries)
+
+    def entry(self, name: str, set_index: int = 0) -> ExchangeEntry:
+        entry = self._by_key.get((name, set_index), None)
+        if entry is None:
+            raise KeyError(f"exchange file {self.path} has no tensor {name!r} for set {set_index}")
+        return entry
+
+    def buffer(self, name: str, set_index: int = 0) -> memoryview:
+        """Writable view of one tensor region; no bytes are copied."""
+        entry = self.entry(name, set_index)
+        return memoryview(self._mapping)[entry.offset : entry.offset + entry.nbytes]
+
+    def write_tensor(self, name: str, set_index: int, tensor: Any) -> None:
+        """Copy a torch tensor into its region (the only copy on the way to the device)."""
+        import torch
+
+        entry = self.entry(name, set_index)
+        src = tensor.detach().cpu().contiguous().view(torch.uint8).reshape(-1)
+        if src.numel() != entry.nbytes:
+            raise ValueError(f"exchange tensor {name} holds {entry.nbytes} bytes, got: {src.numel()}")
+        if entry.nbytes:
+            dst = torch.frombuffer(self._mapping, dtype=torch.uint8, count=entry.nbytes, offset=entry.offset)
+            dst.copy_(src)
+
+    def tensor(self, name: str, set_index: int, dtype: Any) -> Any:
+        """torch view of a region; it shares memory with the mapping and keeps it alive."""
+        import torch
+
+        entry = self.entry(name, set_index)
+        if entry.nbytes == 0:
+            return torch.empty(entry.shape, dtype=dtype)
+        count = entry.nbytes // torch.empty((), dtype=dtype).element_size()
+        return torch.frombuffer(self._mapping, dtype=dtype, count=count, offset=entry.offset).view(*entry.shape)
+
+    def close(self) -> None:
+        try:
+            self._mapping.close()
+        except BufferError:
+            # Tensors returned by tensor() still view the mapping; it is released with them.
+            pass
+
+
+def exchange_path(test_dir: str) -> str:
+    override = os.getenv(EXCHANGE_ENV)
+    if override:
+        return override
+    return os.path.join(test_dir, EXCHANGE_NAME)
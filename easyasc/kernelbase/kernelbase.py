@@ -4,7 +4,9 @@ import os
 import platform
 import shutil
 import tarfile
-from typing import List, Optional, Set, Union, TYPE_CHECKING
+import types
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple, Union, TYPE_CHECKING
 
 from ..utils.instruction import Instruction
 from ..utils.Tensor import GMTensor, DBuff
@@ -13,9 +15,15 @@ from ..utils.mutex import CvMutex, VcMutex
 from ..utils.datatype import Datatype
 from ..utils.positions import Position
 from .. import globvars
+from . import manifest as build_manifest
 
 if TYPE_CHECKING:
     from ..micro.micromodule import MicroModule
+    from ..simulator.sanitizer import SanitizerFinding
+    from ..simulator.timing import CostTable, TimingReport
+
+# Traces kept per kernel; each holds an instruction stream and its argument objects.
+_TRACE_CACHE_SIZE = 8
 
 
 class KernelBase:
@@ -29,6 +37,10 @@ class KernelBase:
         self.used_micros: Set["MicroModule"] = set()
         self._last_bound_args = {}
         self._last_output_gmtensors = set()
+        # Findings of the last run_sim(sanitize=True).
+        self.sanitizer_findings: List["SanitizerFinding"] = []
+        # Recorded traces keyed by _trace_key(...), least recently used first.
+        self._trace_cache: "OrderedDict[Tuple[Any, ...], Tuple[Tuple[Any, ...], Any]]" = OrderedDict()
 
     def __call__(self, *args, **kwargs):
         def _collect_gmtensors(value, out):
@@ -46,15 +58,22 @@ class KernelBase:
 
         sig = inspect.signature(self.func)
         bound = sig.bind_partial(*args, **kwargs)
-        self._last_bound_args = dict(bound.arguments)
-        self._last_output_gmtensors = set()
-        self.workspace_shapes = []
-        self.used_micros = set()
         for param_name, value in bound.arguments.items():
             if isinstance(value, (GMTensor, Var)):
                 value.name = param_name
             else:
                 raise TypeError(f"kernel arguments must be GMTensor or Var, current {param_name} type: {type(value)}")
+        key = self._trace_key(bound.arguments)
+        cached = self._trace_cache.get(key) if key is not None else None
+        if cached is not None:
+            self._trace_cache.move_to_end(key)
+            return self._replay_trace(cached, bound.arguments)
+        self._last_bound_args = dict(bound.arguments)
+        self._last_output_gmtensors = set()
+        self.workspace_shapes = []
+        self.used_micros = set()
+        self.instructions = []
+        self.crosscore_mutex = []
         globvars.active_kernel = self
         globvars.tmp_idx = 0
         for value in bound.arguments.values():
@@ -102,9 +121,142 @@ class KernelBase:
             self.instructions.extend(tail_instructions)
         globvars.tmp_idx = 0
         globvars.active_kernel = None
+        if key is not None:
+            self._trace_cache[key] = (self._save_trace(), res)
+            while len(self._trace_cache) > _TRACE_CACHE_SIZE:
+                self._trace_cache.popitem(last=False)
+        return res
+
+    def _trace_key(self, arguments: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """
+        Signature of one call: GMTensor dtypes and shapes/views, Var dtypes, device_type, and
+        the scalar globals/closure values the kernel body reads (see _referenced_values()).
+
+        Int dims are baked into the trace, so they are part of the key; a dim that is one of
+        the Var arguments is keyed by that argument (its value only reaches the runtime).
+        Returns None (no caching) when a dim is neither or the body reads an unhashable value.
+        """
+        var_params = {id(value): name for name, value in arguments.items() if isinstance(value, Var)}
+
+        def _dim(dim: Any) -> Any:
+            if isinstance(dim, Var):
+                ref = var_params.get(id(dim), None)
+                if ref is None:
+                    raise TypeError("unkeyed Var dim")
+                return ("var", ref)
+            if isinstance(dim, bool) or not isinstance(dim, int):
+                raise TypeError("unkeyed dim")
+            return dim
+
+        parts: List[Any] = [str(globvars.device_type)]
+        first_seen: Dict[int, str] = {}
+        try:
+            parts.append(self._referenced_values())
+            for name, value in arguments.items():
+                if isinstance(value, GMTensor):
+                    # The same tensor passed twice traces differently from two distinct tensors.
+                    alias = first_seen.setdefault(id(value), name)
+                    parts.append(
+                        (
+                            name,
+                            alias,
+                            str(value.dtype),
+                            tuple(_dim(dim) for dim in value.shape),
+                            tuple(_dim(dim) for dim in value.offset),
+                            tuple(_dim(dim) for dim in value.span),
+                            tuple(_dim(dim) for dim in value.step),
+                        )
+                    )
+                else:
+                    parts.append((name, str(value.dtype)))
+        except TypeError:
+            return None
+        return tuple(parts)
+
+    def _referenced_values(self) -> Tuple[Any, ...]:
+        """
+        (name, type, value) of every scalar global and closure cell the kernel body reads, also
+        through helper functions of its module; a changed BLK must not replay the old trace.
+
+        Other hashable values (modules, classes, functions) are left out. Raises TypeError when
+        a read value is unhashable, since a change to it could not be seen.
+        """
+        module = getattr(self.func, "__module__", None)
+        values: Set[Tuple[str, str, Any]] = set()
+        seen: Set[int] = set()
+        pending: List[Any] = [self.func]
+        while pending:
+            fn = pending.pop()
+            code = getattr(fn, "__code__", None)
+            if id(fn) in seen or code is None:
+                continue
+            seen.add(id(fn))
+            if getattr(fn, "__wrapped__", None) is not None:
+                pending.append(fn.__wrapped__)
+            refs: List[Tuple[str, Any]] = []
+            codes = [code]
+            while codes:
+                current = codes.pop()
+                refs.extend((name, fn.__globals__[name]) for name in current.co_names if name in fn.__globals__)
+                codes.extend(const for const in current.co_consts if isinstance(const, types.CodeType))
+            for name, cell in zip(code.co_freevars, fn.__closure__ or ()):
+                try:
+                    refs.append((name, cell.cell_contents))
+                except ValueError:
+                    continue
+            for name, value in refs:
+                if isinstance(value, types.FunctionType):
+                    if value.__module__ == module:
+                        pending.append(value)
+                    continue
+                hash(value)
+                if value is None or isinstance(value, (bool, int, float, str)):
+                    values.add((name, type(value).__name__, value))
+        return tuple(sorted(values, key=repr))
+
+    def _replay_trace(self, cached: Tuple[Tuple[Any, ...], Any], arguments: Dict[str, Any]) -> Any:
+        # The recorded instructions reference the arguments of the traced call: hand them the
+        # new GM data and Var values instead of re-running the kernel body.
+        state, res = cached
+        self._load_trace(state)
+        for name, value in arguments.items():
+            recorded = self._last_bound_args.get(name, None)
+            if recorded is None or recorded is value:
+                continue
+            if isinstance(value, GMTensor):
+                recorded.data = value.data
+            else:
+                recorded.value = value.value
         return res
             
 
+    def _reset_trace(self) -> None:
+        # Drop the previous trace and the recorded ones, e.g. after the kernel's globals changed (autotune).
+        self.instructions = []
+        self.crosscore_mutex = []
+        self._trace_cache.clear()
+
+    def _save_trace(self) -> Tuple[Any, ...]:
+        return (
+            self.instructions,
+            self.crosscore_mutex,
+            self.workspace_shapes,
+            self.used_micros,
+            self._last_bound_args,
+            self._last_output_gmtensors,
+        )
+
+    def _load_trace(self, state: Tuple[Any, ...]) -> None:
+        # Swap a saved trace back in without re-running the kernel function (OpExec.run_batch).
+        (
+            self.instructions,
+            self.crosscore_mutex,
+            self.workspace_shapes,
+            self.used_micros,
+            self._last_bound_args,
+            self._last_output_gmtensors,
+        ) = state
+
     def print_instructions(self):
         print(f"Kernel {self.name}:")
         if not self.instructions:
@@ -121,11 +273,14 @@ class KernelBase:
         with open(f"{path}_vec.h", "w") as f:
             f.write(vec_code)
 
-    def dump_kernel(self, path: str) -> None:
+    def dump_kernel(self, path: str, split_code: Optional[Tuple[str, str]] = None, out_dir: str = ".") -> None:
+        """Write <path>.cpp and its cube/vec headers into `out_dir`; `path` is also the kernel entry name."""
         from ..parser.asc import translate_split
         from ..parser.asc_utils import dtype_to_cpp
 
-        cube_code, vec_code = translate_split(self.instructions, self.name)
+        if split_code is None:
+            split_code = translate_split(self.instructions, self.name)
+        cube_code, vec_code = split_code
         sig = inspect.signature(self.func)
         param_names = list(sig.parameters.keys())
 
@@ -199,9 +354,9 @@ class KernelBase:
                 f"}}\n"
             )
 
-        with open(f"{path}_cube.h", "w") as f:
+        with open(os.path.join(out_dir, f"{path}_cube.h"), "w") as f:
             f.write(_wrap(cube_code, "cube"))
-        with open(f"{path}_vec.h", "w") as f:
+        with open(os.path.join(out_dir, f"{path}_vec.h"), "w") as f:
             f.write(_wrap(vec_code, "vec"))
         cpp_params = [f"GM_ADDR {name}" for name in param_names
                       if isinstance(self._last_bound_args.get(name, None), GMTensor) or name in gmtensors]
@@ -240,10 +395,13 @@ class KernelBase:
             f"    }}\n"
             "\n}\n"
         )
-        with open(f"{path}.cpp", "w") as f:
+        with open(os.path.join(out_dir, f"{path}.cpp"), "w") as f:
             f.write(cpp_body)
 
-    def generate_op_host(self) -> None:
+    def generate_op_host(self, path: str = ".") -> None:
+        """Write <name>_tiling.h and <name>.cpp of the op host into `path`."""
+        if not isinstance(path, str):
+            raise TypeError(f"path must be str, got: {type(path)}")
         sig = inspect.signature(self.func)
         if not self._last_bound_args:
             raise RuntimeError("generate_op_host requires calling kernel first to bind arguments")
@@ -337,7 +495,7 @@ class KernelBase:
         lines.append("}")
         content = "\n".join(lines) + "\n"
 
-        with open(f"{self.name}_tiling.h", "w") as f:
+        with open(os.path.join(path, f"{self.name}_tiling.h"), "w") as f:
             f.write(content)
 
         output_gmtensors = set()
@@ -463,7 +621,7 @@ class KernelBase:
                 "",
             ]
         )
-        with open(f"{self.name}.cpp", "w") as f:
+        with open(os.path.join(path, f"{self.name}.cpp"), "w") as f:
             f.write("\n".join(cpp_lines))
 
     def generate_op_project(self, path: str, cann_path: str) -> None:
@@ -532,11 +690,118 @@ class KernelBase:
         custom_op_path: Optional[str] = None,
         profile: bool = False,
         gen_only: bool = False,
-    ) -> None:
+        max_workers: Optional[int] = None,
+        cost_table: Optional["CostTable"] = None,
+        trace_path: Optional[str] = None,
+        sanitize: bool = False,
+    ) -> Optional["TimingReport"]:
         from ..simulator.base import SimulatorBase
 
-        sim_runner = SimulatorBase(self)
-        sim_runner.run()
+        sim_runner = SimulatorBase(
+            self,
+            max_workers=max_workers,
+            profile=profile,
+            cost_table=cost_table,
+            trace_path=trace_path,
+            sanitize=sanitize,
+        )
+        report = sim_runner.run()
+        self.sanitizer_findings = sim_runner.sanitizer_findings
+        return report
+
+    def _io_signature(self, with_values: bool) -> Dict[str, Any]:
+        # Parameter names/kinds/dtypes decide the op package; shapes and Var values only reach test.cpp.
+        param_names = list(inspect.signature(self.func).parameters)
+
+        def _dim(dim: Any) -> Any:
+            if not isinstance(dim, Var):
+                return dim
+            if with_values:
+                return [dim.name, dim.value]
+            # As generate_op_host prints it: a Var parameter by name, any other Var as its constant.
+            return dim.name if isinstance(self._last_bound_args.get(dim.name, None), Var) else dim.value
+
+        params: List[Dict[str, Any]] = []
+        for name in param_names:
+            bound_val = self._last_bound_args.get(name, None)
+            entry: Dict[str, Any] = {"name": name, "dtype": str(getattr(bound_val, "dtype", None))}
+            if isinstance(bound_val, GMTensor):
+                entry["kind"] = "gm"
+                entry["output"] = bound_val in self._last_output_gmtensors
+                if with_values:
+                    entry["shape"] = [_dim(dim) for dim in bound_val.shape]
+            elif isinstance(bound_val, Var):
+                entry["kind"] = "var"
+                if with_values:
+                    entry["value"] = bound_val.value
+            params.append(entry)
+        return {
+            "params": params,
+            "workspace": [[_dim(dim) for dim in shape] for shape in self.workspace_shapes],
+        }
+
+    def _build_hashes(
+        self,
+        split_code: Tuple[str, str],
+        micro_codes: Dict[str, str],
+        cann_path: str,
+        custom_op_path: str,
+        profile: bool,
+        batch: bool = False,
+        mmap_io: bool = False,
+        serve: bool = False,
+    ) -> Tuple[str, str]:
+        """(op package hash, aclnn test hash) for the manifest."""
+        resources_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "resources"))
+
+        def _resource(name: str) -> str:
+            return build_manifest.file_digest(os.path.join(resources_dir, name))
+
+        from ..parser import asc_utils
+
+        op_hash = build_manifest.hash_parts(
+            [
+                self.name,
+                str(getattr(globvars, "device_type", "")),
+                cann_path,
+                split_code[0],
+                split_code[1],
+                sorted(micro_codes.items()),
+                self._io_signature(with_values=False),
+                [_resource(name) for name in ("CustomOp.tar.gz", "CMakePresets.json", "tensorutils.h")],
+                # generate_op_host/dump_kernel templates and the dtype names they print.
+                [build_manifest.file_digest(os.path.abspath(path)) for path in (__file__, asc_utils.__file__)],
+            ]
+        )
+        test_parts: List[Any] = [
+            op_hash,
+            custom_op_path,
+            profile,
+            platform.machine().lower(),
+            self._io_signature(with_values=True),
+            [_resource(name) for name in ("macros.h", "parse_prof.py", "setup_aclnn.py", "tensorx.h", "test.cpp")],
+        ]
+        if batch:
+            test_parts.append("batch")
+        if mmap_io:
+            test_parts.extend(["mmap_io", _resource("exchange.h")])
+        if serve:
+            test_parts.append("serve")
+        test_hash = build_manifest.hash_parts(test_parts)
+        return op_hash, test_hash
+
+    def _iface_hash(self, cann_path: str, custom_op_path: str) -> str:
+        """Hash of what the installed aclnn header/library expose to test.cpp."""
+        return build_manifest.hash_parts(
+            [
+                "iface",
+                self.name,
+                str(getattr(globvars, "device_type", "")),
+                cann_path,
+                custom_op_path,
+                self._io_signature(with_values=False),
+            ]
+        )
 
     def generate(
         self,
@@ -544,7 +809,19 @@ class KernelBase:
         cann_path: Optional[str] = None,
         custom_op_path: Optional[str] = None,
         profile: bool = False,
-    ) -> None:
+        use_cache: bool = True,
+        batch: bool = False,
+        mmap_io: bool = False,
+        serve: bool = False,
+    ) -> bool:
+        """Generate the op project, aclnn test and b.sh/r.sh; returns False when b.sh has nothing to build.
+
+        With `use_cache`, the op package and the aclnn test are only regenerated (and rebuilt by b.sh)
+        when their hash differs from the manifest written by the last successful b.sh run.
+        `batch` generates an aclnn test that loops over numbered input sets and `mmap_io` one that
+        exchanges tensors through a memory-mapped file; `serve` adds the long-lived runner mode
+        (see generate_aclnn_test and kernelbase/runner.py).
+        """
         if not isinstance(out_dir, str):
             raise TypeError(f"out_dir must be str, got: {type(out_dir)}")
         if out_dir == "":
@@ -561,43 +838,132 @@ class KernelBase:
             custom_op_path = cann_path
         if not isinstance(custom_op_path, str):
             raise TypeError(f"custom_op_path must be str, got: {type(custom_op_path)}")
-
-        self.generate_op_project(out_dir, cann_path)
+        if not isinstance(use_cache, bool):
+            raise TypeError(f"use_cache must be bool, got: {type(use_cache)}")
+        if not isinstance(batch, bool):
+            raise TypeError(f"batch must be bool, got: {type(batch)}")
+        if not isinstance(mmap_io, bool):
+            raise TypeError(f"mmap_io must be bool, got: {type(mmap_io)}")
+        if not isinstance(serve, bool):
+            raise TypeError(f"serve must be bool, got: {type(serve)}")
+        if serve and not mmap_io:
+            raise ValueError("serve requires mmap_io: the runner exchanges tensors through the mapped file")
+        from ..parser.asc import translate_split
+        from .buildgraph import BuildGraph
 
         abs_out_dir = os.path.abspath(out_dir)
         op_host_dir = os.path.join(abs_out_dir, "op_host")
         op_kernel_dir = os.path.join(abs_out_dir, "op_kernel")
-        os.makedirs(op_host_dir, exist_ok=True)
-        os.makedirs(op_kernel_dir, exist_ok=True)
-
-        cwd = os.getcwd()
-        try:
-            os.chdir(op_host_dir)
-            self.generate_op_host()
-        finally:
-            os.chdir(cwd)
-
-        cwd = os.getcwd()
-        try:
-            os.chdir(op_kernel_dir)
+        test_dir = os.path.abspath(f"{out_dir}_aclnn_test")
+        plan: Dict[str, Any] = {}
+
+        def _plan() -> None:
+            split_code = graph.result("translate")
+            micro_codes = graph.result("micro")
+            op_hash, test_hash = self._build_hashes(
+                split_code, micro_codes, cann_path, custom_op_path, profile, batch, mmap_io, serve
+            )
+            manifest = build_manifest.load_manifest(abs_out_dir) if use_cache else {}
+            build_op = not (manifest.get("op_hash") == op_hash and os.path.isdir(op_kernel_dir))
+            build_test = build_op or not (
+                manifest.get("test_hash") == test_hash and os.path.isfile(os.path.join(test_dir, "test.cpp"))
+            )
+            iface_hash = self._iface_hash(cann_path, custom_op_path)
+            installed_header = os.path.join(
+                self._resolve_custom_opp_path(custom_op_path),
+                "vendors",
+                "customize",
+                "op_api",
+                "include",
+                f"aclnn_{self.name}.h",
+            )
+            plan.update(
+                op_hash=op_hash,
+                test_hash=test_hash,
+                iface_hash=iface_hash,
+                build_op=build_op,
+                build_test=build_test,
+                # test.cpp only sees the aclnn interface: with an unchanged one already installed it
+                # can compile while build.sh runs.
+                overlap_test=build_op
+                and build_test
+                and manifest.get("iface_hash") == iface_hash
+                and os.path.isfile(installed_header),
+            )
+            if build_op or build_test:
+                build_manifest.discard_manifest(abs_out_dir)
+            if not build_op:
+                print(f"[easyasc] {self.name}: op package unchanged (hash {op_hash[:12]}), skipping regeneration and build")
+            if not build_test:
+                print(f"[easyasc] {self.name}: aclnn test unchanged (hash {test_hash[:12]}), skipping rebuild")
+
+        def _op_project() -> None:
+            self.generate_op_project(out_dir, cann_path)
+            os.makedirs(op_host_dir, exist_ok=True)
+            os.makedirs(op_kernel_dir, exist_ok=True)
+
+        def _op_kernel() -> None:
+            micro_codes = graph.result("micro")
             for micro in self.used_micros:
-                micro.gen_code(f"{micro.name}.h")
-            self.dump_kernel(self.name)
-        finally:
-            os.chdir(cwd)
+                with open(os.path.join(op_kernel_dir, f"{micro.name}.h"), "w", encoding="utf-8") as f:
+                    f.write(micro_codes[micro.name])
+            self.dump_kernel(self.name, split_code=graph.result("translate"), out_dir=op_kernel_dir)
+            resources_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "resources"))
+            tensorutils_src = os.path.join(resources_dir, "tensorutils.h")
+            if not os.path.isfile(tensorutils_src):
+                raise FileNotFoundError(f"tensorutils.h not found: {tensorutils_src}")
+            shutil.copy2(tensorutils_src, os.path.join(op_kernel_dir, "tensorutils.h"))
+
+        def _bashfiles() -> None:
+            pending_path = build_manifest.write_pending_manifest(
+                abs_out_dir, plan["op_hash"], plan["test_hash"], iface_hash=plan["iface_hash"]
+            )
+            self.generate_bashfiles(
+                out_dir,
+                cann_path,
+                custom_op_path=custom_op_path,
+                build_op=plan["build_op"],
+                build_test=plan["build_test"],
+                manifest_path=pending_path,
+                overlap_test=plan["overlap_test"],
+            )
 
-        resources_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "resources"))
-        tensorutils_src = os.path.join(resources_dir, "tensorutils.h")
-        if not os.path.isfile(tensorutils_src):
-            raise FileNotFoundError(f"tensorutils.h not found: {tensorutils_src}")
-        shutil.copy2(tensorutils_src, os.path.join(op_kernel_dir, "tensorutils.h"))
-        self.generate_aclnn_test(
-            f"{out_dir}_aclnn_test",
-            cann_path=cann_path,
-            custom_op_path=custom_op_path,
-            profile=profile,
+        def _skip_op() -> bool:
+            return not plan["build_op"]
+
+        graph = BuildGraph(self.name)
+        graph.add("translate", lambda: translate_split(self.instructions, self.name))
+        # Translation handlers keep module-level counters (e.g. select temporaries), so micro
+        # rendering stays after translation to keep the generated names deterministic.
+        graph.add(
+            "micro",
+            lambda: {micro.name: micro.render_code() for micro in self.used_micros},
+            deps=("translate",),
+        )
+        graph.add("plan", _plan, deps=("translate", "micro"))
+        graph.add("op_project", _op_project, deps=("plan",), skip=_skip_op)
+        graph.add("op_host", lambda: self.generate_op_host(op_host_dir), deps=("op_project",), skip=_skip_op)
+        graph.add("op_kernel", _op_kernel, deps=("op_project",), skip=_skip_op)
+        graph.add(
+            "aclnn_test",
+            lambda: self.generate_aclnn_test(
+                f"{out_dir}_aclnn_test",
+                cann_path=cann_path,
+                custom_op_path=custom_op_path,
+                profile=profile,
+                batch=batch,
+                mmap_io=mmap_io,
+                serve=serve,
+            ),
+            deps=("plan",),
+            skip=lambda: not plan["build_test"],
         )
-        self.generate_bashfiles(out_dir, cann_path, custom_op_path=custom_op_path)
+        graph.add("bashfiles", _bashfiles, deps=("op_host", "op_kernel", "aclnn_test"))
+        graph.run()
+        print(graph.report())
+        build_op = plan["build_op"]
+        build_test = plan["build_test"]
+        return build_op or build_test
 
     def generate_aclnn_test(
         self,
@@ -605,7 +971,19 @@ class KernelBase:
         cann_path: Optional[str] = None,
         custom_op_path: Optional[str] = None,
         profile: bool = False,
+        batch: bool = False,
+        mmap_io: bool = False,
+        serve: bool = False,
     ) -> None:
+        """
+        Write the aclnn test project. With `batch`, test.cpp runs the op once per input set:
+        `./aclnn_test <count>` reads input/input_<name>_<i>.bin and writes
+        output/output_<name>_<i>.bin for i < count, reusing the device tensors.
+        With `mmap_io`, inputs and outputs live in one memory-mapped exchange file
+        (kernelbase/exchange.py, ./exchange.bin or $EASYASC_EXCHANGE) instead of .bin files.
+        With `serve` (requires `mmap_io`), `./aclnn_test --serve` sets up ACL and the device
+        tensors once and then runs `run <count>` requests from stdin (kernelbase/runner.py).
+        """
         if not isinstance(path, str):
             raise TypeError(f"path must be str, got: {type(path)}")
         if cann_path is None:
@@ -620,6 +998,16 @@ class KernelBase:
             raise TypeError(f"custom_op_path must be str, got: {type(custom_op_path)}")
         if not isinstance(profile, bool):
             raise TypeError(f"profile must be bool, got: {type(profile)}")
+        if not isinstance(batch, bool):
+            raise TypeError(f"batch must be bool, got: {type(batch)}")
+        if not isinstance(mmap_io, bool):
+            raise TypeError(f"mmap_io must be bool, got: {type(mmap_io)}")
+        if not isinstance(serve, bool):
+            raise TypeError(f"serve must be bool, got: {type(serve)}")
+        if serve and not mmap_io:
+            raise ValueError("serve requires mmap_io: the runner exchanges tensors through the mapped file")
+        from .runner import REPLY_PREFIX, SERVE_FLAG
+
         resolved_custom_op_path = self._resolve_custom_opp_path(custom_op_path)
 
         abs_path = os.path.abspath(path)
@@ -686,6 +1074,11 @@ class KernelBase:
             raise ValueError('Missing #include "cust_op_list.h" in tensorx.h')
         with open(os.path.join(abs_path, "tensorx.h"), "w", encoding="utf-8") as f:
             f.writelines(tensorx_lines)
+        if mmap_io:
+            exchange_src = os.path.join(resources_dir, "exchange.h")
+            if not os.path.isfile(exchange_src):
+                raise FileNotFoundError(f"exchange.h not found: {exchange_src}")
+            shutil.copy2(exchange_src, os.path.join(abs_path, "exchange.h"))
         if not self._last_bound_args:
             raise RuntimeError("generate_aclnn_test requires calling kernel first to bind arguments")
         sig = inspect.signature(self.func)
@@ -831,6 +1224,12 @@ class KernelBase:
             "    ret = aclrtSetCurrentContext(context);",
             "    ret = aclrtCreateStream(&stream);",
         ]
+        if mmap_io:
+            lines.insert(lines.index('#include "tensorx.h"') + 1, '#include "exchange.h"')
+        if batch or serve:
+            # atoi / std::to_string for the input-set loop.
+            lines.insert(lines.index("#include <fstream>") + 1, "#include <string>")
+            lines.insert(lines.index("#include <fstream>") + 1, "#include <cstdlib>")
         if profile and profile_pre_lines:
             lines.extend(profile_pre_lines)
         lines.extend(
@@ -844,22 +1243,46 @@ class KernelBase:
             lines.append(_var_decl(name, var))
         if var_params:
             lines.append("    ")
+        if mmap_io and not serve:
+            lines.append("    ExchangeFile exchange(exchangePath());")
+            lines.append("    ")
+        # Mapped tensors use exchange-file regions as host memory, so only the device side is allocated.
+        tensor_class = "MappedTensorX" if mmap_io else "TensorX"
+        init_call = "initDevice" if mmap_io else "initAll"
+
+        def _load_input(name: str, indent: str, set_expr: str, suffix_expr: str) -> List[str]:
+            if mmap_io:
+                load = f"{indent}{name}.bindHost(exchange, \"{name}\", {set_expr});"
+            else:
+                load = f"{indent}{name}.fillHostWithBinFile(\"./input/input_{name}{suffix_expr});"
+            return [load, f"{indent}{name}.copyToDevice();"]
+
+        def _save_output(name: str, indent: str, set_expr: str, suffix_expr: str) -> List[str]:
+            if mmap_io:
+                return [
+                    f"{indent}{name}.bindHost(exchange, \"{name}\", {set_expr});",
+                    f"{indent}{name}.copyToHost();",
+                ]
+            return [
+                f"{indent}{name}.copyToHost();",
+                f"{indent}{name}.saveHostToBinFile(\"output/output_{name}{suffix_expr});",
+            ]
 
         for name, val in input_params:
             tensorx_type = _tensorx_type(val.dtype)
             shape_expr = _shape_expr(val.shape)
-            lines.append(f"    TensorX<{tensorx_type}> {name}({{{shape_expr}}});")
-            lines.append(f"    {name}.initAll();")
-            lines.append(f"    {name}.fillHostWithBinFile(\"./input/input_{name}.bin\");")
-            lines.append(f"    {name}.copyToDevice();")
+            lines.append(f"    {tensor_class}<{tensorx_type}> {name}({{{shape_expr}}});")
+            lines.append(f"    {name}.{init_call}();")
+            if not (batch or serve):
+                lines.extend(_load_input(name, "    ", "0", '.bin\"'))
         if input_params:
             lines.append("    ")
 
         for name, val in output_params:
             tensorx_type = _tensorx_type(val.dtype)
             shape_expr = _shape_expr(val.shape)
-            lines.append(f"    TensorX<{tensorx_type}> {name}({{{shape_expr}}});")
-            lines.append(f"    {name}.initAll();")
+            lines.append(f"    {tensor_class}<{tensorx_type}> {name}({{{shape_expr}}});")
+            lines.append(f"    {name}.{init_call}();")
         if output_params:
             lines.append("    ")
 
@@ -885,17 +1308,60 @@ class KernelBase:
             if isinstance(bound_val, GMTensor) and bound_val in output_gmtensors:
                 exec_args.append(f"{name}_acl")
         args_str = ", ".join(exec_args)
-        if profile:
-            lines.append("    for (int i=0; i<100; ++i){")
+        if serve:
+            # The exchange file is mapped per request: OpExec replaces it for every run.
+            lines.append("    auto run_sets = [&](int batch_num){")
+            lines.append("        ExchangeFile exchange(exchangePath());")
+            lines.append("        for (int b = 0; b < batch_num; ++b){")
+            for name, _ in input_params:
+                lines.extend(_load_input(name, "            ", "b", ""))
+            lines.append(f"            EXECOP(aclnn{op_name}, stream, {args_str});")
+            lines.append("            CHECK_RET(aclrtSynchronizeStream(stream));")
+            for name, _ in output_params:
+                lines.extend(_save_output(name, "            ", "b", ""))
+            lines.append("        }")
+            lines.append("    };")
+            lines.append(f"    if (argc > 1 && std::string(argv[1]) == \"{SERVE_FLAG}\"){{")
+            lines.append(f"        printf(\"{REPLY_PREFIX}ready\\n\");")
+            lines.append("        fflush(stdout);")
+            lines.append("        char request[256];")
+            lines.append("        while (fgets(request, sizeof(request), stdin) != nullptr){")
+            lines.append("            int batch_num = 0;")
+            lines.append("            if (sscanf(request, \"run %d\", &batch_num) != 1) break;")
+            lines.append("            try{")
+            lines.append("                run_sets(batch_num);")
+            lines.append(f"                printf(\"{REPLY_PREFIX}ok %d\\n\", batch_num);")
+            lines.append("            }catch (const std::exception &e){")
+            lines.append(f"                printf(\"{REPLY_PREFIX}error %s\\n\", e.what());")
+            lines.append("            }")
+            lines.append("            fflush(stdout);")
+            lines.append("        }")
+            lines.append("    }else{")
+            lines.append("        run_sets(argc > 1 ? atoi(argv[1]) : 1);")
+            lines.append("    }")
+        elif batch:
+            lines.append("    int batch_num = argc > 1 ? atoi(argv[1]) : 1;")
+            lines.append("    for (int b = 0; b < batch_num; ++b){")
+            lines.append("        std::string suffix = \"_\" + std::to_string(b) + \".bin\";")
+            for name, _ in input_params:
+                lines.extend(_load_input(name, "        ", "b", '\" + suffix'))
             lines.append(f"        EXECOP(aclnn{op_name}, stream, {args_str});")
+            lines.append("        CHECK_RET(aclrtSynchronizeStream(stream));")
+            for name, _ in output_params:
+                lines.extend(_save_output(name, "        ", "b", '\" + suffix'))
             lines.append("    }")
-        lines.append(f"    EXECOP(aclnn{op_name}, stream, {args_str});")
-        lines.append("    CHECK_RET(aclrtSynchronizeStream(stream));")
-        lines.append("    ")
-        lines.append("    printf(\"--> Saving output tensors...\\n\");")
-        for name, _ in output_params:
-            lines.append(f"    {name}.copyToHost();")
-            lines.append(f"    {name}.saveHostToBinFile(\"output/output_{name}.bin\");")
+            lines.append("    printf(\"--> Ran %d input sets\\n\", batch_num);")
+        else:
+            if profile:
+                lines.append("    for (int i=0; i<100; ++i){")
+                lines.append(f"        EXECOP(aclnn{op_name}, stream, {args_str});")
+                lines.append("    }")
+            lines.append(f"    EXECOP(aclnn{op_name}, stream, {args_str});")
+            lines.append("    CHECK_RET(aclrtSynchronizeStream(stream));")
+            lines.append("    ")
+            lines.append("    printf(\"--> Saving output tensors...\\n\");")
+            for name, _ in output_params:
+                lines.extend(_save_output(name, "    ", "0", '.bin\"'))
         if profile and profile_post_lines:
             lines.append("    ")
             lines.extend(profile_post_lines)
@@ -911,7 +1377,18 @@ class KernelBase:
         path: str,
         cann_path: str,
         custom_op_path: Optional[str] = None,
+        build_op: bool = True,
+        build_test: bool = True,
+        manifest_path: Optional[str] = None,
+        overlap_test: bool = False,
     ) -> None:
+        """
+        Write b.sh (build/install/test-compile steps, each timed in the log) and r.sh.
+
+        With `overlap_test`, the aclnn test compiles while build.sh builds the op package; this
+        is only valid when the installed aclnn header/library already match the op interface.
+        The package is installed after both finished, so the test never links a half-written library.
+        """
         if not isinstance(path, str):
             raise TypeError(f"path must be str, got: {type(path)}")
         if not isinstance(cann_path, str):
@@ -920,23 +1397,64 @@ class KernelBase:
             custom_op_path = cann_path
         if not isinstance(custom_op_path, str):
             raise TypeError(f"custom_op_path must be str, got: {type(custom_op_path)}")
+        if not isinstance(overlap_test, bool):
+            raise TypeError(f"overlap_test must be bool, got: {type(overlap_test)}")
         resolved_custom_op_path = self._resolve_custom_opp_path(custom_op_path)
-        script_lines = [
-            f"cd {path}",
-            "bash build.sh",
-            "cd build_out",
-            'for f in custom_*.run; do bash "$f"; done',
-            f"export LD_LIBRARY_PATH={resolved_custom_op_path}/vendors/customize/op_api/lib/:${{LD_LIBRARY_PATH}}",
-            f"cd ../../{path}_aclnn_test",
-            "python setup_aclnn.py",
-            "",
-        ]
+        script_lines = []
+        if manifest_path is not None:
+            # Stop at the first failure so a broken build never records its manifest.
+            script_lines.append("set -e")
+        script_lines.extend(
+            [
+                "_step() {",
+                "    local name=$1",
+                "    shift",
+                "    local start=$(date +%s.%N)",
+                "    local rc=0",
+                '    "$@" || rc=$?',
+                '    echo "[easyasc] step ${name}: $(awk -v a="$start" -v b="$(date +%s.%N)" \'BEGIN{printf "%.2f", b-a}\')s (rc=${rc})"',
+                "    return $rc",
+                "}",
+                f"op_build() ( cd {path} && bash build.sh )",
+                f'op_install() ( cd {path}/build_out && for f in custom_*.run; do bash "$f" || exit 1; done )',
+                f"test_build() ( cd {path}_aclnn_test && python setup_aclnn.py )",
+                f"export LD_LIBRARY_PATH={resolved_custom_op_path}/vendors/customize/op_api/lib/:${{LD_LIBRARY_PATH}}",
+            ]
+        )
+        if build_op and build_test and overlap_test:
+            op_log = f"{path}_op_build.log"
+            test_log = f"{path}_test_build.log"
+            script_lines.extend(
+                [
+                    f"_step op_build op_build > {op_log} 2>&1 &",
+                    "op_pid=$!",
+                    f"_step test_build test_build > {test_log} 2>&1 &",
+                    "test_pid=$!",
+                    "op_rc=0",
+                    "wait $op_pid || op_rc=$?",
+                    "test_rc=0",
+                    "wait $test_pid || test_rc=$?",
+                    f"cat {op_log} {test_log}",
+                    # An `a && b` list does not trip `set -e`, so exit explicitly before installing.
+                    'if [ "$op_rc" -ne 0 ] || [ "$test_rc" -ne 0 ]; then exit 1; fi',
+                    "_step op_install op_install",
+                ]
+            )
+        else:
+            if build_op:
+                script_lines.extend(["_step op_build op_build", "_step op_install op_install"])
+            if build_test:
+                script_lines.append("_step test_build test_build")
+        if manifest_path is not None:
+            final_path = os.path.join(os.path.dirname(manifest_path), build_manifest.MANIFEST_NAME)
+            script_lines.append(f'mv -f "{manifest_path}" "{final_path}"')
+        script_lines.append("")
         with open("b.sh", "w", encoding="utf-8") as f:
             f.write("\n".join(script_lines))
         run_lines = [
             f"export LD_LIBRARY_PATH={resolved_custom_op_path}/vendors/customize/op_api/lib/:${{LD_LIBRARY_PATH}}",
             f"cd {path}_aclnn_test",
-            "./aclnn_test",
+            './aclnn_test "$@"',
             "",
         ]
         with open("r.sh", "w", encoding="utf-8") as f:
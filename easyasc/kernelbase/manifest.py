@@ -0,0 +1,88 @@
+import functools
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+# Bump when the generated project layout changes so older manifests stop matching.
+MANIFEST_VERSION = 1
+MANIFEST_NAME = ".easyasc_manifest.json"
+PENDING_MANIFEST_NAME = ".easyasc_manifest.pending.json"
+
+
+def hash_parts(parts: Iterable[Any]) -> str:
+    """sha256 over the JSON form of each part, in order."""
+    digest = hashlib.sha256()
+    digest.update(f"v{MANIFEST_VERSION}".encode("utf-8"))
+    for part in parts:
+        data = part if isinstance(part, str) else json.dumps(part, sort_keys=True, default=str)
+        digest.update(b"\0")
+        digest.update(data.encode("utf-8"))
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=64)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def source_digest(root: str) -> str:
+    """sha256 over the relative path and content of every .py file under `root`."""
+    digest = hashlib.sha256()
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(path, root).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"file to hash not found: {path}")
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_manifest(out_dir: str) -> Dict[str, Any]:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def discard_manifest(out_dir: str) -> None:
+    # Files on disk no longer match the installed build until b.sh succeeds again.
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+def write_pending_manifest(out_dir: str, op_hash: str, test_hash: str, iface_hash: Optional[str] = None) -> str:
+    """Stage the manifest; b.sh promotes it to MANIFEST_NAME only after the build succeeded."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, PENDING_MANIFEST_NAME)
+    data: Dict[str, Any] = {"version": MANIFEST_VERSION, "op_hash": op_hash, "test_hash": test_hash}
+    if iface_hash is not None:
+        # Interface of the installed aclnn header/library, see KernelBase._iface_hash.
+        data["iface_hash"] = iface_hash
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    return path
@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+import weakref
+from typing import IO, Any, Callable, Optional, Sequence
+
+from .exchange import ExchangeFile, exchange_path
+
+# Replies of the serve protocol start with this prefix; every other output line is log text.
+REPLY_PREFIX = "@easyasc "
+SERVE_FLAG = "--serve"
+
+
+def _stop_process(proc: "subprocess.Popen[str]", log_file: Optional[IO[str]]) -> None:
+    if proc.poll() is None:
+        try:
+            proc.stdin.write("quit\n")  # type: ignore[union-attr]
+            proc.stdin.flush()  # type: ignore[union-attr]
+        except (OSError, ValueError):
+            pass
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    if log_file is not None:
+        log_file.close()
+
+
+class AclnnRunner:
+    """
+    Long-lived aclnn test process that runs the op on request.
+
+    `command` starts an aclnn test built with `serve=True` (e.g. `bash r.sh --serve`), which
+    initializes ACL, the context, the stream and the device tensors once and then answers
+    `run <count>` lines on stdin: it maps the exchange file, runs `count` input sets and
+    replies `@easyasc ok <count>` (or `@easyasc error <message>`). `quit` or EOF stops it.
+    Any process speaking the protocol works, e.g. `serve()` with a mock executor.
+    """
+
+    def __init__(self, command: Sequence[str], cwd: Optional[str] = None, log_path: Optional[str] = None) -> None:
+        if isinstance(command, str) or not command:
+            raise ValueError("command must be a non-empty sequence of arguments")
+        self.command = list(command)
+        self.log_path = log_path
+        log_file = open(log_path, "w", encoding="utf-8") if log_path is not None else None
+        self._log_file = log_file
+        self._proc = subprocess.Popen(
+            self.command,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=log_file if log_file is not None else subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._finalizer = weakref.finalize(self, _stop_process, self._proc, log_file)
+        self._expect("ready")
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def _expect(self, status: str) -> str:
+        stdout = self._proc.stdout
+        assert stdout is not None
+        while True:
+            line = stdout.readline()
+            if line == "":
+                code = self._proc.wait()
+                log_hint = f" Log: {self.log_path}" if self.log_path else ""
+                raise RuntimeError(f"aclnn runner exited with return code {code}.{log_hint}")
+            if not line.startswith(REPLY_PREFIX):
+                if self._log_file is not None:
+                    # The child's stderr shares this file; flush to keep the order.
+                    self._log_file.write(line)
+                    self._log_file.flush()
+                continue
+            reply, _, detail = line[len(REPLY_PREFIX) :].strip().partition(" ")
+            if reply == "error":
+                raise RuntimeError(f"aclnn runner failed: {detail}")
+            if reply != status:
+                raise RuntimeError(f"aclnn runner replied {reply!r}, expected {status!r}")
+            return detail
+
+    def run(self, count: int = 1) -> None:
+        """Run the op on input sets 0..count-1 of the current exchange file."""
+        if isinstance(count, bool) or not isinstance(count, int):
+            raise TypeError(f"count must be int, got: {type(count)}")
+        if count < 1:
+            raise ValueError(f"count must be >= 1, got: {count}")
+        if not self.alive:
+            raise RuntimeError("aclnn runner is not running")
+        stdin = self._proc.stdin
+        assert stdin is not None
+        stdin.write(f"run {count}\n")
+        stdin.flush()
+        self._expect("ok")
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def __enter__(self) -> "AclnnRunner":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def serve(
+    executor: Callable[[ExchangeFile, int], None],
+    stdin: Optional[IO[str]] = None,
+    stdout: Optional[IO[str]] = None,
+) -> None:
+    """
+    Serve the runner protocol in Python with `executor(exchange, set_index)` in place of the
+    ACL runtime: it reads the inputs of one set from the mapping and writes its outputs.
+    """
+    stdin = stdin if stdin is not None else sys.stdin
+    stdout = stdout if stdout is not None else sys.stdout
+    stdout.write(f"{REPLY_PREFIX}ready\n")
+    stdout.flush()
+    for line in stdin:
+        parts = line.split()
+        if not parts or parts[0] == "quit":
+            break
+        try:
+            if parts[0] != "run" or len(parts) != 2:
+                raise ValueError(f"unknown request: {line.strip()!r}")
+            count = int(parts[1])
+            exchange = ExchangeFile.open(exchange_path(os.getcwd()))
+            try:
+                for set_index in range(count):
+                    executor(exchange, set_index)
+            finally:
+                exchange.close()
+            reply = f"ok {count}"
+        except Exception as exc:
+            reply = " ".join(f"error {type(exc).__name__}: {exc}".split())
+        stdout.write(f"{REPLY_PREFIX}{reply}\n")
+        stdout.flush()
@@ -123,6 +123,28 @@ class MicroModule:
     def gen_code(self, path: str) -> None:
         if not isinstance(path, str):
             raise TypeError(f"path must be str, got: {type(path)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render_code())
+
+    def render_code(self) -> str:
+        from ..parser.asc_cache import fingerprint, get_translation_cache
+
+        cache = get_translation_cache()
+        key = fingerprint(
+            "micro",
+            self.name,
+            self.input_list,
+            self.cast_cfg_list,
+            [(inst.opname, inst.kwargs) for inst in self.instructions],
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+        code = self._render_code()
+        cache.put(key, (code,))
+        return code
+
+    def _render_code(self) -> str:
         from ..parser.asc import translate
         from ..parser.asc_utils import dtype_to_cpp
         from ..parser.helper import CodeHelper
@@ -175,6 +197,4 @@ class MicroModule:
         helper.il()
         helper("}")
         helper()
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(str(helper))
+        return str(helper)
@@ -1,434 +1,550 @@
-from typing import Dict, List, Optional, Set, Tuple, Literal, Union
-from functools import lru_cache
-
-from .asc_utils import build_expr_state, should_skip_inst
-from ..utils.events import DEvent, SEvent
-from .asc_handlers import build_handlers
-from ..utils.Tensor import Tensor
-from ..utils.instruction import Instruction
-from ..utils.pipe import Pipe, PipeType
-
-
-_AUTO_SYNC_START = "start_auto_sync"
-_AUTO_SYNC_END = "end_auto_sync"
-_EXPLICIT_VEC_OPNAMES = {
-    "abs",
-    "add",
-    "adds",
-    "axpy",
-    "brcb",
-    "cadd",
-    "cast",
-    "cgadd",
-    "cgmax",
-    "cgmin",
-    "cmax",
-    "cmin",
-    "compare",
-    "compare_scalar",
-    "cpadd",
-    "div",
-    "dup",
-    "exp",
-    "gather",
-    "gm_to_ub_pad",
-    "ln",
-    "lrelu",
-    "mergesort4",
-    "mergesort_2seq",
-    "mul",
-    "muladddst",
-    "muls",
-    "rec",
-    "relu",
-    "reset_mask",
-    "rsqrt",
-    "scatter",
-    "select",
-    "set_atomic_type",
-    "set_cmpmask",
-    "set_mask",
-    "sort32",
-    "sqrt",
-    "sub",
-    "ub_to_gm_pad",
-    "ub_to_ub",
-    "vand",
-    "vmax",
-    "vmaxs",
-    "vmin",
-    "vmins",
-    "vnot",
-    "vor",
-}
-
-
-@lru_cache(maxsize=1)
-def get_pipe_opnames() -> Dict[str, Set[str]]:
-    pipe_opnames: Dict[str, Set[str]] = {
-        str(Pipe.MTE2): {"gm_to_l1_nd2nz", "gm_to_ub_pad"},
-        str(Pipe.MTE1): {"l1_to_l0"},
-        str(Pipe.M): {"mmad"},
-        str(Pipe.FIX): {"l0c_to_gm_nz2nd", "l0c_to_l1"},
-        str(Pipe.MTE3): {"ub_to_gm_pad"},
-    }
-    vec_pipe_ops = set(_EXPLICIT_VEC_OPNAMES)
-    for opnames in pipe_opnames.values():
-        vec_pipe_ops -= opnames
-    pipe_opnames[str(Pipe.V)] = vec_pipe_ops
-    return pipe_opnames
-
-
-PIPE_OPNAMES = get_pipe_opnames()
-_PIPE_NAME_TO_TYPE: Dict[str, PipeType] = {
-    str(Pipe.MTE2): Pipe.MTE2,
-    str(Pipe.MTE1): Pipe.MTE1,
-    str(Pipe.M): Pipe.M,
-    str(Pipe.FIX): Pipe.FIX,
-    str(Pipe.MTE3): Pipe.MTE3,
-    str(Pipe.V): Pipe.V,
-}
-_OPNAME_TO_PIPE: Dict[str, PipeType] = {
-    opname: _PIPE_NAME_TO_TYPE[pipe_name]
-    for pipe_name, opnames in PIPE_OPNAMES.items()
-    if pipe_name in _PIPE_NAME_TO_TYPE
-    for opname in opnames
-}
-_EVENT_TYPES = (SEvent, DEvent)
-
-
-class AutosyncNode:
-    def __init__(self, instructions: List[Instruction], src_pipe: PipeType, dst_pipe: PipeType,
-                             producer_src: bool, producer_dst: bool, consumer_src: bool, consumer_dst: bool, 
-                             buf_name: str):
-        self.insts = list(instructions)
-        self.new_insts: List[Union[Instruction, "AutosyncNode"]] = []
-        self.src_pipe = src_pipe
-        self.dst_pipe = dst_pipe
-        self.producer_src = producer_src
-        self.producer_dst = producer_dst
-        self.consumer_src = consumer_src
-        self.consumer_dst = consumer_dst
-        self.buf_idx = 0
-        self.buf_name = buf_name
-        self.events_to_be_created: List[str] = []
-        self.has_inst = False
-        self.is_mixed_scope = False
-        self.is_single_buffer = False 
-        self.used_pipes: Set[PipeType] = set()
-        self.pre_process()
-        self.summarize_used_pipes()
-
-    def assign_buf_indices(self):
-        for inst in self.new_insts:
-            if isinstance(inst, AutosyncNode):
-                if self.is_mixed_scope:
-                    inst.buf_idx = self.buf_idx + 1 
-                else:
-                    inst.buf_idx = self.buf_idx
-                inst.assign_buf_indices()
-        return self 
-
-    def summarize_used_pipes(self):
-        used = self.used_pipes
-        op_to_pipe = _OPNAME_TO_PIPE
-        src_pipe = self.src_pipe
-        dst_pipe = self.dst_pipe
-        producer_src = self.producer_src
-        producer_dst = self.producer_dst
-        consumer_src = self.consumer_src
-        consumer_dst = self.consumer_dst
-        is_single_buffer = self.is_single_buffer
-        for inst in self.new_insts:
-            if isinstance(inst, AutosyncNode):
-                if inst.used_pipes:
-                    used.update(inst.used_pipes)
-                if inst.is_single_buffer:
-                    is_single_buffer = True
-                continue
-            if not isinstance(inst, Instruction):
-                continue
-            pipe = op_to_pipe.get(inst.opname)
-            if pipe is not None and pipe in [self.src_pipe, self.dst_pipe]:
-                used.add(pipe)
-                self.has_inst = True
-                if pipe == src_pipe:
-                    if producer_src:
-                        src = inst.kwargs.get("src")
-                        if isinstance(src, Tensor):
-                            source_buf = src.source_buf
-                            if source_buf is None or isinstance(source_buf, Tensor):
-                                is_single_buffer = True
-                    if not is_single_buffer and producer_dst:
-                        dst = inst.kwargs.get("dst")
-                        if isinstance(dst, Tensor):
-                            source_buf = dst.source_buf
-                            if source_buf is None or isinstance(source_buf, Tensor):
-                                is_single_buffer = True
-                elif pipe == dst_pipe:
-                    if consumer_src:
-                        src = inst.kwargs.get("src")
-                        if isinstance(src, Tensor):
-                            source_buf = src.source_buf
-                            if source_buf is None or isinstance(source_buf, Tensor):
-                                is_single_buffer = True
-                    if not is_single_buffer and consumer_dst:
-                        dst = inst.kwargs.get("dst")
-                        if isinstance(dst, Tensor):
-                            source_buf = dst.source_buf
-                            if source_buf is None or isinstance(source_buf, Tensor):
-                                is_single_buffer = True
-        self.is_single_buffer = is_single_buffer
-        self.is_mixed_scope = len(used)==2 and self.has_inst
-
-    def pre_process(self):
-        insts = self.insts
-        new_insts = self.new_insts
-        n = len(insts)
-        if n == 0:
-            return
-        start_loop = "start_loop"
-        end_loop = "end_loop"
-        if_starts = ("start_if", "start_elif", "start_else")
-        end_if = "end_if"
-
-        def _find_loop_end(idx: int) -> Optional[int]:
-            depth = 1
-            while idx < n:
-                op = insts[idx].opname
-                if op == start_loop:
-                    depth += 1
-                elif op == end_loop:
-                    depth -= 1
-                    if depth == 0:
-                        return idx
-                idx += 1
-            return None
-
-        def _find_if_end(idx: int) -> Optional[int]:
-            depth = 1
-            while idx < n:
-                op = insts[idx].opname
-                if op in if_starts:
-                    depth += 1
-                elif op == end_if:
-                    depth -= 1
-                    if depth == 0:
-                        return idx
-                idx += 1
-            return None
-
-        i = 0
-        while i < n:
-            if i==0 and (insts[i].opname==start_loop or insts[i].opname in if_starts):
-                new_insts.append(insts[i])
-                i += 1
-                continue
-            inst = insts[i]
-            op = inst.opname
-            if op == start_loop:
-                end_idx = _find_loop_end(i + 1)
-                if end_idx is None:
-                    new_insts.extend(insts[i:])
-                    break
-                body = insts[i:end_idx + 1]
-                sub_insts = AutosyncNode(
-                    body,
-                    self.src_pipe,
-                    self.dst_pipe,
-                    self.producer_src,
-                    self.producer_dst,
-                    self.consumer_src,
-                    self.consumer_dst,
-                    self.buf_name,
-                )
-                new_insts.append(sub_insts)
-                i = end_idx + 1
-                continue
-            if op in if_starts:
-                end_idx = _find_if_end(i + 1)
-                if end_idx is None:
-                    new_insts.extend(insts[i:])
-                    break
-                body = insts[i:end_idx + 1]
-                sub_insts = AutosyncNode(
-                    body,
-                    self.src_pipe,
-                    self.dst_pipe,
-                    self.producer_src,
-                    self.producer_dst,
-                    self.consumer_src,
-                    self.consumer_dst,
-                    self.buf_name,
-                )
-                new_insts.append(sub_insts)
-                i = end_idx + 1
-                continue
-            new_insts.append(inst)
-            i += 1
-    
-    def insert_auto_sync_inst(self):
-        if not self.is_mixed_scope:
-            return self
-        
-        if self.is_single_buffer:
-            event_valid: Union[SEvent, DEvent] = object.__new__(SEvent)
-            event_valid.name = f"_tmp_sevent_valid_{self.buf_name}_{self.buf_idx}"
-            event_valid.src_pipe = self.src_pipe
-            event_valid.dst_pipe = self.dst_pipe
-            event_valid.idx = 9999
-            self.events_to_be_created.append(event_valid.name)
-            event_ready: Union[SEvent, DEvent] = object.__new__(SEvent)
-            event_ready.name = f"_tmp_sevent_ready_{self.buf_name}_{self.buf_idx}"
-            event_ready.src_pipe = self.src_pipe
-            event_ready.dst_pipe = self.dst_pipe
-            event_ready.idx = 9998
-            self.events_to_be_created.append(event_ready.name)
-        else:
-            event_valid: Union[SEvent, DEvent] = object.__new__(DEvent)
-            event_valid.name = f"_tmp_devent_valid_{self.buf_name}_{self.buf_idx}"
-            event_valid.src_pipe = self.src_pipe
-            event_valid.dst_pipe = self.dst_pipe
-            event_valid.idx = 9999
-            self.events_to_be_created.append(event_valid.name)
-            event_ready: Union[SEvent, DEvent] = object.__new__(DEvent)
-            event_ready.name = f"_tmp_devent_ready_{self.buf_name}_{self.buf_idx}"
-            event_ready.src_pipe = self.src_pipe
-            event_ready.dst_pipe = self.dst_pipe
-            event_ready.idx = 9998
-            self.events_to_be_created.append(event_ready.name)
-
-        valid_wait_inst = Instruction(opname="event_wait", event=event_valid)
-        valid_set_inst = Instruction(opname="event_set", event=event_valid)
-        ready_wait_inst = Instruction(opname="event_wait", event=event_ready)
-        ready_set_inst = Instruction(opname="event_set", event=event_ready)
-
-
-        declared = False 
-        changed = False
-        result: List[Instruction | AutosyncNode] = []
-        for i in self.new_insts:
-            if isinstance(i, AutosyncNode):
-                if self.src_pipe in i.used_pipes and not declared:
-                    result.append(valid_wait_inst)
-                    declared = True
-                elif self.dst_pipe in i.used_pipes and declared and not changed:
-                    result.append(ready_set_inst)
-                    result.append(ready_wait_inst)
-                    declared = False
-                    changed = True
-                elif self.src_pipe in i.used_pipes and changed and not declared:
-                    result.append(valid_set_inst)
-                    declared = True
-                    changed = False
-                result.append(i)
-            else:
-                if not isinstance(i, Instruction):
-                    raise TypeError("Expected Instruction or AutosyncNode")
-                pipe = _OPNAME_TO_PIPE.get(i.opname)
-                if pipe is not None:
-                    if pipe == self.src_pipe and not declared:
-                        result.append(valid_wait_inst)
-                        declared = True
-                    elif pipe == self.dst_pipe and declared and not changed:
-                        result.append(ready_set_inst)
-                        result.append(ready_wait_inst)
-                        declared = False
-                        changed = True
-                    elif pipe == self.src_pipe and changed and not declared:
-                        result.append(valid_set_inst)
-                        declared = True
-                        changed = False
-                result.append(i)
-            
-        if changed:
-            if result[-1].opname not in ['end_loop', 'end_if']:
-                result.append(ready_set_inst)
-            else:
-                result.insert(-1, valid_set_inst)
-        if declared:
-            if result[-1].opname not in ['end_loop', 'end_if']:
-                result.append(ready_set_inst)
-                result.append(ready_wait_inst)
-                result.append(valid_set_inst)
-            else:
-                result.insert(-1, ready_set_inst)
-                result.insert(-1, ready_wait_inst)
-                result.insert(-1, valid_set_inst)
-            print('WARNING: NOT balanced auto_sync events, please check the code logic!')
-        
-        self.new_insts = result
-        return self
-
-    def get_instructions(self):
-        result: List[Instruction | AutosyncNode] = []
-        for i in self.new_insts:
-            if isinstance(i, AutosyncNode):
-                result.extend(i.insert_auto_sync_inst().get_instructions().new_insts)
-                self.events_to_be_created.extend(i.events_to_be_created)
-            else:
-                result.append(i)
-        # return result
-        self.new_insts = result
-        return self 
-
-    def create_events(self, full_instructions: List[Instruction]):
-        for name in set(self.events_to_be_created):
-            if name.startswith("_tmp_sevent"):
-                event: Union[SEvent, DEvent] = object.__new__(SEvent)
-            else:
-                event = object.__new__(DEvent)
-
-            if 'valid' in name:
-                event.src_pipe = self.dst_pipe
-                event.dst_pipe = self.src_pipe
-                event.preset = True
-            else:
-                event.src_pipe = self.src_pipe
-                event.dst_pipe = self.dst_pipe
-                event.preset = False
-            event.name = name
-            event.idx = 9999 if 'valid' in name else 9998
-
-            if name.startswith("_tmp_sevent"):
-                event_create_inst = Instruction(opname="create_sevent", val=event)
-            else:
-                event_create_inst = Instruction(opname="create_devent", val=event)
-            full_instructions.append(event_create_inst)
-        return self.new_insts
-
-
-def _insert_autosync_node(instructions: List[Instruction], mode: Literal['cube', 'vec']) -> Tuple[List[Instruction], List[Instruction]]:
-    event_creation: List[Instruction] = []
-    if mode == 'vec':
-        instructions = AutosyncNode(instructions, Pipe.MTE2, Pipe.V, False, True, False, False, 'ubin').assign_buf_indices().insert_auto_sync_inst().get_instructions().create_events(event_creation)
-        instructions = AutosyncNode(instructions, Pipe.V, Pipe.MTE3, False, False, True, False, 'ubout').assign_buf_indices().insert_auto_sync_inst().get_instructions().create_events(event_creation)
-    else:
-        instructions = AutosyncNode(instructions, Pipe.MTE2, Pipe.MTE1, False, True, False, False, 'l1').assign_buf_indices().insert_auto_sync_inst().get_instructions().create_events(event_creation)
-        instructions = AutosyncNode(instructions, Pipe.MTE1, Pipe.M, False, True, False, False, 'l0').assign_buf_indices().insert_auto_sync_inst().get_instructions().create_events(event_creation)
-        instructions = AutosyncNode(instructions, Pipe.M, Pipe.FIX, False, False, True, False, 'fix').assign_buf_indices().insert_auto_sync_inst().get_instructions().create_events(event_creation)
-    return instructions, event_creation
-
-
-def insert_auto_sync(instructions: List[Instruction], mode: Literal['cube', 'vec']) -> List[Instruction]:
-    if mode not in ['cube', 'vec']:
-        raise ValueError("mode must be either 'cube' or 'vec'")
-    
-    insts = list(instructions)
-    if not insts:
-        return insts
-    result: List[Instruction] = []
-    tmp_insts: List[Instruction] = []
-    curr_inst_list = result
-
-    for i in insts:
-        if i.opname==_AUTO_SYNC_START:
-            curr_inst_list = tmp_insts
-        curr_inst_list.append(i)
-        if i.opname==_AUTO_SYNC_END:
-            tmp_insts_with_autosync, event_creation = _insert_autosync_node(tmp_insts, mode)
-            result.extend(tmp_insts_with_autosync)
-            result = event_creation + result
-            curr_inst_list = result
-            tmp_insts = []
-    return result
+from typing import Dict, List, Optional, Set, Tuple, Literal, Union
+from functools import lru_cache
+
+from .. import globvars
+from .asc_utils import build_expr_state, should_skip_inst
+from ..utils.events import DEvent, SEvent
+from .asc_handlers import build_handlers
+from ..utils.Tensor import Tensor
+from ..utils.instruction import Instruction
+from ..utils.pipe import Pipe, PipeType
+
+
+_AUTO_SYNC_START = "start_auto_sync"
+_AUTO_SYNC_END = "end_auto_sync"
+_EXPLICIT_VEC_OPNAMES = {
+    "abs",
+    "add",
+    "adds",
+    "axpy",
+    "brcb",
+    "cadd",
+    "call_micro",
+    "cast",
+    "cgadd",
+    "cgmax",
+    "cgmin",
+    "cmax",
+    "cmin",
+    "compare",
+    "compare_scalar",
+    "cpadd",
+    "div",
+    "dup",
+    "exp",
+    "gather",
+    "gm_to_ub_pad",
+    "ln",
+    "lrelu",
+    "mergesort4",
+    "mergesort_2seq",
+    "mul",
+    "muladddst",
+    "muls",
+    "rec",
+    "relu",
+    "reset_mask",
+    "rsqrt",
+    "scatter",
+    "select",
+    "set_atomic_type",
+    "set_cmpmask",
+    "set_mask",
+    "sort32",
+    "sqrt",
+    "sub",
+    "ub_to_gm_pad",
+    "ub_to_ub",
+    "vand",
+    "vmax",
+    "vmaxs",
+    "vmin",
+    "vmins",
+    "vnot",
+    "vor",
+}
+
+
+@lru_cache(maxsize=1)
+def get_pipe_opnames() -> Dict[str, Set[str]]:
+    pipe_opnames: Dict[str, Set[str]] = {
+        str(Pipe.MTE2): {"gm_to_l1_nd2nz", "gm_to_ub_pad"},
+        str(Pipe.MTE1): {"l1_to_l0"},
+        str(Pipe.M): {"mmad"},
+        str(Pipe.FIX): {"l0c_to_gm_nz2nd", "l0c_to_l1"},
+        str(Pipe.MTE3): {"ub_to_gm_pad"},
+    }
+    vec_pipe_ops = set(_EXPLICIT_VEC_OPNAMES)
+    for opnames in pipe_opnames.values():
+        vec_pipe_ops -= opnames
+    pipe_opnames[str(Pipe.V)] = vec_pipe_ops
+    return pipe_opnames
+
+
+PIPE_OPNAMES = get_pipe_opnames()
+_PIPE_NAME_TO_TYPE: Dict[str, PipeType] = {
+    str(Pipe.MTE2): Pipe.MTE2,
+    str(Pipe.MTE1): Pipe.MTE1,
+    str(Pipe.M): Pipe.M,
+    str(Pipe.FIX): Pipe.FIX,
+    str(Pipe.MTE3): Pipe.MTE3,
+    str(Pipe.V): Pipe.V,
+}
+_OPNAME_TO_PIPE: Dict[str, PipeType] = {
+    opname: _PIPE_NAME_TO_TYPE[pipe_name]
+    for pipe_name, opnames in PIPE_OPNAMES.items()
+    if pipe_name in _PIPE_NAME_TO_TYPE
+    for opname in opnames
+}
+_EVENT_TYPES = (SEvent, DEvent)
+_EVENT_OPNAMES = ("event_set", "event_wait", "event_setall", "event_release")
+
+
+_START_LOOP = "start_loop"
+_END_LOOP = "end_loop"
+_IF_STARTS = ("start_if", "start_elif", "start_else")
+_END_IF = "end_if"
+
+
+class SyncBlock:
+    """A loop or if/elif/else branch of an auto-sync region, from its start instruction to its end."""
+
+    __slots__ = ("children", "used_pipes", "has_inst", "is_single_buffer", "is_mixed_scope")
+
+    def __init__(self, children: List[Union[Instruction, "SyncBlock"]]):
+        self.children = children
+        # Per pipe pair; reset by AutosyncPass.summarize_used_pipes.
+        self.used_pipes: Set[PipeType] = set()
+        self.has_inst = False
+        self.is_single_buffer = False
+        self.is_mixed_scope = False
+
+
+def _match_blocks(instructions: List[Instruction]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Map each start_loop / start_if|elif|else index to the index of its end, in one pass.
+
+    Loop and if brackets are matched independently: start_micro_loop is not a loop start
+    here, and every if/elif/else branch closes at its own end_if.
+    """
+    loop_ends: Dict[int, int] = {}
+    if_ends: Dict[int, int] = {}
+    loop_stack: List[int] = []
+    if_stack: List[int] = []
+    for idx, inst in enumerate(instructions):
+        op = inst.opname
+        if op == _START_LOOP:
+            loop_stack.append(idx)
+        elif op == _END_LOOP:
+            if loop_stack:
+                loop_ends[loop_stack.pop()] = idx
+        elif op in _IF_STARTS:
+            if_stack.append(idx)
+        elif op == _END_IF:
+            if if_stack:
+                if_ends[if_stack.pop()] = idx
+    return loop_ends, if_ends
+
+
+def _build_block(
+    instructions: List[Instruction],
+    lo: int,
+    hi: int,
+    loop_ends: Dict[int, int],
+    if_ends: Dict[int, int],
+) -> SyncBlock:
+    children: List[Union[Instruction, SyncBlock]] = []
+    i = lo
+    while i < hi:
+        inst = instructions[i]
+        op = inst.opname
+        # The block's own start instruction stays a plain child.
+        if i == lo or (op != _START_LOOP and op not in _IF_STARTS):
+            children.append(inst)
+            i += 1
+            continue
+        end_idx = (loop_ends if op == _START_LOOP else if_ends).get(i)
+        if end_idx is None or end_idx >= hi:
+            children.extend(instructions[i:hi])
+            break
+        children.append(_build_block(instructions, i, end_idx + 1, loop_ends, if_ends))
+        i = end_idx + 1
+    return SyncBlock(children)
+
+
+def build_sync_tree(instructions: List[Instruction]) -> SyncBlock:
+    loop_ends, if_ends = _match_blocks(instructions)
+    return _build_block(instructions, 0, len(instructions), loop_ends, if_ends)
+
+
+def _flatten(block: SyncBlock, out: List[Instruction]) -> List[Instruction]:
+    for child in block.children:
+        if isinstance(child, SyncBlock):
+            _flatten(child, out)
+        else:
+            out.append(child)
+    return out
+
+
+def _is_single_buffer_operand(value: object) -> bool:
+    if not isinstance(value, Tensor):
+        return False
+    source_buf = value.source_buf
+    return source_buf is None or isinstance(source_buf, Tensor)
+
+
+class AutosyncPass:
+    """Event insertion for one producer -> consumer pipe pair over a shared SyncBlock tree.
+
+    The tree is edited in place, so the next pipe pair sees the events inserted by this one.
+    """
+
+    def __init__(self, src_pipe: PipeType, dst_pipe: PipeType,
+                 producer_src: bool, producer_dst: bool, consumer_src: bool, consumer_dst: bool,
+                 buf_name: str):
+        self.src_pipe = src_pipe
+        self.dst_pipe = dst_pipe
+        self.producer_src = producer_src
+        self.producer_dst = producer_dst
+        self.consumer_src = consumer_src
+        self.consumer_dst = consumer_dst
+        self.buf_name = buf_name
+        self.events_to_be_created: List[str] = []
+
+    def run(self, root: SyncBlock, full_instructions: List[Instruction]) -> SyncBlock:
+        self.summarize_used_pipes(root)
+        self.insert_auto_sync_inst(root, 0)
+        self.create_events(full_instructions)
+        return root
+
+    def summarize_used_pipes(self, block: SyncBlock) -> None:
+        used: Set[PipeType] = set()
+        has_inst = False
+        is_single_buffer = False
+        op_to_pipe = _OPNAME_TO_PIPE
+        src_pipe = self.src_pipe
+        dst_pipe = self.dst_pipe
+        for inst in block.children:
+            if isinstance(inst, SyncBlock):
+                self.summarize_used_pipes(inst)
+                if inst.used_pipes:
+                    used.update(inst.used_pipes)
+                if inst.is_single_buffer:
+                    is_single_buffer = True
+                continue
+            pipe = op_to_pipe.get(inst.opname)
+            if pipe is None or pipe not in (src_pipe, dst_pipe):
+                continue
+            used.add(pipe)
+            has_inst = True
+            if pipe == src_pipe:
+                if self.producer_src and _is_single_buffer_operand(inst.kwargs.get("src")):
+                    is_single_buffer = True
+                if not is_single_buffer and self.producer_dst and _is_single_buffer_operand(inst.kwargs.get("dst")):
+                    is_single_buffer = True
+            elif pipe == dst_pipe:
+                if self.consumer_src and _is_single_buffer_operand(inst.kwargs.get("src")):
+                    is_single_buffer = True
+                if not is_single_buffer and self.consumer_dst and _is_single_buffer_operand(inst.kwargs.get("dst")):
+                    is_single_buffer = True
+        block.used_pipes = used
+        block.has_inst = has_inst
+        block.is_single_buffer = is_single_buffer
+        block.is_mixed_scope = len(used) == 2 and has_inst
+
+    def _make_event(self, kind: str, buf_idx: int, single: bool, idx: int) -> Union[SEvent, DEvent]:
+        event: Union[SEvent, DEvent] = object.__new__(SEvent if single else DEvent)
+        prefix = "_tmp_sevent" if single else "_tmp_devent"
+        event.name = f"{prefix}_{kind}_{self.buf_name}_{buf_idx}"
+        # Same pipes as the declaration in create_events: "valid" flows back from dst to src.
+        if kind == "valid":
+            event.src_pipe = self.dst_pipe
+            event.dst_pipe = self.src_pipe
+        else:
+            event.src_pipe = self.src_pipe
+            event.dst_pipe = self.dst_pipe
+        event.idx = idx
+        self.events_to_be_created.append(event.name)
+        return event
+
+    def insert_auto_sync_inst(self, block: SyncBlock, buf_idx: int) -> None:
+        # Parents are handled before children so event names are collected in pre-order.
+        if block.is_mixed_scope:
+            block.children = self._sync_children(block, buf_idx)
+        child_buf_idx = buf_idx + 1 if block.is_mixed_scope else buf_idx
+        for child in block.children:
+            if isinstance(child, SyncBlock):
+                self.insert_auto_sync_inst(child, child_buf_idx)
+
+    def _sync_children(self, block: SyncBlock, buf_idx: int) -> List[Union[Instruction, SyncBlock]]:
+        event_valid = self._make_event("valid", buf_idx, block.is_single_buffer, 9999)
+        event_ready = self._make_event("ready", buf_idx, block.is_single_buffer, 9998)
+        valid_wait_inst = Instruction(opname="event_wait", event=event_valid)
+        valid_set_inst = Instruction(opname="event_set", event=event_valid)
+        ready_wait_inst = Instruction(opname="event_wait", event=event_ready)
+        ready_set_inst = Instruction(opname="event_set", event=event_ready)
+
+        declared = False
+        changed = False
+        result: List[Union[Instruction, SyncBlock]] = []
+        for i in block.children:
+            if isinstance(i, SyncBlock):
+                uses_src = self.src_pipe in i.used_pipes
+                uses_dst = self.dst_pipe in i.used_pipes
+            else:
+                pipe = _OPNAME_TO_PIPE.get(i.opname)
+                uses_src = pipe is not None and pipe == self.src_pipe
+                uses_dst = pipe is not None and pipe == self.dst_pipe
+            if uses_src and not declared:
+                result.append(valid_wait_inst)
+                declared = True
+            elif uses_dst and declared and not changed:
+                result.append(ready_set_inst)
+                result.append(ready_wait_inst)
+                declared = False
+                changed = True
+            elif uses_src and changed and not declared:
+                result.append(valid_set_inst)
+                declared = True
+                changed = False
+            result.append(i)
+
+        if changed:
+            if result[-1].opname not in ['end_loop', 'end_if']:
+                result.append(ready_set_inst)
+            else:
+                result.insert(-1, valid_set_inst)
+        if declared:
+            if result[-1].opname not in ['end_loop', 'end_if']:
+                result.append(ready_set_inst)
+                result.append(ready_wait_inst)
+                result.append(valid_set_inst)
+            else:
+                result.insert(-1, ready_set_inst)
+                result.insert(-1, ready_wait_inst)
+                result.insert(-1, valid_set_inst)
+            print('WARNING: NOT balanced auto_sync events, please check the code logic!')
+        return result
+
+    def create_events(self, full_instructions: List[Instruction]) -> None:
+        for name in set(self.events_to_be_created):
+            if name.startswith("_tmp_sevent"):
+                event: Union[SEvent, DEvent] = object.__new__(SEvent)
+            else:
+                event = object.__new__(DEvent)
+
+            if 'valid' in name:
+                event.src_pipe = self.dst_pipe
+                event.dst_pipe = self.src_pipe
+                event.preset = True
+            else:
+                event.src_pipe = self.src_pipe
+                event.dst_pipe = self.dst_pipe
+                event.preset = False
+            event.name = name
+            event.idx = 9999 if 'valid' in name else 9998
+
+            if name.startswith("_tmp_sevent"):
+                event_create_inst = Instruction(opname="create_sevent", val=event)
+            else:
+                event_create_inst = Instruction(opname="create_devent", val=event)
+            full_instructions.append(event_create_inst)
+
+
+def _event_name(inst: Instruction) -> str:
+    return str(getattr(inst.kwargs.get("event", None), "name", ""))
+
+
+def _event_pipe(inst: Instruction) -> Optional[PipeType]:
+    # Pipe that issues the set/wait, as in the event's template arguments.
+    event = inst.kwargs.get("event", None)
+    if inst.opname == "event_set":
+        return getattr(event, "src_pipe", None)
+    if inst.opname == "event_wait":
+        return getattr(event, "dst_pipe", None)
+    return None
+
+
+def _block_summary(block: SyncBlock) -> Tuple[Set[PipeType], Set[str]]:
+    """Pipes that issue work inside `block` and the events it touches."""
+    pipes: Set[PipeType] = set()
+    names: Set[str] = set()
+    for child in block.children:
+        if isinstance(child, SyncBlock):
+            child_pipes, child_names = _block_summary(child)
+            pipes |= child_pipes
+            names |= child_names
+        elif child.opname in _EVENT_OPNAMES:
+            names.add(_event_name(child))
+        else:
+            pipe = _OPNAME_TO_PIPE.get(child.opname)
+            if pipe is not None:
+                pipes.add(pipe)
+    return pipes, names
+
+
+class SyncEliminator:
+    """Drops auto-sync event_set/event_wait pairs whose ordering other events already imply.
+
+    An event qualifies when it has no preset and each of its sets is followed by its wait in the
+    same block, with nothing touching the event in between: the pair then always runs as a unit,
+    the wait consumes that set, and removing the pair leaves the counters of the rest matched.
+    Qualifying user events (all their ops inside the region) order pipes as well, but only
+    auto-sync pairs are removed. Happens-before is tracked per block with vector clocks over
+    the pipes' work; nested blocks may run zero times, so they only advance the clocks of the
+    pipes they use.
+    """
+
+    def __init__(self, event_creation: List[Instruction], stream_event_ops: Dict[str, int]):
+        self.event_creation = event_creation
+        # Event op count per name over the whole stream before auto-sync, for user events.
+        self.stream_event_ops = stream_event_ops
+        self.removed = 0
+
+    def run(self, root: SyncBlock) -> SyncBlock:
+        self.auto_names = {inst.kwargs["val"].name for inst in self.event_creation}
+        self.paired = self._paired_events(root)
+        self._eliminate(root)
+        if self.removed:
+            _, used = _block_summary(root)
+            self.event_creation[:] = [inst for inst in self.event_creation if inst.kwargs["val"].name in used]
+        return root
+
+    def _collect_ops(self, block: SyncBlock, out: Dict[str, List[Tuple[SyncBlock, int]]]) -> None:
+        for idx, child in enumerate(block.children):
+            if isinstance(child, SyncBlock):
+                self._collect_ops(child, out)
+            elif child.opname in _EVENT_OPNAMES:
+                out.setdefault(_event_name(child), []).append((block, idx))
+
+    def _paired_events(self, root: SyncBlock) -> Set[str]:
+        ops: Dict[str, List[Tuple[SyncBlock, int]]] = {}
+        self._collect_ops(root, ops)
+        preset = {inst.kwargs["val"].name for inst in self.event_creation if inst.kwargs["val"].preset}
+        paired: Set[str] = set()
+        for name, positions in ops.items():
+            if name in self.auto_names:
+                if name in preset:
+                    continue
+            else:
+                event = positions[0][0].children[positions[0][1]].kwargs["event"]
+                if getattr(event, "preset", True) or self.stream_event_ops.get(name, 0) != len(positions):
+                    continue
+            if len(positions) % 2 == 0 and all(
+                self._is_pair(name, set_pos, wait_pos)
+                for set_pos, wait_pos in zip(positions[::2], positions[1::2])
+            ):
+                paired.add(name)
+        return paired
+
+    @staticmethod
+    def _is_pair(name: str, set_pos: Tuple[SyncBlock, int], wait_pos: Tuple[SyncBlock, int]) -> bool:
+        block, set_idx = set_pos
+        children = block.children
+        if wait_pos[0] is not block or children[set_idx].opname != "event_set":
+            return False
+        if children[wait_pos[1]].opname != "event_wait":
+            return False
+        return not any(
+            isinstance(child, SyncBlock) and name in _block_summary(child)[1]
+            for child in children[set_idx + 1:wait_pos[1]]
+        )
+
+    def _eliminate(self, block: SyncBlock) -> None:
+        # steps[p]: work items pipe p issued in this block so far (1: everything before the block).
+        steps: Dict[PipeType, int] = {}
+        # known[q][p]: how many of p's steps pipe q is ordered after.
+        known: Dict[PipeType, Dict[PipeType, int]] = {}
+        pending: Dict[str, Tuple[int, Dict[PipeType, int]]] = {}
+        drop: Set[int] = set()
+
+        def clock(pipe: PipeType) -> Dict[PipeType, int]:
+            own = known.setdefault(pipe, {})
+            own[pipe] = steps.get(pipe, 1)
+            return own
+
+        for idx, child in enumerate(block.children):
+            if isinstance(child, SyncBlock):
+                self._eliminate(child)
+                pipes, names = _block_summary(child)
+                for pipe in pipes:
+                    steps[pipe] = steps.get(pipe, 1) + 1
+                for name in names:
+                    pending.pop(name, None)
+                continue
+            if child.opname not in _EVENT_OPNAMES:
+                pipe = _OPNAME_TO_PIPE.get(child.opname)
+                if pipe is not None:
+                    steps[pipe] = steps.get(pipe, 1) + 1
+                continue
+            name = _event_name(child)
+            pipe = _event_pipe(child)
+            if pipe is None or name not in self.paired:
+                continue
+            if child.opname == "event_set":
+                pending[name] = (idx, dict(clock(pipe)))
+                continue
+            entry = pending.pop(name, None)
+            if entry is None:
+                continue
+            set_idx, sent = entry
+            waiter = clock(pipe)
+            if name in self.auto_names and all(waiter.get(src, 0) >= step for src, step in sent.items()):
+                drop.update((set_idx, idx))
+                continue
+            for src, step in sent.items():
+                if step > waiter.get(src, 0):
+                    waiter[src] = step
+
+        if drop:
+            block.children = [child for idx, child in enumerate(block.children) if idx not in drop]
+            self.removed += len(drop) // 2
+
+
+
+def _insert_autosync_node(
+    instructions: List[Instruction],
+    mode: Literal['cube', 'vec'],
+    stream_event_ops: Dict[str, int],
+) -> Tuple[List[Instruction], List[Instruction]]:
+    event_creation: List[Instruction] = []
+    # One tree for every pipe pair: inserted events are plain children, so the block structure is shared.
+    root = build_sync_tree(instructions)
+    if mode == 'vec':
+        AutosyncPass(Pipe.MTE2, Pipe.V, False, True, False, False, 'ubin').run(root, event_creation)
+        AutosyncPass(Pipe.V, Pipe.MTE3, False, False, True, False, 'ubout').run(root, event_creation)
+    else:
+        AutosyncPass(Pipe.MTE2, Pipe.MTE1, False, True, False, False, 'l1').run(root, event_creation)
+        AutosyncPass(Pipe.MTE1, Pipe.M, False, True, False, False, 'l0').run(root, event_creation)
+        AutosyncPass(Pipe.M, Pipe.FIX, False, False, True, False, 'fix').run(root, event_creation)
+    if globvars.eliminate_redundant_sync:
+        SyncEliminator(event_creation, stream_event_ops).run(root)
+    return _flatten(root, []), event_creation
+
+
+def insert_auto_sync(instructions: List[Instruction], mode: Literal['cube', 'vec']) -> List[Instruction]:
+    if mode not in ['cube', 'vec']:
+        raise ValueError("mode must be either 'cube' or 'vec'")
+    
+    insts = list(instructions)
+    if not insts:
+        return insts
+    stream_event_ops: Dict[str, int] = {}
+    for i in insts:
+        if i.opname in _EVENT_OPNAMES:
+            name = _event_name(i)
+            stream_event_ops[name] = stream_event_ops.get(name, 0) + 1
+    result: List[Instruction] = []
+    tmp_insts: List[Instruction] = []
+    curr_inst_list = result
+
+    for i in insts:
+        if i.opname==_AUTO_SYNC_START:
+            curr_inst_list = tmp_insts
+        curr_inst_list.append(i)
+        if i.opname==_AUTO_SYNC_END:
+            tmp_insts_with_autosync, event_creation = _insert_autosync_node(tmp_insts, mode, stream_event_ops)
+            result.extend(tmp_insts_with_autosync)
+            result = event_creation + result
+            curr_inst_list = result
+            tmp_insts = []
+    return result
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import types
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .. import globvars
+
+# Bump when the cache entry layout changes.
+_CACHE_FORMAT = 1
+_ATOMIC_TYPES = (type(None), bool, int, float, str)
+
+
+# ---------------------------
+# Fingerprinting
+# ---------------------------
+
+def _encode(value: Any, memo: Dict[int, int], keep: List[Any], out: List[str]) -> None:
+    """Append a structural encoding of `value`; repeated objects become back-references."""
+    if isinstance(value, _ATOMIC_TYPES):
+        out.append(repr(value))
+        return
+    if isinstance(value, (list, tuple)):
+        out.append("[" if isinstance(value, list) else "(")
+        for item in value:
+            _encode(item, memo, keep, out)
+        out.append("]")
+        return
+    if isinstance(value, dict):
+        out.append("{")
+        for key, item in value.items():
+            out.append(repr(key))
+            _encode(item, memo, keep, out)
+        out.append("}")
+        return
+    if isinstance(value, (set, frozenset)):
+        parts: List[str] = []
+        for item in value:
+            item_out: List[str] = []
+            _encode(item, memo, keep, item_out)
+            parts.append("".join(item_out))
+        out.append("<" + ",".join(sorted(parts)) + ">")
+        return
+    if isinstance(value, (type, types.FunctionType, types.MethodType, types.ModuleType)):
+        out.append(f"~{getattr(value, '__qualname__', getattr(value, '__name__', ''))}")
+        return
+    ref = memo.get(id(value))
+    if ref is not None:
+        # Identity matters to pruning/auto-sync (same Tensor object vs. an equal-looking one).
+        out.append(f"@{ref}")
+        return
+    memo[id(value)] = len(memo)
+    keep.append(value)
+    out.append(type(value).__qualname__)
+    state = getattr(value, "__dict__", None)
+    if not isinstance(state, dict):
+        state = _slot_state(value)
+    if state is None:
+        out.append(repr(value))
+        return
+    _encode(state, memo, keep, out)
+
+
+def _slot_state(value: Any) -> Any:
+    # Slotted objects have no __dict__. Prefer their own pickling state: Instruction leaves out
+    # its opcode there, which is only stable within one process.
+    if type(value).__getstate__ is not object.__getstate__:
+        return value.__getstate__()
+    slots = [name for cls in type(value).__mro__ for name in getattr(cls, "__slots__", ())]
+    if not slots:
+        return None
+    return {name: getattr(value, name) for name in slots if hasattr(value, name)}
+
+
+# Everything translate()/MicroModule.render_code() run: the parser itself, the micro renderer,
+# the value types whose names and C++ spellings end up in the code, and the global switches.
+_CODEGEN_SOURCES = ("parser", "micro", "utils", "globvars.py")
+
+
+@lru_cache(maxsize=1)
+def _codegen_digest() -> str:
+    # Source of the code generator, so disk entries written by an older translator never match.
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths: List[str] = []
+    for source in _CODEGEN_SOURCES:
+        source_path = os.path.join(package_dir, source)
+        if os.path.isfile(source_path):
+            paths.append(source_path)
+            continue
+        for root, dirs, files in os.walk(source_path):
+            dirs.sort()
+            paths.extend(os.path.join(root, filename) for filename in sorted(files) if filename.endswith(".py"))
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, package_dir).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def fingerprint(kind: str, *parts: Any) -> str:
+    """Hash of the translation inputs: opnames, kwargs structure and the device settings codegen reads."""
+    out: List[str] = [
+        f"v{_CACHE_FORMAT}",
+        kind,
+        _codegen_digest(),
+        str(globvars.device_type),
+        str(globvars.simplify_with_sympy),
+        str(globvars.plan_local_memory),
+        str(globvars.eliminate_redundant_sync),
+    ]
+    memo: Dict[int, int] = {}
+    keep: List[Any] = []
+    for part in parts:
+        _encode(part, memo, keep, out)
+    return hashlib.sha256("\x1f".join(out).encode("utf-8")).hexdigest()
+
+
+def fingerprint_instructions(instructions: Iterable[Any]) -> str:
+    return fingerprint("instructions", [(inst.opname, inst.kwargs) for inst in instructions])
+
+
+# ---------------------------
+# Cache storage
+# ---------------------------
+
+class TranslationCache:
+    """LRU of translated C++ text keyed by fingerprint, optionally backed by one JSON file per entry."""
+
+    def __init__(self, maxsize: int = 128, cache_dir: Optional[str] = None) -> None:
+        if isinstance(maxsize, bool) or not isinstance(maxsize, int):
+            raise TypeError(f"maxsize must be int, got: {type(maxsize)}")
+        if maxsize < 0:
+            raise ValueError(f"maxsize must be non-negative, got: {maxsize}")
+        if cache_dir is not None and not isinstance(cache_dir, str):
+            raise TypeError(f"cache_dir must be str or None, got: {type(cache_dir)}")
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key: str, value: Tuple[str, ...]) -> None:
+        if self.maxsize == 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Tuple[str, ...]]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        path = self._disk_path(key)
+        if path is not None and os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = None
+            if isinstance(data, list) and all(isinstance(item, str) for item in data):
+                value = tuple(data)
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Tuple[str, ...]) -> None:
+        self._remember(key, value)
+        path = self._disk_path(key)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(value), f)
+        os.replace(tmp_path, path)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_TRANSLATION_CACHE = TranslationCache()
+
+
+def get_translation_cache() -> TranslationCache:
+    # The disk location follows globvars so it can be switched per session.
+    _TRANSLATION_CACHE.cache_dir = globvars.translation_cache_dir
+    return _TRANSLATION_CACHE
+
+
+def clear_translation_cache() -> None:
+    """Drop in-memory entries; files under `globvars.translation_cache_dir` are left untouched."""
+    _TRANSLATION_CACHE.clear()
@@ -1,6 +1,17 @@
+from ..asc_memplan import arena_name
+from .common import position_to_cpp
+
+
 def handle_reset_cache(inst, helper, expr_map) -> None:
     helper("pipe_ptr->Reset();")
     helper("OccupyMMTE1Events();")
+    plan = helper.memory_plan
+    segment = plan.segment_for_reset(inst) if plan is not None else None
+    if segment is None:
+        return
+    for position, peak in segment.peak.items():
+        arena = arena_name(segment.index, position)
+        helper(f"LocalTensor<uint8_t> {arena} = AllocateLocalTensor<{position_to_cpp(position)}, uint8_t>({peak});")
 
 
 def handle_sim_print(inst, helper, expr_map) -> None:
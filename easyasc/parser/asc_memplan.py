@@ -0,0 +1,404 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.events import SEvent
+from ..utils.instruction import Instruction
+from ..utils.pipe import Pipe
+from ..utils.Tensor import DBuff, Tensor
+
+# Byte alignment of planned buffers per position (L0 buffers are fractal-aligned).
+_ALIGN_BYTES: Dict[str, int] = {"L1": 32, "UB": 32, "L0A": 512, "L0B": 512, "L0C": 512}
+_LOOP_STARTS = ("start_loop", "start_micro_loop")
+_IF_STARTS = ("start_if", "start_elif", "start_else")
+_EVENT_OPS = ("event_set", "event_wait", "event_setall", "event_release")
+_ALIAS_OPS = {
+    "get_buf": ("buf", "out"),
+    "slice_tensor": ("src", "out"),
+    "micro_slice_tensor": ("src", "out"),
+    "reinterpret": ("src", "dst"),
+}
+_PLAN_CACHE_SIZE = 8
+_PLAN_CACHE: "OrderedDict[int, Tuple[List[Instruction], int, MemoryPlan]]" = OrderedDict()
+
+
+class BufferSlot:
+    """Planned placement of one create_tensor/create_dbuf root buffer."""
+
+    __slots__ = ("name", "position", "arena", "offsets", "nbytes", "start", "end")
+
+    def __init__(self, name: str, position: object, nbytes: int, start: int, end: int, copies: int) -> None:
+        self.name = name
+        self.position = position
+        # Name of the per-segment, per-position byte arena the offsets index into.
+        self.arena = ""
+        # One byte offset per copy: a Tensor has one, a DBuff two.
+        self.offsets: Tuple[int, ...] = (0,) * copies
+        # Aligned size of a single copy.
+        self.nbytes = nbytes
+        # Live range as instruction indices, inclusive.
+        self.start = start
+        self.end = end
+
+    @property
+    def footprint(self) -> int:
+        return self.nbytes * len(self.offsets)
+
+    def __repr__(self) -> str:
+        return f"BufferSlot({self.name!r}, {self.position}, offsets={self.offsets}, nbytes={self.nbytes})"
+
+
+class SegmentPlan:
+    """Placements between two reset_cache instructions."""
+
+    def __init__(self, index: int, reset_inst: Optional[Instruction], top_level: bool) -> None:
+        self.index = index
+        self.reset_inst = reset_inst
+        # Arenas are declared right after reset_cache, so only segments opened at kernel
+        # scope are planned (later buffers could sit outside the arena's C++ scope).
+        self.plannable = reset_inst is not None and top_level
+        self.slots: Dict[str, BufferSlot] = {}
+        # Peak bytes per planned position; positions left to bump allocation are absent.
+        self.peak: Dict[str, int] = {}
+        # Positions with a runtime-sized buffer; all of their buffers keep bump allocation.
+        self.unplanned: Set[str] = set()
+        # Indices of kernel-scope barrier(Pipe.ALL) instructions, in order.
+        self.fences: List[int] = []
+
+
+class MemoryPlan:
+    """Liveness-based placement of local buffers, one SegmentPlan per reset_cache segment."""
+
+    def __init__(self, segments: List[SegmentPlan]) -> None:
+        self.segments = segments
+        self.slots: Dict[str, BufferSlot] = {}
+        for segment in segments:
+            self.slots.update(segment.slots)
+        self._by_reset = {id(seg.reset_inst): seg for seg in segments if seg.reset_inst is not None}
+
+    def slot(self, name: str) -> Optional[BufferSlot]:
+        return self.slots.get(name)
+
+    def segment_for_reset(self, inst: Instruction) -> Optional[SegmentPlan]:
+        return self._by_reset.get(id(inst))
+
+
+def arena_name(segment_idx: int, position: str) -> str:
+    return f"_arena_{segment_idx}_{position}"
+
+
+def _align(value: int, position: str) -> int:
+    align = _ALIGN_BYTES.get(position, 32)
+    return (value + align - 1) // align * align
+
+
+def _static_nbytes(inst: Instruction, val: object) -> Optional[int]:
+    # Only literal int shapes are planned: Var dims are evaluated at kernel run time.
+    shape = inst.kwargs.get("shape", None)
+    if shape is None:
+        shape = getattr(val, "shape", None)
+    if not isinstance(shape, (list, tuple)):
+        return None
+    numel = 1
+    for dim in shape:
+        if isinstance(dim, bool) or not isinstance(dim, int):
+            return None
+        numel *= dim
+    try:
+        elem_size = getattr(getattr(val, "dtype", None), "size", None)
+    except ValueError:
+        return None
+    if isinstance(elem_size, bool) or not isinstance(elem_size, int):
+        return None
+    return numel * elem_size
+
+
+def _collect_refs(value: object, out: List[str]) -> None:
+    if isinstance(value, (Tensor, DBuff)):
+        out.append(value.name)
+        return
+    if isinstance(value, dict):
+        for item in value.values():
+            _collect_refs(item, out)
+        return
+    if isinstance(value, (list, tuple, set)):
+        for item in value:
+            _collect_refs(item, out)
+
+
+def _loop_ends(instructions: List[Instruction]) -> Dict[int, int]:
+    ends: Dict[int, int] = {}
+    stack: List[int] = []
+    for idx, inst in enumerate(instructions):
+        if inst.opname in _LOOP_STARTS:
+            stack.append(idx)
+        elif inst.opname == "end_loop" and stack:
+            ends[stack.pop()] = idx
+    return ends
+
+
+def _fenced(first_end: int, second_start: int, fences: List[int]) -> bool:
+    """Whether a fence runs after instruction `first_end` and before `second_start`."""
+    pos = bisect_right(fences, first_end)
+    return pos < len(fences) and fences[pos] < second_start
+
+
+class _Ordering:
+    """Happens-before between the pipe accesses of two buffers, from SEvent set/wait pairs.
+
+    Scopes are the tuples of enclosing loop/if start indices. A fact is either LAST (the
+    last run of an instruction is ordered after the source access) or ALL (every run is).
+    A set that encloses no more blocks than the instruction before it on its pipe carries
+    LAST along; its wait, found by program order with nothing touching the event in
+    between, is LAST when both sit in the same block and ALL when they share no loop. An
+    ALL wait only counts if every run of the target access is preceded by a run of it.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: Dict[int, Tuple[int, ...]] = {}
+        self.loops: Set[int] = set()
+        self.pipes: Dict[int, str] = {}
+        self.accesses: Dict[str, List[int]] = {}
+        # Event sets per issuing pipe, and the wait each set is consumed by.
+        self.sets: Dict[str, List[int]] = {}
+        self.waits: Dict[int, int] = {}
+        self._last_op: Dict[str, Tuple[str, int]] = {}
+        self._memo: Dict[Tuple[int, bool, int], bool] = {}
+
+    def event(self, idx: int, inst: Instruction, scope: Tuple[int, ...]) -> None:
+        event = inst.kwargs.get("event", None)
+        name = str(getattr(event, "name", ""))
+        prev = self._last_op.get(name, None)
+        self._last_op[name] = (inst.opname, idx)
+        # DEvent ops alternate between two flags, so only SEvent waits are matched to sets.
+        if not isinstance(event, SEvent):
+            return
+        if inst.opname == "event_set":
+            pipe = str(event.src_pipe)
+            self.sets.setdefault(pipe, []).append(idx)
+        elif inst.opname == "event_wait" and prev is not None and prev[0] == "event_set":
+            pipe = str(event.dst_pipe)
+            self.waits[prev[1]] = idx
+        else:
+            return
+        self.scopes[idx] = scope
+        self.pipes[idx] = pipe
+
+    def access(self, root: str, idx: int, pipe: Optional[str], scope: Tuple[int, ...]) -> None:
+        # Ops with no known pipe cannot be ordered; -1 marks the buffer as such.
+        if pipe is None:
+            idx = -1
+        else:
+            self.scopes[idx] = scope
+            self.pipes[idx] = pipe
+        self.accesses.setdefault(root, []).append(idx)
+
+    def _shares_loop(self, a: int, b: int) -> bool:
+        return any(start in self.loops for start in set(self.scopes[a]) & set(self.scopes[b]))
+
+    def _prefix(self, a: int, b: int) -> bool:
+        """Whether instruction `a` sits in an enclosing block of `b` (or the same one)."""
+        outer, inner = self.scopes[a], self.scopes[b]
+        return inner[:len(outer)] == outer
+
+    def _reaches(self, fact: int, last: bool, target: int) -> bool:
+        key = (fact, last, target)
+        if key not in self._memo:
+            self._memo[key] = self._search(fact, last, target)
+        return self._memo[key]
+
+    def _search(self, fact: int, last: bool, target: int) -> bool:
+        if self.pipes[fact] == self.pipes[target] and fact < target:
+            # Same pipe: runs in issue order once no loop reruns `fact` after `target`.
+            if last and not self._shares_loop(fact, target):
+                return True
+            if not last and self._prefix(fact, target):
+                return True
+        for set_idx in self.sets.get(self.pipes[fact], []):
+            if set_idx <= fact or set_idx >= target or not self._prefix(set_idx, fact):
+                continue
+            wait_idx = self.waits.get(set_idx, None)
+            if wait_idx is None or wait_idx >= target:
+                continue
+            if self.scopes[wait_idx] == self.scopes[set_idx]:
+                if self._reaches(wait_idx, True, target):
+                    return True
+            elif not self._shares_loop(set_idx, wait_idx) and self._prefix(wait_idx, target):
+                if self._reaches(wait_idx, False, target):
+                    return True
+        return False
+
+    def ordered(self, first: str, second: str) -> bool:
+        """Whether every pipe access of buffer `first` runs before any access of `second`."""
+        for src in self.accesses.get(first, []):
+            for dst in self.accesses.get(second, []):
+                if src < 0 or dst < 0 or self._shares_loop(src, dst):
+                    return False
+                if not self._reaches(src, True, dst):
+                    return False
+        return True
+
+
+def _conflicts(a: "BufferSlot", b: "BufferSlot", fences: List[int], ordering: _Ordering) -> bool:
+    if a.start <= b.end and b.start <= a.end:
+        return True
+    first, second = (a, b) if a.end < b.start else (b, a)
+    if _fenced(first.end, second.start, fences):
+        return False
+    return not ordering.ordered(first.name, second.name)
+
+
+def _place(slots: List[BufferSlot], position: str, fences: List[int], ordering: _Ordering) -> int:
+    """First-fit by decreasing size over the conflict graph; returns the peak bytes."""
+    placed: List[Tuple[int, int, BufferSlot]] = []  # (offset, end_offset, slot)
+    peak = 0
+    for slot in sorted(slots, key=lambda item: (-item.footprint, item.start, item.name)):
+        busy = sorted(
+            (lo, hi)
+            for lo, hi, other in placed
+            if _conflicts(other, slot, fences, ordering)
+        )
+        offsets: List[int] = []
+        for _ in slot.offsets:
+            offset = 0
+            for lo, hi in busy:
+                if offset + slot.nbytes <= lo:
+                    break
+                offset = max(offset, _align(hi, position))
+            offsets.append(offset)
+            busy = sorted(busy + [(offset, offset + slot.nbytes)])
+            placed.append((offset, offset + slot.nbytes, slot))
+            peak = max(peak, offset + slot.nbytes)
+        slot.offsets = tuple(offsets)
+    return peak
+
+
+def plan_local_memory(instructions: Iterable[Instruction]) -> MemoryPlan:
+    """
+    Place create_tensor/create_dbuf buffers by live range instead of bump allocation.
+
+    A buffer lives from its create_* to the last instruction that uses it or a view of
+    it (get_buf/slice/reinterpret); a use inside a loop that the buffer was created
+    outside of keeps it alive until that loop ends. Two buffers share bytes only if their
+    live ranges are disjoint and the pipes are ordered between them: a kernel-scope
+    barrier(Pipe.ALL) runs in between, or SEvent set/wait chains (auto_sync's or
+    hand-written) order every pipe access of the first buffer before every access of
+    the second (see _Ordering).
+    """
+    from .asc_autosync import PIPE_OPNAMES
+
+    op_pipes = {opname: pipe for pipe, opnames in PIPE_OPNAMES.items() for opname in opnames}
+    instructions = list(instructions)
+    loop_ends = _loop_ends(instructions)
+    segments: List[SegmentPlan] = [SegmentPlan(0, None, True)]
+    roots: Dict[str, BufferSlot] = {}
+    alias: Dict[str, str] = {}
+    loop_stack: List[int] = []
+    blocks: List[int] = []
+    depth = 0
+    ordering = _Ordering()
+    pending: List[Tuple[SegmentPlan, BufferSlot]] = []
+
+    for idx, inst in enumerate(instructions):
+        opname = inst.opname
+        if opname == "reset_cache":
+            segments.append(SegmentPlan(len(segments), inst, depth == 0))
+            continue
+        if opname in _LOOP_STARTS:
+            loop_stack.append(idx)
+            blocks.append(idx)
+            ordering.loops.add(idx)
+            depth += 1
+        elif opname == "end_loop":
+            if loop_stack:
+                loop_stack.pop()
+            if blocks:
+                blocks.pop()
+            depth -= 1
+        elif opname in _IF_STARTS:
+            blocks.append(idx)
+            depth += 1
+        elif opname == "end_if":
+            if blocks:
+                blocks.pop()
+            depth -= 1
+        elif opname in _EVENT_OPS:
+            ordering.event(idx, inst, tuple(blocks))
+            continue
+        elif opname == "barrier" and depth == 0 and str(inst.kwargs.get("pipe", None)) == str(Pipe.ALL):
+            segments[-1].fences.append(idx)
+            continue
+        if opname in ("create_tensor", "create_dbuf"):
+            val = inst.kwargs.get("val", None)
+            if not isinstance(val, (Tensor, DBuff)):
+                continue
+            segment = segments[-1]
+            position = str(val.position)
+            nbytes = _static_nbytes(inst, val)
+            if nbytes is None:
+                segment.unplanned.add(position)
+                continue
+            slot = BufferSlot(
+                val.name,
+                val.position,
+                _align(nbytes, position),
+                idx,
+                idx,
+                2 if isinstance(val, DBuff) else 1,
+            )
+            roots[val.name] = slot
+            pending.append((segment, slot))
+            continue
+        alias_keys = _ALIAS_OPS.get(opname)
+        if alias_keys is not None:
+            src = inst.kwargs.get(alias_keys[0], None)
+            out = inst.kwargs.get(alias_keys[1], None)
+            if isinstance(src, (Tensor, DBuff)) and isinstance(out, Tensor):
+                alias[out.name] = alias.get(src.name, src.name)
+        refs: List[str] = []
+        for value in inst.kwargs.values():
+            _collect_refs(value, refs)
+        accessed: Set[str] = set()
+        for name in refs:
+            root = roots.get(alias.get(name, name))
+            if root is None:
+                continue
+            if alias_keys is None and root.name not in accessed:
+                accessed.add(root.name)
+                ordering.access(root.name, idx, op_pipes.get(opname, None), tuple(blocks))
+            end = idx
+            # Outermost loop entered after the buffer was created: its next iteration uses it again.
+            for loop_start in loop_stack:
+                if loop_start > root.start:
+                    end = loop_ends.get(loop_start, len(instructions) - 1)
+                    break
+            if end > root.end:
+                root.end = end
+
+    for segment, slot in pending:
+        position = str(slot.position)
+        if not segment.plannable or position in segment.unplanned:
+            continue
+        slot.arena = arena_name(segment.index, position)
+        segment.slots[slot.name] = slot
+    for segment in segments:
+        by_position: Dict[str, List[BufferSlot]] = {}
+        for slot in segment.slots.values():
+            by_position.setdefault(str(slot.position), []).append(slot)
+        for position, slots in by_position.items():
+            segment.peak[position] = _place(slots, position, segment.fences, ordering)
+    return MemoryPlan(segments)
+
+
+def get_memory_plan(instructions: List[Instruction]) -> MemoryPlan:
+    """Return the cached plan for an instruction list, planning it on first use."""
+    key = id(instructions)
+    cached = _PLAN_CACHE.get(key)
+    if cached is not None and cached[0] is instructions and cached[1] == len(instructions):
+        _PLAN_CACHE.move_to_end(key)
+        return cached[2]
+    plan = plan_local_memory(instructions)
+    _PLAN_CACHE[key] = (instructions, len(instructions), plan)
+    while len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+        _PLAN_CACHE.popitem(last=False)
+    return plan
@@ -0,0 +1,253 @@
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+# A polynomial maps a monomial to its integer coefficient. A monomial is a sorted tuple of
+# (atom, exponent) pairs; atoms are (rank, text) so symbols order before parenthesized sums,
+# and sums before function calls, the way sympy sorts Symbol/Add/Function arguments.
+Atom = Tuple[int, str]
+Monomial = Tuple[Tuple[Atom, int], ...]
+Poly = Dict[Monomial, int]
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+)|([A-Za-z_][A-Za-z0-9_.]*)|(.))")
+_SYMBOL_RANK = 0
+_SUM_RANK = 1
+_CALL_RANK = 2
+
+
+class Unsupported(Exception):
+    """Raised for input outside the integer polynomial subset; callers keep or fall back."""
+
+
+def _tokenize(expr: str) -> List[str]:
+    tokens: List[str] = []
+    pos = 0
+    while pos < len(expr):
+        match = _TOKEN_RE.match(expr, pos)
+        if match is None:
+            raise Unsupported(expr)
+        pos = match.end()
+        token = match.group(1) or match.group(2) or match.group(3)
+        if token is None:
+            continue
+        if match.group(3) is not None and token not in "+-*/%(),":
+            raise Unsupported(token)
+        tokens.append(token)
+    return tokens
+
+
+def _const(value: int) -> Poly:
+    return {(): value} if value else {}
+
+
+def _add(left: Poly, right: Poly, sign: int = 1) -> Poly:
+    out = dict(left)
+    for mono, coeff in right.items():
+        value = out.get(mono, 0) + sign * coeff
+        if value:
+            out[mono] = value
+        else:
+            out.pop(mono, None)
+    return out
+
+
+def _mul_mono(left: Monomial, right: Monomial) -> Monomial:
+    powers: Dict[Atom, int] = dict(left)
+    for atom, exp in right:
+        powers[atom] = powers.get(atom, 0) + exp
+    return tuple(sorted(powers.items()))
+
+
+def _expand(left: Poly, right: Poly) -> Poly:
+    out: Poly = {}
+    for lmono, lcoeff in left.items():
+        for rmono, rcoeff in right.items():
+            mono = _mul_mono(lmono, rmono)
+            value = out.get(mono, 0) + lcoeff * rcoeff
+            if value:
+                out[mono] = value
+            else:
+                out.pop(mono, None)
+    return out
+
+
+def _as_const(poly: Poly) -> Optional[int]:
+    if not poly:
+        return 0
+    if len(poly) == 1 and () in poly:
+        return poly[()]
+    return None
+
+
+def _factor(poly: Poly) -> Poly:
+    # A multi-term factor stays parenthesized (with its integer content pulled out), e.g. K*(m + 128).
+    if len(poly) <= 1:
+        return poly
+    content = 0
+    for coeff in poly.values():
+        content = math.gcd(content, coeff)
+    inner = {mono: coeff // content for mono, coeff in poly.items()}
+    return {(((_SUM_RANK, f"({_format_final(inner)})"), 1),): content}
+
+
+def _format_final(poly: Poly) -> str:
+    # A kept-factored product is only final on its own: next to other terms it may cancel
+    # against them (N*(m + 1) - N*m is N), which is sympy's job.
+    if len(poly) > 1 and any(atom[0] == _SUM_RANK for mono in poly for atom, _ in mono):
+        raise Unsupported("product of a sum")
+    return format_poly(poly)
+
+
+def _mul(left: Poly, right: Poly) -> Poly:
+    # Constants distribute over sums; products of a sum with a non-constant are kept factored.
+    if _as_const(left) is not None or _as_const(right) is not None:
+        return _expand(left, right)
+    return _expand(_factor(left), _factor(right))
+
+
+def _div(left: Poly, right: Poly) -> Poly:
+    # C++ integer division: only folded when every coefficient divides exactly.
+    divisor = _as_const(right)
+    if not divisor or any(coeff % divisor for coeff in left.values()):
+        raise Unsupported("/")
+    return {mono: coeff // divisor for mono, coeff in left.items()}
+
+
+def _mod(left: Poly, right: Poly) -> Poly:
+    divisor = _as_const(right)
+    if not divisor:
+        raise Unsupported("%")
+    if all(coeff % divisor == 0 for coeff in left.values()):
+        return {}
+    value = _as_const(left)
+    if value is None or value < 0 or divisor < 0:
+        raise Unsupported("%")
+    return _const(value % divisor)
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self, expected: Optional[str] = None) -> str:
+        token = self._peek()
+        if token is None or (expected is not None and token != expected):
+            raise Unsupported(f"expected {expected}, got {token}")
+        self.pos += 1
+        return token
+
+    def parse(self) -> Poly:
+        poly = self._expr()
+        if self._peek() is not None:
+            raise Unsupported(self._peek())
+        return poly
+
+    def _expr(self) -> Poly:
+        poly = self._term()
+        while self._peek() in ("+", "-"):
+            sign = 1 if self._take() == "+" else -1
+            poly = _add(poly, self._term(), sign)
+        return poly
+
+    def _term(self) -> Poly:
+        poly = self._unary()
+        while self._peek() in ("*", "/", "%"):
+            op = self._take()
+            rhs = self._unary()
+            if op == "*":
+                poly = _mul(poly, rhs)
+            elif op == "/":
+                poly = _div(poly, rhs)
+            else:
+                poly = _mod(poly, rhs)
+        return poly
+
+    def _unary(self) -> Poly:
+        token = self._peek()
+        if token == "-":
+            self._take()
+            return {mono: -coeff for mono, coeff in self._unary().items()}
+        if token == "+":
+            self._take()
+            return self._unary()
+        return self._primary()
+
+    def _primary(self) -> Poly:
+        token = self._take()
+        if token == "(":
+            poly = self._expr()
+            self._take(")")
+            return poly
+        if token.isdigit():
+            return _const(int(token))
+        if token[0].isalpha() or token[0] == "_":
+            if token in ("true", "false"):
+                raise Unsupported(token)
+            if self._peek() != "(":
+                return {(((_SYMBOL_RANK, token), 1),): 1}
+            self._take("(")
+            args: List[str] = []
+            if self._peek() != ")":
+                args.append(_format_final(self._expr()))
+                while self._peek() == ",":
+                    self._take(",")
+                    args.append(_format_final(self._expr()))
+            self._take(")")
+            return {(((_CALL_RANK, f"{token}({', '.join(args)})"), 1),): 1}
+        raise Unsupported(token)
+
+
+def _format_term(mono: Monomial, coeff: int) -> str:
+    factors: List[str] = []
+    for (_, text), exp in mono:
+        factors.extend([text] * exp)
+    if not factors:
+        return str(coeff)
+    body = "*".join(factors)
+    if coeff == 1:
+        return body
+    if coeff == -1:
+        return f"-{body}"
+    return f"{coeff}*{body}"
+
+
+def format_poly(poly: Poly) -> str:
+    if not poly:
+        return "0"
+    gens = sorted({atom for mono in poly for atom, _ in mono})
+    index = {atom: idx for idx, atom in enumerate(gens)}
+
+    def _exponents(mono: Monomial) -> Tuple[int, ...]:
+        exps = [0] * len(gens)
+        for atom, exp in mono:
+            exps[index[atom]] = exp
+        return tuple(exps)
+
+    # Same term order sympy prints: reverse lex over the sorted generators, constant last.
+    ordered = sorted(poly.items(), key=lambda item: _exponents(item[0]), reverse=True)
+    if len(ordered) == 2 and ordered[0][1] < 0 < ordered[1][1] and ordered[1][0] == ():
+        # sympy prints a positive constant first against a single negated term: 120 - m.
+        ordered.reverse()
+    out = ""
+    for mono, coeff in ordered:
+        text = _format_term(mono, coeff)
+        if not out:
+            out = text
+        elif text.startswith("-"):
+            out += f" - {text[1:]}"
+        else:
+            out += f" + {text}"
+    return out
+
+
+def simplify_polynomial(expr: str) -> str:
+    """Fold an integer +,-,*,/,% expression into canonical sum-of-products text.
+
+    Raises Unsupported for anything else (comparisons, logic, inexact division, literals
+    other than integers, a product of a sum next to other terms).
+    """
+    return _format_final(_Parser(_tokenize(expr)).parse())
@@ -0,0 +1,116 @@
+#pragma once
+#include "tensorx.h"
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+// Layout shared with easyasc/kernelbase/exchange.py.
+#define EXCHANGE_VERSION 1
+#define EXCHANGE_MAX_DIMS 8
+
+struct ExchangeHeader{
+    char magic[8];
+    uint32_t version;
+    uint32_t count;
+    uint64_t size;
+    uint64_t reserved;
+};
+
+struct ExchangeEntry{
+    char name[64];
+    char dtype[16];
+    uint32_t set_index;
+    uint32_t ndim;
+    uint64_t offset;
+    uint64_t nbytes;
+    int64_t dims[EXCHANGE_MAX_DIMS];
+};
+
+
+// Maps the exchange file written by OpExec; tensor regions are used in place as host memory.
+class ExchangeFile{
+protected:
+    uint8_t* m_base = nullptr;
+    size_t m_size = 0;
+
+public:
+    explicit ExchangeFile(const char* path){
+        int fd = open(path, O_RDWR);
+        if (fd < 0){
+            printf("[ERROR] Cannot open exchange file %s\n", path);
+            throw std::runtime_error("exchange file not found");
+        }
+        struct stat st;
+        fstat(fd, &st);
+        m_size = (size_t) st.st_size;
+        void* base = mmap(nullptr, m_size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+        (void) close(fd);
+        if (base == MAP_FAILED || m_size < sizeof(ExchangeHeader)){
+            throw std::runtime_error("cannot map exchange file");
+        }
+        m_base = (uint8_t*) base;
+        const ExchangeHeader* header = (const ExchangeHeader*) m_base;
+        if (std::memcmp(header->magic, "EASYXCHG", 8) != 0 || header->version != EXCHANGE_VERSION){
+            throw std::runtime_error("exchange file version mismatch");
+        }
+    }
+
+    ~ExchangeFile(){
+        if (m_base != nullptr){
+            msync(m_base, m_size, MS_SYNC);
+            munmap(m_base, m_size);
+        }
+    }
+
+    void* find(const char* name, uint32_t set_index, int64_t nbytes){
+        const ExchangeHeader* header = (const ExchangeHeader*) m_base;
+        const ExchangeEntry* entries = (const ExchangeEntry*) (m_base + sizeof(ExchangeHeader));
+        for (uint32_t i=0; i<header->count; ++i){
+            if (entries[i].set_index == set_index && std::strncmp(entries[i].name, name, sizeof(entries[i].name)) == 0){
+                if ((int64_t) entries[i].nbytes != nbytes){
+                    printf("[ERROR] Exchange tensor %s holds %lld bytes, expected %lld\n", name, (long long) entries[i].nbytes, (long long) nbytes);
+                    throw std::runtime_error("exchange tensor size mismatch");
+                }
+                return (void*) (m_base + entries[i].offset);
+            }
+        }
+        printf("[ERROR] Exchange tensor %s (set %u) not found\n", name, set_index);
+        throw std::runtime_error("exchange tensor not found");
+    }
+};
+
+
+inline const char* exchangePath(){
+    const char* path = getenv("EASYASC_EXCHANGE");
+    return path ? path : "./exchange.bin";
+}
+
+
+// TensorX whose host side is a region of an ExchangeFile: copyToDevice/copyToHost move data
+// between the mapping and the device without a separate host buffer or file read/write.
+template <typename T, aclDataType aclT>
+class MappedTensorX : public TensorX<T, aclT>{
+public:
+    MappedTensorX(std::vector<int64_t> shape) : TensorX<T, aclT>(shape) {}
+
+    int64_t dataSize() const{
+        return this->m_data_size;
+    }
+
+    void bindHost(ExchangeFile &exchange, const char* name, uint32_t set_index){
+        this->m_host_ptr = exchange.find(name, set_index, this->m_data_size);
+    }
+
+    void freeHost(){
+        // The mapping owns the host memory.
+        this->m_host_ptr = nullptr;
+    }
+};
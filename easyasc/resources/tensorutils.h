@@ -137,6 +137,11 @@ __aicore__ inline LocalTensor<T> AllocateLocalTensor(int len){
     return tbuf.template Get<T>();
 }
 
+template <typename T>
+__aicore__ inline LocalTensor<T> PlaceLocalTensor(LocalTensor<uint8_t> arena, int offset){
+    return arena[offset].template ReinterpretCast<T>();
+}
+
 /* ------------- Tensor ------------- */ 
 
 
@@ -153,6 +158,11 @@ public:
         tsr1 = buf1.template Get<T>();
         tsr2 = buf2.template Get<T>();
     }
+
+    __aicore__ inline void InitAt(LocalTensor<uint8_t> arena, int off1, int off2){
+        tsr1 = arena[off1].template ReinterpretCast<T>();
+        tsr2 = arena[off2].template ReinterpretCast<T>();
+    }
     
     __aicore__ inline LocalTensor<T> get(int i){
         if (i%2==0){
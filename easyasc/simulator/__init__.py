@@ -1,19 +1,36 @@
 from .base import SimulatorBase
 from .core import Core
+from .crosscore import CrossCoreFlags
 from .cube import Cube
-from .pipe import FIXPipe, MPipe, MTE1Pipe, MTE2Pipe, PipeBase
+from .pipe import FIXPipe, MPipe, MTE1Pipe, MTE2Pipe, PipeBase, ScalarPipe
+from .timing import CostTable, PipeTimer, TimingReport
+from .trace import TraceRecorder, write_chrome_trace
+from .unit import UnitBase
 from .vec import Vec
+from .vec_pipe import MTE3Pipe, VecMTE2Pipe, VecPipeBase, VPipe
 
 __all__ = [
     "Core",
+    "CrossCoreFlags",
     "Cube",
     "PipeBase",
     "MTE2Pipe",
     "MTE1Pipe",
     "MPipe",
     "FIXPipe",
+    "ScalarPipe",
+    "UnitBase",
     "Vec",
+    "VecPipeBase",
+    "VecMTE2Pipe",
+    "VPipe",
+    "MTE3Pipe",
     "SimulatorBase",
+    "CostTable",
+    "PipeTimer",
+    "TimingReport",
+    "TraceRecorder",
+    "write_chrome_trace",
 ]
 
 # reference: https://www.hiascend.com/document/detail/zh/CANNCommunityEdition/850/opdevg/Ascendcopdevg/atlas_ascendc_10_00027.html
@@ -1,23 +1,158 @@
-from typing import TYPE_CHECKING, List
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
+    import torch
+
     from ..kernelbase.kernelbase import KernelBase
     from ..utils.instruction import Instruction
     from .core import Core
+    from .sanitizer import SanitizerFinding
+    from .timing import CostTable, TimingReport
+
+
+_SIM_LOGGER = logging.getLogger("easyasc.simulator.cube")
+
+# (atomic, gm root index, storage offset, size, stride, value) for one recorded GM writeback.
+GMWriteRecord = Tuple[bool, int, int, Tuple[int, ...], Tuple[int, ...], "torch.Tensor"]
+# (lane label, PipeTimer.snapshot()) per lane of one core.
+LaneTiming = List[Tuple[str, Dict[str, Any]]]
+# Chrome trace events of one core (metadata included), empty when tracing is off.
+CoreTrace = List[Dict[str, Any]]
+# Sanitizer findings of one core, empty when the sanitizer is off.
+CoreFindings = List["SanitizerFinding"]
+
+# Worker-side state. Populated right before the process pool forks, so workers
+# inherit the simulator, the instruction stream and the shared GM roots without pickling.
+_WORKER_STATE: Dict[str, Any] = {}
+# Instructions that turn on atomic GM writebacks.
+_ATOMIC_OPNAMES = ("atomic_add", "atomic_max", "atomic_min", "set_atomic_type")
+
+
+def _locate_gm_root(gm_roots: List["torch.Tensor"], view: "torch.Tensor") -> int:
+    ptr = view.untyped_storage().data_ptr()
+    for idx, root in enumerate(gm_roots):
+        if root.untyped_storage().data_ptr() == ptr:
+            return idx
+    raise ValueError("Atomic writeback target is not backed by any shared GMTensor data")
+
+
+def _lane_timings(core: "Core") -> LaneTiming:
+    out: LaneTiming = []
+    for lane in core.lanes:
+        if lane.timer is not None:
+            out.append((lane._log_prefix(), lane.timer.snapshot()))
+    return out
+
+
+def _core_trace(core: "Core") -> CoreTrace:
+    if core.trace is None:
+        return []
+    return core.trace.export()
+
+
+def _core_findings(core: "Core") -> CoreFindings:
+    if core.sanitizer is None:
+        return []
+    return core.sanitizer.findings
+
+
+def _run_core_worker(core_idx: int) -> Tuple[List[GMWriteRecord], LaneTiming, CoreTrace, CoreFindings]:
+    import torch
+
+    from .. import globvars
+
+    torch.set_num_threads(1)
+    sim: "SimulatorBase" = _WORKER_STATE["sim"]
+    instructions: List["Instruction"] = _WORKER_STATE["instructions"]
+    vec_instructions: List["Instruction"] = _WORKER_STATE["vec_instructions"]
+    bound_args: Optional[Dict[str, Any]] = _WORKER_STATE["bound_args"]
+    gm_roots: List[torch.Tensor] = _WORKER_STATE["gm_roots"]
+
+    core = sim.cores[core_idx]
+    gm_writes: List[Tuple[bool, torch.Tensor, torch.Tensor]] = []
+    if _WORKER_STATE["record_gm_writes"]:
+        # GM is this worker's copy-on-write copy: writebacks (atomics included) land there, so the
+        # core reads its own results, and one shared log keeps them in execution order for the parent.
+        for pipe in [core.cube.FIX] + [vec.MTE3 for vec in core.vecs]:
+            pipe.record_gm_writes = True
+            pipe.gm_writes = gm_writes
+        # Batched loops write GM without going through the pipes.
+        globvars.sim_batch_loops = False
+    core.run(instructions, bound_args=bound_args, vec_instructions=vec_instructions)
+
+    records: List[GMWriteRecord] = []
+    for atomic, dst_region, value in gm_writes:
+        records.append(
+            (
+                atomic,
+                _locate_gm_root(gm_roots, dst_region),
+                int(dst_region.storage_offset()),
+                tuple(dst_region.shape),
+                tuple(dst_region.stride()),
+                value.detach().clone(),
+            )
+        )
+    return records, _lane_timings(core), _core_trace(core), _core_findings(core)
 
 
 class SimulatorBase:
-    def __init__(self, kernel: "KernelBase") -> None:
+    def __init__(
+        self,
+        kernel: "KernelBase",
+        max_workers: Optional[int] = None,
+        profile: bool = False,
+        cost_table: Optional["CostTable"] = None,
+        trace_path: Optional[str] = None,
+        sanitize: bool = False,
+    ) -> None:
         from ..kernelbase.kernelbase import KernelBase
         from .. import globvars
         from .core import Core
+        from .timing import CostTable, PipeTimer
 
         if not isinstance(kernel, KernelBase):
             raise TypeError(f"kernel must be KernelBase, got: {type(kernel)}")
+        if max_workers is not None:
+            if isinstance(max_workers, bool) or not isinstance(max_workers, int):
+                raise TypeError(f"max_workers must be int or None, got: {type(max_workers)}")
+            if max_workers < 1:
+                raise ValueError(f"max_workers must be >= 1, got: {max_workers}")
+        if not isinstance(profile, bool):
+            raise TypeError(f"profile must be bool, got: {type(profile)}")
+        if cost_table is not None and not isinstance(cost_table, CostTable):
+            raise TypeError(f"cost_table must be CostTable or None, got: {type(cost_table)}")
+        if trace_path is not None and not isinstance(trace_path, str):
+            raise TypeError(f"trace_path must be str or None, got: {type(trace_path)}")
+        if not isinstance(sanitize, bool):
+            raise TypeError(f"sanitize must be bool, got: {type(sanitize)}")
         self.kernel = kernel
+        self.max_workers = max_workers
         self.device_type = str(getattr(globvars, "device_type", "")).lower()
         self.core_num = self._resolve_core_num(self.device_type)
         self.cores: List[Core] = [Core(core_idx) for core_idx in range(self.core_num)]
+        # A cost table or a trace path implies profiling; profiling alone uses the default table.
+        self.cost_table: Optional[CostTable] = cost_table
+        if (profile or trace_path is not None) and self.cost_table is None:
+            self.cost_table = CostTable()
+        self.trace_path = trace_path
+        self.timing_report: Optional["TimingReport"] = None
+        self.sanitize = sanitize
+        # Race/uninitialized-read findings of the last run, in core order.
+        self.sanitizer_findings: List["SanitizerFinding"] = []
+        # (traced list, its length, cube stream, vec stream): repeated run() calls on the same
+        # trace (OpExec.run_batch) skip the split and auto-sync passes.
+        self._streams: Optional[Tuple[List["Instruction"], int, List["Instruction"], List["Instruction"]]] = None
+        if self.cost_table is not None:
+            for core in self.cores:
+                for lane in core.lanes:
+                    lane.timer = PipeTimer(self.cost_table)
+        if self.trace_path is not None:
+            for core in self.cores:
+                core.enable_trace()
+        if self.sanitize:
+            for core in self.cores:
+                core.enable_sanitizer()
 
     @staticmethod
     def _resolve_core_num(device_type: str) -> int:
@@ -29,11 +164,126 @@ class SimulatorBase:
             return 32
         raise ValueError(f"Unsupported device_type for simulator: {device_type}")
 
-    def run(self) -> None:
+    def run(self) -> Optional["TimingReport"]:
+        from ..parser.asc import split_instructions
         from ..parser.asc_autosync import insert_auto_sync
 
-        instructions: List["Instruction"] = self.kernel.instructions
-        instructions = insert_auto_sync(list(instructions), mode="cube")
+        traced: List["Instruction"] = self.kernel.instructions
+        streams = self._streams
+        if streams is None or streams[0] is not traced or streams[1] != len(traced):
+            # Vector lanes only see their own side of the kernel, like the generated *_vec.h.
+            _, vec_instructions = split_instructions(list(traced))
+            vec_instructions = insert_auto_sync(vec_instructions, mode="vec")
+            instructions = insert_auto_sync(list(traced), mode="cube")
+            self._streams = (traced, len(traced), instructions, vec_instructions)
+        else:
+            instructions, vec_instructions = streams[2], streams[3]
         bound_args = getattr(self.kernel, "_last_bound_args", None)
+        # Set before any worker forks so every vec lane can resolve call_micro by name.
+        micros = {micro.name: micro for micro in getattr(self.kernel, "used_micros", ())}
         for core in self.cores:
-            core.run(instructions, bound_args=bound_args)
+            for vec in core.vecs:
+                vec.micros = micros
+        results: Optional[List[Tuple[LaneTiming, CoreTrace, CoreFindings]]] = None
+        if self.max_workers is not None and self.max_workers > 1 and len(self.cores) > 1:
+            results = self._run_parallel(instructions, vec_instructions, bound_args)
+        if results is None:
+            results = []
+            for core in self.cores:
+                core.run(instructions, bound_args=bound_args, vec_instructions=vec_instructions)
+                results.append((_lane_timings(core), _core_trace(core), _core_findings(core)))
+        timings = [lane_timings for lane_timings, _, _ in results]
+        self.sanitizer_findings = [finding for _, _, core_findings in results for finding in core_findings]
+        if self.sanitize:
+            for finding in self.sanitizer_findings:
+                _SIM_LOGGER.warning(f"[sim][sanitizer][core={finding.core_idx}] {finding.format()}")
+            _SIM_LOGGER.info(f"[sim][sanitizer] {len(self.sanitizer_findings)} finding(s)")
+        if self.trace_path is not None:
+            from .trace import write_chrome_trace
+
+            events = [event for _, core_trace, _ in results for event in core_trace]
+            write_chrome_trace(self.trace_path, events)
+            _SIM_LOGGER.info(f"[sim][trace] wrote {len(events)} events to {self.trace_path}")
+        if self.cost_table is None:
+            return None
+        self.timing_report = self._build_timing_report(timings)
+        _SIM_LOGGER.info(self.timing_report.format())
+        return self.timing_report
+
+    @staticmethod
+    def _build_timing_report(timings: List[LaneTiming]) -> "TimingReport":
+        from .timing import TimingReport
+
+        report = TimingReport()
+        for lane_timings in timings:
+            for label, snapshot in lane_timings:
+                report.add_lane(label, snapshot)
+        return report
+
+    @staticmethod
+    def _collect_gm_roots(instructions: List["Instruction"]) -> List["torch.Tensor"]:
+        from ..utils.Tensor import GMTensor
+
+        roots: List["torch.Tensor"] = []
+        for inst in instructions:
+            if inst.opname != "create_gm_tensor":
+                continue
+            val = inst.kwargs.get("val")
+            if isinstance(val, GMTensor) and val.data is not None:
+                roots.append(val.data)
+        return roots
+
+    def _run_parallel(
+        self,
+        instructions: List["Instruction"],
+        vec_instructions: List["Instruction"],
+        bound_args: Optional[Dict[str, Any]],
+    ) -> Optional[List[Tuple[LaneTiming, CoreTrace, CoreFindings]]]:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .pipe import FIXPipe
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            _SIM_LOGGER.warning(
+                "[sim] parallel core execution requires the 'fork' start method; running cores serially"
+            )
+            return None
+
+        gm_roots = self._collect_gm_roots(instructions)
+        # A core may read back its own atomic writebacks (e.g. a workspace its vec lanes consume), so
+        # kernels with atomics run on private GM and the parent replays the recorded writes.
+        # Otherwise writebacks land directly in shared GM.
+        record_gm_writes = any(inst.opname in _ATOMIC_OPNAMES for inst in instructions + vec_instructions)
+        if not record_gm_writes:
+            for root in gm_roots:
+                root.share_memory_()
+
+        _WORKER_STATE.update(
+            sim=self,
+            instructions=instructions,
+            vec_instructions=vec_instructions,
+            bound_args=bound_args,
+            gm_roots=gm_roots,
+            record_gm_writes=record_gm_writes,
+        )
+        try:
+            workers = min(self.max_workers or 1, len(self.cores))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                futures = [pool.submit(_run_core_worker, core.core_idx) for core in self.cores]
+                results = [future.result() for future in futures]
+        finally:
+            _WORKER_STATE.clear()
+
+        # Replay recorded writebacks in (core_idx, execution order) so results do not depend on worker timing.
+        for records, _, _, _ in results:
+            for atomic, root_idx, storage_offset, size, stride, value in records:
+                dst_region = gm_roots[root_idx].as_strided(size, stride, storage_offset)
+                if atomic:
+                    FIXPipe.apply_atomic_add(dst_region, value)
+                else:
+                    dst_region.copy_(value)
+        return [(lane_timings, core_trace, core_findings) for _, lane_timings, core_trace, core_findings in results]
@@ -4,7 +4,11 @@ import torch
 
 from .. import globvars
 from ._core_utils import validate_core_idx
+from .crosscore import CrossCoreFlags
 from .cube import Cube
+from .sanitizer import MemorySanitizer
+from .trace import TraceRecorder
+from .unit import UnitBase
 from .vec import Vec
 
 if TYPE_CHECKING:
@@ -28,11 +32,42 @@ class Core:
             ub2=ub2,
         )
         self.vecs: List[Vec] = [
-            Vec(core_idx=self.core_idx, l1=l1, ub=ub1),
-            Vec(core_idx=self.core_idx, l1=l1, ub=ub2),
+            Vec(core_idx=self.core_idx, l1=l1, ub=ub1, sub_block_idx=0),
+            Vec(core_idx=self.core_idx, l1=l1, ub=ub2, sub_block_idx=1),
         ]
         self.vec0 = self.vecs[0]
         self.vec1 = self.vecs[1]
+        self.crosscore = CrossCoreFlags(vec_num=len(self.vecs))
+        for lane_index, lane in enumerate(self.lanes):
+            lane.crosscore = self.crosscore
+            lane.lane_index = lane_index
+        self.trace: Optional[TraceRecorder] = None
+        self.sanitizer: Optional[MemorySanitizer] = None
+
+    def enable_trace(self) -> TraceRecorder:
+        """Record a Chrome trace of every lane; lanes need a PipeTimer for timestamps."""
+        self.trace = TraceRecorder(self.core_idx)
+        for lane in self.lanes:
+            lane.trace = self.trace
+        return self.trace
+
+    def enable_sanitizer(self) -> MemorySanitizer:
+        """Check every lane's local-memory accesses against the core's syncs."""
+        self.sanitizer = MemorySanitizer(self.core_idx)
+        cube = self.cube
+        for name, memory in (("L1", cube.L1), ("L0A", cube.L0A), ("L0B", cube.L0B), ("L0C", cube.L0C)):
+            self.sanitizer.add_memory(name, memory)
+        for vec in self.vecs:
+            self.sanitizer.add_memory(f"UB{vec.sub_block_idx}", vec.UB)
+        for lane in self.lanes:
+            self.sanitizer.add_lane(lane)
+            lane.sanitizer = self.sanitizer
+        self.sanitizer.clear()
+        return self.sanitizer
+
+    @property
+    def lanes(self) -> List[UnitBase]:
+        return [self.cube] + self.vecs
 
     @staticmethod
     def _alloc_memory(cap_name: str) -> torch.Tensor:
@@ -47,7 +82,33 @@ class Core:
         self,
         instructions: List["Instruction"],
         bound_args: Optional[Dict[str, Any]] = None,
+        vec_instructions: Optional[List["Instruction"]] = None,
     ) -> None:
-        self.cube.run(instructions, bound_args=bound_args)
+        if vec_instructions is None:
+            vec_instructions = instructions
+        self.crosscore.clear()
+        if self.trace is not None:
+            self.trace.clear()
+        if self.sanitizer is not None:
+            self.sanitizer.clear()
+        self.cube.dispatch(instructions, bound_args=bound_args)
         for vec in self.vecs:
-            vec.run(instructions, bound_args=bound_args)
+            vec.dispatch(vec_instructions, bound_args=bound_args)
+
+        # Interleave the lanes: each advances until it blocks, so cube_ready/wait_cube and
+        # vec_ready/wait_vec hand data across lanes in the order the flags allow.
+        lanes = self.lanes
+        while True:
+            progressed = 0
+            for lane in lanes:
+                progressed += lane.advance()
+            pending = [lane for lane in lanes if not lane.finished()]
+            if not pending:
+                for lane in lanes:
+                    lane.flush_trace()
+                return
+            if progressed == 0:
+                raise RuntimeError(
+                    f"Simulator deadlock across cube/vec lanes of core {self.core_idx}: "
+                    + "; ".join(f"{lane._log_prefix()} " + ", ".join(lane.blocked_heads()) for lane in pending)
+                )
@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+
+class CrossCoreFlags:
+    """Cross-core flag credits shared by one cube lane and its vec lanes (1:2 mix mode).
+
+    Each credit carries the cycle at which it was set (0 when no timing model runs).
+    """
+
+    def __init__(self, vec_num: int = 2) -> None:
+        if isinstance(vec_num, bool) or not isinstance(vec_num, int):
+            raise TypeError(f"vec_num must be int, got: {type(vec_num)}")
+        if vec_num < 1:
+            raise ValueError(f"vec_num must be >= 1, got: {vec_num}")
+        self.vec_num = vec_num
+        self.clear()
+
+    def clear(self) -> None:
+        # to_vec[sub][flag_id]: pending cube_ready credits for one vec lane.
+        self.to_vec: List[Dict[int, List[int]]] = [{} for _ in range(self.vec_num)]
+        # to_cube[sub][flag_id]: pending vec_ready credits issued by one vec lane.
+        self.to_cube: List[Dict[int, List[int]]] = [{} for _ in range(self.vec_num)]
+
+    def _check_sub(self, sub_block_idx: int) -> int:
+        if sub_block_idx < 0 or sub_block_idx >= self.vec_num:
+            raise ValueError(f"sub_block_idx must be in [0, {self.vec_num}), got: {sub_block_idx}")
+        return sub_block_idx
+
+    def cube_ready(self, flag_id: int, time: int = 0) -> None:
+        # A cube-side set reaches every vec lane of the core.
+        for credits in self.to_vec:
+            credits.setdefault(flag_id, []).append(time)
+
+    def vec_ready(self, sub_block_idx: int, flag_id: int, time: int = 0) -> None:
+        self.to_cube[self._check_sub(sub_block_idx)].setdefault(flag_id, []).append(time)
+
+    def can_wait_cube(self, sub_block_idx: int, flag_id: int) -> bool:
+        return bool(self.to_vec[self._check_sub(sub_block_idx)].get(flag_id))
+
+    def wait_cube_time(self, sub_block_idx: int, flag_id: int) -> int:
+        return self.to_vec[self._check_sub(sub_block_idx)][flag_id][0]
+
+    def wait_cube(self, sub_block_idx: int, flag_id: int) -> int:
+        if not self.can_wait_cube(sub_block_idx, flag_id):
+            raise RuntimeError(f"wait_cube consumed flag {flag_id} without a pending cube_ready")
+        return self.to_vec[sub_block_idx][flag_id].pop(0)
+
+    def can_wait_vec(self, flag_id: int) -> bool:
+        # The cube-side wait completes only after every vec lane has set the flag.
+        return all(credits.get(flag_id) for credits in self.to_cube)
+
+    def wait_vec_time(self, flag_id: int) -> int:
+        return max(credits[flag_id][0] for credits in self.to_cube)
+
+    def wait_vec(self, flag_id: int) -> int:
+        if not self.can_wait_vec(flag_id):
+            raise RuntimeError(f"wait_vec consumed flag {flag_id} without pending vec_ready from every vec lane")
+        return max(credits[flag_id].pop(0) for credits in self.to_cube)
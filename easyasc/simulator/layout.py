@@ -0,0 +1,72 @@
+from typing import Dict, Optional, Tuple
+
+import torch
+
+
+# (start byte, end byte, NZ row stride, C0, dtype, logical ND tensor)
+_Entry = Tuple[int, int, int, int, torch.dtype, torch.Tensor]
+
+
+class LayoutCache:
+    """Logical ND copies of NZ regions in cube local memory, shared by the pipes of one lane.
+
+    Entries are keyed by the first element of the region. A memory's entries stay valid while its
+    torch version counter only moved through writes reported to `record`; any other in-place
+    write (batched loops, reinterpreted views, ...) drops them on the next lookup.
+    Cached tensors are never written in place, so pipes may hand out views of them.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, Dict[int, _Entry]] = {}
+        self._versions: Dict[int, int] = {}
+
+    def clear(self) -> None:
+        self._entries = {}
+        self._versions = {}
+
+    @staticmethod
+    def token(flat: torch.Tensor) -> int:
+        """Version of `flat`'s memory before a write, to be passed to `record`."""
+        return flat._version
+
+    def lookup(self, flat: torch.Tensor, rows: int, cols: int, stride_m: int, c0: int) -> Optional[torch.Tensor]:
+        storage = flat.untyped_storage().data_ptr()
+        entries = self._entries.get(storage)
+        if not entries:
+            return None
+        if flat._version != self._versions[storage]:
+            del self._entries[storage]
+            return None
+        entry = entries.get(flat.data_ptr())
+        if entry is None:
+            return None
+        _, _, entry_stride, entry_c0, dtype, logical = entry
+        if entry_stride != stride_m or entry_c0 != c0 or dtype != flat.dtype:
+            return None
+        if rows > int(logical.shape[0]) or cols > int(logical.shape[1]):
+            return None
+        return logical[:rows, :cols]
+
+    def record(
+        self,
+        flat: torch.Tensor,
+        stride_m: int,
+        c0: int,
+        logical: Optional[torch.Tensor],
+        token: int,
+    ) -> None:
+        """Note that `flat` now holds `logical` in NZ layout (None: contents unknown)."""
+        storage = flat.untyped_storage().data_ptr()
+        start = flat.data_ptr()
+        end = start + int(flat.numel()) * int(flat.element_size())
+        entries = self._entries.get(storage)
+        if entries is None or token != self._versions.get(storage):
+            entries = {}
+        else:
+            entries = {
+                key: entry for key, entry in entries.items() if entry[1] <= start or entry[0] >= end
+            }
+        if logical is not None:
+            entries[start] = (start, end, stride_m, c0, flat.dtype, logical)
+        self._entries[storage] = entries
+        self._versions[storage] = flat._version
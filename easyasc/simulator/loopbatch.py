@@ -0,0 +1,543 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import torch
+
+from ..utils.Tensor import DBuff, GMTensor, Tensor
+from ..utils.var import Expr, Var
+from .pipe import MPipe, SimInstruction
+from .plan import STEP_OP
+
+if TYPE_CHECKING:
+    from ..utils.instruction import Instruction
+
+
+# Tile loops run as one batched op per pipe instruction: iteration i of a template op works on
+# row i of a (trips, numel) buffer, local views alternate between the two halves of a DBuff, and
+# GM views advance by a fixed storage offset per iteration.
+_AFFINE_OPNAMES = ("create_var", "var_add", "var_sub", "var_mul")
+_VIEW_OPNAMES = ("get_buf", "slice_tensor", "slice_gm_tensor")
+_SYNC_OPNAMES = ("event_wait", "event_set", "setflag", "waitflag")
+_SCALAR_OPNAMES = (
+    "GetCubeNum",
+    "GetCubeIdx",
+    "GetVecNum",
+    "GetVecIdx",
+    "GetSubBlockIdx",
+    "CeilDiv",
+    "Min",
+    "Max",
+    "var_div",
+    "scalar_sqrt",
+    "Align16",
+    "Align32",
+    "Align64",
+    "Align128",
+    "Align256",
+)
+_NOOP_OPNAMES = ("start_auto_sync", "end_auto_sync")
+
+# Local tensors each batched op reads and writes (GM sides are handled separately).
+_LOCAL_READS: Dict[str, Tuple[str, ...]] = {
+    "gm_to_l1_nd2nz": (),
+    "l1_to_l0": ("src",),
+    "mmad": ("src_a", "src_b"),
+    "l0c_to_gm_nz2nd": ("src",),
+}
+_LOCAL_WRITES: Dict[str, Tuple[str, ...]] = {
+    "gm_to_l1_nd2nz": ("dst",),
+    "l1_to_l0": ("dst",),
+    "mmad": ("dst",),
+    "l0c_to_gm_nz2nd": (),
+}
+_GM_READS: Dict[str, Tuple[str, ...]] = {"gm_to_l1_nd2nz": ("src",)}
+_GM_WRITES: Dict[str, Tuple[str, ...]] = {"l0c_to_gm_nz2nd": ("dst",)}
+
+# Upper bound for the per-chunk batch buffers; longer loops run in several chunks.
+_CHUNK_BYTES = 64 << 20
+_INFO_CACHE_SIZE = 32
+_INFO_CACHE: "OrderedDict[Tuple[int, Tuple[str, ...]], Tuple[List[Any], Optional[LoopInfo]]]" = OrderedDict()
+
+
+class LoopInfo:
+    """Static facts about a loop body that may run batched."""
+
+    __slots__ = ("carried", "scalar_only")
+
+    def __init__(self, carried: FrozenSet[str], scalar_only: bool) -> None:
+        # Vars read before they are written; each advances by a loop-invariant amount per iteration.
+        self.carried = carried
+        # No pipe work at all (e.g. the vec side of a cube loop): only the last iteration matters.
+        self.scalar_only = scalar_only
+
+
+def _var_reads(value: Any, out: Set[str]) -> bool:
+    """Collect Var names read by a kwarg value; returns False when it holds an Expr."""
+    if isinstance(value, Var):
+        out.add(value.name)
+        return True
+    if isinstance(value, Expr):
+        return False
+    if isinstance(value, (Tensor, DBuff, GMTensor)):
+        return True
+    if isinstance(value, dict):
+        return all(_var_reads(item, out) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(_var_reads(item, out) for item in value)
+    return True
+
+
+def _inst_vars(inst: "Instruction") -> Optional[Tuple[Set[str], Optional[str]]]:
+    reads: Set[str] = set()
+    written: Optional[str] = None
+    for key, value in inst.kwargs.items():
+        if inst.opname == "create_var" and key == "val":
+            written = value.name if isinstance(value, Var) else None
+            if isinstance(value, Var) and not _var_reads(value.value, reads):
+                return None
+            continue
+        if key == "out" and isinstance(value, Var):
+            written = value.name
+            continue
+        if not _var_reads(value, reads):
+            return None
+    return reads, written
+
+
+def _analyze(body: List[Any], loop_var: str, batch_opnames: Sequence[str]) -> Optional[LoopInfo]:
+    allowed = _AFFINE_OPNAMES + _VIEW_OPNAMES + _SYNC_OPNAMES + _SCALAR_OPNAMES + _NOOP_OPNAMES
+    ops: List[Tuple["Instruction", Set[str], Optional[str]]] = []
+    for step in body:
+        if step[0] != STEP_OP:
+            return None
+        inst = step[2]
+        if inst.opname not in allowed and inst.opname not in batch_opnames:
+            return None
+        parsed = _inst_vars(inst)
+        if parsed is None:
+            return None
+        ops.append((inst, parsed[0], parsed[1]))
+    scalar_only = not any(inst.opname in batch_opnames or inst.opname in _SYNC_OPNAMES for inst, _, _ in ops)
+    if not scalar_only and not any(inst.opname in batch_opnames for inst, _, _ in ops):
+        return None
+
+    written: Dict[str, int] = {}
+    for _, _, out in ops:
+        if out is not None:
+            written[out] = written.get(out, 0) + 1
+    if loop_var in written:
+        return None
+    carried: Set[str] = set()
+    defined: Set[str] = set()
+    for _, reads, out in ops:
+        carried.update(name for name in reads if name in written and name not in defined)
+        if out is not None:
+            defined.add(out)
+
+    def _invariant(value: Any) -> bool:
+        if isinstance(value, Var):
+            return value.name not in written and value.name != loop_var
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    for inst, _, out in ops:
+        if out not in carried:
+            continue
+        if written[out] != 1 or inst.opname not in ("var_add", "var_sub"):
+            return None
+        a = inst.kwargs.get("a")
+        b = inst.kwargs.get("b")
+        own_a = isinstance(a, Var) and a.name == out
+        own_b = isinstance(b, Var) and b.name == out and inst.opname == "var_add"
+        if not ((own_a and _invariant(b)) or (own_b and _invariant(a))):
+            return None
+
+    # Every value that changes across iterations must stay affine in the iteration index.
+    varying: Set[str] = {loop_var} | carried
+    for inst, reads, out in ops:
+        hits = [name for name in reads if name in varying]
+        opname = inst.opname
+        if opname == "slice_tensor" and hits:
+            return None
+        if out is None or out in carried:
+            continue
+        if not hits:
+            varying.discard(out)
+            continue
+        if opname in ("create_var", "var_add", "var_sub") or (opname == "var_mul" and len(hits) == 1):
+            varying.add(out)
+            continue
+        return None
+    return LoopInfo(frozenset(carried), scalar_only)
+
+
+def analyze_loop(step: Tuple[Any, ...], batch_opnames: Sequence[str]) -> Optional[LoopInfo]:
+    """Return the LoopInfo of a plan loop step, or None when its body cannot run batched."""
+    body = step[6]
+    key = (id(body), tuple(batch_opnames))
+    cached = _INFO_CACHE.get(key)
+    if cached is not None and cached[0] is body:
+        _INFO_CACHE.move_to_end(key)
+        return cached[1]
+    info = _analyze(body, step[2], batch_opnames)
+    _INFO_CACHE[key] = (body, info)
+    while len(_INFO_CACHE) > _INFO_CACHE_SIZE:
+        _INFO_CACHE.popitem(last=False)
+    return info
+
+
+def _align16(value: int) -> int:
+    return ((value + 15) // 16) * 16
+
+
+def _view_key(view: torch.Tensor) -> Tuple[int, Tuple[int, ...], Tuple[int, ...], torch.dtype]:
+    return (view.data_ptr(), tuple(view.shape), tuple(view.stride()), view.dtype)
+
+
+def _byte_range(view: torch.Tensor) -> Tuple[int, int]:
+    extent = 1 + sum((size - 1) * stride for size, stride in zip(view.shape, view.stride()))
+    start = view.data_ptr()
+    return start, start + extent * view.element_size()
+
+
+def _overlaps(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def _tiles_disjoint(view: torch.Tensor, delta: int, trips: int) -> bool:
+    # Row-major tiles that advance by whole tiles down the rows, or along one row, never meet.
+    rows, cols = (int(size) for size in view.shape)
+    row_stride, col_stride = (int(stride) for stride in view.stride())
+    if col_stride != 1 or cols > row_stride:
+        return False
+    if delta % row_stride == 0 and delta >= rows * row_stride:
+        return True
+    return delta >= cols and (trips - 1) * delta + cols <= row_stride
+
+
+def _element_offsets(view: torch.Tensor, delta: int, trips: int) -> torch.Tensor:
+    index = torch.tensor(view.storage_offset(), dtype=torch.int64)
+    for size, stride in zip(view.shape, view.stride()):
+        index = index.unsqueeze(-1) + torch.arange(int(size), dtype=torch.int64) * int(stride)
+    steps = torch.arange(trips, dtype=torch.int64).view(-1, 1) * delta
+    return (steps + index.reshape(1, -1)).reshape(-1)
+
+
+def _decode_nz(flat: torch.Tensor, m_rows: int, n_cols: int, stride_m: int, c0: int) -> torch.Tensor:
+    batch = int(flat.shape[0])
+    out = flat.new_zeros((batch, m_rows, n_cols))
+    if m_rows == 0 or n_cols == 0:
+        return out
+    blocks = (n_cols + c0 - 1) // c0
+    panel = flat[:, : blocks * stride_m * c0].reshape(batch, blocks, stride_m, c0)
+    full_blocks = n_cols // c0
+    if full_blocks > 0:
+        full = panel[:, :full_blocks, :m_rows, :].permute(0, 2, 1, 3)
+        out[:, :, : full_blocks * c0].copy_(full.reshape(batch, m_rows, full_blocks * c0))
+    tail = n_cols - full_blocks * c0
+    if tail > 0:
+        out[:, :, full_blocks * c0 :].copy_(panel[:, full_blocks, :m_rows, :tail])
+    return out
+
+
+def _encode_nz(logical: torch.Tensor, flat: torch.Tensor, m_rows: int, n_cols: int, stride_m: int, c0: int) -> None:
+    if m_rows == 0 or n_cols == 0:
+        return
+    batch = int(flat.shape[0])
+    blocks = (n_cols + c0 - 1) // c0
+    panel = flat[:, : blocks * stride_m * c0].reshape(batch, blocks, stride_m, c0)
+    full_blocks = n_cols // c0
+    if full_blocks > 0:
+        full = logical[:, :, : full_blocks * c0].reshape(batch, m_rows, full_blocks, c0).permute(0, 2, 1, 3)
+        panel[:, :full_blocks, :m_rows, :].copy_(full)
+    tail = n_cols - full_blocks * c0
+    if tail > 0:
+        panel[:, full_blocks, :m_rows, :tail].copy_(logical[:, :, full_blocks * c0 :])
+
+
+def _batch_gm_to_l1_nd2nz(inst: SimInstruction, t: Dict[str, torch.Tensor], rows: Dict[str, int]) -> None:
+    dst = t["dst"]
+    h = int(inst.args["M"])
+    w = int(inst.args["N"])
+    c0 = 32 // dst.element_size()
+    dst.zero_()
+    _encode_nz(t["src"][:, :h, :w], dst, h, w, _align16(int(inst.args["M_dst"])), c0)
+
+
+def _batch_l1_to_l0(inst: SimInstruction, t: Dict[str, torch.Tensor], rows: Dict[str, int]) -> None:
+    dst = t["dst"]
+    src = t["src"]
+    m_dst = int(inst.args["m_dst"])
+    n_dst = int(inst.args["n_dst"])
+    elem_size = dst.element_size()
+    c0 = 32 // elem_size
+    src_stride_m = _align16(int(inst.args["m_src"]))
+    batch = int(dst.shape[0])
+    dst.zero_()
+    if m_dst == 0 or n_dst == 0:
+        return
+    if not inst.args.get("src_is_transpose", False):
+        dst_stride_m = _align16(m_dst)
+        blocks = (n_dst + c0 - 1) // c0
+        src_panel = src[:, : blocks * src_stride_m * c0].reshape(batch, blocks, src_stride_m, c0)
+        dst_panel = dst[:, : blocks * dst_stride_m * c0].reshape(batch, blocks, dst_stride_m, c0)
+        full_blocks = n_dst // c0
+        if full_blocks > 0:
+            dst_panel[:, :full_blocks, :m_dst, :].copy_(src_panel[:, :full_blocks, :m_dst, :])
+        tail = n_dst - full_blocks * c0
+        if tail > 0:
+            dst_panel[:, full_blocks, :m_dst, :tail].copy_(src_panel[:, full_blocks, :m_dst, :tail])
+        return
+    row_block = 32 if elem_size == 1 else 16
+    align = 32 if elem_size == 1 else c0
+    n_align = ((n_dst + align - 1) // align) * align
+    m_blocks = (m_dst + row_block - 1) // row_block
+    logical_pad = dst.new_zeros((batch, m_blocks * row_block, n_align))
+    logical_pad[:, :m_dst, :n_dst].copy_(_decode_nz(src, m_dst, n_dst, src_stride_m, c0))
+    dst_zn = dst[:, : m_blocks * row_block * n_align].reshape(batch, m_blocks, n_align, row_block)
+    dst_zn.copy_(logical_pad.reshape(batch, m_blocks, row_block, n_align).permute(0, 1, 3, 2))
+
+
+def _batch_mmad(inst: SimInstruction, t: Dict[str, torch.Tensor], rows: Dict[str, int]) -> None:
+    dst = t["dst"]
+    src_a = t["src_a"]
+    src_b = t["src_b"]
+    m = int(inst.args["M"])
+    n = int(inst.args["N"])
+    k = int(inst.args["K"])
+    a_nd = _decode_nz(src_a, m, k, _align16(rows["src_a"]), 32 // src_a.element_size())
+    b_nd = _decode_nz(src_b, n, k, _align16(rows["src_b"]), 32 // src_b.element_size())
+    compute_dtype = MPipe._choose_compute_dtype(dst.dtype)
+    prod = torch.matmul(a_nd.to(compute_dtype), b_nd.to(compute_dtype).transpose(1, 2))
+    dst_stride_m = _align16(rows["dst"])
+    c0_dst = 32 // dst.element_size()
+    if not bool(inst.args.get("is_init", True)):
+        prod = _decode_nz(dst, m, n, dst_stride_m, c0_dst).to(compute_dtype) + prod
+    _encode_nz(prod.to(dst.dtype), dst, m, n, dst_stride_m, c0_dst)
+
+
+def _batch_l0c_to_gm_nz2nd(inst: SimInstruction, t: Dict[str, torch.Tensor], rows: Dict[str, int]) -> None:
+    dst = t["dst"]
+    src = t["src"]
+    m = int(inst.args["M"])
+    n = int(inst.args["N"])
+    logical = _decode_nz(src, m, n, _align16(int(inst.args["M_src"])), 32 // src.element_size())
+    if m == 0 or n == 0:
+        return
+    dst[:, :m, :n].copy_(logical.to(dst.dtype))
+
+
+_BATCH_KERNELS = {
+    "gm_to_l1_nd2nz": _batch_gm_to_l1_nd2nz,
+    "l1_to_l0": _batch_l1_to_l0,
+    "mmad": _batch_mmad,
+    "l0c_to_gm_nz2nd": _batch_l0c_to_gm_nz2nd,
+}
+BATCH_OPNAMES = tuple(_BATCH_KERNELS)
+
+
+class TileLoop:
+    """
+    One batched execution of a data-independent tile loop, built from the instructions two
+    consecutive iterations dispatched. Every local buffer an iteration reads was written
+    earlier in the same iteration (or is never written by the loop), so iterations only
+    differ in their GM offsets and in which DBuff half they use.
+    """
+
+    def __init__(self, trips: int) -> None:
+        self.trips = trips
+        # (opname, first-iteration instruction, {key: ref}); refs are ("slot", idx), ("local", parity views)
+        # or ("gm", first view, offset delta).
+        self.ops: List[Tuple[str, SimInstruction, Dict[str, Tuple[Any, ...]]]] = []
+        # Per slot: the physical views of even and odd iterations.
+        self.slots: List[Tuple[torch.Tensor, torch.Tensor]] = []
+        # Sync instructions of one iteration as (pipe name, instruction), in dispatch order.
+        self.sync_ops: List[Tuple[str, SimInstruction]] = []
+        # Every instruction of the first iteration as (pipe name, instruction, refs).
+        self.order: List[Tuple[str, SimInstruction, Dict[str, Tuple[Any, ...]]]] = []
+
+    @classmethod
+    def build(
+        cls,
+        first: List[Tuple[str, SimInstruction]],
+        second: List[Tuple[str, SimInstruction]],
+        trips: int,
+    ) -> Optional["TileLoop"]:
+        """Match the iterations instruction by instruction; None when they are not one tile pipeline."""
+        if len(first) != len(second):
+            return None
+        loop = cls(trips)
+        slot_of: List[Dict[Tuple[Any, ...], int]] = [{}, {}]
+        local_views: List[torch.Tensor] = []
+        slot_writes: Set[int] = set()
+        external: List[torch.Tensor] = []
+        gm_reads: List[torch.Tensor] = []
+        gm_writes: List[Tuple[torch.Tensor, int]] = []
+        for (pipe0, inst0), (pipe1, inst1) in zip(first, second):
+            opname = inst0.opname
+            if pipe0 != pipe1 or opname != inst1.opname or pipe0 == "S":
+                return None
+            if inst0.args != inst1.args or inst0.atomic_enabled:
+                return None
+            if opname in _SYNC_OPNAMES:
+                loop.sync_ops.append((pipe0, inst0))
+                loop.order.append((pipe0, inst0, {}))
+                continue
+            if opname not in _BATCH_KERNELS or set(inst0.tensors) != set(inst1.tensors):
+                return None
+            refs: Dict[str, Tuple[Any, ...]] = {}
+            for key in _GM_READS.get(opname, ()) + _GM_WRITES.get(opname, ()):
+                view0 = inst0.tensors[key]
+                view1 = inst1.tensors[key]
+                if (
+                    view0.shape != view1.shape
+                    or view0.stride() != view1.stride()
+                    or view0.dtype != view1.dtype
+                    or view0.untyped_storage().data_ptr() != view1.untyped_storage().data_ptr()
+                ):
+                    return None
+                delta = view1.storage_offset() - view0.storage_offset()
+                if delta < 0:
+                    return None
+                refs[key] = ("gm", view0, delta)
+                if key in _GM_WRITES.get(opname, ()):
+                    gm_writes.append((view0, delta))
+                else:
+                    gm_reads.append(view0)
+            is_init = bool(inst0.args.get("is_init", True))
+            reads = _LOCAL_READS[opname] + (() if is_init else ("dst",))
+            for key in reads + _LOCAL_WRITES[opname]:
+                if key in refs:
+                    continue
+                views = (inst0.tensors[key], inst1.tensors[key])
+                if any(not view.is_contiguous() for view in views) or views[0].shape != views[1].shape:
+                    return None
+                slots = [slot_of[idx].get(_view_key(view)) for idx, view in enumerate(views)]
+                local_views.extend(views)
+                if key in reads and slots[0] is None and slots[1] is None:
+                    external.extend(views)
+                    refs[key] = ("local", views)
+                    continue
+                if slots[0] is None and slots[1] is None:
+                    slot = len(loop.slots)
+                    loop.slots.append(views)
+                    slot_of[0][_view_key(views[0])] = slot
+                    slot_of[1][_view_key(views[1])] = slot
+                    slots = [slot, slot]
+                if slots[0] != slots[1]:
+                    return None
+                refs[key] = ("slot", slots[0])
+                if key in _LOCAL_WRITES[opname]:
+                    slot_writes.add(slots[0])
+            loop.ops.append((opname, inst0, refs))
+            loop.order.append((pipe0, inst0, refs))
+        if not loop.ops:
+            return None
+
+        # Slots may only alias themselves; buffers read from outside the loop must stay untouched.
+        written_ranges = {
+            _view_key(view): _byte_range(view) for slot in slot_writes for view in loop.slots[slot]
+        }
+        for view in local_views:
+            key = _view_key(view)
+            span = _byte_range(view)
+            for other_key, other_span in written_ranges.items():
+                if other_key != key and _overlaps(span, other_span):
+                    return None
+        for view in external:
+            if any(_overlaps(_byte_range(view), span) for span in written_ranges.values()):
+                return None
+        if not cls._gm_writes_disjoint(gm_writes, gm_reads, trips):
+            return None
+        return loop
+
+    @staticmethod
+    def _gm_writes_disjoint(
+        writes: List[Tuple[torch.Tensor, int]],
+        reads: List[torch.Tensor],
+        trips: int,
+    ) -> bool:
+        read_storages = {view.untyped_storage().data_ptr() for view in reads}
+        by_storage: Dict[int, List[Tuple[torch.Tensor, int]]] = {}
+        for view, delta in writes:
+            storage = view.untyped_storage().data_ptr()
+            if storage in read_storages:
+                return False
+            by_storage.setdefault(storage, []).append((view, delta))
+        for group in by_storage.values():
+            if len(group) == 1 and (group[0][0].numel() == 0 or _tiles_disjoint(group[0][0], group[0][1], trips)):
+                continue
+            flat = torch.cat([_element_offsets(view, delta, trips) for view, delta in group])
+            # Every element is written at most once: no iteration overwrites another's tile.
+            if int(torch.bincount(flat - flat.min()).max()) > 1:
+                return False
+        return True
+
+    def matches(self, issued: List[Tuple[str, SimInstruction]]) -> bool:
+        """Check the instructions the last iteration dispatched against the extrapolated ones."""
+        if len(issued) != len(self.order):
+            return False
+        last = self.trips - 1
+        for (pipe_name, inst, refs), (issued_pipe, issued_inst) in zip(self.order, issued):
+            if pipe_name != issued_pipe or inst.opname != issued_inst.opname or inst.args != issued_inst.args:
+                return False
+            for key, ref in refs.items():
+                view = issued_inst.tensors.get(key)
+                if not isinstance(view, torch.Tensor):
+                    return False
+                if ref[0] == "gm":
+                    # GM slices are clipped at the tensor edge, which breaks the fixed offset step.
+                    base, delta = ref[1], ref[2]
+                    if (
+                        view.shape != base.shape
+                        or view.stride() != base.stride()
+                        or view.untyped_storage().data_ptr() != base.untyped_storage().data_ptr()
+                        or view.storage_offset() != base.storage_offset() + last * delta
+                    ):
+                        return False
+                    continue
+                expected = self.slots[ref[1]][last % 2] if ref[0] == "slot" else ref[1][last % 2]
+                if _view_key(view) != _view_key(expected):
+                    return False
+        return True
+
+    def _gather(self, views: Tuple[torch.Tensor, torch.Tensor], begin: int, count: int) -> torch.Tensor:
+        flat0 = views[0].reshape(1, -1)
+        if views[0].data_ptr() == views[1].data_ptr():
+            return flat0.expand(count, -1).clone()
+        both = torch.cat([flat0, views[1].reshape(1, -1)])
+        return both[(torch.arange(begin, begin + count) % 2)]
+
+    def run(self) -> None:
+        per_trip = sum(int(views[0].numel()) * views[0].element_size() for views in self.slots)
+        chunk = max(1, min(self.trips, _CHUNK_BYTES // max(1, per_trip)))
+        for begin in range(0, self.trips, chunk):
+            count = min(chunk, self.trips - begin)
+            buffers = [self._gather(views, begin, count) for views in self.slots]
+            for opname, inst, refs in self.ops:
+                tensors: Dict[str, torch.Tensor] = {}
+                rows: Dict[str, int] = {}
+                for key, ref in refs.items():
+                    if ref[0] == "slot":
+                        tensors[key] = buffers[ref[1]]
+                        rows[key] = int(self.slots[ref[1]][0].shape[0])
+                    elif ref[0] == "local":
+                        tensors[key] = self._gather(ref[1], begin, count)
+                        rows[key] = int(ref[1][0].shape[0])
+                    else:
+                        view, delta = ref[1], ref[2]
+                        tensors[key] = view.as_strided(
+                            (count,) + tuple(view.shape),
+                            (delta,) + tuple(view.stride()),
+                            view.storage_offset() + begin * delta,
+                        )
+                _BATCH_KERNELS[opname](inst, tensors, rows)
+            # Leave each DBuff half holding the last iteration that used it, as a serial run would.
+            last = begin + count - 1
+            for views, buffer in zip(self.slots, buffers):
+                if views[0].data_ptr() == views[1].data_ptr():
+                    views[0].copy_(buffer[last - begin].view(views[0].shape))
+                    continue
+                for parity in (0, 1):
+                    idx = last if last % 2 == parity else last - 1
+                    if idx >= begin:
+                        views[parity].copy_(buffer[idx - begin].view(views[parity].shape))
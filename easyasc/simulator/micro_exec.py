@@ -0,0 +1,646 @@
+import re
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+import torch
+
+from ..utils.reg import MaskReg, Reg, RegList
+from ..utils.Tensor import Tensor
+from ..utils.var import Var
+from .plan import get_plan
+from .scalar import Number, ScalarContext
+from .vec_pipe import _BITS_DTYPES, _COMPARE_FNS, VecPipeBase, VPipe
+
+if TYPE_CHECKING:
+    from ..micro.micromodule import MicroModule
+    from ..utils.instruction import Instruction
+
+
+_REG_BYTES = 256
+_BLOCK_BYTES = 32
+_REGLIST_ITEM = re.compile(r"^(\w+)\[(\w+)\]$")
+# format_scalar() prefixes half/bfloat16 literals with a C cast and suffixes floats with `f`.
+_SCALAR_CAST = re.compile(r"^\(\w+\)")
+_LAYOUT_INDEX = {"ZERO": 0, "ONE": 1, "TWO": 2, "THREE": 3}
+
+_BINARY_FNS: Dict[str, Callable[[torch.Tensor, torch.Tensor], torch.Tensor]] = {
+    "micro_vadd": torch.add,
+    "micro_vsub": torch.sub,
+    "micro_vmul": torch.mul,
+    "micro_vdiv": torch.div,
+    "micro_vmax": torch.maximum,
+    "micro_vmin": torch.minimum,
+    "micro_vprelu": lambda x, a: torch.where(x >= 0, x, x * a),
+}
+_BITWISE_FNS: Dict[str, Callable[..., torch.Tensor]] = {
+    "micro_vand": torch.bitwise_and,
+    "micro_vor": torch.bitwise_or,
+    "micro_vxor": torch.bitwise_xor,
+    "micro_vnot": torch.bitwise_not,
+}
+_UNARY_FNS: Dict[str, Callable[[torch.Tensor], torch.Tensor]] = {
+    "micro_vexp": torch.exp,
+    "micro_vabs": torch.abs,
+    "micro_vrelu": torch.relu,
+    "micro_vsqrt": torch.sqrt,
+    "micro_vln": torch.log,
+    "micro_vlog": torch.log,
+    "micro_vlog2": torch.log2,
+    "micro_vlog10": torch.log10,
+    "micro_vneg": torch.neg,
+    "micro_vcopy": lambda x: x,
+}
+_UNARY_SCALAR_FNS: Dict[str, Callable[[torch.Tensor, Number], torch.Tensor]] = {
+    "micro_vadds": lambda x, v: x + v,
+    "micro_vmuls": lambda x, v: x * v,
+    "micro_vmaxs": lambda x, v: torch.clamp(x, min=v),
+    "micro_vmins": lambda x, v: torch.clamp(x, max=v),
+    "micro_vlrelu": lambda x, v: torch.where(x >= 0, x, x * v),
+    "micro_shiftls": lambda x, v: torch.bitwise_left_shift(x, int(v)),
+    "micro_shiftrs": lambda x, v: torch.bitwise_right_shift(x, int(v)),
+}
+_MASK_FNS: Dict[str, Callable[..., torch.Tensor]] = {
+    "micro_maskand": torch.logical_and,
+    "micro_maskor": torch.logical_or,
+    "micro_maskxor": torch.logical_xor,
+    "micro_masknot": torch.logical_not,
+    "micro_maskmov": lambda x: x,
+}
+
+
+class MicroExecutor(ScalarContext):
+    """
+    Runs the instructions of one MicroModule call against a vector unit's UB.
+
+    Vector registers are 256-byte torch tensors (`256 // dtype.size` lanes), RegLists are
+    stacked [length, lanes] tensors and mask registers are 256 bools, one per register byte
+    (an element of size s is active when its first byte is). Masked compute and loads use the
+    ZEROING merge mode of the generated casts: inactive destination lanes become 0. Half and
+    bfloat16 values are computed in float32 and rounded when written back. Tensor arguments
+    are UB pointers (byte offsets), so micro slices are plain pointer arithmetic.
+    """
+
+    unit_name = "micro"
+
+    def __init__(self, core_idx: int, ub: torch.Tensor, sub_block_idx: int = 0) -> None:
+        self.core_idx = core_idx
+        self.sub_block_idx = sub_block_idx
+        self.UB = ub
+        self.micro_name = ""
+        self.var_values: Dict[str, Number] = {}
+        self.pointers: Dict[str, int] = {}
+        self.regs: Dict[str, torch.Tensor] = {}
+        self.reglists: Dict[str, torch.Tensor] = {}
+        self.masks: Dict[str, torch.Tensor] = {}
+        self._spr_mask: Optional[Callable[[int], torch.Tensor]] = None
+
+    def run(
+        self,
+        micro: "MicroModule",
+        pointers: Dict[str, int],
+        scalars: Dict[str, Number],
+        spr_mask: Optional[Callable[[int], torch.Tensor]] = None,
+    ) -> None:
+        """Run `micro` with tensor parameters at UB byte offsets `pointers` and scalar parameters `scalars`."""
+        self.micro_name = micro.name
+        self.pointers = dict(pointers)
+        self.var_values = dict(scalars)
+        self.regs = {}
+        self.reglists = {}
+        self.masks = {}
+        # Lane mask of the enclosing V pipe (set_mask), read by move_mask_spr.
+        self._spr_mask = spr_mask
+        self._execute_plan(get_plan(micro.instructions, MicroExecutor, self._op_handler))
+
+    # ---- operands ----------------------------------------------------------------------------
+
+    @staticmethod
+    def _compute_dtype(dtype: torch.dtype) -> torch.dtype:
+        if dtype in (torch.float16, torch.bfloat16):
+            return torch.float32
+        if dtype.is_floating_point:
+            return dtype
+        # Unsigned 16/32-bit tensors support few ops in torch; every integer lane fits int64.
+        return torch.int64
+
+    def _reg_dtype(self, reg: Any, label: str) -> Tuple[torch.dtype, int]:
+        if not isinstance(reg, (Reg, RegList, MaskReg)):
+            raise TypeError(f"{label} must be Reg, got: {type(reg)}")
+        return self._to_torch_dtype(reg.dtype), self._dtype_size(reg.dtype)
+
+    def _scalar_text(self, text: str) -> Number:
+        text = _SCALAR_CAST.sub("", text.strip())
+        literal = text[:-1] if text.endswith("f") else text
+        try:
+            return int(literal)
+        except ValueError:
+            pass
+        try:
+            return float(literal)
+        except ValueError:
+            pass
+        if text not in self.var_values:
+            raise ValueError(f"Var {text} has no runtime value in micro {self.micro_name} simulator")
+        return self.var_values[text]
+
+    def _scalar(self, value: Any) -> Number:
+        if isinstance(value, str):
+            return self._scalar_text(value)
+        return self._resolve_scalar(value)
+
+    def _reg(self, reg: Any, label: str = "reg") -> torch.Tensor:
+        dtype, size = self._reg_dtype(reg, label)
+        name = reg.name
+        value = self.regs.get(name)
+        if value is not None:
+            return value
+        match = _REGLIST_ITEM.match(name)
+        if match is not None and match.group(1) in self.reglists:
+            regs = self.reglists[match.group(1)]
+            idx = int(self._scalar_text(match.group(2)))
+            if idx < 0 or idx >= int(regs.shape[0]):
+                raise IndexError(f"{name} is out of range for RegList of length {int(regs.shape[0])}")
+            return regs[idx]
+        # Temporary registers from MicroModule.get_reg have no create_reg; allocate them on first use.
+        value = torch.zeros(_REG_BYTES // size, dtype=dtype)
+        self.regs[name] = value
+        return value
+
+    def _write(self, reg: Any, values: torch.Tensor, mask: Optional[MaskReg] = None) -> None:
+        dst = self._reg(reg, "dst")
+        if values.dtype != dst.dtype:
+            values = values.to(dst.dtype)
+        if mask is not None:
+            values = torch.where(self._active(mask, dst), values, torch.zeros_like(values))
+        dst.copy_(values)
+
+    def _mask_bits(self, mask: Any) -> torch.Tensor:
+        if not isinstance(mask, MaskReg):
+            raise TypeError(f"mask must be MaskReg, got: {type(mask)}")
+        bits = self.masks.get(mask.name)
+        if bits is None:
+            raise KeyError(f"MaskReg {mask.name} is used before it is created in micro {self.micro_name}")
+        return bits
+
+    def _active(self, mask: Any, reg: torch.Tensor) -> torch.Tensor:
+        return self._mask_bits(mask)[:: int(reg.element_size())]
+
+    @staticmethod
+    def _element_bits(elems: torch.Tensor, size: int) -> torch.Tensor:
+        return elems.repeat_interleave(size)
+
+    def _ub(self, tensor: Any, label: str) -> Tuple[torch.Tensor, int]:
+        # Returns the whole UB reinterpreted as the tensor's dtype plus its base element offset.
+        if not isinstance(tensor, Tensor):
+            raise TypeError(f"{label} must be Tensor, got: {type(tensor)}")
+        offset = self.pointers.get(tensor.name)
+        if offset is None:
+            raise KeyError(f"{label}: UB pointer {tensor.name} is not defined in micro {self.micro_name}")
+        dtype = self._to_torch_dtype(tensor.dtype)
+        size = self._dtype_size(tensor.dtype)
+        if offset % size != 0:
+            raise ValueError(f"{label} is not aligned to {size} bytes in UB, offset={offset}")
+        return self.UB.view(dtype), offset // size
+
+    def _ub_index(self, flat: torch.Tensor, index: torch.Tensor, label: str) -> torch.Tensor:
+        VecPipeBase._check_bounds(flat, index, f"micro {self.micro_name} {label}")
+        return index
+
+    # ---- declarations ------------------------------------------------------------------------
+
+    def _handle_create_reg(self, inst: "Instruction") -> None:
+        reg = inst.kwargs.get("reg")
+        dtype, size = self._reg_dtype(reg, "create_reg reg")
+        self.regs[reg.name] = torch.zeros(_REG_BYTES // size, dtype=dtype)
+
+    def _handle_create_reglist(self, inst: "Instruction") -> None:
+        reglist = inst.kwargs.get("reglist")
+        dtype, size = self._reg_dtype(reglist, "create_reglist reglist")
+        self.reglists[reglist.name] = torch.zeros((reglist.length, _REG_BYTES // size), dtype=dtype)
+
+    @staticmethod
+    def _pattern_count(pattern: str, lanes: int) -> int:
+        if pattern == "ALL":
+            return lanes
+        if pattern == "ALLF":
+            return 0
+        if pattern.startswith("VL"):
+            return min(int(pattern[2:]), lanes)
+        if pattern == "M3":
+            return lanes // 3 * 3
+        if pattern == "M4":
+            return lanes // 4 * 4
+        if pattern == "H":
+            return lanes // 2
+        if pattern == "Q":
+            return lanes // 4
+        raise ValueError(f"Unsupported mask pattern in micro simulator: {pattern}")
+
+    def _count_bits(self, count: int, size: int) -> torch.Tensor:
+        lanes = _REG_BYTES // size
+        return self._element_bits(torch.arange(lanes) < count, size)
+
+    def _handle_create_maskreg(self, inst: "Instruction") -> None:
+        reg = inst.kwargs.get("reg")
+        _, size = self._reg_dtype(reg, "create_maskreg reg")
+        count = self._pattern_count(str(reg.init_mode), _REG_BYTES // size)
+        self.masks[reg.name] = self._count_bits(count, size)
+
+    def _handle_micro_slice_tensor(self, inst: "Instruction") -> None:
+        src = inst.kwargs.get("src")
+        out = inst.kwargs.get("out")
+        if not isinstance(src, Tensor) or not isinstance(out, Tensor):
+            raise TypeError("micro_slice_tensor requires Tensor src/out")
+        if src.name not in self.pointers:
+            raise KeyError(f"micro_slice_tensor: UB pointer {src.name} is not defined in micro {self.micro_name}")
+        shape = [self._resolve_int(dim, "micro_slice_tensor shape") for dim in out.shape]
+        offset = [self._resolve_int(off, "micro_slice_tensor offset") for off in inst.kwargs.get("offset", [])]
+        if len(shape) != len(offset):
+            raise ValueError("micro_slice_tensor shape and offset dimensions do not match")
+        # Same linearization as the generated pointer: sum(off[i] * prod(shape[i+1:])).
+        elems = 0
+        stride = 1
+        for dim, off in zip(reversed(shape), reversed(offset)):
+            elems += off * stride
+            stride *= dim
+        self.pointers[out.name] = self.pointers[src.name] + elems * self._dtype_size(out.dtype)
+
+    # ---- data movement -----------------------------------------------------------------------
+
+    def _block_index(self, inst: "Instruction", base: int, lanes: int, size: int) -> torch.Tensor:
+        # DATA_BLOCK_COPY: 8 blocks of 32 bytes, block b starts blk_stride * b blocks after src.
+        blk_stride = self._resolve_int(inst.kwargs.get("blk_stride", 1), f"{inst.opname} blk_stride")
+        blk = _BLOCK_BYTES // size
+        blocks = torch.arange(8, dtype=torch.int64).view(-1, 1) * (blk_stride * blk)
+        return (base + blocks + torch.arange(blk, dtype=torch.int64).view(1, -1)).reshape(lanes)
+
+    def _handle_ub2reg(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), "micro_ub2reg dst")
+        flat, base = self._ub(inst.kwargs.get("src"), "micro_ub2reg src")
+        index = self._block_index(inst, base, int(dst.numel()), int(dst.element_size()))
+        self._write(inst.kwargs.get("dst"), flat[self._ub_index(flat, index, "ub2reg src")], inst.kwargs.get("mask"))
+
+    def _handle_reg2ub(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_reg2ub src")
+        flat, base = self._ub(inst.kwargs.get("dst"), "micro_reg2ub dst")
+        index = self._block_index(inst, base, int(src.numel()), int(src.element_size()))
+        active = self._active(inst.kwargs.get("mask"), src)
+        flat[self._ub_index(flat, index[active], "reg2ub dst")] = src[active]
+
+    @staticmethod
+    def _dist_kind(mode: Any) -> str:
+        # "DIST_UNPACK4_B8" -> "UNPACK4", "DIST_FIRST_ELEMENT_B32" -> "FIRST_ELEMENT"
+        text = str(mode)
+        if not text.startswith("DIST_") or "_B" not in text:
+            raise ValueError(f"Unsupported data distribution mode in micro simulator: {text}")
+        return text[len("DIST_") : text.rindex("_B")]
+
+    def _handle_ub2regcont(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), "micro_ub2regcont dst")
+        flat, base = self._ub(inst.kwargs.get("src"), "micro_ub2regcont src")
+        lanes = int(dst.numel())
+        kind = self._dist_kind(inst.kwargs.get("mode"))
+        lane = torch.arange(lanes, dtype=torch.int64)
+        if kind == "BRC":
+            index = torch.zeros(lanes, dtype=torch.int64)
+        elif kind == "US":
+            index = lane // 2
+        elif kind == "DS":
+            index = lane * 2
+        elif kind == "E2B":
+            index = lane // (_BLOCK_BYTES // int(dst.element_size()))
+        elif kind in ("UNPACK", "UNPACK4"):
+            # Each source element lands in the low part of a 2x (4x) wider lane; the rest is 0.
+            ratio = 2 if kind == "UNPACK" else 4
+            index = torch.arange(lanes // ratio, dtype=torch.int64)
+            values = torch.zeros_like(dst)
+            values[::ratio] = flat[self._ub_index(flat, base + index, "ub2regcont src")]
+            self._write(inst.kwargs.get("dst"), values)
+            return
+        else:
+            raise ValueError(f"Unsupported load distribution in micro simulator: {kind}")
+        self._write(inst.kwargs.get("dst"), flat[self._ub_index(flat, base + index, "ub2regcont src")])
+
+    def _handle_reg2ubcont(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_reg2ubcont src")
+        flat, base = self._ub(inst.kwargs.get("dst"), "micro_reg2ubcont dst")
+        active = self._active(inst.kwargs.get("mask"), src)
+        kind = self._dist_kind(inst.kwargs.get("mode"))
+        if kind == "NORM":
+            ratio, count = 1, int(src.numel())
+        elif kind == "PACK":
+            ratio, count = 2, int(src.numel()) // 2
+        elif kind == "PACK4":
+            ratio, count = 4, int(src.numel()) // 4
+        elif kind == "FIRST_ELEMENT":
+            ratio, count = 1, 1
+        else:
+            raise ValueError(f"Unsupported store distribution in micro simulator: {kind}")
+        # Packing keeps the low part of each wider lane, i.e. every `ratio`-th element.
+        picked = torch.arange(count, dtype=torch.int64) * ratio
+        keep = active[picked]
+        index = base + torch.arange(count, dtype=torch.int64)
+        flat[self._ub_index(flat, index[keep], "reg2ubcont dst")] = src[picked][keep]
+
+    def _handle_datacopygather(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), "micro_datacopygather dst")
+        flat, base = self._ub(inst.kwargs.get("src"), "micro_datacopygather src")
+        index = self._reg(inst.kwargs.get("index"), "micro_datacopygather index").to(torch.int64)
+        index = index[: int(dst.numel())] + base
+        active = self._active(inst.kwargs.get("mask"), dst)
+        values = torch.zeros_like(dst)
+        values[active] = flat[self._ub_index(flat, index[active], "datacopygather src")]
+        self._write(inst.kwargs.get("dst"), values)
+
+    def _handle_datacopyscatter(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_datacopyscatter src")
+        flat, base = self._ub(inst.kwargs.get("dst"), "micro_datacopyscatter dst")
+        index = self._reg(inst.kwargs.get("index"), "micro_datacopyscatter index").to(torch.int64)
+        index = index[: int(src.numel())] + base
+        active = self._active(inst.kwargs.get("mask"), src)
+        flat[self._ub_index(flat, index[active], "datacopyscatter dst")] = src[active]
+
+    def _handle_gather(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_gather src")
+        index = self._reg(inst.kwargs.get("index"), "micro_gather index").to(torch.int64)[: int(src.numel())]
+        if index.numel() and (int(index.min()) < 0 or int(index.max()) >= int(src.numel())):
+            raise IndexError(f"micro_gather index out of range: [{int(index.min())}, {int(index.max())}], lanes={int(src.numel())}")
+        self._write(inst.kwargs.get("dst"), src[index])
+
+    def _handle_gathermask(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_gathermask src")
+        picked = src[self._active(inst.kwargs.get("mask"), src)]
+        values = torch.zeros_like(src)
+        values[: int(picked.numel())] = picked
+        self._write(inst.kwargs.get("dst"), values)
+
+    # ---- compute -----------------------------------------------------------------------------
+
+    def _handle_binary(self, inst: "Instruction") -> None:
+        src1 = self._reg(inst.kwargs.get("src1"), f"{inst.opname} src1")
+        src2 = self._reg(inst.kwargs.get("src2"), f"{inst.opname} src2")
+        compute = self._compute_dtype(src1.dtype)
+        out = _BINARY_FNS[inst.opname](src1.to(compute), src2.to(compute))
+        self._write(inst.kwargs.get("dst"), out, inst.kwargs.get("mask"))
+
+    def _handle_bitwise(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), f"{inst.opname} dst")
+        bits = _BITS_DTYPES[int(dst.element_size())]
+        if inst.opname == "micro_vnot":
+            out = _BITWISE_FNS[inst.opname](self._reg(inst.kwargs.get("src"), f"{inst.opname} src").view(bits))
+        else:
+            src1 = self._reg(inst.kwargs.get("src1"), f"{inst.opname} src1").view(bits)
+            src2 = self._reg(inst.kwargs.get("src2"), f"{inst.opname} src2").view(bits)
+            out = _BITWISE_FNS[inst.opname](src1, src2)
+        self._write(inst.kwargs.get("dst"), out.view(dst.dtype), inst.kwargs.get("mask"))
+
+    def _handle_unary(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), f"{inst.opname} src")
+        out = _UNARY_FNS[inst.opname](src.to(self._compute_dtype(src.dtype)))
+        self._write(inst.kwargs.get("dst"), out, inst.kwargs.get("mask"))
+
+    def _handle_unary_scalar(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), f"{inst.opname} src")
+        value = self._scalar(inst.kwargs.get("v"))
+        compute = self._compute_dtype(src.dtype)
+        x = src.to(compute)
+        if inst.opname in ("micro_shiftls", "micro_shiftrs") and src.dtype.is_floating_point:
+            # Shifts on float registers act on the raw bits.
+            out = _UNARY_SCALAR_FNS[inst.opname](src.view(_BITS_DTYPES[int(src.element_size())]), value)
+            self._write(inst.kwargs.get("dst"), out.view(src.dtype), inst.kwargs.get("mask"))
+            return
+        if inst.opname == "micro_vaxpy":
+            out = x * value + self._reg(inst.kwargs.get("dst"), "micro_vaxpy dst").to(compute)
+        else:
+            out = _UNARY_SCALAR_FNS[inst.opname](x, value)
+        self._write(inst.kwargs.get("dst"), out, inst.kwargs.get("mask"))
+
+    def _handle_dup(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), "micro_vdup dst")
+        src = inst.kwargs.get("src")
+        if isinstance(src, Reg):
+            # Register form broadcasts the lowest element.
+            value = self._reg(src, "micro_vdup src")[0].to(self._compute_dtype(dst.dtype))
+            out = value.expand(int(dst.numel()))
+        else:
+            out = torch.full(dst.shape, self._scalar(src), dtype=self._compute_dtype(dst.dtype))
+        self._write(inst.kwargs.get("dst"), out, inst.kwargs.get("mask"))
+
+    def _handle_arange(self, inst: "Instruction") -> None:
+        dst = self._reg(inst.kwargs.get("dst"), "micro_arange dst")
+        compute = self._compute_dtype(dst.dtype)
+        lane = torch.arange(int(dst.numel()), dtype=compute)
+        start = self._scalar(inst.kwargs.get("v"))
+        decrease = "DECREASE" in str(inst.kwargs.get("mode", ""))
+        self._write(inst.kwargs.get("dst"), start - lane if decrease else start + lane)
+
+    def _handle_group(self, inst: "Instruction") -> None:
+        opname = inst.opname
+        src = self._reg(inst.kwargs.get("src"), f"{opname} src")
+        dst = self._reg(inst.kwargs.get("dst"), f"{opname} dst")
+        compute = self._compute_dtype(src.dtype)
+        values = src.to(compute)
+        if opname.endswith("add"):
+            neutral: Number = 0
+        elif compute.is_floating_point:
+            neutral = float("-inf") if opname.endswith("max") else float("inf")
+        else:
+            info = torch.iinfo(compute)
+            neutral = info.min if opname.endswith("max") else info.max
+        active = self._active(inst.kwargs.get("mask"), src)
+        values = torch.where(active, values, torch.full_like(values, neutral))
+        lanes = int(values.numel())
+        if opname in ("micro_vcadd", "micro_vcmax", "micro_vcmin"):
+            groups = values.view(1, lanes)
+        elif opname == "micro_vcpadd":
+            groups = values.view(lanes // 2, 2)
+        else:
+            groups = values.view(8, lanes // 8)
+        if opname.endswith("add"):
+            reduced = groups.sum(dim=1)
+        elif opname.endswith("max"):
+            reduced = groups.amax(dim=1)
+        else:
+            reduced = groups.amin(dim=1)
+        # Results fill the lowest lanes of dst; the remaining lanes are zeroed.
+        out = torch.zeros(int(dst.numel()), dtype=compute)
+        out[: int(reduced.numel())] = reduced
+        self._write(inst.kwargs.get("dst"), out)
+
+    def _handle_interleave(self, inst: "Instruction") -> None:
+        src0 = self._reg(inst.kwargs.get("src0"), f"{inst.opname} src0")
+        src1 = self._reg(inst.kwargs.get("src1"), f"{inst.opname} src1")
+        lanes = int(src0.numel())
+        if inst.opname == "micro_interleave":
+            merged = torch.stack([src0, src1], dim=1).reshape(-1)
+            out0, out1 = merged[:lanes], merged[lanes:]
+        else:
+            merged = torch.cat([src0, src1])
+            out0, out1 = merged[0::2], merged[1::2]
+        self._write(inst.kwargs.get("dst0"), out0)
+        self._write(inst.kwargs.get("dst1"), out1)
+
+    def _handle_cast(self, inst: "Instruction") -> None:
+        src = self._reg(inst.kwargs.get("src"), "micro_cast src")
+        dst = self._reg(inst.kwargs.get("dst"), "micro_cast dst")
+        config = inst.kwargs.get("config")
+        layout = _LAYOUT_INDEX.get(str(getattr(config, "reg_layout", "ZERO")), 0)
+        src_size = int(src.element_size())
+        dst_size = int(dst.element_size())
+        if dst_size > src_size:
+            # Widening reads every ratio-th source lane, starting at the register layout index.
+            values = src[layout :: dst_size // src_size][: int(dst.numel())]
+        else:
+            values = src
+        if values.dtype.is_floating_point and not dst.dtype.is_floating_point:
+            round_mode = str(getattr(getattr(config, "round_mode", None), "name", "CAST_RINT"))
+            values = VPipe._round(values.to(torch.float64), round_mode)
+        if not dst.dtype.is_floating_point:
+            if bool(getattr(config, "saturate", False)):
+                info = torch.iinfo(dst.dtype)
+                values = torch.clamp(values.to(torch.float64), info.min, info.max)
+            values = values.to(torch.int64)
+        values = values.to(dst.dtype)
+        if dst_size < src_size:
+            # Narrowing writes each result to lane i * ratio + layout; the other lanes are 0.
+            narrowed = torch.zeros_like(dst)
+            narrowed[layout :: src_size // dst_size] = values[: int(dst.numel()) // (src_size // dst_size)]
+            values = narrowed
+        self._write(inst.kwargs.get("dst"), values, inst.kwargs.get("mask"))
+
+    def _handle_compare(self, inst: "Instruction") -> None:
+        src1 = self._reg(inst.kwargs.get("src1"), f"{inst.opname} src1")
+        mode = str(inst.kwargs.get("mode"))
+        if mode not in _COMPARE_FNS:
+            raise ValueError(f"Unsupported compare mode in micro simulator: {mode}")
+        compute = self._compute_dtype(src1.dtype)
+        if inst.opname == "micro_compare":
+            rhs: Any = self._reg(inst.kwargs.get("src2"), "micro_compare src2").to(compute)
+        else:
+            rhs = self._scalar(inst.kwargs.get("src2"))
+        elems = _COMPARE_FNS[mode](src1.to(compute), rhs) & self._active(inst.kwargs.get("mask"), src1)
+        self.masks[inst.kwargs.get("dst").name] = self._element_bits(elems, int(src1.element_size()))
+
+    def _handle_select(self, inst: "Instruction") -> None:
+        src1 = self._reg(inst.kwargs.get("src1"), "micro_select src1")
+        src2 = self._reg(inst.kwargs.get("src2"), "micro_select src2")
+        self._write(inst.kwargs.get("dst"), torch.where(self._active(inst.kwargs.get("mask"), src1), src1, src2))
+
+    # ---- mask registers ----------------------------------------------------------------------
+
+    def _mask_size(self, mask: Any, label: str) -> int:
+        return self._reg_dtype(mask, label)[1]
+
+    def _handle_mask_logic(self, inst: "Instruction") -> None:
+        fn = _MASK_FNS[inst.opname]
+        if "src" in inst.kwargs:
+            out = fn(self._mask_bits(inst.kwargs.get("src")))
+        else:
+            out = fn(self._mask_bits(inst.kwargs.get("src1")), self._mask_bits(inst.kwargs.get("src2")))
+        self.masks[inst.kwargs.get("dst").name] = out & self._mask_bits(inst.kwargs.get("mask"))
+
+    def _handle_masksel(self, inst: "Instruction") -> None:
+        out = torch.where(
+            self._mask_bits(inst.kwargs.get("mask")),
+            self._mask_bits(inst.kwargs.get("src1")),
+            self._mask_bits(inst.kwargs.get("src2")),
+        )
+        self.masks[inst.kwargs.get("dst").name] = out
+
+    def _handle_mask_interleave(self, inst: "Instruction") -> None:
+        size = self._mask_size(inst.kwargs.get("dst0"), f"{inst.opname} dst0")
+        src0 = self._mask_bits(inst.kwargs.get("src0"))[::size]
+        src1 = self._mask_bits(inst.kwargs.get("src1"))[::size]
+        lanes = int(src0.numel())
+        if inst.opname == "micro_maskinterl":
+            merged = torch.stack([src0, src1], dim=1).reshape(-1)
+            out0, out1 = merged[:lanes], merged[lanes:]
+        else:
+            merged = torch.cat([src0, src1])
+            out0, out1 = merged[0::2], merged[1::2]
+        self.masks[inst.kwargs.get("dst0").name] = self._element_bits(out0, size)
+        self.masks[inst.kwargs.get("dst1").name] = self._element_bits(out1, size)
+
+    def _handle_maskpack(self, inst: "Instruction") -> None:
+        src = self._mask_bits(inst.kwargs.get("src"))
+        high = "HIGHEST" in str(inst.kwargs.get("mode", ""))
+        out = torch.zeros_like(src)
+        half = _REG_BYTES // 2
+        if inst.opname == "micro_maskpack":
+            # Every other bit of src moves into the low (or high) half of dst.
+            start = half if high else 0
+            out[start : start + half] = src[0::2]
+        else:
+            start = half if high else 0
+            out = src[start : start + half].repeat_interleave(2)
+        self.masks[inst.kwargs.get("dst").name] = out
+
+    def _handle_movemaskspr(self, inst: "Instruction") -> None:
+        dst = inst.kwargs.get("dst")
+        size = self._mask_size(dst, "micro_movemaskspr dst")
+        lanes = _REG_BYTES // size
+        elems = self._spr_mask(lanes) if self._spr_mask is not None else torch.ones(lanes, dtype=torch.bool)
+        self.masks[dst.name] = self._element_bits(elems, size)
+
+    def _handle_updatemask(self, inst: "Instruction") -> None:
+        dst = inst.kwargs.get("dst")
+        cnt = inst.kwargs.get("cnt")
+        if not isinstance(cnt, Var):
+            raise TypeError(f"micro_updatemask requires Var cnt, got: {type(cnt)}")
+        size = self._mask_size(dst, "micro_updatemask dst")
+        lanes = _REG_BYTES // size
+        remaining = self._resolve_int(cnt, "micro_updatemask cnt")
+        self.masks[dst.name] = self._count_bits(min(remaining, lanes), size)
+        # UpdateMask consumes one register's worth of elements from the counter.
+        self.var_values[cnt.name] = max(remaining - lanes, 0)
+
+    def _unsupported(self, inst: "Instruction") -> None:
+        raise ValueError(f"Unsupported instruction in micro {self.micro_name} simulator: {inst.opname}")
+
+    _OP_HANDLER_NAMES: Dict[str, str] = {
+        "create_var": "_handle_create_var",
+        "create_reg": "_handle_create_reg",
+        "create_reglist": "_handle_create_reglist",
+        "create_maskreg": "_handle_create_maskreg",
+        "micro_slice_tensor": "_handle_micro_slice_tensor",
+        "micro_ub2reg": "_handle_ub2reg",
+        "micro_reg2ub": "_handle_reg2ub",
+        "micro_ub2regcont": "_handle_ub2regcont",
+        "micro_reg2ubcont": "_handle_reg2ubcont",
+        "micro_datacopygather": "_handle_datacopygather",
+        "micro_datacopyscatter": "_handle_datacopyscatter",
+        "micro_gather": "_handle_gather",
+        "micro_gathermask": "_handle_gathermask",
+        "micro_vaxpy": "_handle_unary_scalar",
+        "micro_vdup": "_handle_dup",
+        "micro_arange": "_handle_arange",
+        "micro_interleave": "_handle_interleave",
+        "micro_dinterleave": "_handle_interleave",
+        "micro_cast": "_handle_cast",
+        "micro_compare": "_handle_compare",
+        "micro_compares": "_handle_compare",
+        "micro_select": "_handle_select",
+        "micro_masksel": "_handle_masksel",
+        "micro_maskinterl": "_handle_mask_interleave",
+        "micro_maskdeinterl": "_handle_mask_interleave",
+        "micro_maskpack": "_handle_maskpack",
+        "micro_maskunpack": "_handle_maskpack",
+        "micro_movemaskspr": "_handle_movemaskspr",
+        "micro_updatemask": "_handle_updatemask",
+    }
+    _OP_HANDLER_NAMES.update({opname: "_assign_var_op" for opname in (
+        "GetCubeNum", "GetCubeIdx", "GetVecNum", "GetVecIdx", "GetSubBlockIdx", "CeilDiv", "Min", "Max",
+        "var_mul", "var_div", "var_add", "var_sub", "scalar_sqrt",
+        "Align16", "Align32", "Align64", "Align128", "Align256",
+    )})
+    _OP_HANDLER_NAMES.update({opname: "_handle_binary" for opname in _BINARY_FNS})
+    _OP_HANDLER_NAMES.update({opname: "_handle_bitwise" for opname in _BITWISE_FNS})
+    _OP_HANDLER_NAMES.update({opname: "_handle_unary" for opname in _UNARY_FNS})
+    _OP_HANDLER_NAMES.update({opname: "_handle_unary_scalar" for opname in _UNARY_SCALAR_FNS})
+    _OP_HANDLER_NAMES.update({opname: "_handle_mask_logic" for opname in _MASK_FNS})
+    _OP_HANDLER_NAMES.update({opname: "_handle_group" for opname in (
+        "micro_vcadd", "micro_vcmax", "micro_vcmin", "micro_vcgadd", "micro_vcgmax", "micro_vcgmin", "micro_vcpadd",
+    )})
+
+    @classmethod
+    def _op_handler(cls, opname: str) -> Callable[["MicroExecutor", "Instruction"], Any]:
+        return getattr(cls, cls._OP_HANDLER_NAMES.get(opname, "_unsupported"))
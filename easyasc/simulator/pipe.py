@@ -1,10 +1,11 @@
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 
 from ._core_utils import validate_core_idx
+from .layout import LayoutCache
 
 
 @dataclass
@@ -33,12 +34,29 @@ class PipeBase:
     def __init__(self, core_idx: int) -> None:
         self.core_idx = validate_core_idx(core_idx)
         self.instructions: List[SimInstruction] = []
+        # Set by the owning lane to share logical ND views of local memory between its pipes.
+        self.layout: Optional[LayoutCache] = None
+        self._scratch_panels: Dict[str, torch.Tensor] = {}
+
+    def _log_prefix(self) -> str:
+        return f"[cube][core={self.core_idx}][pipe={self.pipe_name}]"
 
     def issue(self, instruction: SimInstruction) -> None:
         if not isinstance(instruction, SimInstruction):
             raise TypeError(f"instruction must be SimInstruction, got: {type(instruction)}")
         self.instructions.append(instruction)
 
+    def _scratch(self, slot: str, shape: Tuple[int, ...], like: torch.Tensor) -> torch.Tensor:
+        # Per-pipe temporary reused across instructions; callers must not keep it.
+        numel = 1
+        for dim in shape:
+            numel *= dim
+        panel = self._scratch_panels.get(slot)
+        if panel is None or panel.dtype != like.dtype or panel.device != like.device or int(panel.numel()) < numel:
+            panel = like.new_empty((numel,))
+            self._scratch_panels[slot] = panel
+        return panel[:numel].view(shape)
+
     def execute_instruction(self, instruction: SimInstruction) -> None:
         if instruction.opname != "sim_print":
             return
@@ -46,7 +64,7 @@ class PipeBase:
         if not isinstance(payload, (list, tuple)):
             raise TypeError(f"sim_print payload must be list/tuple, got: {type(payload)}")
         message = " ".join(str(item) for item in payload)
-        _SIM_LOGGER.info(f"[cube][core={self.core_idx}][pipe={self.pipe_name}] {message}")
+        _SIM_LOGGER.info(f"{self._log_prefix()} {message}")
 
     def execute_all(self) -> None:
         for instruction in self.instructions:
@@ -56,6 +74,11 @@ class PipeBase:
         self.instructions = []
 
 
+class ScalarPipe(PipeBase):
+    # Scalar-issued sync/cross-core instructions; pipe instructions dispatched after one wait behind it.
+    pipe_name = "S"
+
+
 class MTE2Pipe(PipeBase):
     pipe_name = "MTE2"
 
@@ -118,8 +141,12 @@ class MTE2Pipe(PipeBase):
                 f"M_dst={h_dst}, N={w}, C0={c0}, aligned_M_dst={dst_stride_h}"
             )
 
+        layout = self.layout
+        token = layout.token(dst_flat) if layout is not None else 0
         dst_flat.zero_()
         if h == 0 or w == 0:
+            if layout is not None:
+                layout.record(dst_flat, dst_stride_h, c0, None, token)
             return
 
         block_count = (w + c0 - 1) // c0
@@ -136,6 +163,10 @@ class MTE2Pipe(PipeBase):
             start_col = full_blocks * c0
             dst_panel[full_blocks, :h, :tail].copy_(src_hw[:, start_col : start_col + tail])
 
+        if layout is not None:
+            # GM can change under the cache, so keep an owned copy in the L1 dtype.
+            layout.record(dst_flat, dst_stride_h, c0, src_hw.to(dst.dtype, copy=True), token)
+
     def execute_instruction(self, instruction: SimInstruction) -> None:
         if instruction.opname == "gm_to_l1_nd2nz":
             self._execute_gm_to_l1_nd2nz(instruction)
@@ -171,8 +202,10 @@ class MTE1Pipe(PipeBase):
         n_cols: int,
         src_stride_m: int,
         c0: int,
+        out: Optional[torch.Tensor] = None,
     ) -> torch.Tensor:
-        out = src_flat.new_zeros((m_rows, n_cols))
+        if out is None:
+            out = src_flat.new_empty((m_rows, n_cols))
         if m_rows == 0 or n_cols == 0:
             return out
         blocks = (n_cols + c0 - 1) // c0
@@ -233,6 +266,8 @@ class MTE1Pipe(PipeBase):
             )
 
         dst_flat = dst.reshape(-1)
+        layout = self.layout
+        token = layout.token(dst_flat) if layout is not None else 0
         if not src_is_transpose:
             dst_stride_m = self._align16(m_dst)
             dst_needed = ((n_dst + c0 - 1) // c0) * dst_stride_m * c0
@@ -244,6 +279,8 @@ class MTE1Pipe(PipeBase):
                 )
             dst_flat.zero_()
             if m_dst == 0 or n_dst == 0:
+                if layout is not None:
+                    layout.record(dst_flat, dst_stride_m, c0, None, token)
                 return
             blocks = (n_dst + c0 - 1) // c0
             src_panel = src_flat[: blocks * src_stride_m * c0].reshape(blocks, src_stride_m, c0)
@@ -254,6 +291,9 @@ class MTE1Pipe(PipeBase):
             tail = n_dst - full_blocks * c0
             if tail > 0:
                 dst_panel[full_blocks, :m_dst, :tail].copy_(src_panel[full_blocks, :m_dst, :tail])
+            if layout is not None:
+                logical = layout.lookup(src_flat, m_dst, n_dst, src_stride_m, c0)
+                layout.record(dst_flat, dst_stride_m, c0, logical, token)
             return
 
         # NZ -> ZN transpose path: int8 uses 32-row tile, others use 16-row tile.
@@ -267,15 +307,27 @@ class MTE1Pipe(PipeBase):
                 f"need={dst_needed}, have={int(dst_flat.numel())}, "
                 f"m_dst={m_dst}, n_dst={n_dst}, row_block={row_block}, n_align={n_align}"
             )
+        logical = layout.lookup(src_flat, m_dst, n_dst, src_stride_m, c0) if layout is not None else None
         dst_flat.zero_()
         if m_dst == 0 or n_dst == 0:
+            if layout is not None:
+                layout.record(dst_flat, n_align, row_block, None, token)
             return
 
-        logical = self._decode_nz_to_nd(src_flat, m_dst, n_dst, src_stride_m, c0)
-        logical_pad = logical.new_zeros((m_blocks * row_block, n_align))
+        cached = logical is not None
+        if not cached:
+            logical = self._decode_nz_to_nd(
+                src_flat, m_dst, n_dst, src_stride_m, c0, out=self._scratch("logical", (m_dst, n_dst), src_flat)
+            )
+        logical_pad = self._scratch("pad", (m_blocks * row_block, n_align), src_flat)
+        logical_pad.zero_()
         logical_pad[:m_dst, :n_dst].copy_(logical)
         dst_zn = dst_flat[:dst_needed].reshape(m_blocks, n_align, row_block)
         dst_zn.copy_(logical_pad.reshape(m_blocks, row_block, n_align).permute(0, 2, 1))
+        if layout is not None:
+            # Read back as NZ with C0 == row_block, the ZN panel holds the transposed tile.
+            transposed = logical.t() if cached and row_block == c0 else None
+            layout.record(dst_flat, n_align, row_block, transposed, token)
 
     def execute_instruction(self, instruction: SimInstruction) -> None:
         if instruction.opname == "l1_to_l0":
@@ -306,8 +358,10 @@ class MPipe(PipeBase):
         n_cols: int,
         src_stride_m: int,
         c0: int,
+        out: Optional[torch.Tensor] = None,
     ) -> torch.Tensor:
-        out = src_flat.new_zeros((m_rows, n_cols))
+        if out is None:
+            out = src_flat.new_empty((m_rows, n_cols))
         if m_rows == 0 or n_cols == 0:
             return out
         blocks = (n_cols + c0 - 1) // c0
@@ -352,6 +406,18 @@ class MPipe(PipeBase):
             return torch.int32
         return dst_dtype
 
+    def _load_nd(self, slot: str, flat: torch.Tensor, rows: int, cols: int, stride_m: int, c0: int) -> torch.Tensor:
+        layout = self.layout
+        if layout is None:
+            return self._decode_nz_to_nd(flat, rows, cols, stride_m, c0, out=self._scratch(slot, (rows, cols), flat))
+        logical = layout.lookup(flat, rows, cols, stride_m, c0)
+        if logical is None:
+            # Remember the decoded operand; L0 tiles are often read by several mmads.
+            token = layout.token(flat)
+            logical = self._decode_nz_to_nd(flat, rows, cols, stride_m, c0)
+            layout.record(flat, stride_m, c0, logical, token)
+        return logical
+
     def _execute_mmad(self, instruction: SimInstruction) -> None:
         dst = instruction.tensors.get("dst")
         src_a = instruction.tensors.get("src_a")
@@ -434,16 +500,20 @@ class MPipe(PipeBase):
                 f"need={need_dst}, have={int(dst_flat.numel())}"
             )
 
-        a_nd = self._decode_nz_to_nd(src_a_flat, m, k, src_a_stride_m, c0_a)
-        b_nd = self._decode_nz_to_nd(src_b_flat, n, k, src_b_stride_m, c0_b)
+        a_nd = self._load_nd("a", src_a_flat, m, k, src_a_stride_m, c0_a)
+        b_nd = self._load_nd("b", src_b_flat, n, k, src_b_stride_m, c0_b)
 
         compute_dtype = self._choose_compute_dtype(dst.dtype)
         prod = torch.matmul(a_nd.to(compute_dtype), b_nd.to(compute_dtype).transpose(0, 1))
         if not is_init:
-            prev = self._decode_nz_to_nd(dst_flat, m, n, dst_stride_m, c0_dst).to(compute_dtype)
+            prev = self._load_nd("dst", dst_flat, m, n, dst_stride_m, c0_dst).to(compute_dtype)
             prod = prev + prod
         out = prod.to(dst.dtype)
+        layout = self.layout
+        token = layout.token(dst_flat) if layout is not None else 0
         self._encode_nd_to_nz(out, dst_flat, m, n, dst_stride_m, c0_dst)
+        if layout is not None:
+            layout.record(dst_flat, dst_stride_m, c0_dst, out, token)
 
     def execute_instruction(self, instruction: SimInstruction) -> None:
         if instruction.opname == "mmad":
@@ -455,6 +525,18 @@ class MPipe(PipeBase):
 class FIXPipe(PipeBase):
     pipe_name = "FIX"
 
+    def __init__(self, core_idx: int) -> None:
+        super().__init__(core_idx)
+        # When set, GM writebacks are also recorded as (atomic, dst_region, value) in issue order,
+        # so a parallel run can replay a worker's private GM writes on the parent's GM.
+        self.record_gm_writes = False
+        self.gm_writes: List[Tuple[bool, torch.Tensor, torch.Tensor]] = []
+
+    def clear(self) -> None:
+        super().clear()
+        # Cleared in place: a parallel worker shares one list across the core's writeback pipes.
+        self.gm_writes.clear()
+
     @staticmethod
     def _resolve_int(value: Any, label: str) -> int:
         if isinstance(value, bool):
@@ -474,8 +556,10 @@ class FIXPipe(PipeBase):
         n_cols: int,
         src_stride_m: int,
         c0: int,
+        out: Optional[torch.Tensor] = None,
     ) -> torch.Tensor:
-        out = src_flat.new_zeros((m_rows, n_cols))
+        if out is None:
+            out = src_flat.new_empty((m_rows, n_cols))
         if m_rows == 0 or n_cols == 0:
             return out
         blocks = (n_cols + c0 - 1) // c0
@@ -498,6 +582,11 @@ class FIXPipe(PipeBase):
             return torch.int32
         return dtype
 
+    @classmethod
+    def apply_atomic_add(cls, dst_region: torch.Tensor, value: torch.Tensor) -> None:
+        compute_dtype = cls._choose_atomic_compute_dtype(dst_region.dtype)
+        dst_region.copy_(dst_region.to(compute_dtype).add(value.to(compute_dtype)).to(dst_region.dtype))
+
     def _execute_l0c_to_gm_nz2nd(self, instruction: SimInstruction) -> None:
         dst = instruction.tensors.get("dst")
         src = instruction.tensors.get("src")
@@ -549,12 +638,16 @@ class FIXPipe(PipeBase):
                 f"M_src={m_src}, N={n}, C0={c0}, aligned_M_src={src_stride_m}"
             )
 
-        logical = self._decode_nz_to_nd(src_flat, m, n, src_stride_m, c0).to(dst.dtype)
         if m == 0 or n == 0:
             return
 
         dst_region = dst[:m, :n]
         atomic_enabled = bool(instruction.atomic_enabled)
+        logical = self.layout.lookup(src_flat, m, n, src_stride_m, c0) if self.layout is not None else None
+        if logical is None:
+            out = self._scratch("logical", (m, n), src_flat)
+            logical = self._decode_nz_to_nd(src_flat, m, n, src_stride_m, c0, out=out)
+        logical = logical.to(dst.dtype)
         if atomic_enabled:
             dst_dtype = instruction.tensor_dtypes.get("dst")
             atomic_dtype = instruction.atomic_dtype
@@ -564,14 +657,15 @@ class FIXPipe(PipeBase):
                 and dst_dtype != atomic_dtype
             ):
                 _SIM_LOGGER.warning(
-                    f"[cube][core={self.core_idx}][pipe={self.pipe_name}] "
+                    f"{self._log_prefix()} "
                     f"atomic dtype mismatch for l0c_to_gm_nz2nd: dst={dst_dtype}, atomic={atomic_dtype}"
                 )
-            compute_dtype = self._choose_atomic_compute_dtype(dst_region.dtype)
-            dst_region.copy_(dst_region.to(compute_dtype).add(logical.to(compute_dtype)).to(dst_region.dtype))
-            return
-
-        dst_region.copy_(logical)
+            self.apply_atomic_add(dst_region, logical)
+        else:
+            dst_region.copy_(logical)
+        if self.record_gm_writes:
+            # The value may live in a scratch or layout-cache buffer that later writebacks reuse.
+            self.gm_writes.append((atomic_enabled, dst_region, logical.clone()))
 
     def execute_instruction(self, instruction: SimInstruction) -> None:
         if instruction.opname == "l0c_to_gm_nz2nd":
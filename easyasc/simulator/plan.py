@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.var import Var
+
+if TYPE_CHECKING:
+    from ..utils.instruction import Instruction
+
+
+# Plan steps are plain tuples so the executor can unpack them without attribute lookups:
+#   (STEP_OP, handler, inst)                          handler(unit, inst)
+#   (STEP_LOOP, inst, loop_var_name, start, stop, step, body)
+#   (STEP_IF, ((cond_or_None, body), ...))            None marks the else branch
+STEP_OP = 0
+STEP_LOOP = 1
+STEP_IF = 2
+
+Plan = List[Tuple[Any, ...]]
+HandlerResolver = Callable[[str], Callable[[Any, "Instruction"], Any]]
+
+# Micro (vf) functions open their loops with start_micro_loop; both close with end_loop.
+_LOOP_STARTS = ("start_loop", "start_micro_loop")
+_BLOCK_TERMINATORS = ("end_loop", "start_elif", "start_else", "end_if")
+_PLAN_CACHE_SIZE = 8
+_PLAN_CACHE: "OrderedDict[Tuple[int, Any], Tuple[List[Instruction], int, Plan]]" = OrderedDict()
+
+
+def match_blocks(
+    instructions: List["Instruction"],
+) -> Tuple[Dict[int, int], Dict[int, int], Dict[int, List[int]]]:
+    """Match loop/if brackets in one pass; returns loop ends, if ends and elif/else headers per if."""
+    loop_end: Dict[int, int] = {}
+    if_end: Dict[int, int] = {}
+    if_branches: Dict[int, List[int]] = {}
+    loop_stack: List[int] = []
+    if_stack: List[Tuple[int, int]] = []
+    for idx, inst in enumerate(instructions):
+        opname = inst.opname
+        if opname in _LOOP_STARTS:
+            loop_stack.append(idx)
+        elif opname == "end_loop":
+            if loop_stack:
+                loop_end[loop_stack.pop()] = idx
+        elif opname == "start_if":
+            if_stack.append((idx, len(loop_stack)))
+            if_branches[idx] = []
+        elif opname in ("start_elif", "start_else"):
+            if if_stack and if_stack[-1][1] == len(loop_stack):
+                if_branches[if_stack[-1][0]].append(idx)
+        elif opname == "end_if":
+            if if_stack:
+                if_end[if_stack.pop()[0]] = idx
+    return loop_end, if_end, if_branches
+
+
+def compile_plan(instructions: List["Instruction"], resolve_handler: HandlerResolver) -> Plan:
+    loop_end, if_end, if_branches = match_blocks(instructions)
+
+    def _compile(start_idx: int, end_idx: int) -> Plan:
+        plan: Plan = []
+        idx = start_idx
+        while idx < end_idx:
+            inst = instructions[idx]
+            opname = inst.opname
+            if opname in _LOOP_STARTS:
+                stop_idx = loop_end.get(idx)
+                if stop_idx is None or stop_idx >= end_idx:
+                    raise ValueError(f"{opname} without matching end_loop")
+                loop_var = inst.kwargs.get("var")
+                if not isinstance(loop_var, Var):
+                    raise TypeError(f"{opname} requires Var loop variable, got: {type(loop_var)}")
+                plan.append(
+                    (
+                        STEP_LOOP,
+                        inst,
+                        loop_var.name,
+                        inst.kwargs.get("start"),
+                        inst.kwargs.get("stop"),
+                        inst.kwargs.get("step"),
+                        _compile(idx + 1, stop_idx),
+                    )
+                )
+                idx = stop_idx + 1
+                continue
+            if opname == "start_if":
+                stop_idx = if_end.get(idx)
+                if stop_idx is None or stop_idx >= end_idx:
+                    raise ValueError("start_if without matching end_if")
+                headers = [idx] + if_branches.get(idx, [])
+                bounds = headers[1:] + [stop_idx]
+                branches = []
+                for header_idx, body_end in zip(headers, bounds):
+                    header = instructions[header_idx]
+                    cond = None if header.opname == "start_else" else header.kwargs.get("cond")
+                    branches.append((cond, _compile(header_idx + 1, body_end)))
+                plan.append((STEP_IF, tuple(branches)))
+                idx = stop_idx + 1
+                continue
+            if opname in _BLOCK_TERMINATORS:
+                break
+            plan.append((STEP_OP, resolve_handler(opname), inst))
+            idx += 1
+        return plan
+
+    return _compile(0, len(instructions))
+
+
+def get_plan(instructions: List["Instruction"], owner: Any, resolve_handler: HandlerResolver) -> Plan:
+    """Return the cached plan for an instruction list, compiling it on first use."""
+    key = (id(instructions), owner)
+    cached: Optional[Tuple[List["Instruction"], int, Plan]] = _PLAN_CACHE.get(key)
+    if cached is not None and cached[0] is instructions and cached[1] == len(instructions):
+        _PLAN_CACHE.move_to_end(key)
+        return cached[2]
+    plan = compile_plan(instructions, resolve_handler)
+    _PLAN_CACHE[key] = (instructions, len(instructions), plan)
+    while len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+        _PLAN_CACHE.popitem(last=False)
+    return plan
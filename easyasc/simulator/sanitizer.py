@@ -0,0 +1,306 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import torch
+
+from .pipe import PipeBase, SimInstruction
+
+if TYPE_CHECKING:
+    from .unit import UnitBase
+
+
+# Shadow granularity in bytes (one UB/L1 block).
+_BLOCK_BYTES = 32
+# Ops that read their destination besides writing it.
+_READ_DST_OPNAMES = ("muladddst",)
+_SET_OPNAMES = ("setflag", "event_set", "event_setall")
+_WAIT_OPNAMES = ("waitflag", "event_wait", "event_release")
+
+
+@dataclass
+class SanitizerFinding:
+    """One race ("RAW"/"WAR"/"WAW") or uninitialized read ("uninit"), deduplicated per op pair."""
+
+    kind: str
+    memory: str
+    offset: int
+    nbytes: int
+    pipe: str
+    seq: int
+    opname: str
+    other_pipe: str = ""
+    other_seq: int = -1
+    other_opname: str = ""
+    count: int = 1
+    core_idx: int = 0
+
+    def format(self) -> str:
+        where = f"{self.memory}[{self.offset}:{self.offset + self.nbytes}]"
+        if self.kind == "uninit":
+            text = f"uninitialized read of {where} by {self.pipe}#{self.seq} {self.opname}"
+        else:
+            text = (
+                f"{self.kind} race on {where}: {self.pipe}#{self.seq} {self.opname} after "
+                f"{self.other_pipe}#{self.other_seq} {self.other_opname} without a sync between them"
+            )
+        if self.count > 1:
+            text += f" (x{self.count})"
+        return text
+
+
+class _Shadow:
+    def __init__(self, name: str, memory: torch.Tensor, pipe_count: int) -> None:
+        self.name = name
+        self.start = memory.data_ptr()
+        self.end = self.start + int(memory.numel()) * int(memory.element_size())
+        blocks = (self.end - self.start + _BLOCK_BYTES - 1) // _BLOCK_BYTES
+        # Last writer per block (-1: never written this run) and the writer's clock/seq.
+        self.w_pipe = torch.full((blocks,), -1, dtype=torch.int64)
+        self.w_clock = torch.zeros((blocks,), dtype=torch.int64)
+        self.w_seq = torch.zeros((blocks,), dtype=torch.int64)
+        # Reads since the last write, per pipe (clock 0: none).
+        self.r_clock = torch.zeros((pipe_count, blocks), dtype=torch.int64)
+        self.r_seq = torch.zeros((pipe_count, blocks), dtype=torch.int64)
+
+
+class MemorySanitizer:
+    """Shadow state for the local memories of one simulated core.
+
+    Every pipe of every lane carries a vector clock. Flags, events and cross-core flags pass
+    clocks from the set to the wait, and pipe work is ordered after the scalar instructions
+    issued before it. Accesses use the extent of each tensor operand at 32-byte granularity;
+    a `barrier(Pipe.ALL)` copy is treated as a fence over its lane's pipes at the point it runs.
+    """
+
+    def __init__(self, core_idx: int) -> None:
+        self.core_idx = core_idx
+        self._memories: List[Tuple[str, torch.Tensor]] = []
+        self._pipe_ids: Dict[Tuple[int, str], int] = {}
+        self._labels: List[str] = []
+        self._lane_pipes: Dict[int, List[int]] = {}
+        self.clear()
+
+    def add_memory(self, name: str, memory: torch.Tensor) -> None:
+        self._memories.append((name, memory))
+
+    def add_lane(self, lane: "UnitBase") -> None:
+        ids = self._lane_pipes.setdefault(lane.lane_index, [])
+        for pipe in lane.pipes:
+            self._pipe_ids[(lane.lane_index, pipe.pipe_name)] = len(self._labels)
+            ids.append(len(self._labels))
+            self._labels.append(f"{lane._trace_lane_name()}.{pipe.pipe_name}")
+
+    def clear(self) -> None:
+        count = len(self._labels)
+        self._clocks = torch.eye(count, dtype=torch.int64)
+        self._shadows = [_Shadow(name, memory, count) for name, memory in self._memories]
+        self._tokens: Dict[Tuple[int, Tuple[str, str, str, str]], torch.Tensor] = {}
+        self._credits: Dict[Tuple[str, int, int], List[torch.Tensor]] = {}
+        # Executed S instructions per lane as (seqs, clocks after each).
+        self._scalar: Dict[int, Tuple[List[int], List[torch.Tensor]]] = {}
+        self._joined: Dict[int, int] = {}
+        self._opnames: Dict[Tuple[int, int], str] = {}
+        self._found: Dict[Tuple[str, str, str, str, str, str], SanitizerFinding] = {}
+
+    @property
+    def findings(self) -> List[SanitizerFinding]:
+        return list(self._found.values())
+
+    def _pipe_id(self, lane: "UnitBase", pipe: PipeBase) -> int:
+        return self._pipe_ids[(lane.lane_index, pipe.pipe_name)]
+
+    def _order(self, lane: "UnitBase", pipe: PipeBase, inst: SimInstruction) -> int:
+        pid = self._pipe_id(lane, pipe)
+        if pipe is lane.S:
+            return pid
+        # Pipe work cannot start before the scalar instructions issued ahead of it.
+        seqs, clocks = self._scalar.get(lane.lane_index, ([], []))
+        idx = bisect_left(seqs, inst.seq) - 1
+        if idx >= 0 and self._joined.get(pid, -1) < idx:
+            torch.maximum(self._clocks[pid], clocks[idx], out=self._clocks[pid])
+            self._joined[pid] = idx
+        return pid
+
+    def _scalar_done(self, lane: "UnitBase", pipe: PipeBase, inst: SimInstruction, pid: int) -> None:
+        if pipe is lane.S:
+            seqs, clocks = self._scalar.setdefault(lane.lane_index, ([], []))
+            seqs.append(inst.seq)
+            clocks.append(self._clocks[pid].clone())
+
+    def _send(self, pid: int) -> torch.Tensor:
+        clock = self._clocks[pid].clone()
+        self._clocks[pid, pid] += 1
+        return clock
+
+    def _receive(self, pid: int, clock: Optional[torch.Tensor]) -> None:
+        if clock is not None:
+            torch.maximum(self._clocks[pid], clock, out=self._clocks[pid])
+
+    def sync(self, lane: "UnitBase", pipe: PipeBase, inst: SimInstruction) -> None:
+        """Account for a sync instruction that `lane` has just executed on `pipe`."""
+        pid = self._order(lane, pipe, inst)
+        opname = inst.opname
+        keys: List[Tuple[str, str, str, str]] = []
+        if opname in ("setflag", "waitflag"):
+            keys = [lane._flag_sync_key(
+                str(inst.args.get("src", "")),
+                str(inst.args.get("dst", "")),
+                inst.args.get("event_id", None),
+            )]
+        elif opname in _SET_OPNAMES or opname in _WAIT_OPNAMES:
+            keys = lane._event_token_keys(inst)
+        if keys:
+            if opname in _SET_OPNAMES:
+                # A newer set replaces an unconsumed one; the wait is ordered after both.
+                clock = self._send(pid)
+                for key in keys:
+                    token = (lane.lane_index, key)
+                    previous = self._tokens.get(token)
+                    self._tokens[token] = clock if previous is None else torch.maximum(previous, clock)
+            else:
+                for key in keys:
+                    self._receive(pid, self._tokens.pop((lane.lane_index, key), None))
+        elif opname in ("cube_ready", "vec_ready", "wait_cube", "wait_vec") and lane.crosscore is not None:
+            flag_id = lane._resolve_int(inst.args.get("flag_id", 0), f"{opname} flag_id")
+            vec_num = lane.crosscore.vec_num
+            if opname == "cube_ready":
+                clock = self._send(pid)
+                for sub in range(vec_num):
+                    self._credits.setdefault(("to_vec", sub, flag_id), []).append(clock)
+            elif opname == "vec_ready":
+                self._credits.setdefault(("to_cube", lane.sub_block_idx, flag_id), []).append(self._send(pid))
+            elif opname == "wait_cube":
+                credits = self._credits.get(("to_vec", lane.sub_block_idx, flag_id))
+                self._receive(pid, credits.pop(0) if credits else None)
+            else:
+                for sub in range(vec_num):
+                    credits = self._credits.get(("to_cube", sub, flag_id))
+                    self._receive(pid, credits.pop(0) if credits else None)
+        self._scalar_done(lane, pipe, inst, pid)
+
+    def access(self, lane: "UnitBase", pipe: PipeBase, inst: SimInstruction) -> None:
+        """Check and record the local-memory reads/writes of a pipe instruction before it runs."""
+        pid = self._order(lane, pipe, inst)
+        opname = inst.opname
+        if opname == "barrier" and inst.args.get("pipe") == "ALL":
+            for other in self._lane_pipes.get(lane.lane_index, []):
+                self._receive(pid, self._clocks[other])
+        reads: List[Tuple[_Shadow, int, int]] = []
+        writes: List[Tuple[_Shadow, int, int]] = []
+        for key, view in inst.tensors.items():
+            region = self._region(view)
+            if region is None:
+                continue
+            # call_micro arguments are opaque to the sanitizer, so they count as read and written
+        # (outputs are not flagged as uninitialized reads).
+            if key != "dst" or opname == "call_micro" or opname in _READ_DST_OPNAMES:
+                reads.append(region)
+            elif opname == "mmad" and not inst.args.get("is_init", True):
+                reads.append(region)
+            if key == "dst" or opname == "call_micro":
+                writes.append(region)
+        if not reads and not writes:
+            self._scalar_done(lane, pipe, inst, pid)
+            return
+        self._opnames[(pid, inst.seq)] = opname
+        clock = self._clocks[pid]
+        epoch = int(clock[pid])
+        for shadow, begin, end in reads:
+            self._check_read(shadow, begin, end, pid, inst, clock)
+            shadow.r_clock[pid, begin:end] = epoch
+            shadow.r_seq[pid, begin:end] = inst.seq
+        for shadow, begin, end in writes:
+            self._check_write(shadow, begin, end, pid, inst, clock)
+            shadow.w_pipe[begin:end] = pid
+            shadow.w_clock[begin:end] = epoch
+            shadow.w_seq[begin:end] = inst.seq
+            shadow.r_clock[:, begin:end] = 0
+        self._scalar_done(lane, pipe, inst, pid)
+
+    def _region(self, view: object) -> Optional[Tuple[_Shadow, int, int]]:
+        if not isinstance(view, torch.Tensor) or view.numel() == 0:
+            return None
+        ptr = view.data_ptr()
+        for shadow in self._shadows:
+            if shadow.start <= ptr < shadow.end:
+                span = 1 + sum((size - 1) * stride for size, stride in zip(view.shape, view.stride()))
+                offset = ptr - shadow.start
+                end = min(offset + span * int(view.element_size()), shadow.end - shadow.start)
+                return shadow, offset // _BLOCK_BYTES, (end + _BLOCK_BYTES - 1) // _BLOCK_BYTES
+        return None
+
+    def _check_read(
+        self, shadow: _Shadow, begin: int, end: int, pid: int, inst: SimInstruction, clock: torch.Tensor
+    ) -> None:
+        writers = shadow.w_pipe[begin:end]
+        uninit = writers < 0
+        if inst.opname != "call_micro" and bool(uninit.any()):
+            self._report("uninit", shadow, begin, uninit, pid, inst)
+        self._check_writer(shadow, begin, end, pid, inst, clock, "RAW")
+
+    def _check_write(
+        self, shadow: _Shadow, begin: int, end: int, pid: int, inst: SimInstruction, clock: torch.Tensor
+    ) -> None:
+        self._check_writer(shadow, begin, end, pid, inst, clock, "WAW")
+        unordered = shadow.r_clock[:, begin:end] > clock.view(-1, 1)
+        unordered[pid] = False
+        if bool(unordered.any()):
+            reader = int(unordered.any(dim=1).nonzero()[0])
+            row = unordered[reader]
+            first = int(row.nonzero()[0])
+            other_seq = int(shadow.r_seq[reader, begin + first])
+            self._report("WAR", shadow, begin, row, pid, inst, reader, other_seq)
+
+    def _check_writer(
+        self,
+        shadow: _Shadow,
+        begin: int,
+        end: int,
+        pid: int,
+        inst: SimInstruction,
+        clock: torch.Tensor,
+        kind: str,
+    ) -> None:
+        writers = shadow.w_pipe[begin:end]
+        known = clock[writers.clamp(min=0)]
+        unordered = (writers >= 0) & (writers != pid) & (shadow.w_clock[begin:end] > known)
+        if bool(unordered.any()):
+            first = int(unordered.nonzero()[0])
+            writer = int(writers[first])
+            other_seq = int(shadow.w_seq[begin + first])
+            self._report(kind, shadow, begin, unordered & (writers == writer), pid, inst, writer, other_seq)
+
+    def _report(
+        self,
+        kind: str,
+        shadow: _Shadow,
+        begin: int,
+        blocks: torch.Tensor,
+        pid: int,
+        inst: SimInstruction,
+        other: int = -1,
+        other_seq: int = -1,
+    ) -> None:
+        hit = blocks.nonzero().view(-1)
+        first, last = int(hit[0]), int(hit[-1])
+        other_pipe = self._labels[other] if other >= 0 else ""
+        other_opname = self._opnames.get((other, other_seq), "") if other >= 0 else ""
+        key = (kind, shadow.name, self._labels[pid], inst.opname, other_pipe, other_opname)
+        found = self._found.get(key)
+        if found is not None:
+            found.count += 1
+            return
+        self._found[key] = SanitizerFinding(
+            kind=kind,
+            memory=shadow.name,
+            offset=(begin + first) * _BLOCK_BYTES,
+            nbytes=(last - first + 1) * _BLOCK_BYTES,
+            pipe=self._labels[pid],
+            seq=inst.seq,
+            opname=inst.opname,
+            other_pipe=other_pipe,
+            other_seq=other_seq,
+            other_opname=other_opname,
+            core_idx=self.core_idx,
+        )
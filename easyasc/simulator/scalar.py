@@ -0,0 +1,229 @@
+import functools
+import math
+import re
+from types import CodeType
+from typing import TYPE_CHECKING, Any, Dict, Tuple, Union
+
+import torch
+
+from ..utils.datatype import DataTypeValue
+from ..utils.var import Expr, Var
+from .plan import STEP_LOOP, STEP_OP, Plan
+
+if TYPE_CHECKING:
+    from ..utils.instruction import Instruction
+
+
+Number = Union[int, float, bool]
+
+_EXPR_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_expr(expr: str) -> CodeType:
+    # C-style Expr text -> Python code object; evaluated against ScalarContext.var_values as locals.
+    py_expr = expr.replace("&&", " and ").replace("||", " or ")
+    py_expr = re.sub(r"(?<![=!<>])!(?!=)", " not ", py_expr)
+    py_expr = re.sub(r"\btrue\b", "True", py_expr, flags=re.IGNORECASE)
+    py_expr = re.sub(r"\bfalse\b", "False", py_expr, flags=re.IGNORECASE)
+    return compile(py_expr.strip(), "<sim-expr>", "eval")
+
+
+class ScalarContext:
+    """
+    Scalar state shared by the simulator units and the micro executor: `var_values`, Expr
+    evaluation, the scalar assignment ops and plan execution. Subclasses provide `core_idx`,
+    `sub_block_idx`, `unit_name` and `var_values`.
+    """
+
+    unit_name = ""
+    core_idx: int
+    sub_block_idx: int
+    var_values: Dict[str, Number]
+
+    @staticmethod
+    def _dtype_size(dtype: DataTypeValue) -> int:
+        try:
+            return int(dtype.size)
+        except Exception:
+            if str(dtype) == "bfloat16_t":
+                return 2
+            raise
+
+    @staticmethod
+    def _to_torch_dtype(dtype: DataTypeValue) -> torch.dtype:
+        name = str(dtype)
+        mapping: Dict[str, torch.dtype] = {
+            "half": torch.float16,
+            "float": torch.float32,
+            "int": torch.int32,
+            "int8_t": torch.int8,
+            "uint8_t": torch.uint8,
+            "int16_t": torch.int16,
+            "int64_t": torch.int64,
+            "bfloat16_t": torch.bfloat16,
+            "bfloat16": torch.bfloat16,
+        }
+        if hasattr(torch, "uint16"):
+            mapping["uint16_t"] = torch.uint16  # type: ignore[attr-defined]
+        if hasattr(torch, "uint32"):
+            mapping["uint32_t"] = torch.uint32  # type: ignore[attr-defined]
+        if hasattr(torch, "uint64"):
+            mapping["uint64_t"] = torch.uint64  # type: ignore[attr-defined]
+        if name not in mapping:
+            raise ValueError(f"Unsupported dtype for simulator tensor view: {dtype}")
+        return mapping[name]
+
+    def _resolve_scalar(self, value: Any) -> Number:
+        if isinstance(value, Var):
+            if value.name in self.var_values:
+                return self.var_values[value.name]
+            if isinstance(value.value, (int, float, bool)):
+                return value.value
+            raise ValueError(f"Var {value.name} has no runtime value in simulator")
+        if isinstance(value, Expr):
+            return self._eval_expr(str(value))
+        if isinstance(value, (int, float, bool)):
+            return value
+        raise TypeError(f"Unsupported scalar value type: {type(value)}")
+
+    def _resolve_int(self, value: Any, label: str) -> int:
+        scalar = self._resolve_scalar(value)
+        if isinstance(scalar, bool):
+            return int(scalar)
+        if not isinstance(scalar, (int, float)):
+            raise TypeError(f"{label} must resolve to int/float, got: {type(scalar)}")
+        return int(scalar)
+
+    def _resolve_bool(self, value: Any) -> bool:
+        if isinstance(value, Expr):
+            return bool(self._eval_expr(str(value)))
+        if isinstance(value, Var):
+            return bool(self._resolve_scalar(value))
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            return bool(value)
+        raise TypeError(f"Unsupported condition type: {type(value)}")
+
+    def _eval_expr(self, expr: str) -> Number:
+        try:
+            code = _compile_expr(expr)
+            out = eval(code, _EXPR_GLOBALS, self.var_values)
+        except Exception as exc:
+            raise ValueError(f"Failed to evaluate expression {expr!r}: {exc}") from exc
+        if not isinstance(out, (int, float, bool)):
+            raise TypeError(f"Expression result must be int/float/bool, got: {type(out)}")
+        return out
+
+    def _handle_create_var(self, inst: "Instruction") -> None:
+        val = inst.kwargs.get("val")
+        if not isinstance(val, Var):
+            raise TypeError(f"create_var requires Var value, got: {type(val)}")
+        raw_value = val.value
+        if isinstance(raw_value, (int, float, bool)):
+            self.var_values[val.name] = raw_value
+        elif raw_value is None:
+            self.var_values[val.name] = 0
+        else:
+            self.var_values[val.name] = self._resolve_scalar(raw_value)
+
+    def _cube_num(self) -> int:
+        from .. import globvars
+
+        device_type = str(getattr(globvars, "device_type", "")).lower()
+        if device_type in ("b3", "b4"):
+            return 20
+        if device_type in ("b1", "b2"):
+            return 24
+        if device_type == "950":
+            return 32
+        raise ValueError(f"Unsupported device_type for simulator: {device_type}")
+
+    def _assign_var_op(self, inst: "Instruction") -> None:
+        out = inst.kwargs.get("out")
+        if not isinstance(out, Var):
+            raise TypeError(f"{inst.opname} requires Var out, got: {type(out)}")
+        opname = inst.opname
+        if opname == "GetCubeNum":
+            value: Number = self._cube_num()
+        elif opname == "GetCubeIdx":
+            value = self.core_idx
+        elif opname == "GetVecNum":
+            value = self._cube_num() * 2
+        elif opname == "GetVecIdx":
+            value = self.core_idx * 2 + self.sub_block_idx
+        elif opname == "GetSubBlockIdx":
+            value = self.sub_block_idx
+        elif opname == "CeilDiv":
+            a = self._resolve_int(inst.kwargs.get("a"), "CeilDiv a")
+            b = self._resolve_int(inst.kwargs.get("b"), "CeilDiv b")
+            value = (a + b - 1) // b
+        elif opname == "Min":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            value = min(a, b)
+        elif opname == "Max":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            value = max(a, b)
+        elif opname == "var_mul":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            value = a * b
+        elif opname == "var_div":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+                raise TypeError("var_div operands must resolve to numeric values")
+            if b == 0:
+                raise ZeroDivisionError("var_div divide by zero")
+            if str(getattr(out, "dtype", "")) == "int":
+                value = int(a) // int(b)
+            else:
+                value = a / b
+        elif opname == "var_add":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            value = a + b
+        elif opname == "var_sub":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            b = self._resolve_scalar(inst.kwargs.get("b"))
+            value = a - b
+        elif opname == "scalar_sqrt":
+            a = self._resolve_scalar(inst.kwargs.get("a"))
+            if not isinstance(a, (int, float)):
+                raise TypeError(f"scalar_sqrt requires numeric operand, got: {type(a)}")
+            value = math.sqrt(float(a))
+        elif opname in ("Align16", "Align32", "Align64", "Align128", "Align256"):
+            a = self._resolve_int(inst.kwargs.get("a"), opname + " a")
+            align = int(opname.replace("Align", ""))
+            value = ((a + align - 1) // align) * align
+        else:
+            raise ValueError(f"Unsupported scalar assignment op in {self.unit_name} simulator: {opname}")
+        self.var_values[out.name] = value
+
+    def _run_loop(self, step: Tuple[Any, ...], trips: range) -> None:
+        var_values = self.var_values
+        var_name, body = step[2], step[6]
+        for value in trips:
+            var_values[var_name] = value
+            self._execute_plan(body)
+
+    def _execute_plan(self, plan: Plan) -> None:
+        for step in plan:
+            kind = step[0]
+            if kind == STEP_OP:
+                step[1](self, step[2])
+            elif kind == STEP_LOOP:
+                start_val = self._resolve_int(step[3], "start_loop start")
+                stop_val = self._resolve_int(step[4], "start_loop stop")
+                step_val = self._resolve_int(step[5], "start_loop step")
+                if step_val == 0:
+                    raise ValueError("start_loop step cannot be zero")
+                self._run_loop(step, range(start_val, stop_val, step_val))
+            else:
+                for cond, body in step[1]:
+                    if cond is None or self._resolve_bool(cond):
+                        self._execute_plan(body)
+                        break
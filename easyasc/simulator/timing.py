@@ -0,0 +1,234 @@
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pipe import SimInstruction
+
+
+# Rough per-core figures; meant for comparing tilings against each other, not for absolute timing.
+_DEFAULT_BYTES_PER_CYCLE: Dict[str, float] = {
+    "MTE2": 64.0,
+    "MTE1": 256.0,
+    "FIX": 128.0,
+    "MTE3": 64.0,
+    "V": 256.0,
+}
+_DEFAULT_MACS_PER_CYCLE: Dict[str, float] = {
+    "half": 4096.0,
+    "bfloat16_t": 4096.0,
+    "float": 1024.0,
+    "int8_t": 8192.0,
+}
+_DEFAULT_OP_LATENCY: Dict[str, int] = {
+    "MTE2": 100,
+    "MTE1": 20,
+    "M": 10,
+    "FIX": 30,
+    "MTE3": 100,
+    "V": 8,
+    "S": 0,
+}
+_ZERO_COST_OPNAMES = (
+    "setflag",
+    "waitflag",
+    "event_set",
+    "event_setall",
+    "event_wait",
+    "event_release",
+    "cube_ready",
+    "vec_ready",
+    "wait_cube",
+    "wait_vec",
+    "allcube_ready",
+    "allcube_wait",
+    "allvec_ready",
+    "allvec_wait",
+    "barrier",
+    "sim_print",
+    "set_mask",
+    "reset_mask",
+)
+
+
+@dataclass
+class CostTable:
+    """Per-op cost model: bytes/cycle for data movement, MACs/cycle for mmad, fixed issue latency per pipe.
+
+    Entries passed in override the defaults key by key.
+    """
+
+    bytes_per_cycle: Dict[str, float] = field(default_factory=dict)
+    macs_per_cycle: Dict[str, float] = field(default_factory=dict)
+    op_latency: Dict[str, int] = field(default_factory=dict)
+    vec_cycles_per_repeat: float = 1.0
+
+    def __post_init__(self) -> None:
+        for name in ("bytes_per_cycle", "macs_per_cycle", "op_latency"):
+            value = getattr(self, name)
+            if not isinstance(value, dict):
+                raise TypeError(f"{name} must be dict, got: {type(value)}")
+        self.bytes_per_cycle = {**_DEFAULT_BYTES_PER_CYCLE, **self.bytes_per_cycle}
+        self.macs_per_cycle = {**_DEFAULT_MACS_PER_CYCLE, **self.macs_per_cycle}
+        self.op_latency = {**_DEFAULT_OP_LATENCY, **self.op_latency}
+        for name, table in (("bytes_per_cycle", self.bytes_per_cycle), ("macs_per_cycle", self.macs_per_cycle)):
+            for key, rate in table.items():
+                if not isinstance(rate, (int, float)) or rate <= 0:
+                    raise ValueError(f"{name}[{key!r}] must be a positive number, got: {rate}")
+        if not isinstance(self.vec_cycles_per_repeat, (int, float)) or self.vec_cycles_per_repeat < 0:
+            raise ValueError(f"vec_cycles_per_repeat must be non-negative, got: {self.vec_cycles_per_repeat}")
+
+    @staticmethod
+    def _arg_int(inst: SimInstruction, key: str, default: int = 0) -> int:
+        value = inst.args.get(key, default)
+        if isinstance(value, (int, float)):
+            return int(value)
+        return default
+
+    @staticmethod
+    def _elem_size(inst: SimInstruction, key: str) -> int:
+        view = inst.tensors.get(key)
+        element_size = getattr(view, "element_size", None)
+        if element_size is None:
+            return 0
+        return int(element_size())
+
+    def transfer_bytes(self, inst: SimInstruction) -> int:
+        opname = inst.opname
+        args = self._arg_int
+        if opname == "gm_to_l1_nd2nz":
+            return args(inst, "M") * args(inst, "N") * self._elem_size(inst, "src")
+        if opname == "l1_to_l0":
+            return args(inst, "m_dst") * args(inst, "n_dst") * self._elem_size(inst, "dst")
+        if opname in ("l0c_to_gm_nz2nd", "l0c_to_l1"):
+            return args(inst, "M") * args(inst, "N") * self._elem_size(inst, "src")
+        if opname in ("gm_to_ub_pad", "ub_to_gm_pad"):
+            return args(inst, "n_burst") * args(inst, "burst_len_byte")
+        if opname == "ub_to_ub":
+            return args(inst, "n_burst") * args(inst, "burst_len") * 32
+        dst = inst.tensors.get("dst")
+        if dst is None or not hasattr(dst, "numel"):
+            return 0
+        return int(dst.numel()) * self._elem_size(inst, "dst")
+
+    def estimate(self, pipe_name: str, inst: SimInstruction) -> int:
+        opname = inst.opname
+        if opname in _ZERO_COST_OPNAMES:
+            return 0
+        latency = int(self.op_latency.get(pipe_name, 0))
+        if opname == "mmad":
+            macs = self._arg_int(inst, "M") * self._arg_int(inst, "N") * self._arg_int(inst, "K")
+            dtype = inst.tensor_dtypes.get("src_a", "")
+            rate = self.macs_per_cycle.get(dtype, self.macs_per_cycle["half"])
+            return latency + int(math.ceil(macs / rate))
+        if pipe_name == "V" and "repeat" in inst.args:
+            return latency + int(math.ceil(max(self._arg_int(inst, "repeat"), 0) * self.vec_cycles_per_repeat))
+        rate = self.bytes_per_cycle.get(pipe_name)
+        if rate is None:
+            return latency
+        return latency + int(math.ceil(self.transfer_bytes(inst) / rate))
+
+
+class PipeTimer:
+    """Per-unit pipe clocks: each pipe runs in order, waits start no earlier than the matching set."""
+
+    def __init__(self, cost: CostTable) -> None:
+        if not isinstance(cost, CostTable):
+            raise TypeError(f"cost must be CostTable, got: {type(cost)}")
+        self.cost = cost
+        self.clear()
+
+    def clear(self) -> None:
+        self.clocks: Dict[str, int] = {}
+        self.busy: Dict[str, int] = {}
+        self.stalls: Dict[str, int] = {}
+        self.token_times: Dict[Tuple[str, str, str, str], int] = {}
+        self._fence_seqs: List[int] = []
+        self._fence_times: List[int] = []
+
+    def clock(self, pipe_name: str) -> int:
+        return self.clocks.get(pipe_name, 0)
+
+    def fence(self, seq: int) -> int:
+        # Completion time of the latest scalar-pipe instruction dispatched before `seq`.
+        idx = bisect_left(self._fence_seqs, seq) - 1
+        return self._fence_times[idx] if idx >= 0 else 0
+
+    def record_fence(self, seq: int, time: int) -> None:
+        self._fence_seqs.append(seq)
+        self._fence_times.append(time)
+
+    def run(self, pipe_name: str, earliest: int, dep_time: int, cycles: int, edge: Optional[str] = None) -> int:
+        start = max(self.clock(pipe_name), earliest)
+        if dep_time > start:
+            if edge is not None:
+                self.stalls[edge] = self.stalls.get(edge, 0) + dep_time - start
+            start = dep_time
+        end = start + cycles
+        self.clocks[pipe_name] = end
+        self.busy[pipe_name] = self.busy.get(pipe_name, 0) + cycles
+        return end
+
+    @property
+    def total_cycles(self) -> int:
+        return max(self.clocks.values(), default=0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "cycles": self.total_cycles,
+            "busy": dict(self.busy),
+            "stalls": dict(self.stalls),
+        }
+
+
+class TimingReport:
+    """Kernel-level aggregate of per-lane PipeTimer snapshots."""
+
+    def __init__(self) -> None:
+        self.lanes: Dict[str, Dict[str, Any]] = {}
+
+    def add_lane(self, label: str, snapshot: Dict[str, Any]) -> None:
+        self.lanes[label] = snapshot
+
+    @property
+    def total_cycles(self) -> int:
+        return max((int(lane["cycles"]) for lane in self.lanes.values()), default=0)
+
+    @staticmethod
+    def _lane_kind(label: str) -> str:
+        # Labels are unit log prefixes such as "[cube][core=0]" or "[vec][core=0][sub=1]".
+        return label.lstrip("[").split("]", 1)[0]
+
+    def pipe_busy_percent(self) -> Dict[str, float]:
+        """Busy cycles per `<unit>.<pipe>` averaged over lanes, as a percentage of kernel cycles."""
+        total = self.total_cycles
+        busy: Dict[str, int] = {}
+        counts: Dict[str, int] = {}
+        for label, lane in self.lanes.items():
+            kind = self._lane_kind(label)
+            for pipe_name, cycles in lane["busy"].items():
+                key = f"{kind}.{pipe_name}"
+                busy[key] = busy.get(key, 0) + int(cycles)
+                counts[key] = counts.get(key, 0) + 1
+        if total == 0:
+            return {key: 0.0 for key in busy}
+        return {key: 100.0 * busy[key] / (counts[key] * total) for key in sorted(busy)}
+
+    def stall_cycles(self) -> Dict[str, int]:
+        """Stall cycles per sync edge summed over lanes."""
+        out: Dict[str, int] = {}
+        for lane in self.lanes.values():
+            for edge, cycles in lane["stalls"].items():
+                out[edge] = out.get(edge, 0) + int(cycles)
+        return dict(sorted(out.items(), key=lambda item: -item[1]))
+
+    def format(self) -> str:
+        lines = [f"[sim][timing] estimated kernel cycles: {self.total_cycles}"]
+        for key, percent in self.pipe_busy_percent().items():
+            lines.append(f"[sim][timing]   busy {key:<10} {percent:6.2f}%")
+        for edge, cycles in self.stall_cycles().items():
+            lines.append(f"[sim][timing]   stall {edge}: {cycles} cycles")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.format()
@@ -0,0 +1,109 @@
+import json
+import os
+from typing import Any, Dict, Hashable, List, Optional
+
+
+# Track ids are lane_index * _LANE_TID_STRIDE + pipe index, so every (core, unit, pipe) gets its own row.
+_LANE_TID_STRIDE = 16
+
+
+class TraceRecorder:
+    """Collects Chrome trace events for the lanes of one simulated core (timestamps are model cycles)."""
+
+    def __init__(self, core_idx: int) -> None:
+        self.core_idx = core_idx
+        self.clear()
+
+    def clear(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self._tracks: Dict[int, str] = {}
+        self._next_flow = 0
+        # Start events wait here until a flow_end consumes them, so sets nobody waits on leave no arrow.
+        self._pending_flows: Dict[Hashable, List[Dict[str, Any]]] = {}
+
+    def track(self, lane_index: int, pipe_index: int, name: str) -> int:
+        tid = lane_index * _LANE_TID_STRIDE + pipe_index
+        self._tracks.setdefault(tid, name)
+        return tid
+
+    def slice(self, tid: int, name: str, start: int, dur: int, args: Optional[Dict[str, Any]] = None) -> None:
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": "sim",
+            "ph": "X",
+            "pid": self.core_idx,
+            "tid": tid,
+            "ts": start,
+            "dur": dur,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, tid: int, name: str, ts: int, args: Optional[Dict[str, Any]] = None) -> None:
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": "sim_print",
+            "ph": "i",
+            "s": "t",
+            "pid": self.core_idx,
+            "tid": tid,
+            "ts": ts,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def flow_start(self, key: Hashable, tid: int, name: str, ts: int, exclusive: bool = False) -> None:
+        # Flow ids are unique per trace: the core index sits in the high bits.
+        flow_id = (self.core_idx << 32) | self._next_flow
+        self._next_flow += 1
+        event = {"name": name, "cat": "sync", "ph": "s", "id": flow_id, "pid": self.core_idx, "tid": tid, "ts": ts}
+        if exclusive:
+            self._pending_flows[key] = [event]
+        else:
+            self._pending_flows.setdefault(key, []).append(event)
+
+    def flow_end(self, key: Hashable, tid: int, name: str, ts: int) -> None:
+        pending = self._pending_flows.get(key)
+        if not pending:
+            return
+        start = pending.pop(0)
+        self.events.append(start)
+        self.events.append(
+            {
+                "name": name,
+                "cat": "sync",
+                "ph": "f",
+                "bp": "e",
+                "id": start["id"],
+                "pid": self.core_idx,
+                "tid": tid,
+                "ts": ts,
+            }
+        )
+
+    def metadata_events(self) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": self.core_idx, "args": {"name": f"core {self.core_idx}"}},
+        ]
+        for tid, name in sorted(self._tracks.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": self.core_idx, "tid": tid, "args": {"name": name}})
+            events.append(
+                {"name": "thread_sort_index", "ph": "M", "pid": self.core_idx, "tid": tid, "args": {"sort_index": tid}}
+            )
+        return events
+
+    def export(self) -> List[Dict[str, Any]]:
+        return self.metadata_events() + self.events
+
+
+def write_chrome_trace(path: str, events: List[Dict[str, Any]]) -> str:
+    """Write trace events as Chrome trace-event JSON (loadable in chrome://tracing and Perfetto)."""
+    if not isinstance(path, str) or path == "":
+        raise ValueError(f"trace path must be a non-empty str, got: {path!r}")
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ns", "otherData": {"time_unit": "cycle"}}, f)
+    return path
@@ -0,0 +1,965 @@
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+import torch
+
+from .. import globvars
+from ..utils.Tensor import DBuff, GMTensor, Tensor
+from ..utils.datatype import DataTypeValue
+from ..utils.events import DEvent
+from ..utils.pipe import Pipe, PipeType
+from ..utils.var import Expr, Var
+from ._core_utils import validate_core_idx
+from .crosscore import CrossCoreFlags
+from .loopbatch import TileLoop, analyze_loop
+from .pipe import PipeBase, ScalarPipe, SimInstruction
+from .timing import PipeTimer
+from .trace import TraceRecorder
+from .plan import get_plan
+from .sanitizer import MemorySanitizer
+from .scalar import Number, ScalarContext
+
+if TYPE_CHECKING:
+    from ..utils.instruction import Instruction
+
+
+_SIM_LOGGER = logging.getLogger("easyasc.simulator.cube")
+if not _SIM_LOGGER.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _SIM_LOGGER.addHandler(_handler)
+_SIM_LOGGER.setLevel(logging.INFO)
+_SIM_LOGGER.propagate = False
+
+
+class UnitBase(ScalarContext):
+    unit_name = ""
+    # opname -> pipe name for compute/data-movement instructions owned by this unit.
+    _OP_PIPES: Dict[str, str] = {}
+    # Cross-core / barrier instructions routed to the pipe given by their `pipe` kwarg.
+    _PIPE_KWARG_OPNAMES: Tuple[str, ...] = ("barrier",)
+    # Data movements that write GM and honor the atomic state.
+    _ATOMIC_OPNAMES: Tuple[str, ...] = ()
+    # Pipe ops a loop body may contain to run batched (loopbatch.py); empty disables batching.
+    _BATCH_OPNAMES: Tuple[str, ...] = ()
+
+    def __init__(self, core_idx: int, sub_block_idx: int = 0) -> None:
+        self.core_idx = validate_core_idx(core_idx)
+        self.sub_block_idx = sub_block_idx
+        self.S = ScalarPipe(self.core_idx)
+        self.pipes: List[PipeBase] = [self.S]
+        # Shared with the other lanes of the same Core; None runs cross-core flags as no-ops.
+        self.crosscore: Optional[CrossCoreFlags] = None
+        # Optional cycle-approximate timing model; None skips timing entirely.
+        self.timer: Optional[PipeTimer] = None
+        # Optional Chrome trace sink (needs `timer` for timestamps); `lane_index` picks the track rows.
+        self.trace: Optional[TraceRecorder] = None
+        self.lane_index = 0
+        # Optional shadow-memory race/uninitialized-read checker, shared by the lanes of one Core.
+        self.sanitizer: Optional[MemorySanitizer] = None
+        # Scalar-side sim_print markers as (dispatch seq, message), stamped once the S pipe has run.
+        self._pending_prints: List[Tuple[int, str]] = []
+
+        self.var_values: Dict[str, Number] = {}
+        self.buffer_views: Dict[str, Union[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]]] = {}
+        self.gm_views: Dict[str, Optional[torch.Tensor]] = {}
+        self._alloc_offsets: Dict[str, int] = {}
+        # parser.asc_memplan.MemoryPlan when globvars.plan_local_memory is set; buffers it
+        # places use the planned offsets so the simulator sees the same aliasing as the kernel.
+        self._memory_plan: Optional[Any] = None
+        self.atomic_enabled = False
+        self.atomic_dtype: Optional[DataTypeValue] = None
+        self._dispatch_seq = 0
+        self._sync_tokens: Dict[Tuple[str, str, str, str], bool] = {}
+        # Per DEvent, the parity of [sets, waits] issued so far: which of its two flags each uses next.
+        self._event_counts: Dict[Tuple[str, str, str, str], List[int]] = {}
+        self._next_indices: Dict[int, int] = {}
+
+    def run(
+        self,
+        instructions: List["Instruction"],
+        bound_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.dispatch(instructions, bound_args=bound_args)
+        self._execute_pipes()
+
+    def dispatch(
+        self,
+        instructions: List["Instruction"],
+        bound_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Run the scalar pass: evaluate vars/views and queue every pipe instruction."""
+        self.var_values = {}
+        self.buffer_views = {}
+        self.gm_views = {}
+        self._alloc_offsets = {key: 0 for key in self._alloc_offsets}
+        self._memory_plan = None
+        if globvars.plan_local_memory:
+            from ..parser.asc_memplan import get_memory_plan
+
+            self._memory_plan = get_memory_plan(instructions)
+        self.atomic_enabled = False
+        self.atomic_dtype = None
+        self._dispatch_seq = 0
+        self._sync_tokens = {}
+        self._event_counts = {}
+        self._pending_prints = []
+        if self.timer is not None:
+            self.timer.clear()
+        self._clear_pipes()
+        self._seed_bound_args(bound_args)
+        self._seed_var_values(instructions)
+        self._execute_plan(get_plan(instructions, type(self), self._op_handler))
+        self._next_indices = {id(pipe): 0 for pipe in self.pipes}
+
+    def _clear_pipes(self) -> None:
+        for pipe in self.pipes:
+            pipe.clear()
+
+    @staticmethod
+    def _flag_sync_key(src: str, dst: str, event_id: Any) -> Tuple[str, str, str, str]:
+        return ("flag", src, dst, str(event_id))
+
+    @staticmethod
+    def _event_sync_key(event_info: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        src_pipe = str(event_info.get("src_pipe", ""))
+        dst_pipe = str(event_info.get("dst_pipe", ""))
+        name = str(event_info.get("name", ""))
+        return ("event", src_pipe, dst_pipe, name)
+
+    def _event_token_keys(self, inst: SimInstruction) -> List[Tuple[str, str, str, str]]:
+        # A DEvent alternates between two flags like tensorutils.h: set/wait use their own
+        # counter's parity, setall marks both flags and release drains both.
+        event_info = inst.args.get("event", {})
+        key = self._event_sync_key(event_info)
+        if not event_info.get("double", False):
+            return [key]
+        set_slot, wait_slot = self._event_counts.get(key, (0, 0))
+        if inst.opname == "event_set":
+            slots = [set_slot]
+        elif inst.opname == "event_wait":
+            slots = [wait_slot]
+        else:
+            slots = [0, 1]
+        return [self._event_slot_key(key, slot) for slot in slots]
+
+    @staticmethod
+    def _event_slot_key(key: Tuple[str, str, str, str], slot: int) -> Tuple[str, str, str, str]:
+        return key[:3] + (f"{key[3]}[{slot}]",)
+
+    def _count_event(self, inst: SimInstruction) -> None:
+        event_info = inst.args.get("event", {})
+        if not isinstance(event_info, dict) or not event_info.get("double", False):
+            return
+        counts = self._event_counts.setdefault(self._event_sync_key(event_info), [0, 0])
+        if inst.opname == "event_set":
+            counts[0] ^= 1
+        elif inst.opname == "event_wait":
+            counts[1] ^= 1
+        elif inst.opname == "event_release":
+            counts[1] = counts[0]
+
+    def _event_to_info(self, event: Any) -> Dict[str, Any]:
+        if isinstance(event, dict):
+            name = event.get("name", None)
+            src_pipe = self._pipe_name(event.get("src_pipe", None))
+            dst_pipe = self._pipe_name(event.get("dst_pipe", None))
+            preset = bool(event.get("preset", False))
+            double = bool(event.get("double", False))
+        else:
+            name = getattr(event, "name", None)
+            src_pipe = self._pipe_name(getattr(event, "src_pipe", None))
+            dst_pipe = self._pipe_name(getattr(event, "dst_pipe", None))
+            preset = bool(getattr(event, "preset", False))
+            double = isinstance(event, DEvent)
+        if not isinstance(name, str) or name == "":
+            raise TypeError(f"event must have non-empty string name, got: {name}")
+        if src_pipe == "" or dst_pipe == "":
+            raise TypeError(f"event must have valid src/dst pipes, got: src={src_pipe}, dst={dst_pipe}")
+        return {
+            "name": name,
+            "src_pipe": src_pipe,
+            "dst_pipe": dst_pipe,
+            "preset": preset,
+            "double": double,
+        }
+
+    def _instruction_blocked(self, inst: SimInstruction) -> bool:
+        if inst.opname == "tile_loop":
+            # A batched loop stands for all its iterations, so every earlier instruction must be done.
+            for pipe in self.pipes:
+                head = self._pipe_head(pipe)
+                if pipe is not self.S and head is not None and head.seq < inst.seq:
+                    return True
+            return False
+        if inst.opname in ("wait_cube", "wait_vec"):
+            if self.crosscore is None:
+                return False
+            flag_id = self._resolve_int(inst.args.get("flag_id", 0), f"{inst.opname} flag_id")
+            if inst.opname == "wait_cube":
+                return not self.crosscore.can_wait_cube(self.sub_block_idx, flag_id)
+            return not self.crosscore.can_wait_vec(flag_id)
+        if inst.opname == "waitflag":
+            key = self._flag_sync_key(
+                str(inst.args.get("src", "")),
+                str(inst.args.get("dst", "")),
+                inst.args.get("event_id", None),
+            )
+            return not self._sync_tokens.get(key, False)
+        if inst.opname == "event_wait":
+            event_info = inst.args.get("event", None)
+            if not isinstance(event_info, dict):
+                raise TypeError(f"event_wait requires event dict in args, got: {type(event_info)}")
+            key = self._event_token_keys(inst)[0]
+            return not self._sync_tokens.get(key, False)
+        return False
+
+    def _execute_crosscore_instruction(self, inst: SimInstruction, time: int = 0) -> bool:
+        opname = inst.opname
+        if opname not in ("cube_ready", "vec_ready", "wait_cube", "wait_vec"):
+            return False
+        if self.crosscore is None:
+            return True
+        flag_id = self._resolve_int(inst.args.get("flag_id", 0), f"{opname} flag_id")
+        if opname == "cube_ready":
+            self.crosscore.cube_ready(flag_id, time)
+        elif opname == "vec_ready":
+            self.crosscore.vec_ready(self.sub_block_idx, flag_id, time)
+        elif opname == "wait_cube":
+            self.crosscore.wait_cube(self.sub_block_idx, flag_id)
+        else:
+            self.crosscore.wait_vec(flag_id)
+        return True
+
+    def _record_token(self, key: Tuple[str, str, str, str], time: int) -> None:
+        self._sync_tokens[key] = True
+        if self.timer is not None:
+            self.timer.token_times[key] = time
+
+    def _execute_sync_instruction(self, inst: SimInstruction, time: int = 0) -> bool:
+        if self._execute_crosscore_instruction(inst, time):
+            return True
+        if inst.opname == "setflag":
+            key = self._flag_sync_key(
+                str(inst.args.get("src", "")),
+                str(inst.args.get("dst", "")),
+                inst.args.get("event_id", None),
+            )
+            self._record_token(key, time)
+            return True
+        if inst.opname == "waitflag":
+            key = self._flag_sync_key(
+                str(inst.args.get("src", "")),
+                str(inst.args.get("dst", "")),
+                inst.args.get("event_id", None),
+            )
+            self._sync_tokens[key] = False
+            return True
+        if inst.opname in ("event_set", "event_setall"):
+            event_info = inst.args.get("event", None)
+            if not isinstance(event_info, dict):
+                raise TypeError(f"{inst.opname} requires event dict in args, got: {type(event_info)}")
+            for key in self._event_token_keys(inst):
+                self._record_token(key, time)
+            return True
+        if inst.opname in ("event_wait", "event_release"):
+            event_info = inst.args.get("event", None)
+            if not isinstance(event_info, dict):
+                raise TypeError(f"{inst.opname} requires event dict in args, got: {type(event_info)}")
+            for key in self._event_token_keys(inst):
+                self._sync_tokens[key] = False
+            return True
+        return False
+
+    def _pipe_head(self, pipe: PipeBase) -> Optional[SimInstruction]:
+        idx = self._next_indices.get(id(pipe), 0)
+        if idx >= len(pipe.instructions):
+            return None
+        return pipe.instructions[idx]
+
+    def finished(self) -> bool:
+        return all(self._pipe_head(pipe) is None for pipe in self.pipes)
+
+    def blocked_heads(self) -> List[str]:
+        blocked: List[str] = []
+        for pipe in self.pipes:
+            inst = self._pipe_head(pipe)
+            if inst is not None:
+                blocked.append(f"{pipe.pipe_name}:{inst.opname}")
+        return blocked
+
+    def advance(self) -> int:
+        """Execute queued pipe instructions until every pipe is drained or blocked; returns the count run."""
+        executed = 0
+        while True:
+            scalar_head = self._pipe_head(self.S)
+            best: Optional[Tuple[int, PipeBase, SimInstruction]] = None
+            for pipe in self.pipes:
+                inst = self._pipe_head(pipe)
+                if inst is None:
+                    continue
+                # Pipe work issued after a pending scalar instruction cannot start before it.
+                if pipe is not self.S and scalar_head is not None and scalar_head.seq < inst.seq:
+                    continue
+                if self._instruction_blocked(inst):
+                    continue
+                if best is None or inst.seq < best[0]:
+                    best = (inst.seq, pipe, inst)
+            if best is None:
+                return executed
+            _, pipe, inst = best
+            end_time = 0
+            if self.timer is not None:
+                end_time = self._time_instruction(self.timer, pipe, inst)
+            if inst.opname == "tile_loop":
+                self._execute_tile_loop(inst)
+            elif self._execute_sync_instruction(inst, end_time):
+                if self.sanitizer is not None:
+                    self.sanitizer.sync(self, pipe, inst)
+                self._count_event(inst)
+            else:
+                if self.sanitizer is not None:
+                    self.sanitizer.access(self, pipe, inst)
+                pipe.execute_instruction(inst)
+            self._next_indices[id(pipe)] += 1
+            executed += 1
+
+    def _execute_tile_loop(self, inst: SimInstruction) -> None:
+        batch: TileLoop = inst.args["batch"]
+        # Replay the loop's syncs in the order advance() would run them, so the tokens left
+        # behind (and any deadlock) match an iteration-by-iteration run.
+        queues: Dict[str, List[SimInstruction]] = {}
+        for pipe_name, sync in batch.sync_ops:
+            queues.setdefault(pipe_name, []).append(sync)
+        positions = {pipe_name: 0 for pipe_name in queues}
+        remaining = sum(len(queue) for queue in queues.values()) * batch.trips
+        boundary: Optional[Tuple[Dict[Any, bool], Dict[Any, List[int]]]] = None
+        while remaining:
+            reps = {positions[name] / len(queue) for name, queue in queues.items()}
+            if len(reps) == 1 and float(next(iter(reps))).is_integer():
+                # Every pipe finished the same iteration; once the tokens (and DEvent flag parities)
+                # repeat, so does the rest.
+                state = (dict(self._sync_tokens), {key: list(counts) for key, counts in self._event_counts.items()})
+                if boundary == state:
+                    break
+                boundary = state
+            best: Optional[Tuple[Tuple[int, int], str, SimInstruction]] = None
+            for pipe_name, queue in queues.items():
+                rep, idx = divmod(positions[pipe_name], len(queue))
+                if rep >= batch.trips:
+                    continue
+                sync = queue[idx]
+                if self._instruction_blocked(sync):
+                    continue
+                if best is None or (rep, sync.seq) < best[0]:
+                    best = ((rep, sync.seq), pipe_name, sync)
+            if best is None:
+                pending = [f"{name}:{queue[positions[name] % len(queue)].opname}" for name, queue in queues.items()]
+                raise RuntimeError("Simulator deadlock in batched loop syncs: " + ", ".join(pending))
+            self._execute_sync_instruction(best[2])
+            self._count_event(best[2])
+            positions[best[1]] += 1
+            remaining -= 1
+        batch.run()
+
+    def _sync_dependency(self, timer: PipeTimer, inst: SimInstruction) -> Tuple[int, Optional[str]]:
+        # (cycle the awaited set happened, sync edge label) for wait instructions.
+        opname = inst.opname
+        if opname == "waitflag":
+            src = str(inst.args.get("src", ""))
+            dst = str(inst.args.get("dst", ""))
+            event_id = inst.args.get("event_id", None)
+            key = self._flag_sync_key(src, dst, event_id)
+            return timer.token_times.get(key, 0), f"{src}->{dst}:{event_id}"
+        if opname == "event_wait":
+            key = self._event_token_keys(inst)[0]
+            return timer.token_times.get(key, 0), f"{key[1]}->{key[2]}:{key[3]}"
+        if opname in ("wait_cube", "wait_vec") and self.crosscore is not None:
+            flag_id = self._resolve_int(inst.args.get("flag_id", 0), f"{opname} flag_id")
+            if opname == "wait_cube":
+                return (
+                    self.crosscore.wait_cube_time(self.sub_block_idx, flag_id),
+                    f"cube->vec{self.sub_block_idx}:flag{flag_id}",
+                )
+            return self.crosscore.wait_vec_time(flag_id), f"vec->cube:flag{flag_id}"
+        return 0, None
+
+    def _time_instruction(self, timer: PipeTimer, pipe: PipeBase, inst: SimInstruction) -> int:
+        earliest = 0 if pipe is self.S else timer.fence(inst.seq)
+        dep_time, edge = self._sync_dependency(timer, inst)
+        cycles = timer.cost.estimate(pipe.pipe_name, inst)
+        end = timer.run(pipe.pipe_name, earliest, dep_time, cycles, edge)
+        if pipe is self.S:
+            timer.record_fence(inst.seq, end)
+        if self.trace is not None:
+            self._trace_instruction(self.trace, pipe, inst, end - cycles, cycles, edge)
+        return end
+
+    def _trace_lane_name(self) -> str:
+        return self.unit_name
+
+    def _trace_track(self, trace: TraceRecorder, pipe: PipeBase) -> int:
+        return trace.track(self.lane_index, self.pipes.index(pipe), f"{self._trace_lane_name()}.{pipe.pipe_name}")
+
+    def _trace_instruction(
+        self,
+        trace: TraceRecorder,
+        pipe: PipeBase,
+        inst: SimInstruction,
+        start: int,
+        cycles: int,
+        edge: Optional[str],
+    ) -> None:
+        tid = self._trace_track(trace, pipe)
+        opname = inst.opname
+        if opname == "sim_print":
+            trace.instant(tid, self._format_sim_print(inst.args.get("payload", [])), start)
+            return
+        args: Dict[str, Any] = {"seq": inst.seq}
+        if edge is not None:
+            args["edge"] = edge
+        trace.slice(tid, opname, start, cycles, args)
+        # Local flags/events are single tokens (a newer set replaces an unconsumed one); cross-core flags queue.
+        if opname in ("setflag", "waitflag"):
+            src = str(inst.args.get("src", ""))
+            dst = str(inst.args.get("dst", ""))
+            event_id = inst.args.get("event_id", None)
+            key = (self.lane_index, self._flag_sync_key(src, dst, event_id))
+            name = f"{src}->{dst}:{event_id}"
+            if opname == "setflag":
+                trace.flow_start(key, tid, name, start, exclusive=True)
+            else:
+                trace.flow_end(key, tid, name, start)
+        elif opname in ("event_set", "event_setall", "event_wait"):
+            for event_key in self._event_token_keys(inst):
+                key = (self.lane_index, event_key)
+                name = f"{event_key[1]}->{event_key[2]}:{event_key[3]}"
+                if opname == "event_wait":
+                    trace.flow_end(key, tid, name, start)
+                else:
+                    trace.flow_start(key, tid, name, start, exclusive=True)
+        elif opname in ("cube_ready", "vec_ready", "wait_cube", "wait_vec") and self.crosscore is not None:
+            flag_id = self._resolve_int(inst.args.get("flag_id", 0), f"{opname} flag_id")
+            if opname == "cube_ready":
+                for sub in range(self.crosscore.vec_num):
+                    trace.flow_start(("to_vec", sub, flag_id), tid, f"cube->vec{sub}:flag{flag_id}", start)
+            elif opname == "vec_ready":
+                sub = self.sub_block_idx
+                trace.flow_start(("to_cube", sub, flag_id), tid, f"vec{sub}->cube:flag{flag_id}", start)
+            elif opname == "wait_cube":
+                sub = self.sub_block_idx
+                trace.flow_end(("to_vec", sub, flag_id), tid, f"cube->vec{sub}:flag{flag_id}", start)
+            else:
+                for sub in range(self.crosscore.vec_num):
+                    trace.flow_end(("to_cube", sub, flag_id), tid, f"vec{sub}->cube:flag{flag_id}", start)
+
+    def flush_trace(self) -> None:
+        """Stamp scalar-side sim_print markers with the S-pipe time reached at their dispatch point."""
+        if self.trace is None or self.timer is None:
+            return
+        tid = self._trace_track(self.trace, self.S)
+        for seq, message in self._pending_prints:
+            self.trace.instant(tid, message, self.timer.fence(seq))
+        self._pending_prints = []
+
+    def _run_loop(self, step: Tuple[Any, ...], trips: range) -> None:
+        info = None
+        if len(trips) >= 2 and globvars.sim_batch_loops:
+            info = analyze_loop(step, self._BATCH_OPNAMES)
+        # Batched loops skip the per-instruction timing and sanitizer hooks.
+        if info is None or ((self.timer is not None or self.sanitizer is not None) and not info.scalar_only):
+            super()._run_loop(step, trips)
+            return
+        # Dispatch the first two iterations as usual; if they form one tile pipeline, their
+        # instructions are replaced by a single batched instruction for the whole loop.
+        var_name, body = step[2], step[6]
+        marks = [len(pipe.instructions) for pipe in self.pipes]
+        probes: List[List[Tuple[str, SimInstruction]]] = []
+        carried: List[Dict[str, Number]] = []
+        probe_marks = marks
+        for value in trips[:2]:
+            self.var_values[var_name] = value
+            self._execute_plan(body)
+            probes.append(self._issued_since(probe_marks))
+            probe_marks = [len(pipe.instructions) for pipe in self.pipes]
+            carried.append({name: self.var_values[name] for name in info.carried})
+        batch: Optional[TileLoop] = None
+        matched = all(isinstance(value, int) for value in carried[0].values())
+        if matched and info.scalar_only:
+            matched = not probes[0] and not probes[1]
+        elif matched:
+            batch = TileLoop.build(probes[0], probes[1], len(trips))
+            matched = batch is not None
+        if matched and len(trips) > 2:
+            # Dispatch the last iteration too: it leaves views and vars as the loop would, and
+            # catches tiles clipped at a GM edge.
+            saved = dict(self.var_values)
+            for name, value in carried[0].items():
+                self.var_values[name] = value + (len(trips) - 2) * (carried[1][name] - value)
+            self.var_values[var_name] = trips[-1]
+            self._execute_plan(body)
+            last = self._issued_since(probe_marks)
+            self._truncate_pipes(probe_marks)
+            matched = not last if batch is None else batch.matches(last)
+            if not matched:
+                self.var_values.clear()
+                self.var_values.update(saved)
+        if not matched:
+            super()._run_loop(step, trips[2:])
+            return
+        self._truncate_pipes(marks)
+        if batch is not None:
+            seq = self._dispatch_seq
+            self._dispatch_seq += 1
+            self.S.issue(SimInstruction(opname="tile_loop", args={"batch": batch}, seq=seq))
+
+    def _issued_since(self, marks: List[int]) -> List[Tuple[str, SimInstruction]]:
+        issued = [
+            (pipe.pipe_name, inst) for pipe, mark in zip(self.pipes, marks) for inst in pipe.instructions[mark:]
+        ]
+        issued.sort(key=lambda item: item[1].seq)
+        return issued
+
+    def _truncate_pipes(self, marks: List[int]) -> None:
+        for pipe, mark in zip(self.pipes, marks):
+            del pipe.instructions[mark:]
+
+    def _execute_pipes(self) -> None:
+        self.advance()
+        if not self.finished():
+            raise RuntimeError(
+                "Simulator deadlock while executing pipes with auto-sync waits: "
+                + ", ".join(self.blocked_heads())
+            )
+
+    def _seed_var_values(self, instructions: List["Instruction"]) -> None:
+        def _visit(value: Any) -> None:
+            if isinstance(value, Var):
+                if isinstance(value.value, (int, float, bool)):
+                    self.var_values.setdefault(value.name, value.value)
+                return
+            if isinstance(value, dict):
+                for item in value.values():
+                    _visit(item)
+                return
+            if isinstance(value, (list, tuple, set)):
+                for item in value:
+                    _visit(item)
+                return
+
+        for inst in instructions:
+            for value in inst.kwargs.values():
+                _visit(value)
+
+    def _seed_bound_args(self, bound_args: Optional[Dict[str, Any]]) -> None:
+        if not isinstance(bound_args, dict):
+            return
+        for key, value in bound_args.items():
+            if not isinstance(key, str):
+                continue
+            if not isinstance(value, Var):
+                continue
+            if not isinstance(value.value, (int, float, bool)):
+                continue
+            self.var_values.setdefault(key, value.value)
+            self.var_values.setdefault(value.name, value.value)
+
+    def _get_memory_by_position(self, position: str) -> torch.Tensor:
+        raise ValueError(f"Unsupported local position for {self.unit_name} simulator: {position}")
+
+    def _alloc_bytes(self, position: str, size_bytes: int) -> torch.Tensor:
+        if size_bytes < 0:
+            raise ValueError(f"size_bytes must be non-negative, got: {size_bytes}")
+        memory = self._get_memory_by_position(position)
+        start = self._alloc_offsets[position]
+        end = start + size_bytes
+        if end > int(memory.numel()):
+            raise MemoryError(
+                f"{position} memory overflow: request={size_bytes} bytes, "
+                f"offset={start}, capacity={int(memory.numel())}"
+            )
+        self._alloc_offsets[position] = end
+        return memory[start:end]
+
+    def _placed_bytes(self, position: str, offset: int, size_bytes: int, slot_bytes: int) -> torch.Tensor:
+        memory = self._get_memory_by_position(position)
+        if size_bytes > slot_bytes or offset + slot_bytes > int(memory.numel()):
+            raise MemoryError(
+                f"{position} planned buffer overflow: request={size_bytes} bytes, "
+                f"slot={slot_bytes} bytes at offset={offset}, capacity={int(memory.numel())}"
+            )
+        return memory[offset:offset + size_bytes]
+
+    def _planned_slot(self, name: str) -> Optional[Any]:
+        if self._memory_plan is None:
+            return None
+        return self._memory_plan.slot(name)
+
+    def _allocate_tensor(self, tensor: Tensor) -> torch.Tensor:
+        position = str(tensor.position)
+        shape0 = self._resolve_int(tensor.shape[0], "shape[0]")
+        shape1 = self._resolve_int(tensor.shape[1], "shape[1]")
+        numel = shape0 * shape1
+        dtype = tensor.dtype
+        elem_size = self._dtype_size(dtype)
+        slot = self._planned_slot(tensor.name)
+        if slot is not None:
+            raw = self._placed_bytes(position, slot.offsets[0], numel * elem_size, slot.nbytes)
+        else:
+            raw = self._alloc_bytes(position, numel * elem_size)
+        torch_dtype = self._to_torch_dtype(dtype)
+        return raw.view(torch_dtype).view(shape0, shape1)
+
+    def _allocate_dbuf(self, dbuf: DBuff) -> Tuple[torch.Tensor, torch.Tensor]:
+        position = str(dbuf.position)
+        shape0 = self._resolve_int(dbuf.shape[0], "shape[0]")
+        shape1 = self._resolve_int(dbuf.shape[1], "shape[1]")
+        numel = shape0 * shape1
+        dtype = dbuf.dtype
+        elem_size = self._dtype_size(dtype)
+        torch_dtype = self._to_torch_dtype(dtype)
+        slot = self._planned_slot(dbuf.name)
+        if slot is not None:
+            first = self._placed_bytes(position, slot.offsets[0], numel * elem_size, slot.nbytes)
+            second = self._placed_bytes(position, slot.offsets[1], numel * elem_size, slot.nbytes)
+        else:
+            first = self._alloc_bytes(position, numel * elem_size)
+            second = self._alloc_bytes(position, numel * elem_size)
+        return first.view(torch_dtype).view(shape0, shape1), second.view(torch_dtype).view(shape0, shape1)
+
+    def _handle_create_tensor(self, inst: "Instruction") -> None:
+        val = inst.kwargs.get("val")
+        if not isinstance(val, Tensor):
+            raise TypeError(f"create_tensor requires Tensor value, got: {type(val)}")
+        if str(val.position) not in self._alloc_offsets:
+            # Declared by the other side of the kernel (e.g. L0A on a vec lane); nothing here touches it.
+            return
+        self.buffer_views[val.name] = self._allocate_tensor(val)
+
+    def _handle_create_dbuf(self, inst: "Instruction") -> None:
+        val = inst.kwargs.get("val")
+        if not isinstance(val, DBuff):
+            raise TypeError(f"create_dbuf requires DBuff value, got: {type(val)}")
+        if str(val.position) not in self._alloc_offsets:
+            return
+        self.buffer_views[val.name] = self._allocate_dbuf(val)
+
+    def _get_tensor_view(self, tensor: Tensor) -> torch.Tensor:
+        view = self.buffer_views.get(tensor.name)
+        if isinstance(view, tuple):
+            raise TypeError(f"Tensor {tensor.name} unexpectedly mapped to DBuff tuple")
+        if view is None:
+            raise KeyError(f"Tensor view not found for {tensor.name}")
+        return view
+
+    def _get_gm_view(self, tensor: GMTensor) -> torch.Tensor:
+        view = self.gm_views.get(tensor.name)
+        if view is None:
+            raise ValueError(
+                f"GMTensor data is not available for {tensor.name}; "
+                "please provide input data for simulator execution"
+            )
+        return view
+
+    def _handle_get_buf(self, inst: "Instruction") -> None:
+        buf = inst.kwargs.get("buf")
+        index = inst.kwargs.get("index")
+        out = inst.kwargs.get("out")
+        if not isinstance(buf, DBuff):
+            raise TypeError(f"get_buf requires DBuff buf, got: {type(buf)}")
+        if not isinstance(out, Tensor):
+            raise TypeError(f"get_buf requires Tensor out, got: {type(out)}")
+        if str(buf.position) not in self._alloc_offsets:
+            return
+        views = self.buffer_views.get(buf.name)
+        if not isinstance(views, tuple):
+            raise KeyError(f"DBuff views not found for {buf.name}")
+        idx = self._resolve_int(index, "get_buf index")
+        self.buffer_views[out.name] = views[idx % 2]
+
+    def _handle_slice_tensor(self, inst: "Instruction") -> None:
+        src = inst.kwargs.get("src")
+        out = inst.kwargs.get("out")
+        offset = inst.kwargs.get("offset")
+        span = inst.kwargs.get("span")
+        step = inst.kwargs.get("step")
+        if not isinstance(src, Tensor):
+            raise TypeError(f"slice_tensor requires Tensor src, got: {type(src)}")
+        if not isinstance(out, Tensor):
+            raise TypeError(f"slice_tensor requires Tensor out, got: {type(out)}")
+        if not isinstance(offset, (list, tuple)) or not isinstance(span, (list, tuple)):
+            raise TypeError("slice_tensor requires list/tuple offset/span")
+        if str(src.position) not in self._alloc_offsets:
+            return
+        src_view = self._get_tensor_view(src)
+        row0 = self._resolve_int(offset[0], "slice_tensor offset[0]")
+        col0 = self._resolve_int(offset[1], "slice_tensor offset[1]")
+        row_span = self._resolve_int(span[0], "slice_tensor span[0]")
+        col_span = self._resolve_int(span[1], "slice_tensor span[1]")
+        row_step = 1
+        col_step = 1
+        if isinstance(step, (list, tuple)) and len(step) >= 2:
+            row_step = self._resolve_int(step[0], "slice_tensor step[0]")
+            col_step = self._resolve_int(step[1], "slice_tensor step[1]")
+        self.buffer_views[out.name] = src_view[
+            row0 : row0 + row_span : row_step,
+            col0 : col0 + col_span : col_step,
+        ]
+
+    def _handle_create_gm_tensor(self, inst: "Instruction") -> None:
+        val = inst.kwargs.get("val")
+        if not isinstance(val, GMTensor):
+            raise TypeError(f"create_gm_tensor requires GMTensor value, got: {type(val)}")
+        self.gm_views[val.name] = val.data
+
+    def _handle_slice_gm_tensor(self, inst: "Instruction") -> None:
+        src = inst.kwargs.get("src")
+        out = inst.kwargs.get("out")
+        offset = inst.kwargs.get("offset")
+        span = inst.kwargs.get("span")
+        step = inst.kwargs.get("step")
+        if not isinstance(src, GMTensor):
+            raise TypeError(f"slice_gm_tensor requires GMTensor src, got: {type(src)}")
+        if not isinstance(out, GMTensor):
+            raise TypeError(f"slice_gm_tensor requires GMTensor out, got: {type(out)}")
+        if not isinstance(offset, (list, tuple)) or not isinstance(span, (list, tuple)):
+            raise TypeError("slice_gm_tensor requires list/tuple offset/span")
+        src_view = self._get_gm_view(src)
+        row0 = self._resolve_int(offset[0], "slice_gm_tensor offset[0]")
+        col0 = self._resolve_int(offset[1], "slice_gm_tensor offset[1]")
+        row_span = self._resolve_int(span[0], "slice_gm_tensor span[0]")
+        col_span = self._resolve_int(span[1], "slice_gm_tensor span[1]")
+        row_step = 1
+        col_step = 1
+        if isinstance(step, (list, tuple)) and len(step) >= 2:
+            row_step = self._resolve_int(step[0], "slice_gm_tensor step[0]")
+            col_step = self._resolve_int(step[1], "slice_gm_tensor step[1]")
+        self.gm_views[out.name] = src_view[
+            row0 : row0 + row_span : row_step,
+            col0 : col0 + col_span : col_step,
+        ]
+
+    @staticmethod
+    def _pipe_name(pipe: Any) -> str:
+        if isinstance(pipe, PipeType):
+            return str(pipe)
+        if isinstance(pipe, str):
+            return pipe
+        return ""
+
+    def _pipe_from_name(self, pipe_name: str) -> Optional[PipeBase]:
+        for pipe in self.pipes:
+            if pipe.pipe_name == pipe_name:
+                return pipe
+        return None
+
+    def _resolve_pipe(self, inst: "Instruction") -> Optional[PipeBase]:
+        opname = inst.opname
+        pipe_name = self._OP_PIPES.get(opname)
+        if pipe_name is not None:
+            return self._pipe_from_name(pipe_name)
+        if opname == "sim_print":
+            return self._pipe_from_name(self._pipe_name(inst.kwargs.get("pipe")))
+        if opname == "setflag":
+            return self._pipe_from_name(self._pipe_name(inst.kwargs.get("src")))
+        if opname == "waitflag":
+            return self._pipe_from_name(self._pipe_name(inst.kwargs.get("dst")))
+        if opname in ("event_set", "event_setall", "event_release"):
+            event_info = self._event_to_info(inst.kwargs.get("event", None))
+            return self._pipe_from_name(str(event_info["src_pipe"]))
+        if opname == "event_wait":
+            event_info = self._event_to_info(inst.kwargs.get("event", None))
+            return self._pipe_from_name(str(event_info["dst_pipe"]))
+        if opname in self._PIPE_KWARG_OPNAMES:
+            pipe = self._pipe_from_name(self._pipe_name(inst.kwargs.get("pipe")))
+            if pipe is None and opname != "barrier":
+                # Cross-core flags on a pipe this unit lacks are issued in scalar order.
+                return self.S
+            return pipe
+        return None
+
+    def _resolve_misc_value(self, value: Any) -> Any:
+        if isinstance(value, Var):
+            return self._resolve_scalar(value)
+        if isinstance(value, Expr):
+            return self._eval_expr(str(value))
+        if isinstance(value, PipeType):
+            return str(value)
+        if isinstance(value, (int, float, bool, str)):
+            return value
+        if isinstance(value, (list, tuple)):
+            out: List[Any] = []
+            for item in value:
+                out.append(self._resolve_misc_value(item))
+            if isinstance(value, tuple):
+                return tuple(out)
+            return out
+        if value is None:
+            return None
+        return str(value)
+
+    def _build_sim_instruction(self, inst: "Instruction") -> SimInstruction:
+        args: Dict[str, Any] = {}
+        tensors: Dict[str, Any] = {}
+        tensor_dtypes: Dict[str, str] = {}
+        for key, value in inst.kwargs.items():
+            if inst.opname == "sim_print" and key == "payload":
+                if not isinstance(value, (list, tuple)):
+                    raise TypeError(f"sim_print payload must be list/tuple, got: {type(value)}")
+                args[key] = [self._resolve_print_item(item) for item in value]
+                continue
+            if key == "event":
+                args[key] = self._event_to_info(value)
+                continue
+            if isinstance(value, Tensor):
+                tensors[key] = self._get_tensor_view(value)
+                tensor_dtypes[key] = str(value.dtype)
+                if inst.opname == "l1_to_l0" and key == "src":
+                    args["src_is_transpose"] = bool(getattr(value, "is_transpose", False))
+                continue
+            if isinstance(value, GMTensor):
+                tensors[key] = self._get_gm_view(value)
+                tensor_dtypes[key] = str(value.dtype)
+                continue
+            args[key] = self._resolve_misc_value(value)
+        atomic_enabled: Optional[bool] = None
+        atomic_dtype: Optional[str] = None
+        if inst.opname in self._ATOMIC_OPNAMES:
+            atomic_enabled = self.atomic_enabled
+            atomic_dtype = str(self.atomic_dtype) if self.atomic_dtype is not None else None
+        seq = self._dispatch_seq
+        self._dispatch_seq += 1
+        return SimInstruction(
+            opname=inst.opname,
+            args=args,
+            tensors=tensors,
+            tensor_dtypes=tensor_dtypes,
+            atomic_enabled=atomic_enabled,
+            atomic_dtype=atomic_dtype,
+            seq=seq,
+        )
+
+    def _resolve_print_item(self, item: Any) -> Any:
+        if isinstance(item, Tensor):
+            return self._get_tensor_view(item)
+        if isinstance(item, GMTensor):
+            return self._get_gm_view(item)
+        if isinstance(item, (Var, Expr, PipeType, int, float, bool, str, list, tuple)):
+            return self._resolve_misc_value(item)
+        return item
+
+    def _log_prefix(self) -> str:
+        return f"[{self.unit_name}][core={self.core_idx}]"
+
+    @staticmethod
+    def _format_sim_print(payload: List[Any]) -> str:
+        return " ".join(str(item) for item in payload)
+
+    def _log_sim_print(self, pipe_name: str, payload: List[Any]) -> None:
+        message = self._format_sim_print(payload)
+        prefix = self._log_prefix()
+        if pipe_name != str(Pipe.S):
+            prefix = f"{prefix}[pipe={pipe_name}]"
+        _SIM_LOGGER.info(f"{prefix} {message}")
+
+    def _dispatch_to_pipe(self, inst: "Instruction") -> bool:
+        if inst.opname == "barrier" and self._pipe_name(inst.kwargs.get("pipe")) == "ALL":
+            for pipe in self.pipes:
+                pipe.issue(self._build_sim_instruction(inst))
+            return True
+        pipe = self._resolve_pipe(inst)
+        if pipe is None:
+            return False
+        pipe.issue(self._build_sim_instruction(inst))
+        return True
+
+    def _handle_reset_cache(self, inst: "Instruction") -> None:
+        self._alloc_offsets = {key: 0 for key in self._alloc_offsets}
+
+    def _handle_create_event(self, inst: "Instruction") -> None:
+        event_info = self._event_to_info(inst.kwargs.get("val", None))
+        key = self._event_sync_key(event_info)
+        preset = bool(event_info.get("preset", False))
+        if event_info["double"]:
+            self._event_counts[key] = [0, 0]
+            for slot in (0, 1):
+                self._sync_tokens[self._event_slot_key(key, slot)] = preset
+        else:
+            self._sync_tokens[key] = preset
+
+    def _handle_atomic_begin(self, inst: "Instruction") -> None:
+        self.atomic_enabled = True
+
+    def _handle_set_atomic_type(self, inst: "Instruction") -> None:
+        dtype = inst.kwargs.get("dtype")
+        if isinstance(dtype, DataTypeValue):
+            self.atomic_dtype = dtype
+            self.atomic_enabled = True
+
+    def _handle_atomic_end(self, inst: "Instruction") -> None:
+        self.atomic_enabled = False
+        self.atomic_dtype = None
+
+    def _handle_sim_print(self, inst: "Instruction") -> None:
+        pipe_name = self._pipe_name(inst.kwargs.get("pipe"))
+        if pipe_name == "":
+            pipe_name = str(Pipe.S)
+        if pipe_name == str(Pipe.S):
+            raw_payload = inst.kwargs.get("payload", [])
+            if not isinstance(raw_payload, (list, tuple)):
+                raise TypeError(f"sim_print payload must be list/tuple, got: {type(raw_payload)}")
+            payload = [self._resolve_print_item(item) for item in raw_payload]
+            self._log_sim_print(pipe_name, payload)
+            if self.trace is not None:
+                self._pending_prints.append((self._dispatch_seq, self._format_sim_print(payload)))
+        else:
+            self._dispatch_to_pipe(inst)
+
+    def _handle_noop(self, inst: "Instruction") -> None:
+        return
+
+    _OP_HANDLER_NAMES: Dict[str, str] = {
+        "reset_cache": "_handle_reset_cache",
+        "create_var": "_handle_create_var",
+        "GetCubeNum": "_assign_var_op",
+        "GetCubeIdx": "_assign_var_op",
+        "GetVecNum": "_assign_var_op",
+        "GetVecIdx": "_assign_var_op",
+        "GetSubBlockIdx": "_assign_var_op",
+        "CeilDiv": "_assign_var_op",
+        "Min": "_assign_var_op",
+        "Max": "_assign_var_op",
+        "var_mul": "_assign_var_op",
+        "var_div": "_assign_var_op",
+        "var_add": "_assign_var_op",
+        "var_sub": "_assign_var_op",
+        "scalar_sqrt": "_assign_var_op",
+        "Align16": "_assign_var_op",
+        "Align32": "_assign_var_op",
+        "Align64": "_assign_var_op",
+        "Align128": "_assign_var_op",
+        "Align256": "_assign_var_op",
+        "create_tensor": "_handle_create_tensor",
+        "create_dbuf": "_handle_create_dbuf",
+        "get_buf": "_handle_get_buf",
+        "slice_tensor": "_handle_slice_tensor",
+        "create_gm_tensor": "_handle_create_gm_tensor",
+        "slice_gm_tensor": "_handle_slice_gm_tensor",
+        "create_sevent": "_handle_create_event",
+        "create_devent": "_handle_create_event",
+        "atomic_add": "_handle_atomic_begin",
+        "atomic_max": "_handle_atomic_begin",
+        "atomic_min": "_handle_atomic_begin",
+        "set_atomic_type": "_handle_set_atomic_type",
+        "atomic_end": "_handle_atomic_end",
+        "sim_print": "_handle_sim_print",
+        "start_auto_sync": "_handle_noop",
+        "end_auto_sync": "_handle_noop",
+    }
+
+    @classmethod
+    def _op_handler(cls, opname: str) -> Callable[["UnitBase", "Instruction"], Any]:
+        return getattr(cls, cls._OP_HANDLER_NAMES.get(opname, "_dispatch_to_pipe"))
+
+    def _execute_inst(self, inst: "Instruction") -> None:
+        self._op_handler(inst.opname)(self, inst)
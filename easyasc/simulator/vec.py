@@ -1,24 +1,90 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
 import torch
 
-from ._core_utils import validate_core_idx
+from ..utils.Tensor import Tensor
+from .pipe import SimInstruction
+from .unit import UnitBase
+from .vec_pipe import MTE3Pipe, VecMTE2Pipe, VPipe
 
 if TYPE_CHECKING:
     from ..utils.instruction import Instruction
 
 
-class Vec:
-    def __init__(self, core_idx: int, l1: torch.Tensor, ub: torch.Tensor) -> None:
-        self.core_idx = validate_core_idx(core_idx)
+class Vec(UnitBase):
+    unit_name = "vec"
+    _OP_PIPES: Dict[str, str] = {
+        "gm_to_ub_pad": "MTE2",
+        "ub_to_gm_pad": "MTE3",
+    }
+    _OP_PIPES.update({opname: "V" for opname in VPipe._HANDLERS})
+    _PIPE_KWARG_OPNAMES: Tuple[str, ...] = (
+        "vec_ready",
+        "wait_cube",
+        "allvec_ready",
+        "allvec_wait",
+        "barrier",
+    )
+    _ATOMIC_OPNAMES: Tuple[str, ...] = ("ub_to_gm_pad",)
+    _OP_HANDLER_NAMES: Dict[str, str] = dict(UnitBase._OP_HANDLER_NAMES, call_micro="_handle_call_micro")
+
+    def __init__(self, core_idx: int, l1: torch.Tensor, ub: torch.Tensor, sub_block_idx: int = 0) -> None:
+        super().__init__(core_idx, sub_block_idx)
+
+        self.MTE2 = VecMTE2Pipe(core_idx, ub, sub_block_idx)
+        self.V = VPipe(core_idx, ub, sub_block_idx)
+        self.MTE3 = MTE3Pipe(core_idx, ub, sub_block_idx)
+        self.pipes = [self.MTE2, self.V, self.MTE3, self.S]
+
         self.L1 = l1
         self.UB = ub
 
-    def run(
-        self,
-        instructions: List["Instruction"],
-        bound_args: Optional[Dict[str, Any]] = None,
-    ) -> None:
-        _ = instructions
-        _ = bound_args
-        pass
+        self._alloc_offsets = {
+            "L1": 0,
+            "UB": 0,
+        }
+        # MicroModule by name for call_micro; set by SimulatorBase from kernel.used_micros.
+        self.micros: Dict[str, Any] = {}
+
+    def _log_prefix(self) -> str:
+        return f"[vec][core={self.core_idx}][sub={self.sub_block_idx}]"
+
+    def _trace_lane_name(self) -> str:
+        return f"vec{self.sub_block_idx}"
+
+    def _handle_call_micro(self, inst: "Instruction") -> None:
+        name = inst.kwargs.get("name")
+        micro = self.micros.get(name)
+        if micro is None:
+            raise KeyError(f"MicroModule {name} is not registered with the vec simulator")
+        args = inst.kwargs.get("args") or []
+        if len(args) != len(micro.input_list):
+            raise ValueError(f"call_micro {name} expects {len(micro.input_list)} args, got: {len(args)}")
+        # The micro body refers to its arguments by parameter name.
+        tensors: Dict[str, Any] = {}
+        tensor_dtypes: Dict[str, str] = {}
+        scalars: Dict[str, Any] = {}
+        for param, arg in zip(micro.input_list, args):
+            if isinstance(arg, Tensor):
+                tensors[param.name] = self._get_tensor_view(arg)
+                tensor_dtypes[param.name] = str(arg.dtype)
+            else:
+                scalars[param.name] = self._resolve_scalar(arg)
+        seq = self._dispatch_seq
+        self._dispatch_seq += 1
+        self.V.issue(
+            SimInstruction(
+                opname="call_micro",
+                args={"name": name, "micro": micro, "scalars": scalars},
+                tensors=tensors,
+                tensor_dtypes=tensor_dtypes,
+                seq=seq,
+            )
+        )
+
+    def _get_memory_by_position(self, position: str) -> torch.Tensor:
+        if position == "L1":
+            return self.L1
+        if position == "UB":
+            return self.UB
+        return super()._get_memory_by_position(position)
@@ -0,0 +1,680 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+
+from .pipe import FIXPipe, PipeBase, SimInstruction, _SIM_LOGGER
+
+
+_BINARY_FNS: Dict[str, Callable[[torch.Tensor, torch.Tensor], torch.Tensor]] = {
+    "add": torch.add,
+    "sub": torch.sub,
+    "mul": torch.mul,
+    "div": torch.div,
+    "vmax": torch.maximum,
+    "vmin": torch.minimum,
+    "vand": torch.bitwise_and,
+    "vor": torch.bitwise_or,
+}
+_UNARY_FNS: Dict[str, Callable[[torch.Tensor], torch.Tensor]] = {
+    "exp": torch.exp,
+    "ln": torch.log,
+    "abs": torch.abs,
+    "rec": torch.reciprocal,
+    "sqrt": torch.sqrt,
+    "rsqrt": torch.rsqrt,
+    "relu": torch.relu,
+    "vnot": torch.bitwise_not,
+}
+_UNARY_SCALAR_OPNAMES = ("adds", "muls", "vmaxs", "vmins", "lrelu", "axpy")
+_GROUP_OPNAMES = ("cadd", "cmax", "cmin", "cgadd", "cgmax", "cgmin", "cpadd")
+_BITWISE_OPNAMES = ("vand", "vor", "vnot")
+_BITS_DTYPES: Dict[int, torch.dtype] = {1: torch.int8, 2: torch.int16, 4: torch.int32, 8: torch.int64}
+_COMPARE_FNS: Dict[str, Callable[[torch.Tensor, Any], torch.Tensor]] = {
+    "LT": torch.lt,
+    "GT": torch.gt,
+    "GE": torch.ge,
+    "LE": torch.le,
+    "EQ": torch.eq,
+    "NE": torch.ne,
+}
+_PROPOSAL_BYTES = 8
+_VEC_REPEAT_BYTES = 256
+
+
+class VecPipeBase(PipeBase):
+    def __init__(self, core_idx: int, ub: torch.Tensor, sub_block_idx: int = 0) -> None:
+        super().__init__(core_idx)
+        self.UB = ub
+        self.sub_block_idx = sub_block_idx
+
+    def _log_prefix(self) -> str:
+        return f"[vec][core={self.core_idx}][sub={self.sub_block_idx}][pipe={self.pipe_name}]"
+
+    @staticmethod
+    def _resolve_int(value: Any, label: str) -> int:
+        if isinstance(value, bool):
+            return int(value)
+        if not isinstance(value, (int, float)):
+            raise TypeError(f"{label} must resolve to int/float, got: {type(value)}")
+        return int(value)
+
+    @staticmethod
+    def _require_view(instruction: SimInstruction, key: str) -> torch.Tensor:
+        view = instruction.tensors.get(key)
+        if not isinstance(view, torch.Tensor):
+            raise TypeError(f"{instruction.opname} requires {key} tensor view, got: {type(view)}")
+        return view
+
+    def _ub_flat(self, view: torch.Tensor, label: str, dtype: Optional[torch.dtype] = None) -> Tuple[torch.Tensor, int]:
+        # Returns the whole UB reinterpreted as `dtype` plus the view's base element offset in it.
+        if view.untyped_storage().data_ptr() != self.UB.untyped_storage().data_ptr():
+            raise ValueError(f"{label} must be a UB tensor view of this vector unit")
+        base_bytes = int(view.storage_offset()) * int(view.element_size()) - int(self.UB.storage_offset())
+        flat_dtype = view.dtype if dtype is None else dtype
+        elem_size = torch.empty((), dtype=flat_dtype).element_size()
+        if base_bytes % elem_size != 0:
+            raise ValueError(f"{label} is not aligned to {elem_size} bytes in UB, offset={base_bytes}")
+        return self.UB.view(flat_dtype), base_bytes // elem_size
+
+    @staticmethod
+    def _gm_flat(view: torch.Tensor) -> Tuple[torch.Tensor, int]:
+        numel = view.untyped_storage().nbytes() // int(view.element_size())
+        return view.as_strided((numel,), (1,), 0), int(view.storage_offset())
+
+    @staticmethod
+    def _check_bounds(flat: torch.Tensor, index: torch.Tensor, label: str) -> None:
+        if index.numel() == 0:
+            return
+        low = int(index.min())
+        high = int(index.max())
+        if low < 0 or high >= int(flat.numel()):
+            raise MemoryError(
+                f"{label} access out of range: [{low}, {high}], capacity={int(flat.numel())}"
+            )
+
+    @staticmethod
+    def _burst_index(base: int, n_burst: int, burst: int, pitch: int) -> torch.Tensor:
+        rows = torch.arange(n_burst, dtype=torch.int64).view(-1, 1) * pitch
+        cols = torch.arange(burst, dtype=torch.int64).view(1, -1)
+        return (base + rows + cols).reshape(-1)
+
+
+class VecMTE2Pipe(VecPipeBase):
+    pipe_name = "MTE2"
+
+    def _execute_gm_to_ub_pad(self, instruction: SimInstruction) -> None:
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        n_burst = self._resolve_int(instruction.args.get("n_burst"), "gm_to_ub_pad n_burst")
+        burst_len_byte = self._resolve_int(instruction.args.get("burst_len_byte"), "gm_to_ub_pad burst_len_byte")
+        src_stride_byte = self._resolve_int(instruction.args.get("src_stride_byte", 0), "gm_to_ub_pad src_stride_byte")
+        dst_stride = self._resolve_int(instruction.args.get("dst_stride", 0), "gm_to_ub_pad dst_stride")
+        if n_burst <= 0 or burst_len_byte <= 0:
+            return
+        if src.dtype != dst.dtype:
+            raise ValueError(f"gm_to_ub_pad requires matching dtypes, got: src={src.dtype}, dst={dst.dtype}")
+
+        elem_size = int(dst.element_size())
+        burst = burst_len_byte // elem_size
+        src_flat, src_base = self._gm_flat(src)
+        dst_flat, dst_base = self._ub_flat(dst, "gm_to_ub_pad dst")
+        src_index = self._burst_index(src_base, n_burst, burst, burst + src_stride_byte // elem_size)
+        dst_pitch = (((burst_len_byte + 31) // 32) + dst_stride) * 32 // elem_size
+        dst_index = self._burst_index(dst_base, n_burst, burst, dst_pitch)
+        self._check_bounds(src_flat, src_index, "gm_to_ub_pad src")
+        self._check_bounds(dst_flat, dst_index, "gm_to_ub_pad dst")
+        dst_flat[dst_index] = src_flat[src_index]
+
+    def execute_instruction(self, instruction: SimInstruction) -> None:
+        if instruction.opname == "gm_to_ub_pad":
+            self._execute_gm_to_ub_pad(instruction)
+            return
+        super().execute_instruction(instruction)
+
+
+class MTE3Pipe(VecPipeBase):
+    pipe_name = "MTE3"
+
+    def __init__(self, core_idx: int, ub: torch.Tensor, sub_block_idx: int = 0) -> None:
+        super().__init__(core_idx, ub, sub_block_idx)
+        # Same contract as FIXPipe.record_gm_writes.
+        self.record_gm_writes = False
+        self.gm_writes: List[Tuple[bool, torch.Tensor, torch.Tensor]] = []
+
+    def clear(self) -> None:
+        super().clear()
+        # Cleared in place: a parallel worker shares one list across the core's writeback pipes.
+        self.gm_writes.clear()
+
+    def _execute_ub_to_gm_pad(self, instruction: SimInstruction) -> None:
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        n_burst = self._resolve_int(instruction.args.get("n_burst"), "ub_to_gm_pad n_burst")
+        burst_len_byte = self._resolve_int(instruction.args.get("burst_len_byte"), "ub_to_gm_pad burst_len_byte")
+        src_stride = self._resolve_int(instruction.args.get("src_stride", 0), "ub_to_gm_pad src_stride")
+        dst_stride_byte = self._resolve_int(instruction.args.get("dst_stride_byte", 0), "ub_to_gm_pad dst_stride_byte")
+        if n_burst <= 0 or burst_len_byte <= 0:
+            return
+        if src.dtype != dst.dtype:
+            raise ValueError(f"ub_to_gm_pad requires matching dtypes, got: src={src.dtype}, dst={dst.dtype}")
+
+        elem_size = int(src.element_size())
+        burst = burst_len_byte // elem_size
+        src_flat, src_base = self._ub_flat(src, "ub_to_gm_pad src")
+        dst_flat, dst_base = self._gm_flat(dst)
+        src_pitch = (((burst_len_byte + 31) // 32) + src_stride) * 32 // elem_size
+        src_index = self._burst_index(src_base, n_burst, burst, src_pitch)
+        dst_index = self._burst_index(dst_base, n_burst, burst, burst + dst_stride_byte // elem_size)
+        self._check_bounds(src_flat, src_index, "ub_to_gm_pad src")
+        self._check_bounds(dst_flat, dst_index, "ub_to_gm_pad dst")
+        value = src_flat[src_index]
+
+        atomic_enabled = bool(instruction.atomic_enabled)
+        if atomic_enabled:
+            dst_dtype = instruction.tensor_dtypes.get("dst")
+            atomic_dtype = instruction.atomic_dtype
+            if isinstance(dst_dtype, str) and isinstance(atomic_dtype, str) and dst_dtype != atomic_dtype:
+                _SIM_LOGGER.warning(
+                    f"{self._log_prefix()} "
+                    f"atomic dtype mismatch for ub_to_gm_pad: dst={dst_dtype}, atomic={atomic_dtype}"
+                )
+        elif not self.record_gm_writes:
+            dst_flat[dst_index] = value
+            return
+        # Express the bursts as a strided 2D region so recorded writes stay (offset, size, stride) shaped.
+        dst_pitch = burst + dst_stride_byte // elem_size
+        dst_region = dst_flat.as_strided((n_burst, burst), (dst_pitch, 1), dst_base)
+        value = value.view(n_burst, burst)
+        if atomic_enabled:
+            FIXPipe.apply_atomic_add(dst_region, value)
+        else:
+            dst_region.copy_(value)
+        if self.record_gm_writes:
+            self.gm_writes.append((atomic_enabled, dst_region, value))
+
+    def execute_instruction(self, instruction: SimInstruction) -> None:
+        if instruction.opname == "ub_to_gm_pad":
+            self._execute_ub_to_gm_pad(instruction)
+            return
+        super().execute_instruction(instruction)
+
+
+class VPipe(VecPipeBase):
+    pipe_name = "V"
+
+    def __init__(self, core_idx: int, ub: torch.Tensor, sub_block_idx: int = 0) -> None:
+        super().__init__(core_idx, ub, sub_block_idx)
+        self.mask_low: Optional[int] = None
+        self.mask_high: Optional[int] = None
+        self.cmpmask: Optional[torch.Tensor] = None
+        self._mask_cache: Dict[Tuple[int, int, int], torch.Tensor] = {}
+        # Register-level executor for call_micro, created on the first micro call.
+        self._micro: Optional[Any] = None
+
+    def clear(self) -> None:
+        super().clear()
+        self.mask_low = None
+        self.mask_high = None
+        self.cmpmask = None
+
+    @staticmethod
+    def _compute_dtype(dtype: torch.dtype) -> torch.dtype:
+        if dtype in (torch.float16, torch.bfloat16):
+            return torch.float32
+        return dtype
+
+    @staticmethod
+    def _repeat_index(
+        base: int,
+        repeat: int,
+        blk_stride: int,
+        rep_stride: int,
+        blk_elems: int,
+        rep_unit: int,
+    ) -> torch.Tensor:
+        # Element index of (repeat r, block b, lane e): base + r*rep_stride*rep_unit + b*blk_stride*blk_elems + e.
+        r = torch.arange(repeat, dtype=torch.int64).view(-1, 1, 1) * (rep_stride * rep_unit)
+        b = torch.arange(8, dtype=torch.int64).view(1, -1, 1) * (blk_stride * blk_elems)
+        e = torch.arange(blk_elems, dtype=torch.int64).view(1, 1, -1)
+        return (base + r + b + e).reshape(repeat, 8 * blk_elems)
+
+    def _operand(
+        self,
+        instruction: SimInstruction,
+        key: str,
+        repeat: int,
+        lanes: int,
+        dtype: Optional[torch.dtype] = None,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        view = self._require_view(instruction, key)
+        label = f"{instruction.opname} {key}"
+        flat, base = self._ub_flat(view, label, dtype)
+        c0 = 32 // int(flat.element_size())
+        blk_stride = self._resolve_int(instruction.args.get(f"{key}_blk_stride", 1), f"{label} blk_stride")
+        rep_stride = self._resolve_int(instruction.args.get(f"{key}_rep_stride", 8), f"{label} rep_stride")
+        index = self._repeat_index(base, repeat, blk_stride, rep_stride, lanes // 8, c0)
+        self._check_bounds(flat, index, label)
+        return flat, index
+
+    def _repeat_count(self, instruction: SimInstruction) -> int:
+        return self._resolve_int(instruction.args.get("repeat", 1), f"{instruction.opname} repeat")
+
+    @staticmethod
+    def _lanes(view: torch.Tensor) -> int:
+        return _VEC_REPEAT_BYTES // int(view.element_size())
+
+    def _lane_mask(self, lanes: int) -> torch.Tensor:
+        if self.mask_low is None or self.mask_high is None:
+            return torch.ones(lanes, dtype=torch.bool)
+        key = (self.mask_low, self.mask_high, lanes)
+        cached = self._mask_cache.get(key)
+        if cached is None:
+            bits = self.mask_low | (self.mask_high << 64)
+            cached = torch.tensor([bool((bits >> i) & 1) for i in range(lanes)], dtype=torch.bool)
+            self._mask_cache[key] = cached
+        return cached
+
+    @staticmethod
+    def _masked_store(flat: torch.Tensor, index: torch.Tensor, values: torch.Tensor, mask: torch.Tensor) -> None:
+        full = mask.view(1, -1).expand_as(index)
+        flat[index[full]] = values[full].to(flat.dtype)
+
+    def _execute_set_mask(self, instruction: SimInstruction) -> None:
+        low = self._resolve_int(instruction.args.get("low"), "set_mask low")
+        high = self._resolve_int(instruction.args.get("high"), "set_mask high")
+        self.mask_low = low & 0xFFFFFFFFFFFFFFFF
+        self.mask_high = high & 0xFFFFFFFFFFFFFFFF
+
+    def _execute_reset_mask(self, instruction: SimInstruction) -> None:
+        self.mask_low = None
+        self.mask_high = None
+
+    def _execute_set_cmpmask(self, instruction: SimInstruction) -> None:
+        src = self._require_view(instruction, "src")
+        flat, base = self._ub_flat(src, "set_cmpmask src", torch.uint8)
+        self.cmpmask = flat[base : base + 16].clone()
+
+    def _execute_binary(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        dtype = None
+        if opname in _BITWISE_OPNAMES:
+            dtype = _BITS_DTYPES[int(self._require_view(instruction, "dst").element_size())]
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes, dtype)
+        src1_flat, src1_index = self._operand(instruction, "src1", repeat, lanes, dtype)
+        src2_flat, src2_index = self._operand(instruction, "src2", repeat, lanes, dtype)
+        compute = self._compute_dtype(dst_flat.dtype)
+        lhs = src1_flat[src1_index].to(compute)
+        rhs = src2_flat[src2_index].to(compute)
+        if opname == "muladddst":
+            out = lhs * rhs + dst_flat[dst_index].to(compute)
+        else:
+            out = _BINARY_FNS[opname](lhs, rhs)
+        self._masked_store(dst_flat, dst_index, out, self._lane_mask(lanes))
+
+    def _execute_unary(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        dtype = None
+        if opname in _BITWISE_OPNAMES:
+            dtype = _BITS_DTYPES[int(self._require_view(instruction, "dst").element_size())]
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes, dtype)
+        src_flat, src_index = self._operand(instruction, "src", repeat, lanes, dtype)
+        out = _UNARY_FNS[opname](src_flat[src_index].to(self._compute_dtype(dst_flat.dtype)))
+        self._masked_store(dst_flat, dst_index, out, self._lane_mask(lanes))
+
+    def _execute_unary_scalar(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        val = instruction.args.get("val")
+        if isinstance(val, bool) or not isinstance(val, (int, float)):
+            raise TypeError(f"{opname} val must resolve to int/float, got: {type(val)}")
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes)
+        src_flat, src_index = self._operand(instruction, "src", repeat, lanes)
+        src = src_flat[src_index].to(self._compute_dtype(dst_flat.dtype))
+        if opname == "adds":
+            out = src + val
+        elif opname == "muls":
+            out = src * val
+        elif opname == "vmaxs":
+            out = torch.clamp(src, min=val)
+        elif opname == "vmins":
+            out = torch.clamp(src, max=val)
+        elif opname == "lrelu":
+            out = torch.where(src >= 0, src, src * val)
+        else:
+            out = dst_flat[dst_index].to(src.dtype) + src * val
+        self._masked_store(dst_flat, dst_index, out, self._lane_mask(lanes))
+
+    def _execute_dup(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        value = instruction.args.get("src")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"dup value must resolve to int/float, got: {type(value)}")
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes)
+        out = torch.full(dst_index.shape, value, dtype=self._compute_dtype(dst_flat.dtype))
+        self._masked_store(dst_flat, dst_index, out, self._lane_mask(lanes))
+
+    def _execute_brcb(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        src = self._require_view(instruction, "src")
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes)
+        src_flat, src_base = self._ub_flat(src, "brcb src")
+        src_index = src_base + torch.arange(repeat * 8, dtype=torch.int64)
+        self._check_bounds(src_flat, src_index, "brcb src")
+        # Element b of each 8-element source group fills destination block b of that repeat.
+        out = src_flat[src_index].view(repeat, 8, 1).expand(repeat, 8, lanes // 8).reshape(repeat, lanes)
+        dst_flat[dst_index] = out.to(dst_flat.dtype)
+
+    def _execute_group(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        dst = self._require_view(instruction, "dst")
+        lanes = self._lanes(self._require_view(instruction, "src"))
+        src_flat, src_index = self._operand(instruction, "src", repeat, lanes)
+        dst_flat, dst_base = self._ub_flat(dst, f"{opname} dst")
+        dst_rep_stride = self._resolve_int(instruction.args.get("dst_rep_stride", 1), f"{opname} dst_rep_stride")
+        compute = self._compute_dtype(src_flat.dtype)
+        values = src_flat[src_index].to(compute)
+
+        if opname.endswith("add"):
+            neutral = 0.0
+        elif compute.is_floating_point:
+            neutral = float("-inf") if opname.endswith("max") else float("inf")
+        else:
+            info = torch.iinfo(compute)
+            neutral = info.min if opname.endswith("max") else info.max
+        mask = self._lane_mask(lanes).view(1, -1).expand_as(values)
+        values = torch.where(mask, values, torch.full_like(values, neutral))
+
+        if opname in ("cadd", "cmax", "cmin"):
+            groups = values.view(repeat, 1, lanes)
+            rep_unit = 1
+        elif opname == "cpadd":
+            groups = values.view(repeat, lanes // 2, 2)
+            rep_unit = 128 // int(src_flat.element_size())
+        else:
+            groups = values.view(repeat, 8, lanes // 8)
+            rep_unit = 8
+        if opname.endswith("add"):
+            out = groups.sum(dim=2)
+        elif opname.endswith("max"):
+            out = groups.amax(dim=2)
+        else:
+            out = groups.amin(dim=2)
+        width = int(out.shape[1])
+        dst_index = (
+            dst_base
+            + torch.arange(repeat, dtype=torch.int64).view(-1, 1) * (dst_rep_stride * rep_unit)
+            + torch.arange(width, dtype=torch.int64).view(1, -1)
+        )
+        self._check_bounds(dst_flat, dst_index, f"{opname} dst")
+        dst_flat[dst_index] = out.to(dst_flat.dtype)
+
+    @staticmethod
+    def _round(values: torch.Tensor, mode: str) -> torch.Tensor:
+        if mode in ("CAST_RINT", "CAST_NONE"):
+            return torch.round(values)
+        if mode == "CAST_ROUND":
+            return torch.sign(values) * torch.floor(torch.abs(values) + 0.5)
+        if mode == "CAST_FLOOR":
+            return torch.floor(values)
+        if mode == "CAST_CEIL":
+            return torch.ceil(values)
+        if mode == "CAST_TRUNC":
+            return torch.trunc(values)
+        raise ValueError(f"Unsupported cast round mode: {mode}")
+
+    def _execute_cast(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        lanes = _VEC_REPEAT_BYTES // max(int(dst.element_size()), int(src.element_size()))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes)
+        src_flat, src_index = self._operand(instruction, "src", repeat, lanes)
+        values = src_flat[src_index]
+        if values.dtype.is_floating_point and not dst_flat.dtype.is_floating_point:
+            values = self._round(values.to(torch.float64), str(instruction.args.get("mode", "CAST_NONE")))
+        self._masked_store(dst_flat, dst_index, values, self._lane_mask(lanes))
+
+    @staticmethod
+    def _pack_bits(bits: torch.Tensor) -> torch.Tensor:
+        rows, lanes = int(bits.shape[0]), int(bits.shape[1])
+        weights = torch.tensor([1 << i for i in range(8)], dtype=torch.int32)
+        packed = (bits.view(rows, lanes // 8, 8).to(torch.int32) * weights).sum(dim=2)
+        return packed.to(torch.uint8)
+
+    def _execute_compare(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        mode = str(instruction.args.get("mode"))
+        if mode not in _COMPARE_FNS:
+            raise ValueError(f"Unsupported compare mode: {mode}")
+        lanes = self._lanes(self._require_view(instruction, "src1"))
+        src1_flat, src1_index = self._operand(instruction, "src1", repeat, lanes)
+        compute = self._compute_dtype(src1_flat.dtype)
+        lhs = src1_flat[src1_index].to(compute)
+        if opname == "compare":
+            src2_flat, src2_index = self._operand(instruction, "src2", repeat, lanes)
+            rhs: Any = src2_flat[src2_index].to(compute)
+        else:
+            rhs = instruction.args.get("src2")
+            if isinstance(rhs, bool) or not isinstance(rhs, (int, float)):
+                raise TypeError(f"compare_scalar src2 must resolve to int/float, got: {type(rhs)}")
+        bits = _COMPARE_FNS[mode](lhs, rhs) & self._lane_mask(lanes).view(1, -1)
+        # The bit mask is written contiguously (lanes/8 bytes per repeat), LSB first.
+        dst_flat, dst_base = self._ub_flat(self._require_view(instruction, "dst"), f"{opname} dst", torch.uint8)
+        packed = self._pack_bits(bits).reshape(-1)
+        dst_index = dst_base + torch.arange(int(packed.numel()), dtype=torch.int64)
+        self._check_bounds(dst_flat, dst_index, f"{opname} dst")
+        dst_flat[dst_index] = packed
+
+    def _execute_select(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        lanes = self._lanes(self._require_view(instruction, "dst"))
+        dst_flat, dst_index = self._operand(instruction, "dst", repeat, lanes)
+        src1_flat, src1_index = self._operand(instruction, "src1", repeat, lanes)
+        compute = self._compute_dtype(dst_flat.dtype)
+        lhs = src1_flat[src1_index].to(compute)
+        if str(instruction.args.get("mode")) == "TENSOR_TENSOR":
+            src2_flat, src2_index = self._operand(instruction, "src2", repeat, lanes)
+            rhs = src2_flat[src2_index].to(compute)
+        else:
+            scalar = instruction.args.get("src2")
+            if isinstance(scalar, bool) or not isinstance(scalar, (int, float)):
+                raise TypeError(f"select src2 must resolve to int/float, got: {type(scalar)}")
+            rhs = torch.full_like(lhs, scalar)
+
+        bit_pos = torch.arange(repeat * lanes, dtype=torch.int64)
+        selmask = instruction.tensors.get("selmask")
+        if isinstance(selmask, torch.Tensor):
+            mask_flat, mask_base = self._ub_flat(selmask, "select selmask", torch.uint8)
+            byte_index = mask_base + bit_pos // 8
+            self._check_bounds(mask_flat, byte_index, "select selmask")
+            bits = (mask_flat[byte_index].to(torch.int64) >> (bit_pos % 8)) & 1
+        else:
+            scalar_mask = self._resolve_int(instruction.args.get("selmask"), "select selmask")
+            pattern = torch.tensor([(scalar_mask >> i) & 1 for i in range(64)], dtype=torch.int64)
+            bits = pattern[bit_pos % 64]
+        out = torch.where(bits.view(repeat, lanes).bool(), lhs, rhs)
+        dst_flat[dst_index] = out.to(dst_flat.dtype)
+
+    def _execute_gather(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        opname = instruction.opname
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        data_view = dst if opname == "gather" else src
+        lanes = self._lanes(data_view)
+        c0 = lanes // 8
+        elem_size = int(data_view.element_size())
+        offset_flat, offset_base = self._ub_flat(self._require_view(instruction, "offset"), f"{opname} offset", torch.int32)
+        offset_index = offset_base + torch.arange(repeat * lanes, dtype=torch.int64)
+        self._check_bounds(offset_flat, offset_index, f"{opname} offset")
+        # Offsets are uint32 byte offsets relative to the addressed tensor.
+        elem_offsets = (offset_flat[offset_index].to(torch.int64) & 0xFFFFFFFF) // elem_size
+
+        dst_flat, dst_base = self._ub_flat(dst, f"{opname} dst")
+        src_flat, src_base = self._ub_flat(src, f"{opname} src")
+        if opname == "gather":
+            rep_stride = self._resolve_int(instruction.args.get("dst_rep_stride", 8), "gather dst_rep_stride")
+            src_index = src_base + elem_offsets
+            dst_index = self._repeat_index(dst_base, repeat, 1, rep_stride, c0, c0).reshape(-1)
+        else:
+            rep_stride = self._resolve_int(instruction.args.get("src_rep_stride", 8), "scatter src_rep_stride")
+            src_index = self._repeat_index(src_base, repeat, 1, rep_stride, c0, c0).reshape(-1)
+            dst_index = dst_base + elem_offsets
+        self._check_bounds(src_flat, src_index, f"{opname} src")
+        self._check_bounds(dst_flat, dst_index, f"{opname} dst")
+        dst_flat[dst_index] = src_flat[src_index]
+
+    def _proposal_rows(self, view: torch.Tensor, count: int, label: str) -> torch.Tensor:
+        flat, base = self._ub_flat(view, label, torch.uint8)
+        if base + count * _PROPOSAL_BYTES > int(flat.numel()):
+            raise MemoryError(f"{label} access out of range: need={count * _PROPOSAL_BYTES} bytes at offset={base}")
+        return flat[base : base + count * _PROPOSAL_BYTES].view(count, _PROPOSAL_BYTES)
+
+    @staticmethod
+    def _proposal_scores(rows: torch.Tensor, score_dtype: torch.dtype) -> torch.Tensor:
+        width = torch.empty((), dtype=score_dtype).element_size()
+        return rows[..., :width].contiguous().view(score_dtype).squeeze(-1).to(torch.float32)
+
+    def _store_sorted(self, dst: torch.Tensor, rows: torch.Tensor, scores: torch.Tensor, label: str) -> None:
+        # Stable descending sort keeps equal scores in source order, matching the hardware merge.
+        order = torch.sort(scores, dim=-1, descending=True, stable=True).indices
+        ordered = torch.gather(rows, -2, order.unsqueeze(-1).expand(*order.shape, _PROPOSAL_BYTES))
+        count = int(ordered.numel()) // _PROPOSAL_BYTES
+        self._proposal_rows(dst, count, label).copy_(ordered.reshape(count, _PROPOSAL_BYTES))
+
+    def _execute_sort32(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        if repeat <= 0:
+            return
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        idx = self._require_view(instruction, "idx")
+        src_flat, src_base = self._ub_flat(src, "sort32 src")
+        score_index = src_base + torch.arange(repeat * 32, dtype=torch.int64)
+        self._check_bounds(src_flat, score_index, "sort32 src")
+        scores = src_flat[score_index].view(repeat, 32)
+        idx_flat, idx_base = self._ub_flat(idx, "sort32 idx", torch.uint8)
+        if idx_base + repeat * 32 * 4 > int(idx_flat.numel()):
+            raise MemoryError(f"sort32 idx access out of range: offset={idx_base}")
+        index_bytes = idx_flat[idx_base : idx_base + repeat * 32 * 4].view(repeat, 32, 4)
+
+        elem_size = int(src_flat.element_size())
+        rows = torch.zeros((repeat, 32, _PROPOSAL_BYTES), dtype=torch.uint8)
+        rows[:, :, :elem_size] = scores.contiguous().view(torch.uint8).view(repeat, 32, elem_size)
+        rows[:, :, 4:] = index_bytes
+        self._store_sorted(dst, rows, scores.to(torch.float32), "sort32 dst")
+
+    def _execute_mergesort4(self, instruction: SimInstruction) -> None:
+        repeat = self._repeat_count(instruction)
+        length = self._resolve_int(instruction.args.get("length_per_blk", 32), "mergesort4 length_per_blk")
+        if repeat <= 0 or length <= 0:
+            return
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        rows = self._proposal_rows(src, repeat * 4 * length, "mergesort4 src").view(repeat, 4 * length, _PROPOSAL_BYTES).clone()
+        self._store_sorted(dst, rows, self._proposal_scores(rows, src.dtype), "mergesort4 dst")
+
+    def _execute_mergesort_2seq(self, instruction: SimInstruction) -> None:
+        size1 = self._resolve_int(instruction.args.get("size1"), "mergesort_2seq size1")
+        size2 = self._resolve_int(instruction.args.get("size2"), "mergesort_2seq size2")
+        if size1 < 0 or size2 < 0:
+            raise ValueError(f"mergesort_2seq sizes must be non-negative, got: size1={size1}, size2={size2}")
+        dst = self._require_view(instruction, "dst")
+        src1 = self._require_view(instruction, "src1")
+        src2 = self._require_view(instruction, "src2")
+        rows = torch.cat(
+            [
+                self._proposal_rows(src1, size1, "mergesort_2seq src1"),
+                self._proposal_rows(src2, size2, "mergesort_2seq src2"),
+            ],
+            dim=0,
+        )
+        self._store_sorted(dst, rows, self._proposal_scores(rows, src1.dtype), "mergesort_2seq dst")
+
+    def _execute_ub_to_ub(self, instruction: SimInstruction) -> None:
+        dst = self._require_view(instruction, "dst")
+        src = self._require_view(instruction, "src")
+        n_burst = self._resolve_int(instruction.args.get("n_burst"), "ub_to_ub n_burst")
+        burst_len = self._resolve_int(instruction.args.get("burst_len"), "ub_to_ub burst_len")
+        src_stride = self._resolve_int(instruction.args.get("src_stride", 0), "ub_to_ub src_stride")
+        dst_stride = self._resolve_int(instruction.args.get("dst_stride", 0), "ub_to_ub dst_stride")
+        if n_burst <= 0 or burst_len <= 0:
+            return
+        # burst_len and strides are 32-byte block counts.
+        dst_flat, dst_base = self._ub_flat(dst, "ub_to_ub dst", torch.uint8)
+        src_flat, src_base = self._ub_flat(src, "ub_to_ub src", torch.uint8)
+        burst = burst_len * 32
+        src_index = self._burst_index(src_base, n_burst, burst, (burst_len + src_stride) * 32)
+        dst_index = self._burst_index(dst_base, n_burst, burst, (burst_len + dst_stride) * 32)
+        self._check_bounds(src_flat, src_index, "ub_to_ub src")
+        self._check_bounds(dst_flat, dst_index, "ub_to_ub dst")
+        dst_flat[dst_index] = src_flat[src_index]
+
+    def _execute_call_micro(self, instruction: SimInstruction) -> None:
+        from .micro_exec import MicroExecutor
+
+        if self._micro is None:
+            self._micro = MicroExecutor(self.core_idx, self.UB, self.sub_block_idx)
+        pointers: Dict[str, int] = {}
+        for name, view in instruction.tensors.items():
+            pointers[name] = self._ub_flat(view, f"call_micro {name}", torch.uint8)[1]
+        self._micro.run(instruction.args["micro"], pointers, instruction.args.get("scalars", {}), self._lane_mask)
+
+    _HANDLERS: Dict[str, str] = {
+        "call_micro": "_execute_call_micro",
+        "set_mask": "_execute_set_mask",
+        "reset_mask": "_execute_reset_mask",
+        "set_cmpmask": "_execute_set_cmpmask",
+        "dup": "_execute_dup",
+        "brcb": "_execute_brcb",
+        "cast": "_execute_cast",
+        "compare": "_execute_compare",
+        "compare_scalar": "_execute_compare",
+        "select": "_execute_select",
+        "gather": "_execute_gather",
+        "scatter": "_execute_gather",
+        "sort32": "_execute_sort32",
+        "mergesort4": "_execute_mergesort4",
+        "mergesort_2seq": "_execute_mergesort_2seq",
+        "ub_to_ub": "_execute_ub_to_ub",
+    }
+    _HANDLERS.update({opname: "_execute_binary" for opname in list(_BINARY_FNS) + ["muladddst"]})
+    _HANDLERS.update({opname: "_execute_unary" for opname in _UNARY_FNS})
+    _HANDLERS.update({opname: "_execute_unary_scalar" for opname in _UNARY_SCALAR_OPNAMES})
+    _HANDLERS.update({opname: "_execute_group" for opname in _GROUP_OPNAMES})
+
+    def execute_instruction(self, instruction: SimInstruction) -> None:
+        handler = self._HANDLERS.get(instruction.opname)
+        if handler is not None:
+            getattr(self, handler)(instruction)
+            return
+        super().execute_instruction(instruction)
@@ -1,10 +1,17 @@
-from typing import TYPE_CHECKING, Any, Callable, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 if TYPE_CHECKING:
+    import torch
+
+    from .kernelbase.exchange import ExchangeFile
     from .kernelbase.kernelbase import KernelBase
+    from .kernelbase.runner import AclnnRunner
+    from .utils.Tensor import GMTensor
+    from .simulator.sanitizer import SanitizerFinding
+    from .simulator.timing import CostTable, TimingReport
 
 
-def _run_bash_with_progress(script_path: str, log_path: str) -> None:
+def _run_bash_with_progress(script_path: str, log_path: str, args: Sequence[str] = ()) -> None:
     import os
     import subprocess
     import sys
@@ -15,7 +22,7 @@ def _run_bash_with_progress(script_path: str, log_path: str) -> None:
 
     with open(log_path, "w", encoding="utf-8") as log_file:
         proc = subprocess.Popen(
-            ["bash", script_path],
+            ["bash", script_path, *args],
             stdout=log_file,
             stderr=log_file,
         )
@@ -29,7 +36,7 @@ def _run_bash_with_progress(script_path: str, log_path: str) -> None:
                 pos = 2 * bar_width - pos - 1
             bar = [" "] * bar_width
             bar[pos] = "#"
-            msg = f"\r[{''.join(bar)}] bash b.sh running... {elapsed:6.1f}s"
+            msg = f"\r[{''.join(bar)}] bash {os.path.basename(script_path)} running... {elapsed:6.1f}s"
             print(msg, end="", file=sys.stderr, flush=True)
             if ret is not None:
                 break
@@ -41,6 +48,111 @@ def _run_bash_with_progress(script_path: str, log_path: str) -> None:
             )
 
 
+def _torch_dtype_map(torch: Any) -> Dict[Any, Any]:
+    from .utils.datatype import Datatype
+
+    dtype_map = {
+        torch.float16: Datatype.half,
+        torch.float32: Datatype.float,
+        torch.int32: Datatype.int,
+        torch.int64: Datatype.int64,
+        torch.int8: Datatype.int8,
+        torch.uint8: Datatype.uint8,
+        torch.int16: Datatype.int16,
+        torch.bfloat16: Datatype.bfloat16,
+    }
+    if hasattr(torch, "uint16"):
+        dtype_map[torch.uint16] = Datatype.uint16  # type: ignore
+    if hasattr(torch, "uint32"):
+        dtype_map[torch.uint32] = Datatype.uint32  # type: ignore
+    if hasattr(torch, "uint64"):
+        dtype_map[torch.uint64] = Datatype.uint64  # type: ignore
+    return dtype_map
+
+
+def _resolve_dim(value: Any, label: str) -> int:
+    from .utils.var import Var
+
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, Var):
+        raw = value.value
+        if not isinstance(raw, (int, float, bool)):
+            raise TypeError(
+                f"{label} must resolve to int/float/bool from Var, got: {type(raw)}"
+            )
+        return int(raw)
+    if isinstance(value, float):
+        return int(value)
+    raise TypeError(f"{label} must resolve to int, got: {type(value)}")
+
+
+def _clone_gm_tensor_view(gm_tensor: "GMTensor", clone: bool = True) -> "torch.Tensor":
+    if gm_tensor.data is None:
+        raise ValueError(
+            f"Simulator output GMTensor {gm_tensor.name} has no data bound"
+        )
+
+    row0 = _resolve_dim(gm_tensor.offset[0], f"{gm_tensor.name}.offset[0]")
+    col0 = _resolve_dim(gm_tensor.offset[1], f"{gm_tensor.name}.offset[1]")
+    row_span = _resolve_dim(gm_tensor.span[0], f"{gm_tensor.name}.span[0]")
+    col_span = _resolve_dim(gm_tensor.span[1], f"{gm_tensor.name}.span[1]")
+    row_step = _resolve_dim(gm_tensor.step[0], f"{gm_tensor.name}.step[0]")
+    col_step = _resolve_dim(gm_tensor.step[1], f"{gm_tensor.name}.step[1]")
+    if row_step <= 0 or col_step <= 0:
+        raise ValueError(
+            f"{gm_tensor.name} step must be positive, got row_step={row_step}, col_step={col_step}"
+        )
+    gm_view = gm_tensor.data[
+        row0 : row0 + row_span : row_step,
+        col0 : col0 + col_span : col_step,
+    ]
+    if not clone and gm_view.is_contiguous() and int(gm_view.numel()) == row_span * col_span:
+        # Outputs read back from the aclnn test are private to this run: hand out their buffer as is.
+        return gm_view.view(row_span, col_span)
+    out = gm_view.detach().clone()
+    target_numel = row_span * col_span
+    if int(out.numel()) != target_numel:
+        raise ValueError(
+            f"{gm_tensor.name} output view numel mismatch: "
+            f"expected={target_numel}, actual={int(out.numel())}"
+        )
+    return out.contiguous().view(row_span, col_span)
+
+
+def _map_outputs(value: Any, clone: bool = True) -> Any:
+    from .utils.Tensor import GMTensor
+
+    if isinstance(value, GMTensor):
+        return _clone_gm_tensor_view(value, clone)
+    if isinstance(value, list):
+        return [_map_outputs(item, clone) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_map_outputs(item, clone) for item in value)
+    if isinstance(value, dict):
+        return {key: _map_outputs(item, clone) for key, item in value.items()}
+    return value
+
+
+class _TracedCall:
+    """One kernel trace reused for every input set with the same signature."""
+
+    __slots__ = ("gm_tensors", "scalar_vars", "kernel_ret", "state", "sim", "needs_build")
+
+    def __init__(self, gm_tensors: List[Any], scalar_vars: List[Any], kernel_ret: Any, state: Tuple[Any, ...]) -> None:
+        self.gm_tensors = gm_tensors
+        self.scalar_vars = scalar_vars
+        self.kernel_ret = kernel_ret
+        # KernelBase._save_trace() snapshot: instructions, mutexes and bound metadata.
+        self.state = state
+        # SimulatorBase kept across input sets (simulator mode).
+        self.sim: Any = None
+        # Result of KernelBase.generate for this trace (aclnn mode); None until generated.
+        self.needs_build: Optional[bool] = None
+
+
 class OpExec:
     def __init__(
         self,
@@ -51,6 +163,12 @@ class OpExec:
         profile: bool = False,
         gen_only: bool = False,
         simulator: bool = False,
+        max_workers: Optional[int] = None,
+        cost_table: Optional["CostTable"] = None,
+        trace_path: Optional[str] = None,
+        mmap_io: bool = False,
+        persistent: bool = False,
+        sanitize: bool = False,
     ) -> None:
         self.op_func = op_func
         self.out_dir = out_dir
@@ -61,16 +179,62 @@ class OpExec:
         if not isinstance(simulator, bool):
             raise TypeError(f"simulator must be bool, got: {type(simulator)}")
         self.simulator = simulator
+        if max_workers is not None and (isinstance(max_workers, bool) or not isinstance(max_workers, int)):
+            raise TypeError(f"max_workers must be int or None, got: {type(max_workers)}")
+        self.max_workers = max_workers
+        self.cost_table = cost_table
+        self.trace_path = trace_path
+        if not isinstance(sanitize, bool):
+            raise TypeError(f"sanitize must be bool, got: {type(sanitize)}")
+        # Simulator only: check local-memory accesses against the syncs (simulator/sanitizer.py).
+        self.sanitize = sanitize
+        self.sanitizer_findings: List["SanitizerFinding"] = []
+        if not isinstance(mmap_io, bool):
+            raise TypeError(f"mmap_io must be bool, got: {type(mmap_io)}")
+        if not isinstance(persistent, bool):
+            raise TypeError(f"persistent must be bool, got: {type(persistent)}")
+        # Keep one aclnn test process (kernelbase/runner.py) alive across calls; it reads the exchange file.
+        self.persistent = persistent
+        # Exchange tensors with the aclnn test through one memory-mapped file instead of .bin files.
+        self.mmap_io = mmap_io or persistent
+        # Exchange file of the last aclnn run when mmap_io is set.
+        self.exchange: Optional["ExchangeFile"] = None
+        self._runner: Optional["AclnnRunner"] = None
+        self.timing_report: Optional["TimingReport"] = None
+        # run_batch traces, keyed by the shape/dtype/scalar signature of one input set.
+        self._traces: Dict[Tuple[Any, ...], _TracedCall] = {}
 
-    def __call__(self, *args: Any) -> Any:
+    def autotune(
+        self,
+        space: Dict[str, Sequence[Any]],
+        *args: Any,
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str] = ".easyasc_autotune",
+    ) -> Dict[str, Any]:
+        """Pick the fastest feasible `space` entry for `args` in the simulator and apply it to the kernel's globals."""
+        from .autotune import Autotuner
         from .kernelbase.kernelbase import KernelBase
-        from .utils.Tensor import GMTensor
-        from .utils.datatype import Datatype
-        from .utils.var import Var
-        import os
 
         if not isinstance(self.op_func, KernelBase):
             raise TypeError("op_func must be a KernelBase instance")
+        tuner = Autotuner(
+            self.op_func,
+            space,
+            cost_table=self.cost_table,
+            max_workers=max_workers if max_workers is not None else self.max_workers,
+            cache_dir=cache_dir,
+        )
+        best = tuner.best(*args)
+        self.op_func.func.__globals__.update(best)
+        self.op_func._reset_trace()
+        # Cached batch traces were taken with the old constants.
+        self._traces = {}
+        return best
+
+    def _bind_args(self, args: Tuple[Any, ...]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """Map torch tensors / Python scalars to (tensors, GMTensors, Vars) for a kernel trace."""
+        from .utils.Tensor import GMTensor
+        from .utils.var import Var
 
         try:
             import torch
@@ -92,22 +256,7 @@ class OpExec:
                 continue
             raise TypeError(f"Invalid argument type: arg #{idx} has type {type(arg)}")
 
-        dtype_map = {
-            torch.float16: Datatype.half,
-            torch.float32: Datatype.float,
-            torch.int32: Datatype.int,
-            torch.int64: Datatype.int64,
-            torch.int8: Datatype.int8,
-            torch.uint8: Datatype.uint8,
-            torch.int16: Datatype.int16,
-            torch.bfloat16: Datatype.bfloat16,
-        }
-        if hasattr(torch, "uint16"):
-            dtype_map[torch.uint16] = Datatype.uint16  # type: ignore
-        if hasattr(torch, "uint32"):
-            dtype_map[torch.uint32] = Datatype.uint32  # type: ignore
-        if hasattr(torch, "uint64"):
-            dtype_map[torch.uint64] = Datatype.uint64  # type: ignore
+        dtype_map = _torch_dtype_map(torch)
 
         gm_tensors: List[GMTensor] = []
         for tensor in tensor_args:
@@ -130,24 +279,11 @@ class OpExec:
             if self.simulator:
                 gm_tensor.data = tensor.detach().clone()
             gm_tensors.append(gm_tensor)
+        return tensor_args, gm_tensors, scalar_vars
 
-        kernel_ret = self.op_func(*(gm_tensors + scalar_vars))
-        if self.simulator:
-            print('Starting simulation run')
-            self.op_func.run_sim(
-                out_dir=self.out_dir,
-                cann_path=self.cann_path,
-                custom_op_path=self.custom_op_path,
-                profile=self.profile,
-                gen_only=self.gen_only,
-            )
-        else:
-            self.op_func.generate(
-                self.out_dir,
-                cann_path=self.cann_path,
-                custom_op_path=self.custom_op_path,
-                profile=self.profile,
-            )
+    def _param_names(self, tensor_count: int) -> Tuple[List[str], List[str]]:
+        """(kernel GMTensor parameter name of each torch.Tensor argument, input parameter names)."""
+        from .utils.Tensor import GMTensor
 
         if not self.op_func._last_bound_args:
             raise ValueError("op_func has not been executed; cannot extract IO info from KernelBase")
@@ -166,88 +302,314 @@ class OpExec:
             if bound_val not in output_gmtensors:
                 input_param_names.append(name)
 
-        if len(tensor_args) == len(gmtensor_param_names):
-            tensor_by_name = {
-                name: tensor_args[idx] for idx, name in enumerate(gmtensor_param_names)
-            }
-        elif len(tensor_args) == len(input_param_names):
-            tensor_by_name = {
-                name: tensor_args[idx] for idx, name in enumerate(input_param_names)
-            }
+        if tensor_count == len(gmtensor_param_names):
+            return gmtensor_param_names, input_param_names
+        if tensor_count == len(input_param_names):
+            return input_param_names, input_param_names
+        raise ValueError(
+            "Number of torch.Tensor inputs does not match KernelBase GMTensor parameters"
+        )
+
+    def __call__(self, *args: Any) -> Any:
+        from .kernelbase.kernelbase import KernelBase
+        import os
+
+        if not isinstance(self.op_func, KernelBase):
+            raise TypeError("op_func must be a KernelBase instance")
+
+        tensor_args, gm_tensors, scalar_vars = self._bind_args(args)
+        import torch  # _bind_args has checked it is installed
+
+        kernel_ret = self.op_func(*(gm_tensors + scalar_vars))
+        if self.simulator:
+            print('Starting simulation run')
+            self.timing_report = self.op_func.run_sim(
+                out_dir=self.out_dir,
+                cann_path=self.cann_path,
+                custom_op_path=self.custom_op_path,
+                profile=self.profile,
+                gen_only=self.gen_only,
+                max_workers=self.max_workers,
+                cost_table=self.cost_table,
+                trace_path=self.trace_path,
+                sanitize=self.sanitize,
+            )
+            self.sanitizer_findings = self.op_func.sanitizer_findings
         else:
-            raise ValueError(
-                "Number of torch.Tensor inputs does not match KernelBase GMTensor parameters"
+            needs_build = self.op_func.generate(
+                self.out_dir,
+                cann_path=self.cann_path,
+                custom_op_path=self.custom_op_path,
+                profile=self.profile,
+                mmap_io=self.mmap_io,
+                serve=self.persistent,
             )
 
+        arg_names, input_param_names = self._param_names(len(tensor_args))
+        tensor_by_name = {name: tensor_args[idx] for idx, name in enumerate(arg_names)}
+
         if not self.simulator:
             base_dir = self.out_dir if self.out_dir else self.op_func.name
-            input_dir = f"{base_dir}_aclnn_test/input"
-            os.makedirs(input_dir, exist_ok=True)
+            if self.mmap_io:
+                self.exchange = self._create_exchange(
+                    f"{base_dir}_aclnn_test", [{name: tensor_by_name[name] for name in input_param_names}]
+                )
+            else:
+                input_dir = f"{base_dir}_aclnn_test/input"
+                os.makedirs(input_dir, exist_ok=True)
 
-            for name in input_param_names:
-                tensor = tensor_by_name[name]
-                tensor_cpu = tensor.detach().cpu()
-                tensor_bytes = tensor_cpu.contiguous().view(torch.uint8)
-                tensor_bytes.numpy().tofile(os.path.join(input_dir, f"input_{name}.bin"))
+                for name in input_param_names:
+                    tensor = tensor_by_name[name]
+                    tensor_cpu = tensor.detach().cpu()
+                    tensor_bytes = tensor_cpu.contiguous().view(torch.uint8)
+                    tensor_bytes.numpy().tofile(os.path.join(input_dir, f"input_{name}.bin"))
 
-            if not self.gen_only:
+            if needs_build and not self.gen_only:
                 log_path = os.path.abspath("b.sh.log")
                 _run_bash_with_progress("b.sh", log_path)
+            if self.persistent and not self.gen_only:
+                self._ensure_runner(needs_build).run(1)
+                return self._exchange_results(kernel_ret, 1)[0]
         else:
-            def _resolve_dim(value: Any, label: str) -> int:
-                if isinstance(value, bool):
-                    return int(value)
-                if isinstance(value, int):
-                    return value
-                if isinstance(value, Var):
-                    raw = value.value
-                    if not isinstance(raw, (int, float, bool)):
-                        raise TypeError(
-                            f"{label} must resolve to int/float/bool from Var, got: {type(raw)}"
-                        )
-                    return int(raw)
-                if isinstance(value, float):
-                    return int(value)
-                raise TypeError(f"{label} must resolve to int, got: {type(value)}")
-
-            def _clone_gm_tensor_view(gm_tensor: GMTensor) -> "torch.Tensor":
-                if gm_tensor.data is None:
-                    raise ValueError(
-                        f"Simulator output GMTensor {gm_tensor.name} has no data bound"
-                    )
-
-                row0 = _resolve_dim(gm_tensor.offset[0], f"{gm_tensor.name}.offset[0]")
-                col0 = _resolve_dim(gm_tensor.offset[1], f"{gm_tensor.name}.offset[1]")
-                row_span = _resolve_dim(gm_tensor.span[0], f"{gm_tensor.name}.span[0]")
-                col_span = _resolve_dim(gm_tensor.span[1], f"{gm_tensor.name}.span[1]")
-                row_step = _resolve_dim(gm_tensor.step[0], f"{gm_tensor.name}.step[0]")
-                col_step = _resolve_dim(gm_tensor.step[1], f"{gm_tensor.name}.step[1]")
-                if row_step <= 0 or col_step <= 0:
-                    raise ValueError(
-                        f"{gm_tensor.name} step must be positive, got row_step={row_step}, col_step={col_step}"
-                    )
-                gm_view = gm_tensor.data[
-                    row0 : row0 + row_span : row_step,
-                    col0 : col0 + col_span : col_step,
-                ]
-                out = gm_view.detach().clone()
-                target_numel = row_span * col_span
-                if int(out.numel()) != target_numel:
-                    raise ValueError(
-                        f"{gm_tensor.name} output view numel mismatch: "
-                        f"expected={target_numel}, actual={int(out.numel())}"
-                    )
-                return out.contiguous().view(row_span, col_span)
-
-            def _map_outputs(value: Any) -> Any:
-                if isinstance(value, GMTensor):
-                    return _clone_gm_tensor_view(value)
-                if isinstance(value, list):
-                    return [_map_outputs(item) for item in value]
-                if isinstance(value, tuple):
-                    return tuple(_map_outputs(item) for item in value)
-                if isinstance(value, dict):
-                    return {key: _map_outputs(item) for key, item in value.items()}
-                return value
-
             return _map_outputs(kernel_ret)
+
+    def _ensure_runner(self, rebuilt: bool) -> "AclnnRunner":
+        import os
+
+        from .kernelbase.runner import SERVE_FLAG, AclnnRunner
+
+        if self._runner is not None and (rebuilt or not self._runner.alive):
+            # A rebuilt binary (new code, shapes or scalars) needs a fresh process.
+            self._runner.close()
+            self._runner = None
+        if self._runner is None:
+            self._runner = AclnnRunner(["bash", "r.sh", SERVE_FLAG], log_path=os.path.abspath("r.sh.log"))
+        return self._runner
+
+    def close(self) -> None:
+        """Stop the persistent aclnn runner and release the exchange file."""
+        if self._runner is not None:
+            self._runner.close()
+            self._runner = None
+        if self.exchange is not None:
+            self.exchange.close()
+            self.exchange = None
+
+    def _exchange_results(self, kernel_ret: Any, count: int) -> List[Any]:
+        import torch
+
+        exchange = self.exchange
+        if exchange is None:
+            raise RuntimeError("no exchange file: the inputs of this run were not written")
+        dtype_by_datatype = {value: key for key, value in _torch_dtype_map(torch).items()}
+        outputs = self._output_params()
+        results: List[Any] = []
+        for set_idx in range(count):
+            for name, gm_tensor in outputs:
+                # A view of the mapping: the bytes the test binary copied back from the device.
+                gm_tensor.data = exchange.tensor(name, set_idx, dtype_by_datatype[gm_tensor.dtype])
+            results.append(_map_outputs(kernel_ret, clone=False))
+        return results
+
+    def _output_params(self) -> List[Tuple[str, "GMTensor"]]:
+        from .utils.Tensor import GMTensor
+
+        return [
+            (name, val)
+            for name, val in self.op_func._last_bound_args.items()
+            if isinstance(val, GMTensor) and val in self.op_func._last_output_gmtensors
+        ]
+
+    def _create_exchange(self, test_dir: str, input_sets: List[Dict[str, Any]]) -> "ExchangeFile":
+        """Lay out one region per input and output of every input set and write the inputs."""
+        import torch
+
+        from .kernelbase.exchange import ExchangeFile, exchange_path
+
+        dtype_map = _torch_dtype_map(torch)
+        dtype_by_datatype = {value: key for key, value in dtype_map.items()}
+        specs: List[Tuple[str, int, str, List[int], int]] = []
+        for set_idx, tensor_by_name in enumerate(input_sets):
+            for name, tensor in tensor_by_name.items():
+                nbytes = int(tensor.numel()) * tensor.element_size()
+                specs.append((name, set_idx, dtype_map[tensor.dtype].name, list(tensor.shape), nbytes))
+            for name, gm_tensor in self._output_params():
+                shape = [_resolve_dim(dim, f"{name}.shape") for dim in gm_tensor.shape]
+                numel = 1
+                for dim in shape:
+                    numel *= dim
+                elem_size = torch.empty((), dtype=dtype_by_datatype[gm_tensor.dtype]).element_size()
+                specs.append((name, set_idx, gm_tensor.dtype.name, shape, numel * elem_size))
+        if self.exchange is not None:
+            self.exchange.close()
+        exchange = ExchangeFile.create(exchange_path(test_dir), specs)
+        for set_idx, tensor_by_name in enumerate(input_sets):
+            for name, tensor in tensor_by_name.items():
+                exchange.write_tensor(name, set_idx, tensor)
+        return exchange
+
+    @staticmethod
+    def _signature(args: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        # Scalars are part of the key: shapes are traced against their values.
+        out: List[Any] = []
+        for arg in args:
+            shape = getattr(arg, "shape", None)
+            if shape is not None:
+                out.append((tuple(int(dim) for dim in shape), str(arg.dtype)))
+            else:
+                out.append((type(arg).__name__, arg))
+        return tuple(out)
+
+    def _traced(self, args: Tuple[Any, ...]) -> _TracedCall:
+        """Trace the kernel for this input signature once; later input sets only rebind GM data."""
+        key = self._signature(args)
+        traced = self._traces.get(key)
+        if traced is None:
+            tensor_args, gm_tensors, scalar_vars = self._bind_args(args)
+            self.op_func._reset_trace()
+            kernel_ret = self.op_func(*(gm_tensors + scalar_vars))
+            traced = _TracedCall(gm_tensors, scalar_vars, kernel_ret, self.op_func._save_trace())
+            self._traces[key] = traced
+            return traced
+        self.op_func._load_trace(traced.state)
+        if self.simulator:
+            tensor_args = [arg for arg in args if getattr(arg, "shape", None) is not None]
+            for gm_tensor, tensor in zip(traced.gm_tensors, tensor_args):
+                gm_tensor.data = tensor.detach().clone()
+        return traced
+
+    @staticmethod
+    def _split_batch(batch_args: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        import torch
+
+        size: Optional[int] = None
+        columns: List[Any] = []
+        for idx, arg in enumerate(batch_args):
+            if isinstance(arg, torch.Tensor):
+                items: Any = list(arg.unbind(0))
+            elif isinstance(arg, (list, tuple)):
+                items = list(arg)
+            else:
+                columns.append(arg)
+                continue
+            if size is None:
+                size = len(items)
+            elif len(items) != size:
+                raise ValueError(f"batch arg #{idx} has {len(items)} entries, expected {size}")
+            columns.append(items)
+        if size is None:
+            raise ValueError("run_batch requires at least one batched tensor argument")
+        return [
+            tuple(column[idx] if isinstance(column, list) else column for column in columns)
+            for idx in range(size)
+        ]
+
+    def run_batch(self, *batch_args: Any) -> List[Any]:
+        """
+        Run the op over many input sets, tracing once per shape/dtype/scalar signature.
+
+        Tensor arguments are batched: a list/tuple of tensors, or a stacked tensor whose
+        leading dim is the batch. Scalars are shared by every input set. In simulator mode
+        the sets run back-to-back on one SimulatorBase and the outputs are returned per
+        set; otherwise the project is generated once, the aclnn test binary loops over all
+        input files in one run (`r.sh <count>`, or one request to the runner process when
+        `persistent`) and the outputs are read back per set.
+        """
+        from .kernelbase.kernelbase import KernelBase
+
+        if not isinstance(self.op_func, KernelBase):
+            raise TypeError("op_func must be a KernelBase instance")
+        items = self._split_batch(batch_args)
+        if self.simulator:
+            return self._run_batch_sim(items)
+        return self._run_batch_aclnn(items)
+
+    def _run_batch_sim(self, items: List[Tuple[Any, ...]]) -> List[Any]:
+        from .simulator.base import SimulatorBase
+
+        results: List[Any] = []
+        for args in items:
+            traced = self._traced(args)
+            if traced.sim is None:
+                traced.sim = SimulatorBase(
+                    self.op_func,
+                    max_workers=self.max_workers,
+                    profile=self.profile,
+                    cost_table=self.cost_table,
+                    trace_path=self.trace_path,
+                    sanitize=self.sanitize,
+                )
+            self.timing_report = traced.sim.run()
+            self.sanitizer_findings = traced.sim.sanitizer_findings
+            results.append(_map_outputs(traced.kernel_ret))
+        return results
+
+    def _run_batch_aclnn(self, items: List[Tuple[Any, ...]]) -> List[Any]:
+        import os
+
+        import torch
+
+        groups: Dict[Tuple[Any, ...], List[int]] = {}
+        for idx, args in enumerate(items):
+            groups.setdefault(self._signature(args), []).append(idx)
+        if len(groups) > 1:
+            # One op project per out_dir: every set of a batch must share the traced signature.
+            raise ValueError(f"run_batch without simulator needs one input signature, got {len(groups)}")
+
+        traced = self._traced(items[0])
+        if traced.needs_build is None:
+            traced.needs_build = self.op_func.generate(
+                self.out_dir,
+                cann_path=self.cann_path,
+                custom_op_path=self.custom_op_path,
+                profile=self.profile,
+                batch=True,
+                mmap_io=self.mmap_io,
+                serve=self.persistent,
+            )
+        tensor_count = len([arg for arg in items[0] if isinstance(arg, torch.Tensor)])
+        arg_names, input_param_names = self._param_names(tensor_count)
+
+        base_dir = self.out_dir if self.out_dir else self.op_func.name
+        test_dir = f"{base_dir}_aclnn_test"
+        input_sets: List[Dict[str, Any]] = []
+        for args in items:
+            tensor_args = [arg for arg in args if isinstance(arg, torch.Tensor)]
+            tensor_by_name = {name: tensor_args[idx] for idx, name in enumerate(arg_names)}
+            input_sets.append({name: tensor_by_name[name] for name in input_param_names})
+        if self.mmap_io:
+            self.exchange = self._create_exchange(test_dir, input_sets)
+        else:
+            os.makedirs(os.path.join(test_dir, "input"), exist_ok=True)
+            os.makedirs(os.path.join(test_dir, "output"), exist_ok=True)
+            for batch_idx, tensor_by_name in enumerate(input_sets):
+                for name, tensor in tensor_by_name.items():
+                    tensor_bytes = tensor.detach().cpu().contiguous().view(torch.uint8)
+                    tensor_bytes.numpy().tofile(os.path.join(test_dir, "input", f"input_{name}_{batch_idx}.bin"))
+        if self.gen_only:
+            return []
+        rebuilt = bool(traced.needs_build)
+        if traced.needs_build:
+            _run_bash_with_progress("b.sh", os.path.abspath("b.sh.log"))
+            traced.needs_build = False
+        if self.persistent:
+            self._ensure_runner(rebuilt).run(len(items))
+        else:
+            _run_bash_with_progress("r.sh", os.path.abspath("r.sh.log"), args=[str(len(items))])
+        if self.mmap_io:
+            return self._exchange_results(traced.kernel_ret, len(items))
+
+        dtype_by_datatype = {value: key for key, value in _torch_dtype_map(torch).items()}
+        outputs = self._output_params()
+        results: List[Any] = []
+        for batch_idx in range(len(items)):
+            for name, gm_tensor in outputs:
+                dtype = dtype_by_datatype[gm_tensor.dtype]
+                path = os.path.join(test_dir, "output", f"output_{name}_{batch_idx}.bin")
+                with open(path, "rb") as f:
+                    raw = bytearray(f.read())
+                shape = [_resolve_dim(dim, f"{name}.shape") for dim in gm_tensor.shape]
+                gm_tensor.data = torch.frombuffer(raw, dtype=dtype).view(*shape)
+            # Each set's output buffers are its own, so they are returned without a copy.
+            results.append(_map_outputs(traced.kernel_ret, clone=False))
+        return results
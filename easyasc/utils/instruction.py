@@ -1,15 +1,41 @@
+from .opcodes import _OP_INFOS, opcode_of
+
+
 class Instruction:
     """Instruction class that stores operation name and keyword arguments."""
+
+    __slots__ = ("opname", "opcode", "kwargs")
+
     def __init__(self, opname: str, **kwargs):
         if not isinstance(opname, str):
             raise TypeError(f"opname must be str, got: {type(opname)}")
-        self.opname = opname
-        self.kwargs = dict(kwargs)
-
+        self.opcode = opcode_of(opname)
+        # The registry keeps the interned string, so opname compares are mostly identity checks.
+        self.opname = _OP_INFOS[self.opcode].name
+        self.kwargs = kwargs
+
+    @property
+    def info(self):
+        return _OP_INFOS[self.opcode]
+
     def __getattr__(self, name: str):
-        if name in self.kwargs:
-            return self.kwargs[name]
+        # Only reached for names that are not slots; guard against unset slots (e.g. mid-unpickle).
+        if name in Instruction.__slots__:
+            raise AttributeError(name)
+        kwargs = self.kwargs
+        if name in kwargs:
+            return kwargs[name]
         raise AttributeError(f"{type(self).__name__!s} object has no attribute {name!s}")
-
-    def __repr__(self):
-        return f"Instruction(opname={self.opname!r}, kwargs={self.kwargs!r})"
+
+    def __getstate__(self):
+        return (self.opname, self.kwargs)
+
+    def __setstate__(self, state):
+        opname, kwargs = state
+        # Opcodes are per-process; re-intern on the receiving side.
+        self.opcode = opcode_of(opname)
+        self.opname = _OP_INFOS[self.opcode].name
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"Instruction(opname={self.opname!r}, kwargs={self.kwargs!r})"
@@ -0,0 +1,56 @@
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+
+class OpInfo:
+    """Per-opcode record shared by every Instruction with the same opname."""
+
+    __slots__ = ("opcode", "name", "side", "handler", "bound")
+
+    def __init__(self, opcode: int, name: str) -> None:
+        self.opcode = opcode
+        self.name = name
+        # "cube" / "vec" / "both" when the side follows from the opname alone; None when it
+        # depends on operands (events, setflag/waitflag).
+        self.side: Optional[str] = None
+        # Codegen handler `(inst, helper, expr_map) -> None`, or None if untranslated.
+        self.handler: Optional[Callable[..., Any]] = None
+        # Set once the parser has filled `side` and `handler`.
+        self.bound = False
+
+    def __repr__(self) -> str:
+        return f"OpInfo(opcode={self.opcode}, name={self.name!r}, side={self.side!r})"
+
+
+_OPCODES: Dict[str, int] = {}
+_OP_INFOS: List[OpInfo] = []
+
+
+def opcode_of(name: str) -> int:
+    """Interned integer opcode for `name`; new opnames are registered on first use."""
+    opcode = _OPCODES.get(name)
+    if opcode is not None:
+        return opcode
+    if not isinstance(name, str):
+        raise TypeError(f"opname must be str, got: {type(name)}")
+    name = sys.intern(name)
+    opcode = len(_OP_INFOS)
+    _OPCODES[name] = opcode
+    _OP_INFOS.append(OpInfo(opcode, name))
+    return opcode
+
+
+def op_info(opcode: int) -> OpInfo:
+    if isinstance(opcode, bool) or not isinstance(opcode, int):
+        raise TypeError(f"opcode must be int, got: {type(opcode)}")
+    if opcode < 0 or opcode >= len(_OP_INFOS):
+        raise ValueError(f"unknown opcode: {opcode}")
+    return _OP_INFOS[opcode]
+
+
+def op_info_by_name(name: str) -> OpInfo:
+    return _OP_INFOS[opcode_of(name)]
+
+
+def registered_ops() -> List[OpInfo]:
+    return list(_OP_INFOS)
@@ -0,0 +1,53 @@
+import array
+import os
+import sys
+import tempfile
+import time
+
+from easyasc.kernelbase.exchange import ExchangeFile
+from easyasc.kernelbase.runner import AclnnRunner, serve
+
+
+NUMEL = 1024
+SETS = 4
+
+
+def mock_executor(exchange: ExchangeFile, set_index: int):
+    # Stands in for the aclnn op: z = x + y on float32 regions of the exchange file.
+    x = exchange.buffer("x", set_index).cast("f")
+    y = exchange.buffer("y", set_index).cast("f")
+    z = exchange.buffer("z", set_index).cast("f")
+    for idx in range(len(z)):
+        z[idx] = x[idx] + y[idx]
+
+
+def write_inputs(path, scale):
+    specs = []
+    for set_index in range(SETS):
+        for name in ("x", "y", "z"):
+            specs.append((name, set_index, "float", [NUMEL], NUMEL * 4))
+    exchange = ExchangeFile.create(path, specs)
+    for set_index in range(SETS):
+        exchange.buffer("x", set_index).cast("f")[:] = array.array("f", [float(i) for i in range(NUMEL)])
+        exchange.buffer("y", set_index).cast("f")[:] = array.array("f", [scale * set_index] * NUMEL)
+    return exchange
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--mock":
+        serve(mock_executor)
+        sys.exit(0)
+
+    work_dir = tempfile.mkdtemp()
+    # OpExec(op, out_dir, persistent=True) starts `bash r.sh --serve` the same way.
+    with AclnnRunner([sys.executable, os.path.abspath(__file__), "--mock"], cwd=work_dir) as runner:
+        start = time.time()
+        for call in range(20):
+            exchange = write_inputs(os.path.join(work_dir, "exchange.bin"), call)
+            runner.run(SETS)
+        elapsed = (time.time() - start) / 20
+        for set_index in range(SETS):
+            z = exchange.buffer("z", set_index).cast("f")
+            err = max(abs(z[i] - (i + 19 * set_index)) for i in range(NUMEL))
+            print(set_index, err)
+        print(f"{elapsed * 1000:.2f} ms per call")
@@ -0,0 +1,63 @@
+from easyasc.a5 import *
+from easyasc.parser.asc import split_instructions
+from easyasc.parser.asc_autosync import insert_auto_sync
+
+
+ROWS = 16
+COLS = 64
+
+@vf()
+def double_rows(x: Tensor, y: Tensor, n_rows: Var):
+    r_x = Reg(DT.float)
+    for i in range(n_rows):
+        r_x <<= x[i * COLS]
+        add(r_x, r_x, r_x)
+        reg_to_ub(y[i * COLS], r_x)
+
+
+@kernel()
+def vecfunc(x: GMTensor, z: GMTensor, M: Var):
+    xub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    yub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xub[cnt] <<= x[m:m+ROWS, :]
+            double_rows(xub[cnt], yub[cnt], Var(ROWS))
+            z[m:m+ROWS, :] <<= yub[cnt]
+            cnt += 1
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * ROWS * 2
+    x = torch.randn(M, COLS)
+
+    op = OpExec(vecfunc, "test_cust_op", simulator=True, sanitize=True)
+    z = op(x, torch.zeros(M, COLS), M)
+
+    # The micro call is a V op: the MTE2 load must be waited on before it (ubin ready) and
+    # the MTE3 store must wait for it (ubout ready); the buffers are handed back by valid events.
+    vec_insts = insert_auto_sync(split_instructions(vecfunc.instructions)[1], mode="vec")
+    order = []
+    for inst in vec_insts:
+        if inst.opname in ("event_wait", "event_set"):
+            order.append(f"{inst.opname}:{inst.kwargs['event'].name}")
+        elif inst.opname in ("gm_to_ub_pad", "call_micro", "ub_to_gm_pad"):
+            order.append(inst.opname)
+    micro = order.index("call_micro")
+    print(order)
+    print(
+        "ubin ready waited before call_micro:",
+        "event_wait:_tmp_devent_ready_ubin_0" in order[order.index("gm_to_ub_pad"):micro],
+    )
+    print(
+        "ubout ready set after call_micro:",
+        "event_set:_tmp_devent_ready_ubout_0" in order[micro:order.index("ub_to_gm_pad")],
+    )
+    print(len(op.sanitizer_findings), torch.abs(z - 2 * x).max())
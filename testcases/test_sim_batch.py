@@ -0,0 +1,52 @@
+from easyasc.a5 import *
+
+
+BLK = 128
+LANES = 4
+
+@kernel()
+def cubefunc(x: GMTensor, y: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    z.bind_cv_mutex(0)
+
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+
+    cnt = Var(0)
+
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            l1y[cnt] <<= y[:, :]
+            
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            z[m:m+BLK, :] <<= l0c[cnt]
+            cnt += 1 
+
+    return z 
+
+
+if __name__ == "__main__":
+    import torch
+
+    out_dir = "test_cust_op"
+
+    M = 64*64
+    N = 64
+    K = 128
+    batch = 8
+    x = torch.randn(batch, M, K).half()
+    y = torch.randn(batch, N, K).half()
+    z = torch.zeros(M, N).half()
+
+    op = OpExec(cubefunc, out_dir, simulator=True)
+    # x/y are stacked along dim 0; z is a list so every input set gets its own output buffer.
+    z_kernels = op.run_batch(x, y, [z] * batch, M, N, K)
+
+    for idx, z_kernel in enumerate(z_kernels):
+        z_golden = (x[idx].float() @ y[idx].float().t()).half()
+        print(idx, torch.abs(z_kernel - z_golden).max())
@@ -0,0 +1,95 @@
+from easyasc.a5 import *
+
+
+BLK = 128
+HALF = BLK // 2
+
+@kernel()
+def cube_to_vec(x: GMTensor, y: GMTensor, ws: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    # The matmul tile goes through ws to a relu epilogue; each vec lane takes half of its rows.
+    ws.bind_cv_mutex(0)
+
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+    wub = DBuff(DT.float, [HALF, N], Position.UB)
+    oub = DBuff(DT.float, [HALF, N], Position.UB)
+
+    cnt = Var(0)
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+    lane = Var(GetSubBlockIdx() * HALF)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            l1y[cnt] <<= y[:, :]
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            ws.lock()
+            ws[m:m+BLK, :] <<= l0c[cnt]
+            ws.ready()
+
+            ws.wait()
+            wub[cnt] <<= ws[m+lane:m+lane+HALF, :]
+            ws.free()
+            oub[cnt] <<= wub[cnt].relu()
+            z[m+lane:m+lane+HALF, :] <<= oub[cnt]
+            cnt += 1
+
+    return z
+
+
+@kernel()
+def vec_to_cube(x: GMTensor, y: GMTensor, xs: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    # Each vec lane scales half of the x tile into xs; the cube frees it once MTE2 has read it.
+    xs.bind_vc_mutex(0, dst_end_pipe=Pipe.MTE2)
+
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+    xub = DBuff(DT.half, [HALF, K], Position.UB)
+    sub = DBuff(DT.half, [HALF, K], Position.UB)
+
+    cnt = Var(0)
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+    lane = Var(GetSubBlockIdx() * HALF)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            xs.lock()
+            xub[cnt] <<= x[m+lane:m+lane+HALF, :]
+            sub[cnt] <<= xub[cnt] * 2.0
+            xs[m+lane:m+lane+HALF, :] <<= sub[cnt]
+            xs.ready()
+
+            xs.wait()
+            l1x[cnt] <<= xs[m:m+BLK, :]
+            xs.free()
+            l1y[cnt] <<= y[:, :]
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            z[m:m+BLK, :] <<= l0c[cnt]
+            cnt += 1
+
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * 64
+    N = 64
+    K = 128
+    x = torch.randn(M, K).half()
+    y = torch.randn(N, K).half()
+    xy = x.float() @ y.float().t()
+
+    op = OpExec(cube_to_vec, "test_cust_op", simulator=True, sanitize=True)
+    z = op(x, y, torch.zeros(M, N), torch.zeros(M, N), M, N, K)
+    print(cube_to_vec.name, len(op.sanitizer_findings), torch.abs(z - torch.relu(xy)).max())
+
+    op = OpExec(vec_to_cube, "test_cust_op", simulator=True, sanitize=True)
+    z = op(x, y, torch.zeros(M, K).half(), torch.zeros(M, N), M, N, K)
+    print(vec_to_cube.name, len(op.sanitizer_findings), torch.abs(z - 2 * xy).max())
@@ -0,0 +1,52 @@
+import time
+
+from easyasc import globvars
+from easyasc.a5 import *
+
+
+BLK = 128
+
+@kernel()
+def cubefunc(x: GMTensor, y: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+
+    cnt = Var(0)
+
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            l1y[cnt] <<= y[:, :]
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            z[m:m+BLK, :] <<= l0c[cnt]
+            cnt += 1
+
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 32 * 1024
+    N = 128
+    K = 128
+    x = torch.randn(M, K).half()
+    y = torch.randn(N, K).half()
+    z = torch.zeros(M, N).half()
+    z_golden = (x.float() @ y.float().t()).half()
+
+    # Run the pipes tile by tile so mmad/FIX actually go through the layout cache.
+    globvars.sim_batch_loops = False
+    op = OpExec(cubefunc, "test_cust_op", simulator=True)
+    outputs = {}
+    for cached in (False, True):
+        globvars.sim_layout_cache = cached
+        start = time.time()
+        outputs[cached] = op(x, y, z.clone(), M, N, K)
+        print(f"layout_cache={cached}: {time.time() - start:.2f}s, err={torch.abs(outputs[cached] - z_golden).max()}")
+    print(torch.equal(outputs[False], outputs[True]))
@@ -0,0 +1,51 @@
+import time
+
+from easyasc import globvars
+from easyasc.a5 import *
+
+
+BLK = 128
+
+@kernel()
+def cubefunc(x: GMTensor, y: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = Tensor(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+
+    cnt = Var(0)
+
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+
+    # y stays in L1 for the whole loop; only the x tiles and the outputs move.
+    l1y <<= y[:, :]
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            matmul(l0c[cnt], l1x[cnt], l1y)
+            z[m:m+BLK, :] <<= l0c[cnt]
+            cnt += 1
+
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * 1024
+    N = 64
+    K = 128
+    x = torch.randn(M, K).half()
+    y = torch.randn(N, K).half()
+    z = torch.zeros(M, N).half()
+    z_golden = (x.float() @ y.float().t()).half()
+
+    op = OpExec(cubefunc, "test_cust_op", simulator=True)
+    outputs = {}
+    for batched in (False, True):
+        globvars.sim_batch_loops = batched
+        start = time.time()
+        outputs[batched] = op(x, y, z.clone(), M, N, K)
+        print(f"batched={batched}: {time.time() - start:.2f}s, err={torch.abs(outputs[batched] - z_golden).max()}")
+    print(torch.equal(outputs[False], outputs[True]))
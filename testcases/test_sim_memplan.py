@@ -0,0 +1,63 @@
+from easyasc import globvars
+from easyasc.a5 import *
+from easyasc.parser.asc import split_instructions
+from easyasc.parser.asc_autosync import insert_auto_sync
+from easyasc.parser.asc_memplan import plan_local_memory
+
+
+ROWS = 16
+COLS = 64
+
+def two_phases(x: GMTensor, z: GMTensor, w: GMTensor, M: Var, fenced: bool):
+    a = Tensor(DT.float, [ROWS, COLS], Position.UB, "a")
+    b = Tensor(DT.float, [ROWS, COLS], Position.UB, "b")
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            a <<= x[m:m+ROWS, :]
+            b <<= a + a
+            z[m:m+ROWS, :] <<= b
+        if fenced:
+            bar_all()
+        # a and b are dead here, so d and c may take their bytes. The auto_sync events order
+        # c after a and d after a or b, but only a barrier orders the MTE2 writes of c after
+        # the MTE3 reads of b: auto_sync pairs events per pipe pair.
+        d = Tensor(DT.float, [ROWS, COLS], Position.UB, "d")
+        c = Tensor(DT.float, [ROWS, COLS], Position.UB, "c")
+        for m in range(m1, m2, ROWS):
+            c <<= x[m:m+ROWS, :]
+            d <<= c + c
+            w[m:m+ROWS, :] <<= d
+    return z, w
+
+
+@kernel()
+def unfenced(x: GMTensor, z: GMTensor, w: GMTensor, M: Var):
+    return two_phases(x, z, w, M, False)
+
+
+@kernel()
+def fenced(x: GMTensor, z: GMTensor, w: GMTensor, M: Var):
+    return two_phases(x, z, w, M, True)
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * ROWS * 2
+    x = torch.randn(M, COLS)
+
+    globvars.plan_local_memory = True
+    for func in (unfenced, fenced):
+        op = OpExec(func, "test_cust_op", simulator=True, sanitize=True)
+        z, w = op(x, torch.zeros(M, COLS), torch.zeros(M, COLS), M)
+        # Plan the stream the vec lanes ran: the events auto_sync inserts order the reuse.
+        plan = plan_local_memory(insert_auto_sync(split_instructions(func.instructions)[1], mode="vec"))
+        offsets = {name: slot.offsets for name, slot in plan.slots.items()}
+        peak = plan.segments[-1].peak["UB"]
+        total = sum(slot.footprint for slot in plan.slots.values())
+        assert peak < total
+        print(func.name, offsets, f"peak={peak} sum={total}", len(op.sanitizer_findings))
+        print(torch.abs(z - 2 * x).max(), torch.abs(w - 2 * x).max())
@@ -0,0 +1,52 @@
+from easyasc.a5 import *
+
+
+ROWS = 16
+COLS = 64
+
+@vf()
+def softmax_rows(x: Tensor, y: Tensor, n_rows: Var):
+    r_x = Reg(DT.float)
+    r_m = Reg(DT.float)
+    r_s = Reg(DT.float)
+    for i in range(n_rows):
+        r_x <<= x[i * COLS]
+        cmax(r_m, r_x)
+        dup(r_m, r_m)
+        sub(r_x, r_x, r_m)
+        exp(r_x, r_x)
+        cadd(r_s, r_x)
+        dup(r_s, r_s)
+        div(r_x, r_x, r_s)
+        reg_to_ub(y[i * COLS], r_x)
+
+
+@kernel()
+def vecfunc(x: GMTensor, z: GMTensor, M: Var):
+    xub = DBuff(DT.half, [ROWS, COLS], Position.UB)
+    yub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xub[cnt] <<= x[m:m+ROWS, :]
+            softmax_rows(xub[cnt], yub[cnt], Var(ROWS))
+            z[m:m+ROWS, :] <<= yub[cnt]
+            cnt += 1
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * ROWS * 2
+    x = torch.randn(M, COLS).half()
+    z = torch.zeros(M, COLS)
+
+    op = OpExec(vecfunc, "test_cust_op", simulator=True)
+    z_kernel = op(x, z, M)
+
+    z_golden = torch.softmax(x.float(), dim=-1)
+    print(torch.abs(z_kernel - z_golden).max())
@@ -0,0 +1,63 @@
+from easyasc.a5 import *
+
+
+BLK = 128
+HALF = BLK // 2
+
+@kernel()
+def bias_relu(x: GMTensor, y: GMTensor, ws: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    # ws holds the bias; the cube adds the matmul tile into it and the vec lanes read the sum back.
+    ws.bind_cv_mutex(0)
+
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+    wub = DBuff(DT.float, [HALF, N], Position.UB)
+    oub = DBuff(DT.float, [HALF, N], Position.UB)
+
+    cnt = Var(0)
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+    lane = Var(GetSubBlockIdx() * HALF)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            l1y[cnt] <<= y[:, :]
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            ws.lock()
+            with atomic_add():
+                ws[m:m+BLK, :] <<= l0c[cnt]
+            ws.ready()
+
+            ws.wait()
+            wub[cnt] <<= ws[m+lane:m+lane+HALF, :]
+            ws.free()
+            oub[cnt] <<= wub[cnt].relu()
+            z[m+lane:m+lane+HALF, :] <<= oub[cnt]
+            cnt += 1
+
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * 64
+    N = 64
+    K = 128
+    x = torch.randn(M, K).half()
+    y = torch.randn(N, K).half()
+    bias = torch.randn(M, N)
+    z_golden = torch.relu(bias + x.float() @ y.float().t())
+
+    # Each core reads back its own atomic writes, so running the cores in worker processes must
+    # give the serial result.
+    outputs = []
+    for max_workers in (None, 4):
+        op = OpExec(bias_relu, "test_cust_op", simulator=True, max_workers=max_workers)
+        z = op(x, y, bias.clone(), torch.zeros(M, N), M, N, K)
+        outputs.append(z)
+        print(f"max_workers={max_workers}: err={torch.abs(z - z_golden).max().item()}")
+    print(torch.equal(outputs[0], outputs[1]))
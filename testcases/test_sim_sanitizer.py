@@ -0,0 +1,65 @@
+from easyasc.a5 import *
+
+
+BLK = 128
+
+@kernel()
+def synced(x: GMTensor, y: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+
+    cnt = Var(0)
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+
+    with auto_sync():
+        for m in range(m1, m2, BLK):
+            l1x[cnt] <<= x[m:m+BLK, :]
+            l1y[cnt] <<= y[:, :]
+            matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+            z[m:m+BLK, :] <<= l0c[cnt]
+            cnt += 1
+
+    return z
+
+
+@kernel()
+def unsynced(x: GMTensor, y: GMTensor, z: GMTensor, M: Var, N: Var, K: Var):
+    l1x = DBuff(DT.half, [BLK, K], Position.L1)
+    l1y = DBuff(DT.half, [N, K], Position.L1)
+    l0c = DBuff(DT.float, [BLK, N], Position.L0C)
+
+    cnt = Var(0)
+    m_per_core = CeilDiv(M, GetCubeNum())
+    m1 = Var(m_per_core * GetCubeIdx())
+    m2 = Min(m1 + m_per_core, M)
+
+    # Same body without auto_sync: every pipe hand-off is a race.
+    for m in range(m1, m2, BLK):
+        l1x[cnt] <<= x[m:m+BLK, :]
+        l1y[cnt] <<= y[:, :]
+        matmul(l0c[cnt], l1x[cnt], l1y[cnt])
+        z[m:m+BLK, :] <<= l0c[cnt]
+        cnt += 1
+
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * 64
+    N = 64
+    K = 128
+    x = torch.randn(M, K).half()
+    y = torch.randn(N, K).half()
+    z_golden = (x.float() @ y.float().t()).half()
+
+    for func in (synced, unsynced):
+        op = OpExec(func, "test_cust_op", simulator=True, sanitize=True)
+        z_kernel = op(x, y, torch.zeros(M, N).half(), M, N, K)
+        kinds = sorted({finding.kind for finding in op.sanitizer_findings})
+        print(func.name, len(op.sanitizer_findings), kinds)
+        print(torch.abs(z_kernel - z_golden).max())
@@ -0,0 +1,68 @@
+from easyasc.a5 import *
+from easyasc.simulator.timing import CostTable
+
+
+ROWS = 16
+COLS = 64
+
+def body(x: GMTensor, z: GMTensor, M: Var, double: bool):
+    if double:
+        xub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+        yub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    else:
+        xub = Tensor(DT.float, [ROWS, COLS], Position.UB)
+        yub = Tensor(DT.float, [ROWS, COLS], Position.UB)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xin = xub[cnt] if double else xub
+            yout = yub[cnt] if double else yub
+            xin <<= x[m:m+ROWS, :]
+            yout <<= xin + xin
+            z[m:m+ROWS, :] <<= yout
+            cnt += 1
+    return z
+
+
+@kernel()
+def single(x: GMTensor, z: GMTensor, M: Var):
+    return body(x, z, M, False)
+
+
+@kernel()
+def double(x: GMTensor, z: GMTensor, M: Var):
+    return body(x, z, M, True)
+
+
+if __name__ == "__main__":
+    import torch
+
+    # Default costs: a 4 KB tile moves in 100 + 4096/64 = 164 cycles on MTE2/MTE3, and the add
+    # takes 8 + 16 repeats = 24 cycles on V.
+    # One tile per lane: 164 + 24 + 164.
+    # Two tiles, DBuff: the second load overlaps the first tile, 2*164 + 24 + 164.
+    # Two tiles, Tensor: the second load waits for the first add, the second add for the
+    # first store: 188 + 164 + 24 + 164.
+    # One tile at 32 B/cycle on MTE2: 228 + 24 + 164.
+    slow_mte2 = CostTable(bytes_per_cycle={"MTE2": 32.0})
+    cases = [
+        (double, 1, None, 352),
+        (double, 2, None, 516),
+        (single, 2, None, 540),
+        (double, 1, slow_mte2, 416),
+    ]
+    for func, tiles, cost_table, expected in cases:
+        M = 64 * ROWS * tiles
+        x = torch.randn(M, COLS)
+        op = OpExec(func, "test_cust_op", simulator=True, profile=True, cost_table=cost_table)
+        z = op(x, torch.zeros(M, COLS), M)
+        report = op.timing_report
+        busy = report.pipe_busy_percent()
+        print(
+            f"{func.name} tiles={tiles} slow_mte2={cost_table is not None}: "
+            f"cycles={report.total_cycles} expected={expected} vec.MTE2 busy={busy['vec.MTE2']:.2f}%, "
+            f"err={torch.abs(z - 2 * x).max().item()}"
+        )
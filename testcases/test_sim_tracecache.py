@@ -0,0 +1,61 @@
+from easyasc.a5 import *
+from easyasc.kernelbase.kernelbase import _TRACE_CACHE_SIZE
+
+
+ROWS = 16
+COLS = 64
+SCALE = 2.0
+
+@kernel()
+def scale(x: GMTensor, z: GMTensor, M: Var):
+    xub = DBuff(x.dtype, [ROWS, COLS], Position.UB)
+    yub = DBuff(x.dtype, [ROWS, COLS], Position.UB)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xub[cnt] <<= x[m:m+ROWS, :]
+            yub[cnt] <<= xub[cnt] * SCALE
+            z[m:m+ROWS, :] <<= yub[cnt]
+            cnt += 1
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    # M is a Var dim, so other row counts reuse the trace; a new dtype records another one.
+    op = OpExec(scale, "test_cust_op", simulator=True)
+    traces = {}
+    for dtype, M in ((torch.float, 64 * ROWS), (torch.float, 64 * ROWS * 3), (torch.half, 64 * ROWS), (torch.float, 64 * ROWS * 2)):
+        x = torch.randn(M, COLS).to(dtype)
+        z = op(x, torch.zeros(M, COLS).to(dtype), M)
+        reused = traces.get(dtype, None) is scale.instructions
+        traces[dtype] = scale.instructions
+        print(
+            f"{dtype} M={M}: traces={len(scale._trace_cache)} reused={reused}, "
+            f"err={torch.abs(z.float() - 2 * x.float()).max().item()}"
+        )
+
+    # The body reads SCALE, so changing it records a new trace with the new constant.
+    SCALE = 3.0
+    x = torch.randn(64 * ROWS, COLS)
+    z = op(x, torch.zeros(64 * ROWS, COLS), 64 * ROWS)
+    reused = traces[torch.float] is scale.instructions
+    print(
+        f"SCALE={SCALE}: traces={len(scale._trace_cache)} reused={reused}, "
+        f"err={torch.abs(z - SCALE * x).max().item()}"
+    )
+
+    # Int dims are baked into the trace. Nine shapes overflow the cache; then the newest one
+    # is reused and the oldest (evicted) one is traced again.
+    assert _TRACE_CACHE_SIZE == 8
+    traces = {}
+    for tiles in (1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 1):
+        rows = ROWS * tiles
+        scale(GMTensor(DT.float, [rows, COLS]), GMTensor(DT.float, [rows, COLS]), Var(rows))
+        reused = traces.get(rows, None) is scale.instructions
+        traces[rows] = scale.instructions
+        print(f"rows={rows}: traces={len(scale._trace_cache)} reused={reused}")
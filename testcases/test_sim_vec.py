@@ -0,0 +1,65 @@
+from easyasc.a5 import *
+
+
+ROWS = 16
+COLS = 64
+
+@kernel()
+def vecfunc(x: GMTensor, y: GMTensor, z: GMTensor, s: GMTensor, M: Var):
+    xub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    yub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    zub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    sub = DBuff(DT.float, [1, ROWS], Position.UB)
+    t = Tensor(DT.float, [ROWS, COLS], Position.UB)
+    u = Tensor(DT.float, [ROWS, COLS], Position.UB)
+    h = Tensor(DT.half, [ROWS, COLS], Position.UB)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xub[cnt] <<= x[m:m+ROWS, :]
+            yub[cnt] <<= y[m:m+ROWS, :]
+            # Binary ops.
+            t <<= xub[cnt] + yub[cnt]
+            t <<= t * xub[cnt]
+            t <<= t - yub[cnt]
+            u <<= yub[cnt].abs()
+            u <<= u + 1.0
+            t <<= t / u
+            # Scalar ops.
+            t <<= t.maximum(-1.0)
+            t <<= t * 0.5
+            # Unary ops.
+            u <<= xub[cnt].exp()
+            t <<= t + u
+            u <<= yub[cnt].relu()
+            u <<= u.sqrt()
+            t <<= t - u
+            # Round trip through half, then one sum per row.
+            h <<= t.cast()
+            zub[cnt] <<= h.cast()
+            sub[cnt] <<= zub[cnt].cadd()
+            z[m:m+ROWS, :] <<= zub[cnt]
+            s[0:1, m:m+ROWS] <<= sub[cnt]
+            cnt += 1
+    return z, s
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * ROWS * 2
+    x = torch.randn(M, COLS)
+    y = torch.randn(M, COLS)
+
+    op = OpExec(vecfunc, "test_cust_op", simulator=True)
+    z, s = op(x, y, torch.zeros(M, COLS), torch.zeros(1, M), M)
+
+    t = ((x + y) * x - y) / (y.abs() + 1)
+    t = torch.maximum(t, torch.tensor(-1.0)) * 0.5 + x.exp() - y.relu().sqrt()
+    z_golden = t.half().float()
+    s_golden = z_golden.sum(dim=-1).reshape(1, M)
+    print(torch.abs(z - z_golden).max())
+    print(torch.abs(s - s_golden).max())
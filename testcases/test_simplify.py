@@ -0,0 +1,92 @@
+import random
+import re
+
+from easyasc import globvars
+from easyasc.parser.asc_simplify import Unsupported, simplify_polynomial
+from easyasc.parser.asc_utils import _simplify_with_sympy, simplify_expr
+
+
+# Offset and loop expressions as build_expr_state sees them, then inexact / and % that the
+# fast path must leave to sympy (or keep as written when sympy is off).
+EXPRS = [
+    "m1 + m_per_core",
+    "(m + 128) - m",
+    "(m + 256) - (m + 128)",
+    "K - 0",
+    "K - K",
+    "N - K",
+    "(-K + N) * 2",
+    "128 * K",
+    "128*K / 64",
+    "(m + 128) * K",
+    "64 * 16 + 0 * 128",
+    "m_per_core * get_block_idx()",
+    "CeilDiv(128*K, 64)",
+    "CeilDiv(K - N, 16)",
+    "M * N",
+    "(2*K + 4) / 2",
+    "(4*K + 8) % 4",
+    "7 % 3",
+    "(K + 1) / 2",
+    "K / 2",
+    "(N - K) / 3",
+    "(m + 128) * K / 64",
+    "(K + 1) % 2",
+    "K % 4",
+    "-7 % 3",
+    "128*K / 64 + (m % 16)",
+]
+
+# Products of a sum next to other terms cancel; simplify_expr must print exactly what sympy does.
+EXACT = [
+    ("N*(m + 1) - N*m", "N"),
+    ("K*(2*m+1) - K", "2*K*m"),
+    ("x*(y+1) - x*y", "x"),
+]
+
+_NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CALLS = {"CeilDiv": lambda a, b: -(-a // b), "GetBlockNum": lambda: 24, "get_block_idx": lambda: 5}
+
+
+def evaluate(expr: str, values: dict) -> object:
+    scope = {name: _CALLS.get(name, values.get(name)) for name in _NAME_RE.findall(expr)}
+    return eval(expr, {"__builtins__": {}}, scope)
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    points = [{name: rng.randint(1, 4096) for name in ("K", "M", "N", "m", "m1", "m_per_core")} for _ in range(8)]
+
+    text_equal = value_equal = deferred = 0
+    mismatches = []
+    for expr in EXPRS:
+        sympy_out = _simplify_with_sympy(expr)
+        try:
+            fast_out = simplify_polynomial(expr)
+        except Unsupported:
+            # Inexact division/modulo: the sympy path runs as before, or the text is kept.
+            globvars.simplify_with_sympy = False
+            kept = simplify_expr(expr)
+            globvars.simplify_with_sympy = True
+            if simplify_expr(expr) == sympy_out and kept == expr:
+                deferred += 1
+            else:
+                mismatches.append((expr, kept, sympy_out))
+            continue
+        if fast_out == sympy_out:
+            text_equal += 1
+        elif all(evaluate(fast_out, p) == evaluate(sympy_out, p) for p in points):
+            value_equal += 1
+        else:
+            mismatches.append((expr, fast_out, sympy_out))
+
+    for expr, expected in EXACT:
+        got = simplify_expr(expr)
+        if got != expected or _simplify_with_sympy(expr) != expected:
+            mismatches.append((expr, got, _simplify_with_sympy(expr)))
+
+    for expr, fast_out, sympy_out in mismatches:
+        print(f"mismatch: {expr!r}: fast {fast_out!r}, sympy {sympy_out!r}")
+    print(f"{len(EXPRS)} expressions: {text_equal} text-equal, {value_equal} value-equal, {deferred} deferred to sympy")
+    print(f"{len(EXACT)} exact checks")
+    print("mismatches:", len(mismatches))
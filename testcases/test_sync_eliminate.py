@@ -0,0 +1,46 @@
+from easyasc import globvars
+from easyasc.a5 import *
+from easyasc.parser.asc import split_instructions
+from easyasc.parser.asc_autosync import insert_auto_sync
+
+
+ROWS = 16
+COLS = 64
+
+@kernel()
+def vecfunc(x: GMTensor, z: GMTensor, M: Var):
+    xub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    yub = DBuff(DT.float, [ROWS, COLS], Position.UB)
+    loaded = SEvent(Pipe.MTE2, Pipe.V)
+    cnt = Var(0)
+    rows_per_vec = CeilDiv(M, GetVecNum())
+    m1 = Var(rows_per_vec * GetVecIdx())
+    m2 = Min(m1 + rows_per_vec, M)
+    with auto_sync():
+        for m in range(m1, m2, ROWS):
+            xub[cnt] <<= x[m:m+ROWS, :]
+            # Hand-written MTE2 -> V sync: the auto-sync pair after it is implied.
+            loaded.set()
+            loaded.wait()
+            yub[cnt] <<= xub[cnt] + xub[cnt]
+            z[m:m+ROWS, :] <<= yub[cnt]
+            cnt += 1
+    return z
+
+
+if __name__ == "__main__":
+    import torch
+
+    M = 64 * ROWS * 2
+    x = torch.randn(M, COLS)
+    z = torch.zeros(M, COLS)
+
+    op = OpExec(vecfunc, "test_cust_op", simulator=True, sanitize=True)
+    outputs = {}
+    for eliminate in (False, True):
+        globvars.eliminate_redundant_sync = eliminate
+        outputs[eliminate] = op(x, z.clone(), M)
+        vec_insts = insert_auto_sync(split_instructions(vecfunc.instructions)[1], mode="vec")
+        waits = [inst.kwargs["event"].name for inst in vec_insts if inst.opname == "event_wait"]
+        print(f"eliminate={eliminate}: waits={waits}, findings={len(op.sanitizer_findings)}")
+    print(torch.abs(outputs[True] - 2 * x).max(), torch.equal(outputs[False], outputs[True]))